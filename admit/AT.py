@@ -19,6 +19,7 @@ import admit.util.bdp_types as bt
 import admit.xmlio.XmlWriter as XmlWriter
 import admit.util.PlotControl as PlotControl
 from admit.util.AdmitLogging import AdmitLogging as logging
+from admit.util.Metrics import Metrics
 
 
 class AT(object):
@@ -1740,7 +1741,8 @@ class AT(object):
             1. Update BDP inputs (if `args` is given).
             2. Validate task keywords.
             3. Validate task BDP inputs.
-            4. Call task `run()`_.
+            4. Call task `run()`_, recording its profile in the project
+               metrics file (see admit.util.Metrics).
             5. Mark task up to date.
             6. Mark persistent BDP outputs out of date.
             7. Disable running attribute.
@@ -1787,19 +1789,31 @@ class AT(object):
             raise Exception("Inputs not validated: %s" % details)
         # @todo   review this if need, currently we clear (delete) all BDPs prior to running
         self.clearoutput()
-        self.run()
+        if self._baseDir:
+            metrics = Metrics(self._baseDir + Metrics.FILENAME)
+            metrics.begin(self)
+            try:
+                self.run()
+            except:
+                metrics.end(self, "failed")
+                raise
+            metrics.end(self)
+        else:
+            self.run()
         self.markUpToDate()
         self._needToSave = True
         self.seteffectivelevel(temploglevel)
         self._running = False
 
-    def checkfiles(self):
+    def checkfiles(self, cache=None):
         """ Check if the files from all the BDP_out's in an AT exist.
             Return the list of files not found.
 
             Parameters
             ----------
-            None
+            cache : FileCache, optional
+                Stat cache of the project directory. If given, existence
+                is looked up in the cache instead of on disk.
 
             Returns
             -------
@@ -1828,7 +1842,14 @@ class AT(object):
             #print "CHECKFILES: ", fl, self.dir(fl)
             if fl is None:
                 continue
-            if not os.path.exists(self.dir(fl)):
+            # Tasks run without plots only registered their plot file names.
+            if self._plot_mode == PlotControl.NOPLOT and PlotControl.isplotfile(fl):
+                continue
+            if cache is not None:
+                found = cache.exists(self.dir(fl))
+            else:
+                found = os.path.exists(self.dir(fl))
+            if not found:
                 self.markChanged()
                 logging.warning("AT.checkfiles():: File not found: " + fl)
                 return files
@@ -23,13 +23,12 @@ import traceback
 import subprocess
 #import Queue
 #from multiprocessing.dummy import Pool as ThreadPool 
-import signal
 
 # ADMIT imports
 import admit
 import admit.version 
 import admit.xmlio.Parser as Parser
-import admit.Summary as Summary
+from admit.Summary import Summary
 import admit.util.utils as utils
 import admit.util.AdmitHTTP
 import admit.util.PlotControl as PlotControl
@@ -37,6 +36,8 @@ from admit.xmlio.DtdReader import DtdReader
 import admit.util.bdp_types as bt
 from admit.util.AdmitLogging import AdmitLogging as logging
 from admit.util import LineData
+from admit.util.FileCache import FileCache
+from admit.util.ImagePool import ImagePool
 
 # ==============================================================================
 
@@ -89,6 +90,11 @@ class Admit(object):
         script) before use; this is usually the case for interactive mode. Set
         to ``False`` in (most) scripts, which reconstruct the flow each time.
 
+    manifest : bool, optional
+        Whether to write a file manifest (see FileCache) each time the
+        project is saved; default is ``False``. A valid manifest lets an
+        unchanged project be validated on load without scanning every file.
+
     Attributes
     ----------
     baseDir : str
@@ -136,6 +142,9 @@ class Admit(object):
     _data_server : bool
         Whether to start the data browser server.
 
+    _manifest : bool
+        Whether to write a file manifest when saving the project.
+
     _server : HTTP server
         Data HTTP server.
 
@@ -152,9 +161,10 @@ class Admit(object):
 
     project_id = 0        # Class static project ID counter.
     loginit = False       # whether or not the logger has been innitialized
+    _runlock = threading.RLock()  # one run() at a time in this process
 
     def __init__(self, baseDir=None, name='none', basefile=None, create=True, dataserver=False,
-                 loglevel=logging.INFO, commit=True):
+                 loglevel=logging.INFO, commit=True, manifest=False):
         #
         # IMPORTANT note for dtd's:   if you add items for admit.xml here,
         # don't forget to edit dtdGenerator.py and run bin/dtdGenerator
@@ -189,7 +199,7 @@ class Admit(object):
         self.loglevel = loglevel
         # new Admit things
         self.userData = {}                # user added data, anything can go in here; use get/set
-        self.summaryData = Summary.Summary()      # summary added data, the my_AT.summary() will provide these
+        self.summaryData = Summary()      # summary added data, the my_AT.summary() will provide these
         self._fm0 = None                  # flow manager as read from XML
         self.fm = admit.Flow()            # flow manager
         self.pm = admit.Manager()         # project manager
@@ -197,6 +207,7 @@ class Admit(object):
         self.astale = 0                   # export hack (will be True if lightweight tar file is built)
         self.count = 0                    # keep track how many times this admit has been run
         self._server = None               # data HTTP server
+        self._manifest = manifest         # write file manifest on save?
         # location information
         self.baseDir = None               # base directory for xml files ('the admit directory')
         self.baseFile = None              # base file name, usually admit.xml
@@ -314,9 +325,6 @@ class Admit(object):
         else:
             self._data_url = None
 
-        signal.signal(signal.SIGUSR1, self._signal_handler)
-        self._pid = os.getpid()
-
         if self.userData.has_key('flowcount'):
             self.count = self.userData['flowcount'] + 1
         else:
@@ -476,7 +484,7 @@ class Admit(object):
         """
         return self.pm
 
-    def plotparams(self, plotmode=PlotControl.BATCH, plottype=PlotControl.PNG):
+    def plotparams(self, plotmode=PlotControl.BATCH, plottype=PlotControl.PNG, nproc=None):
         """ Determines if plots are saved and in what format.
             These are based on simple matplotlib diagrams.
             Common output formats are png and pdf.
@@ -493,6 +501,10 @@ class Admit(object):
             plottype : int  
                 Plot format type.  Default: PlotControl.PNG.
 
+            nproc : int, optional
+                Number of processes rendering plots in PlotControl.DEFERRED
+                mode (0 means one per CPU). Default: leave unchanged.
+
             Returns
             -------
             None
@@ -505,6 +517,8 @@ class Admit(object):
         #    return (self.pmode,self.ptype)
         self.pmode = plotmode
         self.ptype = plottype
+        if nproc is not None:
+            admit.AbstractPlot.nproc = nproc
         #AT._plot_mode = plotmode
         #AT._plot_type = plottype
         # nasty cheat, need to formalize a safer method to talk to APlot
@@ -731,12 +745,6 @@ class Admit(object):
 #        self.pool.map(self.__run__,writeargs)
 #        print "******************DONE RUN IN THREADPOOL*************************"
 
-    def _signal_handler(self,num,stack):
-        print 'Received signal %d in %s' % (num, threading.currentThread())
-        sys.stdout.flush()
-        sys.stderr.flush()
-        self.run()
-
     def dryrun(self):
         self.fm.dryrun()
 
@@ -779,35 +787,53 @@ class Admit(object):
         point where the XML is read up to the first call to run() (with
         commit=True). Tasks present (unaltered) in the new flow and marked up
         to date in the XML will not be re-executed.
+
+        A re-run requested from the browser (see startDataServer()) runs on
+        the job thread of the data server, not on the main thread. Runs are
+        serialized by a process-wide lock, so a run() from the session waits
+        for it and vice versa. CASA tools and tasks, and interactive
+        matplotlib (PlotControl.INTERACTIVE), are not thread-safe: do not use
+        them from the session while a re-run from the browser is in progress.
         """
-        # For multiflows, re-run parent projects first. This ensures all
-        # linked tasks (which could depend on each other, if linked from the 
-        # same parent) are processed in the correct order.
-        logging.info("ADMIT run() called [flowcount %d]" % self.count)
-        for pid in self.pm:
-            self.pm[pid].run()
-
-        # Merge XML-backed flow, if any.
-        self.mergeFlow(commit)
-
-        # Make current project summary globally available to ATs.
-        # It will be updated on-the-fly in FlowManager.run().
-        admit.Project.summaryData = self.summaryData
-        try:
-          self.fm.run()
-        except:
-          logging.error("Project run() failed; %s : saving state..." % str(sys.exc_info()))
-          self.write()
-          raise
+        # One run at a time in this process, see Notes.
+        with Admit._runlock:
+            # For multiflows, re-run parent projects first. This ensures all
+            # linked tasks (which could depend on each other, if linked from the 
+            # same parent) are processed in the correct order.
+            logging.info("ADMIT run() called [flowcount %d]" % self.count)
+            for pid in self.pm:
+                self.pm[pid].run()
+
+            # Merge XML-backed flow, if any.
+            self.mergeFlow(commit)
+
+            # Make current project summary globally available to ATs.
+            # It will be updated on-the-fly in FlowManager.run().
+            admit.Project.summaryData = self.summaryData
+            admit.Metrics.run = self.count
+            try:
+              self.fm.run()
+            except:
+              logging.error("Project run() failed; %s : saving state..." % str(sys.exc_info()))
+              admit.AbstractPlot.flush()
+              ImagePool.shared().clear()
+              self.write()
+              raise
+
+            # Deferred plots must exist before the summary HTML is written.
+            admit.AbstractPlot.flush()
+
+            # The tasks share open image tools; none are kept open after the flow.
+            ImagePool.shared().clear()
 
 #        print "-- fm (run) -- "
 #        self.fm.show()
 
-        self.userdata()
-        if write: self.write()  # includes HTML update
+            self.userdata()
+            if write: self.write()  # includes HTML update
 
-        cpu = self.dt.end()
-        logging.info("ADMIT run() finished [flowcount %d] [cpu %g %g ]" % (self.count,cpu[0],cpu[1]))
+            cpu = self.dt.end()
+            logging.info("ADMIT run() finished [flowcount %d] [cpu %g %g ]" % (self.count,cpu[0],cpu[1]))
 
     def print_summary(self):
         """Print out summary data
@@ -1545,6 +1571,10 @@ class Admit(object):
             # Don't name script 'admit.py' to avoid confusing 'import admit'.
             self.script(self.dir() + 'admit0.py')
 
+        # Must come last, after all files of this save have been written.
+        if self._manifest:
+            FileCache(self.baseDir).writemanifest()
+
     def clean(self):
         """ Method to delete orphan bdp's (files and underlying data)
 
@@ -1651,7 +1681,8 @@ class Admit(object):
     def _onpost(self, payload):
         """This is the callback function when a user edits ADMIT key words
         via form.html.  It will cycle through the tasks and call setkeys,
-        then call admit.run().
+        then call admit.run().  The data server calls it from its job
+        queue, one command at a time, outside of the HTTP request.
 
         Parameters
         ----------
@@ -1664,7 +1695,24 @@ class Admit(object):
 
         Notes
         -----
-        Should not be called directly.
+        Should not be called directly.  The command holds the run lock, so
+        it does not change the project while run() is busy in the session;
+        see run().
+        """
+        with Admit._runlock:
+            self._oncommand(payload)
+
+    def _oncommand(self, payload):
+        """Carry out a command of _onpost(), with the run lock held.
+
+        Parameters
+        ----------
+        payload: dict
+            The data coming from the server.
+
+        Returns
+        -------
+        None
         """
 
         #@todo: make this method a dictionary of methods?
@@ -1704,27 +1752,21 @@ class Admit(object):
                            #print "AST key=%s, val=%s" % (key,ast.literal_eval(t[key]) )
                            self.fm[taskid].setkey(key,ast.literal_eval(t[key]))
             except Exception, e:
-               print "Bummer, got exception %s" % e
-               traceback.print_exc()
-               return
+               # fail the job, the browser shows the error
+               logging.error("Could not set the keys: %s" % e)
+               raise
             
-            try:
-               logging.info("Re-running admit...")
-               print "[you may have hit return here]"
-               #self.queue.put(self.run)
-               #self.runqueue()
-               os.kill(self._pid,signal.SIGUSR1)
-               #self.run(write=True)
-               #formurl = self._data_url+"/form.html"
-               #webbrowser.open(url=formurl,new=0)
-               if payload["firefox"] == True:
-                   #print "Damn you, Firefox!"
-                   formurl = self._data_url+"/form.html"
-                   webbrowser.open(url=formurl,new=0)
-               return
-            except Exception, e:
-               print "got exception on run %s" % e
-               traceback.print_exc()
+            # The data server runs this as a background job (see
+            # util.AdmitHTTP.AdmitJobQueue), so the run does not block the
+            # browser, which follows its progress at /jobs; an exception
+            # fails the job. See run() on running on the job thread.
+            logging.info("Re-running admit...")
+            self.run(write=True)
+            if payload["firefox"] == True:
+                #print "Damn you, Firefox!"
+                formurl = self._data_url+"/form.html"
+                webbrowser.open(url=formurl,new=0)
+            return
 
         elif command == "dryrun":
             try:
@@ -1747,22 +1789,16 @@ class Admit(object):
             # get marked in the HTML file.
                        self.fm.connectInputs()
             except Exception, e:
-               print "Bummer, got exception %s" % e
-               traceback.print_exc()
-               return
+               logging.error("Could not set the keys: %s" % e)
+               raise
             
-            try:
-                #self.fm.dryrun()
-                self.write()
-                if payload["firefox"] == True:
-                    #print "damn you, Firefox!"
-                    formurl = self._data_url+"/form.html"
-                    webbrowser.open(url=formurl,new=0)
-                return
-            except Exception, e:
-                print "got exception on dryrun %s" % e
-                traceback.print_exc()
-                return
+            #self.fm.dryrun()
+            self.write()
+            if payload["firefox"] == True:
+                #print "damn you, Firefox!"
+                formurl = self._data_url+"/form.html"
+                webbrowser.open(url=formurl,new=0)
+            return
 
         elif command == "linelistbdp":
             try:
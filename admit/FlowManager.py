@@ -119,7 +119,8 @@ class FlowManager():
         Notes
         -----
         All internal state is kept up to date by `add()`_ and `remove()`_
-        so that it is valid at all times. Hence `_connmap`, `_depsmap`, etc.
+        (and, for variflows, `expand()`/`prune()` in bulk) so that it is
+        valid at all times. Hence `_connmap`, `_depsmap`, etc.
         should never be modified by any other methods, either inside or
         outside of FlowManager (the leading underscore emphasizes this
         intent).
@@ -371,77 +372,14 @@ class FlowManager():
               for key in summary:
                 admit.Project.summaryData.insert(key,summary[key])
 
+              # Start rendering any deferred plots while the flow continues.
+              admit.AbstractPlot.flush(wait=False)
+
               # Update variadic flows.
-              vm = self._varimap
-              if si in vm and vm[si]:
-                # Variadic output port range.
-                bport = len(task._valid_bdp_out) - 1
+              if si in self._varimap and self._varimap[si]:
                 eport = len(task._bdp_out)
-
-                # Delete obsolete, managed sub-flows.
-                # Exception: prototype (port 0) sub-flows are enabled/disabled.
-                for sp in vm[si]:
-                  if sp >= eport and sp != 0:
-                    for flow in vm[si][sp]:
-                      for di in flow:
-                        if di in self: self.remove(di)
-                        if di in vm: del vm[di]
-                  else:
-                    for flow in vm[si][sp]:
-                      for di in flow:
-                        self[di].enabled(sp < eport)
-                        if di in self._varimap:
-                          for tid in self.downstream(di):
-                            self[tid].enabled(sp < eport)
-
-                for sp in vm[si].keys():
-                  if sp > 0 and sp >= eport: del vm[si][sp]
-
-                # Clone new sub-flows onto dangling output ports.
-                # Prototype flows must be attached to *first* variadic output.
-                if bport in self._varimap[si]:
-                  for sp in range(bport+1, eport):
-                    if sp not in self._varimap[si]:
-                      for flow in self._varimap[si][bport]:
-                        # idmap relates original task IDs to cloned task IDs.
-                        # Process tasks in dependency order to fill this.
-                        idmap = {}
-                        tasks = list(flow)
-                        tasks.sort(key=lambda tid: self._tasklevs[tid])
-
-                        for di in tasks:
-                          task = self[di].copy()
-
-                          # Shift connections attached to variadic outputs
-                          # and translate cloned task IDs.
-                          stuples = []
-                          for tup in self._bdpmap[di]:
-                            sat = self[tup[0]]
-                            if tup[0] in idmap: tup = (idmap[tup[0]], tup[1])
-                            if len(sat._bdp_out_zero) == 1 and sat._variflow \
-                               and tup[1] >= len(sat._valid_bdp_out)-1:
-                              tup = (tup[0], tup[1] + sp-bport)
-                            stuples.append(tup)
-
-                          idmap[di] = self.add(task, stuples)
-
-                          # For variadic clones, replicate their variflows.
-                          if di in self._varimap:
-                            vid = idmap[di]
-                            self._varimap[vid] = {}
-                            for dp in self._varimap[di]:
-                              self._varimap[vid][dp] = []
-                              for vflow in self._varimap[di][dp]:
-                                self._varimap[vid][dp].append(set())
-                                for tid in vflow:
-                                  task = self[tid].copy()
-                                  stuples = []
-                                  for tup in self._bdpmap[tid]:
-                                    if tup[0] in idmap:
-                                      tup = (idmap[tup[0]], tup[1])
-                                    stuples.append(tup)
-                                  idmap[tid] = self.add(task, stuples)
-                                  self._varimap[vid][dp][-1].add(idmap[tid])
+                self.prune(si, eport)
+                self.expand(si, eport)
 
 
     def connectInputs(self):
@@ -793,13 +731,32 @@ class FlowManager():
             themselves. User removal of tasks within variadic flows is only
             supported via editing and re-running of script files.
         """
+        tids = self.downstream(id)
+        if keepRoot: tids.discard(id)
+        self._remove(tids, delFiles)
+
+
+    def _remove(self, tids, delFiles = True):
+        """ Removes a set of ATs (but not their downstream tasks).
+
+            Parameters
+            ----------
+            tids : set of int
+                Task IDs of the ATs to be removed; all tasks downstream of
+                them must be included as well.
+
+            delFiles : bool, optional
+                Whether to delete BDP data when removing tasks.
+
+            Returns
+            -------
+            None
+        """
         # Convenience values.
         bm, cm, dm = self._bdpmap, self._connmap, self._depsmap
         tl = self._tasklevs
 
-        for si in self.downstream(id):
-            if keepRoot and si == id: continue
-
+        for si in tids:
             # Remove task as BDP connection source.
             cm.pop(si, None)
 
@@ -815,9 +772,6 @@ class FlowManager():
                 if bdp is not None:
                     bdp.delete(delFiles)
 
-            # Remove any summary information.
-            admit.Project.summaryData.delItemsByTaskID(si)
-
             # Remove task and its flow metadata.
             self._tasks.pop(si)
             dm[tl[si]].remove(si)
@@ -825,6 +779,9 @@ class FlowManager():
             tl.pop(si)
             bm.pop(si)
 
+        # Remove any summary information (in one sweep).
+        if tids: admit.Project.summaryData.delItemsByTaskID(tids)
+
 
     def replace(self, id, a, stuples = None):
         """ Replaces one task with another, removing the original.
@@ -962,6 +919,189 @@ class FlowManager():
         return idmap[fid[1]]
 
 
+    def expand(self, id, eport):
+        """ Clones the prototype sub-flows of a variadic task onto new outputs.
+
+            The sub-flow(s) attached to the *first* variadic output port of
+            task `id` are duplicated for each output port below `eport` that
+            has no sub-flow yet, and connected to that port. The connection,
+            BDP, dependency level and variflow maps of all clones are built in
+            one pass, instead of calling `add()` for each cloned task (which
+            rescans every variadic sub-flow in the flow each time).
+
+            Parameters
+            ----------
+            id : int
+                Task ID of the variadic root task.
+
+            eport : int
+                Number of BDP outputs of the root task.
+
+            Returns
+            -------
+            list of int
+                Task IDs of the cloned tasks.
+
+            See Also
+            --------
+            prune
+        """
+        vm, bm, tl = self._varimap, self._bdpmap, self._tasklevs
+        bport = len(self[id]._valid_bdp_out) - 1
+
+        # Prototype flows must be attached to *first* variadic output.
+        clones = []
+        if bport not in vm[id]: return clones
+
+        for sp in range(bport+1, eport):
+          if sp in vm[id]: continue
+          vm[id][sp] = []
+          for flow in vm[id][bport]:
+            # idmap relates original task IDs to cloned task IDs.
+            # Process tasks in dependency order to fill this.
+            idmap = {}
+            tasks = list(flow)
+            tasks.sort(key=lambda tid: tl[tid])
+
+            for di in tasks:
+              # Shift connections attached to variadic outputs
+              # and translate cloned task IDs.
+              stuples = []
+              for tup in bm[di]:
+                sat = self[tup[0]]
+                if tup[0] in idmap: tup = (idmap[tup[0]], tup[1])
+                if len(sat._bdp_out_zero) == 1 and sat._variflow \
+                   and tup[1] >= len(sat._valid_bdp_out)-1:
+                  tup = (tup[0], tup[1] + sp-bport)
+                stuples.append(tup)
+
+              idmap[di] = self._append(self[di].copy(), stuples)
+              clones.append(idmap[di])
+
+              # For variadic clones, replicate their variflows.
+              if di in vm:
+                vid = idmap[di]
+                for dp in vm[di]:
+                  vm[vid][dp] = []
+                  for vflow in vm[di][dp]:
+                    vtasks = list(vflow)
+                    vtasks.sort(key=lambda tid: tl[tid])
+                    for tid in vtasks:
+                      stuples = []
+                      for tup in bm[tid]:
+                        if tup[0] in idmap: tup = (idmap[tup[0]], tup[1])
+                        stuples.append(tup)
+                      idmap[tid] = self._append(self[tid].copy(), stuples)
+                      clones.append(idmap[tid])
+                    vm[vid][dp].append(set([idmap[tid] for tid in vflow]))
+
+            vm[id][sp].append(set([idmap[di] for di in flow]))
+
+        return clones
+
+
+    def prune(self, id, eport):
+        """ Removes or disables the sub-flows of a variadic task's outputs.
+
+            Managed sub-flows attached to variadic output ports `eport` and
+            above are removed, all at once. Prototype (port 0) sub-flows are
+            not removed but enabled/disabled, as are the remaining sub-flows.
+
+            Parameters
+            ----------
+            id : int
+                Task ID of the variadic root task.
+
+            eport : int
+                Number of BDP outputs of the root task.
+
+            Returns
+            -------
+            None
+
+            See Also
+            --------
+            expand
+        """
+        vm = self._varimap
+
+        # Delete obsolete, managed sub-flows.
+        # Exception: prototype (port 0) sub-flows are enabled/disabled.
+        obsolete = set()
+        for sp in vm[id]:
+          if sp >= eport and sp != 0:
+            for flow in vm[id][sp]:
+              for di in flow:
+                if di in self and di not in obsolete:
+                  obsolete.update(self.downstream(di))
+                if di in vm: del vm[di]
+          else:
+            for flow in vm[id][sp]:
+              for di in flow:
+                self[di].enabled(sp < eport)
+                if di in vm:
+                  for tid in self.downstream(di):
+                    self[tid].enabled(sp < eport)
+
+        self._remove(obsolete)
+
+        for sp in vm[id].keys():
+          if sp > 0 and sp >= eport: del vm[id][sp]
+
+
+    def _append(self, a, stuples):
+        """ Appends a cloned AT to the task flow.
+
+            A stripped-down `add()` for `expand()`, which maintains the
+            variflow map itself: `stuples` must be a list of valid
+            ``(si, sp)`` 2-tuples and there are no destination connections.
+
+            Parameters
+            ----------
+            a : AT
+                ADMIT task to append to the flow.
+
+            stuples : list of 2-tuples
+                List of source connection 2-tuples, one per BDP input port.
+
+            Returns
+            -------
+            int
+                Input task ID.
+        """
+        # Assign flow-unique task ID and alias.
+        if not a.getProject():
+          a.setAlias(self._aliases)
+          a.newId(self._taskid)
+          self._taskid += 1
+
+        # Convenience values.
+        bm, cm, dm = self._bdpmap, self._connmap, self._depsmap
+        tl = self._tasklevs
+
+        di = a._taskid
+        lv = 0
+        bm[di] = []
+        for dp, t in enumerate(stuples):
+          si = t[0]
+          if not cm.has_key(si): cm[si] = {}
+          if not cm[si].has_key(di): cm[si][di] = {}
+          cm[si][di][dp] = (si, t[1], di, dp)
+          bm[di].append(t)
+          if lv <= tl[si]: lv = tl[si] + 1
+
+        self._tasks[di] = a
+        if not dm.has_key(lv): dm[lv] = set()
+        dm[lv].add(di)
+        tl[di] = lv
+
+        # New variflow root?
+        if len(a._bdp_out_zero) == 1 and a._variflow:
+          self._varimap[di] = {}
+
+        return di
+
+
     def find(self, isMatch):
         """
         Finds ATs in the flow matching a criterion.
@@ -446,18 +446,19 @@ class Summary():
            
            Parameters
            ----------
-           taskid : int
-              ID of task for which to delete summary information.
+           taskid : int or set of int
+              ID(s) of task(s) for which to delete summary information.
 
            Returns 
            -------
            None
         """
+        taskids = taskid if isinstance(taskid, (set, frozenset)) else set([taskid])
         delkeys = []
         for key in self._metadata:
             keep = []
             for p in self._metadata[key]:
-                if p.taskid != taskid: keep.append(p)
+                if p.taskid not in taskids: keep.append(p)
             if keep:
                 self._metadata[key] = keep
             else:
@@ -2,23 +2,34 @@
    -------------
 
    This package serves as the root module for all ADMIT script functionality.
-"""
 
-from .AT          import AT          as Task
-from .Admit       import Admit       as Project
-from .bdp.BDP     import BDP         as Data
-from .FlowManager import FlowManager as Flow
-from .ProjectManager import ProjectManager as Manager
-from .Summary     import Summary     as Summary
-from .Summary     import SummaryEntry as SummaryEntry
+   All names (the core classes, and everything exported by admit.util,
+   admit.bdp and admit.at) are imported on first access, so that a plain
+   ``import admit`` stays cheap; see admit.util.lazyimport.
+"""
 
-from admit.util import *
-from admit.bdp  import *
-from admit.at   import *
-from admit.recipes.recipe import recipe
-from admit.recipes import recipeutils as recipeutils
+from admit.util.lazyimport import lazymodule
+import admit.util
+import admit.bdp
+import admit.at
 
+_attrs = {}
+_attrs.update(admit.util._lazy_attrs)
+_attrs.update(admit.bdp._lazy_attrs)
+_attrs.update(admit.at._lazy_attrs)
+_attrs.update({
+    'Task'         : ('admit.AT',                     'AT'),
+    'Project'      : ('admit.Admit',                  'Admit'),
+    'Data'         : ('admit.bdp.BDP',                'BDP'),
+    'Flow'         : ('admit.FlowManager',            'FlowManager'),
+    'Manager'      : ('admit.ProjectManager',         'ProjectManager'),
+    'Summary'      : ('admit.Summary',                'Summary'),
+    'SummaryEntry' : ('admit.Summary',                'SummaryEntry'),
+    'recipe'       : ('admit.recipes.recipe',         'recipe'),
+    'recipeutils'  : ('admit.recipes.recipeutils',    None),
+    # This should be exported by util, but the admit.util.SpectrumIngest
+    # module is used as such in places.
+    'SpectrumIngest' : ('admit.util.SpectrumIngest',  'SpectrumIngest'),
+})
 
-# This should be imported directly by util, but generates a circular import
-# there due to bad module organization.
-from admit.util.SpectrumIngest import SpectrumIngest as SpectrumIngest
+lazymodule(__name__, _attrs)
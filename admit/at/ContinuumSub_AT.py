@@ -19,6 +19,7 @@ from admit.bdp.LineList_BDP import LineList_BDP
 from admit.bdp.LineSegment_BDP import LineSegment_BDP
 import admit.util.utils as utils
 import admit.util.filter.Filter1D as Filter1D
+from admit.util.continuumsubtraction.spectral.BatchPolyFit import BatchPolyFit
 from admit.util.AdmitLogging import AdmitLogging as logging
 import numpy as np
 import numpy.ma as ma
@@ -92,7 +93,11 @@ class ContinuumSub_AT(AT):
     Attributes
     ----------
         _version : string
+
+        tilesize : int
+            Number of cube pixels fitted at a time.
     """
+    tilesize = 4194304
 
     def __init__(self, **keyval):
         keys = {
@@ -143,7 +148,6 @@ class ContinuumSub_AT(AT):
 
         f2 = self.mkext(f1,'lim')
         f3 = self.mkext(f1,'cim')
-        f3a = self.mkext(f1,'cim3d')      # temporary cube name, map is needed
         b2 = SpwCube_BDP(f2)
         b3 = Image_BDP(f3)
 
@@ -152,9 +156,9 @@ class ContinuumSub_AT(AT):
 
         ia = taskinit.iatool()
 
-        ia.open(self.dir(f1))
-        s = ia.summary()
-        nchan = s['shape'][2]                # ingest has guarenteed this to the spectral axis
+        header = casautil.getheader(b1)
+        shape = header.shape()
+        nchan = shape[2]                     # ingest has guarenteed this to the spectral axis
                         
         if b1a != None:                      # if a LineList was given, use that
             if len(b1a.table) > 0:
@@ -182,12 +186,9 @@ class ContinuumSub_AT(AT):
             
         if len(ch) > 0:
             ia.open(self.dir(f1))
-            ia.continuumsub(outline=self.dir(f2),outcont=self.dir(f3a),channels=ch,fitorder=fitorder)
+            self._contsub(ia, shape, ch, fitorder, f2, f3)
             ia.close()
             dt.tag("continuumsub")
-            casa.immoments(self.dir(f3a),-1,outfile=self.dir(f3))      # mean of the continuum cube (f3a)
-            utils.remove(self.dir(f3a))                                # is the continuum map (f3)
-            dt.tag("immoments")
             if b1b != None:
                 # this option is now deprecated (see above, by setting b1b = None), no user option allowed
                 # there is likely a mis-match in the beam, given how they are produced. So it's safer to
@@ -214,6 +215,9 @@ class ContinuumSub_AT(AT):
         thumbname = implot.getThumbnail(figno=implot.figno,relative=True)
         b2.setkey("image", Image(images={bt.CASA:f2}))
         b3.setkey("image", Image(images={bt.CASA:f3, bt.PNG : figname}))
+        # the line cube is a copy of the input cube, so it has the same header
+        b2.setheader(deepcopy(header.header))
+        b3.setheader(casautil.imheader(self.dir(f3)))
         dt.tag("implot")
 
         if len(ch) > 0:
@@ -224,6 +228,93 @@ class ContinuumSub_AT(AT):
         dt.tag("done")
         dt.end()
 
+    def _contsub(self, ia, shape, ch, fitorder, f2, f3):
+        """ Fit and subtract the continuum of all spectra of the (open) cube.
+
+            The cube is processed in blocks of rows (of about **tilesize**
+            pixels).  All spectra of a block that are unmasked in the continuum
+            channels are fitted together with one BatchPolyFit; spectra with
+            masked continuum channels are fitted per mask pattern, and get a
+            zero continuum if too few channels are left.  The line cube is a
+            copy of the input cube (keeping its header, beams and mask) with
+            the continuum subtracted.  The continuum map, the mean continuum
+            over all channels, is computed directly from the fits; a pixel
+            of the map is masked only if its whole spectrum is masked.
+
+            Parameters
+            ----------
+            ia : CASA image tool
+                The open input cube.
+
+            shape : list of int
+                Shape of the cube (x, y, channel, stokes).
+
+            ch : list of int
+                The continuum channels.
+
+            fitorder : int
+                Order of the continuum polynomial.
+
+            f2, f3 : str
+                Names of the output line cube and continuum map.
+
+            Returns
+            -------
+            None
+        """
+        nx, ny, nchan = shape[0], shape[1], shape[2]
+        chans = np.arange(nchan)
+        lines = np.ones(nchan, dtype=bool)
+        lines[np.asarray(ch, dtype=int)] = False
+        bpf = BatchPolyFit(chans, lines, maxdeg=fitorder)
+        if bpf.maxdeg < fitorder:
+            raise Exception,"Not enough continuum channels (%d) for fitorder=%d" % (len(ch), fitorder)
+
+        # the outputs start as copies of the input: a cube, and a single (middle) channel,
+        # whose mask is replaced by the union of the channel masks
+        rg = taskinit.rgtool()
+        ia2 = ia.subimage(outfile=self.dir(f2), overwrite=True)
+        mid = nchan // 2
+        ia3 = ia.subimage(outfile=self.dir(f3), overwrite=True,
+                          region=rg.box([0, 0, mid], [nx-1, ny-1, mid]))
+        cmap = np.zeros((nx, ny))
+        cmask = np.zeros((nx, ny), dtype=bool)
+
+        rows = max(1, min(ny, self.tilesize // (nx * nchan)))
+        for y0 in range(0, ny, rows):
+            y1 = min(y0 + rows, ny) - 1
+            blc = [0, y0, 0, 0]
+            trc = [nx-1, y1, nchan-1, 0]
+            d = ia.getchunk(blc=blc, trc=trc, getmask=False)
+            m = ia.getchunk(blc=blc, trc=trc, getmask=True)
+            # spectra as columns: (nchan, npix)
+            npix = nx * (y1 - y0 + 1)
+            spec = np.nan_to_num(d.reshape(npix, nchan).T.astype(np.float64))
+            good = m.reshape(npix, nchan).T
+            cont = np.zeros(spec.shape)
+            # pixels with all continuum channels valid share the fit
+            clean = good[~lines].all(axis=0)
+            if clean.any():
+                cont[:, clean] = bpf.fit(spec[:, clean], fitorder)
+            if not clean.all():
+                masks = (~good[:, ~clean]) | lines[:, np.newaxis]
+                groups = {}
+                for j, k in enumerate(np.where(~clean)[0]):
+                    groups.setdefault(masks[:, j].tostring(), []).append(k)
+                for key, cols in groups.items():
+                    mask = np.fromstring(key, dtype=bool)
+                    if (~mask).sum() > fitorder:
+                        cont[:, cols] = BatchPolyFit(chans, mask, maxdeg=fitorder).fit(spec[:, cols], fitorder)
+            ia2.putchunk((spec - cont).T.reshape(d.shape).astype(d.dtype), blc=blc)
+            cmap[:, y0:y1+1] = cont.mean(axis=0).reshape(nx, y1 - y0 + 1)
+            cmask[:, y0:y1+1] = good.any(axis=0).reshape(nx, y1 - y0 + 1)
+        s3 = ia3.shape()
+        ia3.putregion(pixels=cmap.reshape(s3).astype(np.float32),
+                      pixelmask=cmask.reshape(s3),
+                      region=rg.box([0, 0, 0, 0], [n-1 for n in s3]))
+        ia2.close()
+        ia3.close()
+
     def summary(self):
         """Returns the summary dictionary from the AT, for merging
            into the ADMIT Summary object.
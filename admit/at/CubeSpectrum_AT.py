@@ -20,6 +20,8 @@ import admit.util.Table as Table
 import admit.util.Image as Image
 from admit.util import APlot
 import admit.util.utils as utils
+import admit.util.casautil as casautil
+from admit.util.ImagePool import ImagePool
 from admit.util.AdmitLogging import AdmitLogging as logging
 
 from copy import deepcopy
@@ -167,6 +169,7 @@ class CubeSpectrum_AT(AT):
 
         b1 = self._bdp_in[0]                                            # check input SpwCube (or LineCube)
         fin = b1.getimagefile(bt.CASA)
+        header = casautil.getheader(b1)
         if self._bdp_in[0]._type == bt.LINECUBE_BDP:
             use_vel = True
         else:
@@ -179,8 +182,8 @@ class CubeSpectrum_AT(AT):
         smax  = []                   # accumulate max in each spectrum for regression
         self.spec_description = []   # for summary()
 
-        # get the tools
-        ia = taskinit.iatool()
+        # the image tool, shared with the other ATs
+        pool = ImagePool.shared()
 
         if self._bdp_in[1] != None:                                      # check if CubeStats_BDP
             #print "BDP[1] type: ",self._bdp_in[1]._type
@@ -242,9 +245,8 @@ class CubeSpectrum_AT(AT):
         if len(pos) == 0:
             # @todo  this could result in a masked pixel and cause further havoc
             # @todo  could also take the reference pixel, but that could be outside image
-            ia.open(self.dir(fin))
-            s = ia.summary()
-            pos = [int(s['shape'][0])/2, int(s['shape'][1])/2]
+            shape = header.shape()
+            pos = [int(shape[0])/2, int(shape[1])/2]
             logging.warning("No input positions supplied, map center choosen: %s" % str(pos))
             dt.tag("map-center")
 
@@ -292,7 +294,16 @@ class CubeSpectrum_AT(AT):
                     # also integrate over regions, imval will not (!!!)
                     region = 'centerbox[[%dpix,%dpix],[1pix,1pix]]' % (xpos,ypos)
                     caption = "Average Spectrum at %s" % region
-                    imval[i] = casa.imval(self.dir(fin),region=region)
+                    if header.axis('Frequency') == 2:
+                        # a single pixel: read it with the open image tool,
+                        # the frequencies and unit are in the header
+                        with pool.open(self.dir(fin)) as ia:
+                            flux = ia.getchunk(blc=[xpos,ypos,0,-1],trc=[xpos,ypos,-1,-1],dropdeg=True)
+                        imval[i] = {'data'   : np.atleast_1d(flux),
+                                    'coords' : None,
+                                    'unit'   : header.unit()}
+                    else:
+                        imval[i] = casa.imval(self.dir(fin),region=region)
             elif type(xpos)==str:
                 # this is tricky, to stay under 1 pixel , or you get a 2x2 back.
                 region = 'centerbox[[%s,%s],[1pix,1pix]]' % (xpos,ypos)
@@ -311,7 +322,9 @@ class CubeSpectrum_AT(AT):
             logging.debug('minmax: %f %f %d' % (flux.min(),flux.max(),len(flux)))
             smax.append(flux.max())
             if i==0:                                              # for first point record few extra things
-                if len(imval[i]['coords'].shape) == 2:                   # normal case: 1 pixel
+                if imval[i]['coords'] is None:                           # from the header
+                    freqs = np.array(header.freqs())
+                elif len(imval[i]['coords'].shape) == 2:                 # normal case: 1 pixel
                     freqs = imval[i]['coords'].transpose()[2]/1e9        # convert to GHz  @todo: input units ok?
                 elif len(imval[i]['coords'].shape) == 3:                 # rare case if > 1 point in imval()
                     freqs = imval[i]['coords'][0].transpose()[2]/1e9     # convert to GHz  @todo: input units ok?
@@ -319,8 +332,8 @@ class CubeSpectrum_AT(AT):
                     logging.fatal("bad shape %s in freq return from imval - SHOULD NEVER HAPPEN" % imval[i]['coords'].shape)
                 chans = np.arange(len(freqs))                     # channels 0..nchans-1
                 unit  = imval[i]['unit']
-                restfreq = casa.imhead(self.dir(fin),mode="get",hdkey="restfreq")['value']/1e9    # in GHz
-                dt.tag("imhead")
+                restfreq = header.restfreq()                          # in GHz
+                dt.tag("header")
                 vel   = (1-freqs/restfreq)*utils.c                #  @todo : use a function (and what about relativistic?)
 
             # construct the Table for CubeSpectrum_BDP 
@@ -413,11 +426,9 @@ class CubeSpectrum_AT(AT):
         # we're going to assume 2D images fit in memory and always use getchunk
         # @todo  review the use of the new casautil.getdata() style routines
         if True:
-            ia = taskinit.iatool()
-            ia.open(im)
-            plane = ia.getchunk(blc=[0,0,0,-1],trc=[-1,-1,-1,-1],dropdeg=True)
+            with ImagePool.shared().open(im) as ia:
+                plane = ia.getchunk(blc=[0,0,0,-1],trc=[-1,-1,-1,-1],dropdeg=True)
             v = ma.masked_invalid(plane)
-            ia.close()
             mp = np.unravel_index(v.argmax(), v.shape)
             maxval = v[mp[0],mp[1]]
             maxpos = [int(mp[0]),int(mp[1])]
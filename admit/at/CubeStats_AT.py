@@ -19,6 +19,7 @@ from admit.util import stats
 from admit.util.segmentfinder import ADMITSegmentFinder
 from admit.Summary import SummaryEntry
 import admit.util.casautil as casautil
+from admit.util.ImagePool import ImagePool
 from admit.util.AdmitLogging import AdmitLogging as logging
 
 from copy import deepcopy
@@ -209,8 +210,8 @@ class CubeStats_AT(AT):
         numsigma = -1.0
         numsigma = 3.0
 
-        # tools we need
-        ia = taskinit.iatool()
+        # the image tool, shared with the other ATs
+        pool = ImagePool.shared()
 
         # grab the new robust statistics. If this is used, 'rms' will be the RMS,
         # else we will use RMS = 1.4826*MAD (MAD does a decent job on outliers as well)
@@ -228,18 +229,22 @@ class CubeStats_AT(AT):
         #@todo think about using this instead of putting 'fin' in all the SummaryEntry
         #self._summary["casaimage"] = SummaryEntry(fin,"CubeStats_AT",self.id(True))
 
-        # extra CASA call to get the freq's in GHz, as these are not in imstat1{}
+        # the freq's in GHz are not in imstat1{}, but in the header recorded in the BDP
         # @todo what if the coordinates are not in FREQ ?
         # Note: CAS-7648 bug on 3D cubes
-        if False:
+        header = casautil.getheader(b1)
+        if header.freqs() is not None:
+            freqs = header.freqs()
+            dt.tag("header")
+        elif False:
             # csys method
-            ia.open(self.dir(fin))
-            csys = ia.coordsys() 
-            spec_axis = csys.findaxisbyname("spectral") 
-            # ieck, we need a valid position, or else it will come back and "Exception: All selected pixels are masked"
-            #freqs = ia.getprofile(spec_axis, region=rg.box([0,0],[0,0]))['coords']/1e9
-            #freqs = ia.getprofile(spec_axis)['coords']/1e9
-            freqs = ia.getprofile(spec_axis,unit="GHz")['coords']
+            with pool.open(self.dir(fin)) as ia:
+                csys = ia.coordsys() 
+                spec_axis = csys.findaxisbyname("spectral") 
+                # ieck, we need a valid position, or else it will come back and "Exception: All selected pixels are masked"
+                #freqs = ia.getprofile(spec_axis, region=rg.box([0,0],[0,0]))['coords']/1e9
+                #freqs = ia.getprofile(spec_axis)['coords']/1e9
+                freqs = ia.getprofile(spec_axis,unit="GHz")['coords']
             dt.tag("getprofile")
         else:
             # old imval method 
@@ -310,19 +315,18 @@ class CubeStats_AT(AT):
             ypos    = np.zeros(nchan)
             peaksum = np.zeros(nchan)
 
-            ia.open(self.dir(fin))
-            for i in range(nchan):
-                if sigma[i] > 0.0:
-                    plane = ia.getchunk(blc=[0,0,i,-1],trc=[-1,-1,i,-1],dropdeg=True)
-                    v = ma.masked_invalid(plane)
-                    v_abs = np.absolute(v)
-                    max = np.unravel_index(v_abs.argmax(), v_abs.shape)
-                    xpos[i] = max[0]
-                    ypos[i] = max[1]
-                    if numsigma > 0.0:
-                        peaksum[i] = ma.masked_less(v,numsigma * sigma[i]).sum()
+            with pool.open(self.dir(fin)) as ia:
+                for i in range(nchan):
+                    if sigma[i] > 0.0:
+                        plane = ia.getchunk(blc=[0,0,i,-1],trc=[-1,-1,i,-1],dropdeg=True)
+                        v = ma.masked_invalid(plane)
+                        v_abs = np.absolute(v)
+                        max = np.unravel_index(v_abs.argmax(), v_abs.shape)
+                        xpos[i] = max[0]
+                        ypos[i] = max[1]
+                        if numsigma > 0.0:
+                            peaksum[i] = ma.masked_less(v,numsigma * sigma[i]).sum()
             peaksum = np.nan_to_num(peaksum)    # put 0's where nan's are found
-            ia.close()
             dt.tag("ppp")
 
         # construct the admit Table for CubeStats_BDP
@@ -428,13 +432,8 @@ class CubeStats_AT(AT):
 
             # the "box" for the "spectrum" is all pixels.  Don't know how to 
             # get this except via shape.
-            ia.open(self.dir(fin))
-            s = ia.summary()
-            ia.close()
-            if 'shape' in s:
-                specbox = (0,0,s['shape'][0],s['shape'][1])
-            else:
-                specbox = ()
+            shape = header.shape()
+            specbox = (0,0,shape[0],shape[1])
 
             caption = "Emission characteristics as a function of channel, as derived by CubeStats_AT "
             caption += "(cyan: global rms,"
@@ -568,7 +567,6 @@ class CubeStats_AT(AT):
         for v in self._summary:
             self._summary[v].setTaskArgs(taskargs)
 
-        ia.done()     # is that a good habit?
         dt.tag("summary")
         dt.end()
 
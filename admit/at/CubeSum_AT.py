@@ -10,6 +10,7 @@ from admit.Summary import SummaryEntry
 from admit.util import APlot
 import admit.util.bdp_types as bt
 import admit.util.casautil as casautil
+from admit.util.ImagePool import ImagePool
 import admit.util.Image as Image
 import admit.util.Line as Line
 import admit.util.ImPlot as ImPlot
@@ -198,9 +199,7 @@ class CubeSum_AT(AT):
         ia = taskinit.iatool()
 
         f1 =  b1.getimagefile(bt.CASA)
-        ia.open(self.dir(f1))
-        s = ia.summary()
-        nchan = s['shape'][2]
+        nchan = casautil.getheader(b1).shape()[2]
 
         if b1b != None:
             ch0 = b1b.table.getFullColumnByName("startchan")
@@ -337,9 +336,8 @@ class CubeSum_AT(AT):
             utils.remove(mask)
 
         # get the flux
-        ia.open(image_out)
-        st = ia.statistics()
-        ia.close()
+        with ImagePool.shared().open(image_out) as im:
+            st = im.statistics()
         dt.tag("statistics")
         # report that flux, but there's no way to get the units from casa it seems
         # ia.summary()['unit'] is usually 'Jy/beam.km/s' for ALMA
@@ -368,8 +366,9 @@ class CubeSum_AT(AT):
         data = casautil.getdata(image_out,zeromask=True).compressed()
         dt.tag("getdata")
 
-        # get the label for the x axis
-        bunit = casa.imhead(imagename=image_out, mode="get", hdkey="bunit")
+        # get the label for the x axis, from the header recorded with the map
+        header = casautil.imheader(image_out)
+        bunit = header['bunit']
 
         # Make the histogram plot
         # Since we give abspath in the constructor, figname should be relative
@@ -390,7 +389,8 @@ class CubeSum_AT(AT):
                                 auxiliary = auxname,
                                 auxtype   = auxtype,
                                 thumbnail = thumbname,
-                                thumbnailtype = thumbtype)
+                                thumbnailtype = thumbtype,
+                                header    = header)
 
         if hasattr(b1,"line"):                      # SpwCube doesn't have Line
             line = deepcopy(getattr(b1,"line"))
@@ -0,0 +1,387 @@
+""" .. _GenerateCube-at-api:
+
+   **GenerateCube_AT** --- Generates synthetic test cubes.
+   -------------------------------------------------------
+
+   This module defines the GenerateCube_AT class.
+"""
+from admit.AT import AT
+import admit.util.bdp_types as bt
+from admit.bdp.SpwCube_BDP import SpwCube_BDP
+from admit.util.Image import Image
+from admit.util.FitsCube import FitsCube
+import admit.util.utils as utils
+from admit.util.AdmitLogging import AdmitLogging as logging
+from admit.at.GenerateSpectrum_AT import getlines
+
+import os
+import math
+import numpy as np
+try:
+    import casa
+except:
+    casa = None
+
+class GenerateCube_AT(AT):
+    """ Define a synthetic SpwCube for testing and benchmarking.
+
+    This task writes a FITS cube (optionally converted to a CASA image) with
+    noise, continuum and Gaussian lines, so the image based ATs can be tested
+    and benchmarked on cubes of any size without real data. The lines are
+    given as in GenerateSpectrum_AT (lines= and transitions=), and/or drawn
+    at random (nlines=).
+
+    All emission comes from a single source at the center of the map, with
+    a Gaussian profile of FWHM sqrt(size**2 + beam**2); the line emission can
+    have a velocity gradient along the first (RA) axis. The noise is
+    uncorrelated between pixels.  Intensities are given in units of the noise, as the S/N units
+    of GenerateSpectrum_AT, and the cube is in Jy/beam.
+
+    The cube is written a block of channels at a time into a memory mapped
+    FITS file, so the memory used does not depend on the size of the cube,
+    and the blocks can be made by several processes (nproc=).
+    The method writefits() can also be used outside of a flow, e.g. to create
+    the input FITS files of a benchmark.
+
+    **Keywords**
+      **file**: string
+        Basename of the output cube, the FITS file gets the extension
+        ".fits", the CASA image ".im".
+        Default: "gencube".
+
+      **naxis**: list of 3 int
+        Number of pixels in RA and Dec and the number of channels.
+        Default: [64, 64, 128].
+
+      **seed**: int
+        Seed for the random number generator, as in GenerateSpectrum_AT:
+        0 uses a random realization per call, any positive value gives a
+        repeatable cube, -1 disables the noise.
+        Default: 0.
+
+      **noise**: float
+        RMS noise per pixel, in Jy/beam.
+        Default: 1.0.
+
+      **contin**: float
+        Peak continuum level of the source, in units of the noise.
+        Default: 0.0.
+
+      **freq**: float
+        The central frequency of the band in GHz, also the rest frequency.
+        Default: 115.2712018.
+
+      **delta**: float
+        The size of each channel in MHz.
+        Default: 0.5.
+
+      **lines**: list of tuples
+        Parameters for each Gaussian line: peak intensity (in units of the
+        noise), center frequency in GHz, FWHM in km/s, see GenerateSpectrum_AT.
+        Default: [].
+
+      **transitions**: list
+        Transitions of given molecules to include, see GenerateSpectrum_AT.
+        Default: [].
+
+      **nlines**: int
+        Number of additional lines with a random frequency in the band, peak
+        intensity (3-20 times the noise) and FWHM (5-50 km/s).  As the noise,
+        these are only repeatable for seed > 0.
+        Default: 0.
+
+      **pixel**: float
+        Pixel size in arcsec.
+        Default: 1.0.
+
+      **beam**: float
+        FWHM of the (circular) beam in arcsec.
+        Default: 3.0.
+
+      **size**: float
+        FWHM of the source in arcsec, 0 for a point source.
+        Default: 10.0.
+
+      **vgrad**: float
+        Velocity gradient of the line emission along the first (RA) axis, in
+        km/s per arcsec (increasing with pixel number).
+        Default: 0.0.
+
+      **center**: list of 2 float
+        RA and Dec of the center of the map, in degrees.
+        Default: [180.0, -30.0].
+
+      **casa**: bool
+        If True, convert the FITS cube to a CASA image (which needs CASA) and
+        remove the FITS file.
+        Default: False.
+
+      **nproc**: int
+        Number of processes writing blocks of channels in parallel. The cube
+        does not depend on it.
+        Default: 1.
+
+    **Input BDPs**
+      None
+
+    **Output BDPs**
+
+      **SpwCube_BDP**: count: 1
+        The cube, as a FITS file or CASA image. The image header is recorded
+        in the BDP, see Image_BDP.getheader().
+        See also :ref:`SpwCube-bdp-api`.
+
+    Parameters
+    ----------
+    keyval : dictionary, optional
+      Keyword values.
+
+    Attributes
+    ----------
+    _version : string
+      Version string.
+    """
+    # number of pixels per block of channels written at once
+    BLOCK = 2**22
+
+    def __init__(self,**keyval):
+        keys = {"file"        : "gencube",
+                "naxis"       : [64, 64, 128],
+                "seed"        : 0,               # -1 is special for no noise
+                "noise"       : 1.0,
+                "contin"      : 0.0,
+                "freq"        : 115.2712018,
+                "delta"       : 0.5,             # channel width in MHz
+                "lines"       : [],              # [(snr,freq0,fwhm),...]
+                "transitions" : [],
+                "nlines"      : 0,
+                "pixel"       : 1.0,             # arcsec
+                "beam"        : 3.0,             # arcsec
+                "size"        : 10.0,            # arcsec
+                "vgrad"       : 0.0,             # km/s/arcsec
+                "center"      : [180.0, -30.0],
+                "casa"        : False,
+                "nproc"       : 1,
+        }
+        AT.__init__(self,keys,keyval)
+        self._version       = "1.0.0"
+        self.set_bdp_in([])
+        self.set_bdp_out([(SpwCube_BDP,1)])
+
+    def summary(self):
+        """Returns the summary dictionary from the AT, for merging
+           into the ADMIT Summary object.
+
+           GenerateCube_AT adds nothing to the ADMIT summary.
+
+           Parameters
+           ----------
+           None
+
+           Returns
+           -------
+           dict
+               Dictionary of SummaryEntry
+        """
+        return {}
+
+    def header(self):
+        """ The header of the cube, as the descriptor recorded in an Image_BDP
+            (see ImageHeader).
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+        """
+        nx, ny, nz = [int(n) for n in self.getkey("naxis")]
+        rad = math.pi / 180.0
+        ra, dec = [c * rad for c in self.getkey("center")]
+        pixel = self.getkey("pixel") / 3600.0 * rad
+        beam = self.getkey("beam")
+        f0 = self.getkey("freq") * 1e9
+        df = self.getkey("delta") * 1e6
+        h = {'shape'     : [nx, ny, nz, 1],
+             'axisnames' : ['Right Ascension', 'Declination', 'Frequency', 'Stokes'],
+             'axisunits' : ['rad', 'rad', 'Hz', ''],
+             'crpix'     : [float(nx/2), float(ny/2), float(nz/2), 0.0],
+             'crval'     : [ra, dec, f0, 1.0],
+             'cdelt'     : [-pixel, pixel, df, 1.0],
+             'bunit'     : 'Jy/beam',
+             'object'    : 'GENCUBE',
+             'telescope' : 'ALMA',
+             'restfreq'  : f0,
+             'beam'      : [beam, beam, 0.0] if beam > 0.0 else [],
+             'corners'   : [],
+             'projection': 'SIN',
+            }
+        # as casautil.imheader(), in the small angle approximation
+        for x in [0, nx]:
+            for y in [0, ny]:
+                h['corners'].append([ra - (x - nx/2) * pixel / math.cos(dec), dec + (y - ny/2) * pixel])
+        return h
+
+    def writefits(self, filename):
+        """ Write the cube to a FITS file.
+
+            Parameters
+            ----------
+            filename : str
+                FITS file name.
+
+            Returns
+            -------
+            dict
+                The header of the cube, see header().
+        """
+        dt = utils.Dtime("GenerateCube")
+        h = self.header()
+        nx, ny, nz = h['shape'][:3]
+        seed = self.getkey("seed")
+        noise = self.getkey("noise")
+        pixel = self.getkey("pixel")
+        beam = self.getkey("beam")
+        cards = [FitsCube.card('BUNIT', h['bunit'])]
+        if beam > 0.0:
+            cards += [FitsCube.card('BMAJ', beam / 3600.0), FitsCube.card('BMIN', beam / 3600.0),
+                      FitsCube.card('BPA', 0.0)]
+        ctype = ['RA---SIN', 'DEC--SIN', 'FREQ', 'STOKES']
+        cunit = ['deg', 'deg', 'Hz', '']
+        scale = [180.0 / math.pi, 180.0 / math.pi, 1.0, 1.0]
+        for i in range(4):
+            j = i + 1
+            cards += [FitsCube.card('CTYPE%d' % j, ctype[i]),
+                      FitsCube.card('CRVAL%d' % j, h['crval'][i] * scale[i]),
+                      FitsCube.card('CDELT%d' % j, h['cdelt'][i] * scale[i]),
+                      FitsCube.card('CRPIX%d' % j, h['crpix'][i] + 1.0),
+                      FitsCube.card('CUNIT%d' % j, cunit[i])]
+        cards += [FitsCube.card('RESTFRQ', h['restfreq']), FitsCube.card('SPECSYS', 'LSRK'),
+                  FitsCube.card('RADESYS', 'FK5'), FitsCube.card('EQUINOX', 2000.0),
+                  FitsCube.card('OBJECT', h['object']), FitsCube.card('TELESCOP', h['telescope'])]
+        cube = FitsCube.create(filename, h['shape'], cards)
+        dt.tag("create")
+
+        # the frequencies (GHz), as in GenerateSpectrum_AT
+        freq = self.getkey("freq") + (np.arange(nz) - nz/2) * self.getkey("delta") / 1000.0
+        rng = np.random.RandomState(seed if seed > 0 else None)
+        lines = getlines(self.getkey("lines"), self.getkey("transitions"))
+        for i in range(self.getkey("nlines")):
+            lines.append([rng.uniform(3.0, 20.0), rng.uniform(freq.min(), freq.max()), rng.uniform(5.0, 50.0)])
+        # the source, and the velocity (km/s) of each column
+        x = (np.arange(nx) - nx/2) * pixel
+        y = (np.arange(ny) - ny/2) * pixel
+        fwhm = math.sqrt(self.getkey("size")**2 + beam**2)
+        if fwhm > 0.0:
+            source = np.exp(-4.0 * math.log(2.0) * (x[np.newaxis, :]**2 + y[:, np.newaxis]**2) / fwhm**2)
+        else:
+            source = np.zeros((ny, nx))
+            source[ny/2, nx/2] = 1.0
+        source = source.astype(np.float32)
+        vel = self.getkey("vgrad") * x
+        # line centers along RA, their width (GHz) and channel range
+        model = []
+        for line in lines:
+            fc = line[1] - utils.veltofreq(vel, line[1])
+            w = utils.veltofreq(line[2], line[1])
+            z = np.nonzero((freq > fc.min() - 3.0 * w) & (freq < fc.max() + 3.0 * w))[0]
+            if len(z) > 0:
+                model.append((line[0] * noise, fc, w, z[0], z[-1] + 1))
+        self._model = {"filename" : filename,
+                       "freq"     : freq,
+                       "source"   : source,
+                       "contin"   : self.getkey("contin") * noise * source,
+                       "lines"    : model}
+        dt.tag("model")
+
+        nblock = max(1, self.BLOCK / (nx * ny))
+        jobs = [(z0, min(nz, z0 + nblock)) for z0 in range(0, nz, nblock)]
+        self.pmap("writeblock", jobs)
+        del self._model
+        dt.tag("write")
+        logging.info("GenerateCube: %s %dx%dx%d, %d lines" % (os.path.basename(filename), nx, ny, nz, len(lines)))
+        dt.end()
+        return h
+
+    def writeblock(self, z0, z1):
+        """ Write a block of channels of the cube being made by writefits().
+
+            The noise of each block is drawn with its own seed, derived from
+            seed= and the first channel, so the cube does not depend on the
+            order (or the number of processes) in which the blocks are made.
+
+            Parameters
+            ----------
+            z0, z1 : int
+                First and last + 1 channel of the block.
+
+            Returns
+            -------
+            None
+        """
+        m = self._model
+        seed = self.getkey("seed")
+        ny, nx = m["source"].shape
+        if seed >= 0:
+            rng = np.random.RandomState([seed, z0] if seed > 0 else None)
+            block = (self.getkey("noise") * rng.standard_normal((z1 - z0, ny, nx))).astype(np.float32)
+        else:
+            block = np.zeros((z1 - z0, ny, nx), dtype=np.float32)
+        block += m["contin"]
+        for peak, fc, w, l0, l1 in m["lines"]:
+            l0, l1 = max(l0, z0), min(l1, z1)
+            if l0 < l1:
+                g = utils.gaussian1D(m["freq"][l0:l1, np.newaxis], peak, fc[np.newaxis, :], w)
+                block[l0 - z0:l1 - z0] += g[:, np.newaxis, :].astype(np.float32) * m["source"]
+        data = FitsCube(m["filename"]).data('r+')
+        data.reshape(data.shape[-3:])[z0:z1] = block
+        data.flush()
+
+    def pmap(self, name, jobs):
+        """ Run a method for a list of jobs, with nproc > 1 by a pool of
+            worker processes, see utils.pmap().
+
+            Parameters
+            ----------
+            name : str
+                Name of the method to run, e.g. "writeblock".
+
+            jobs : list
+                List of argument tuples, one per call of the method.
+
+            Returns
+            -------
+            List of the results of each call
+        """
+        return utils.pmap(self, name, jobs, self.getkey("nproc"))
+
+    def run(self):
+        """Runs the task.
+
+           Parameters
+           ----------
+           None
+
+           Returns
+           -------
+           None
+        """
+        basename = self.getkey("file")
+        fitsname = self.mkext(basename, "fits")
+        h = self.writefits(self.dir(fitsname))
+        if self.getkey("casa"):
+            if casa is None:
+                raise Exception("GenerateCube_AT: casa=True needs CASA")
+            imname = self.mkext(basename, "im")
+            casa.importfits(self.dir(fitsname), self.dir(imname), overwrite=True)
+            os.remove(self.dir(fitsname))
+            image = Image(images={bt.CASA : imname})
+        else:
+            imname = fitsname
+            image = Image(images={bt.FITS : fitsname})
+        b1 = SpwCube_BDP(imname)
+        self.addoutput(b1)
+        b1.setkey("image", image)
+        b1.setheader(h)
@@ -232,31 +232,7 @@ class GenerateSpectrum_AT(AT):
             if seed >= 0:
                 spec[i] += np.random.normal(contin, rms, nchan)
 #            print "MEAN/STD",spec[i].mean(),spec[i].std()
-        lines = self.getkey("lines")
-        sls = SpectralLineSearch(False)
-        for item in self.getkey("transitions"):
-            kw = {"include_only_nrao" : True,
-                  "line_strengths": ["ls1", "ls2"],
-                  "energy_levels" : ["el2", "el4"],
-                  "fel" : True,
-                  "species" : item[0]
-                  }
-            results = sls.search(item[1][0], item[1][1], "off", **kw)
-            # look at line strengths
-            if len(results) > 0:
-                mx = 0.0
-                indx = -1
-                for i in range(len(results)):
-                    if results[i].getkey("linestrength") > mx:
-                        indx = i
-                        mx = results[i].getkey("linestrength")
-                for res in results:
-                    if mx > 0.0:
-                        lines.append([item[2] * res.getkey("linestrength") / mx, res.getkey("frequency") +
-                                      utils.veltofreq(item[4], res.getkey("frequency")), item[3]])
-                    else:
-                        lines.append([item[2], res.getkey("frequency") + utils.veltofreq(item[4], 
-                                      res.getkey("frequency")), item[3]])
+        lines = getlines(self.getkey("lines"), self.getkey("transitions"))
         for item in lines:
             for i in range(nspectra):
                 spec[i] += utils.gaussian1D(freq, item[0], item[1], utils.veltofreq(item[2], item[1]))
@@ -337,3 +313,37 @@ def getspec(file, xcol=0, ycol=1):
             y.append(float(w[ycol]))
         return (np.array(x),np.array(y))
         
+
+def getlines(lines, transitions):
+        """  the Gaussian lines of the lines= and transitions= keywords
+
+        returns:   list of [intensity, frequency (GHz), FWHM (km/s)]
+        """
+        lines = [list(item) for item in lines]
+        if len(transitions) == 0:
+            return lines
+        sls = SpectralLineSearch(False)
+        for item in transitions:
+            kw = {"include_only_nrao" : True,
+                  "line_strengths": ["ls1", "ls2"],
+                  "energy_levels" : ["el2", "el4"],
+                  "fel" : True,
+                  "species" : item[0]
+                  }
+            results = sls.search(item[1][0], item[1][1], "off", **kw)
+            # look at line strengths
+            if len(results) > 0:
+                mx = 0.0
+                indx = -1
+                for i in range(len(results)):
+                    if results[i].getkey("linestrength") > mx:
+                        indx = i
+                        mx = results[i].getkey("linestrength")
+                for res in results:
+                    if mx > 0.0:
+                        lines.append([item[2] * res.getkey("linestrength") / mx, res.getkey("frequency") +
+                                      utils.veltofreq(item[4], res.getkey("frequency")), item[3]])
+                    else:
+                        lines.append([item[2], res.getkey("frequency") + utils.veltofreq(item[4], 
+                                      res.getkey("frequency")), item[3]])
+        return lines
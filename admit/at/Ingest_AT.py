@@ -12,6 +12,7 @@ from admit.AT import AT
 from admit.Summary import SummaryEntry
 import admit.util.bdp_types as bt
 from admit.util.Image import Image
+from admit.util.FitsCube import FitsCube
 import admit.util.utils as utils
 import admit.util.casautil as casautil
 import admit.util.ImPlot  as ImPlot
@@ -171,6 +172,19 @@ class Ingest_AT(AT):
                convention of course. We call this VLSRf.
                NOTE: clarify/check if the "1+z" velocity scale of the high-z object is correct.
                Default: -1.0 (method not used). Units must be GHz!
+
+      **onepass**: boolean
+               If True, a FITS cube is read only once (memory mapped): the box= and
+               edge= selection, the PB correction and the statistics are all done
+               in that pass, after which the result needs a single conversion to CASA.
+               Otherwise the cube is converted to CASA first, and each of these steps
+               is a separate pass over the cube.  Not used for smooth=, for CASA or
+               MIRIAD input, or for FITS cubes where the spectral axis is not the
+               third axis; these always use CASA.
+               Note: with box= the PB map is cut to the same XY box, and averaged
+               over the selected channels only, so the PB output differs from the
+               one of the CASA path.
+               Default: False
       
 
     **Input BDPs**
@@ -234,6 +248,7 @@ class Ingest_AT(AT):
             'variflow': False,     # requires manual sub-flow management for now
             'vlsr'    : -999999.99, # force a VLSR (see also LineID)
             'restfreq': -1.0,      # alternate VLSRf specification
+            'onepass' : False,     # ingest a FITS cube in one pass (see FitsCube)
             # 'symlink' : False,   # 
             # 'autobox' : False,   # automatically cut away spatial and spectral slices that are masked
             # 'cbeam'   : 0.5,     # channel beam variation allowed in terms of pixel size to use median beam
@@ -373,11 +388,41 @@ class Ingest_AT(AT):
         if do_pb: fno2 = self.dir(bdpfile2)
         dt.tag("start")
 
+        # the one pass copy of a FITS cube (see FitsCube) replaces the conversion to CASA,
+        # PB correction, box/edge subimage and statistics below, each a pass over the cube
+        onepass = self.getkey("onepass") and not file_is_casa and len(smooth) == 0 \
+                  and not (do_pb and not use_pb)
+        if onepass:
+            cube = FitsCube(fni)
+            pbcube = None
+            if do_pb:
+                pbcube = FitsCube(pb)
+            onepass = cube.supported() and (pbcube == None or pbcube.supported())
+            if not onepass:
+                logging.info("FITS layout not supported for onepass=True, using CASA to ingest")
+
         ia = taskinit.iatool()
         rg = taskinit.rgtool()
         
         if file_is_casa:
             ia.open(fni)
+        elif onepass:
+            blc,trc = FitsCube.region(cube.shape, box, edge)
+            logging.info("box=%s edge=%s processing with SHAPE: %s" % (str(box),str(edge),str(cube.shape)))
+            _sub = utils.tmp_file('_ingest_', self.dir()) + '.fits'
+            _pbm = None
+            if do_pb:
+                _pbm = utils.tmp_file('_pbmean_', self.dir()) + '.fits'
+            acc = cube.copy(_sub, blc, trc, pbcube, _pbm)
+            dt.tag("onepass")
+            logging.debug("casa::importfits(%s) -> %s" % (_sub,bdpfile))
+            casa.importfits(_sub,fno,zeroblanks=True,overwrite=True)
+            utils.remove(_sub)
+            if do_pb:
+                casa.importfits(_pbm,fno2,zeroblanks=True,overwrite=True)
+                utils.remove(_pbm)
+            dt.tag("importfits")
+            ia.open(fno)
         else:
             if do_pb and use_pb:
                 # @todo   this needs a fix for the path for pb, only works if abs path is given
@@ -475,6 +520,7 @@ class Ingest_AT(AT):
                     dt.tag("specsmooth")
                 ia.open(fno)
 
+        if not file_is_casa:
             s = ia.summary()
             if len(s['shape']) != 4:
                 logging.warning("Adding dummy STOKES-I axis")
@@ -491,66 +537,48 @@ class Ingest_AT(AT):
                 logging.info("SHAPE: %s" % str(s['shape']))
         s = ia.summary()
         dt.tag("summary-0")
-        if s['hasmask'] and create_mask:
-            logging.warning("no extra mask created because input image already had one")
-            create_mask = False
-
-        # if a box= or edge= was given, only a subset of the cube needs to be ingested
-        # this however complicates PB correction later on
-        if len(box) > 0 or len(edge) > 0:
-            if readonly:
-                raise Exception,"Cannot use box= or edge=, data is read-only, or use an basename/alias"
-            if len(edge) == 1:  edge.append(edge[0])
-
-            nx = s['shape'][0]
-            ny = s['shape'][1]
-            nz = s['shape'][2]
-            logging.info("box=%s edge=%s processing with SHAPE: %s" % (str(box),str(edge),str(s['shape'])))
-                                                                                                 
-            if len(box) == 2:
-                # select zrange
-                if len(edge)>0:
-                    raise Exception,"Cannot use edge= when box=[z1,z2] is used"
-                r1 = rg.box([0,0,box[0]] , [nx-1,ny-1,box[1]])
-            elif len(box) == 4:
-                if len(edge) == 0:
-                    # select just an XY box
-                    r1 = rg.box([box[0],box[1]] , [box[2],box[3]])
-                elif len(edge) == 2:
-                    # select an XY box, but remove some edge channels
-                    r1 = rg.box([box[0],box[1],edge[0]] , [box[2],box[3],nz-edge[1]-1])
-                else:
-                    raise Exception,"Bad edge= for len(box)=4"
-            elif len(box) == 6:
-                # select an XYZ box
-                r1 = rg.box([box[0],box[1],box[2]] , [box[3],box[4],box[5]])
-            elif len(edge) == 2:
-                # remove some edge channels, but keep the whole XY box
-                r1 = rg.box([0,0,edge[0]] , [nx-1,ny-1,nz-edge[1]-1])
-            else:
-                raise Exception,"box=%s illegal" % box
-            logging.debug("BOX/EDGE selection: %s %s" % (str(r1['blc']),str(r1['trc']))) 
-            #if taskinit.ia.isopen(): taskinit.ia.close()
-
-            logging.info("SUBIMAGE")
-            subimage = ia.subimage(region=r1,outfile=fno+'.box',overwrite=True)
-            ia.close()
-            ia.done()
-            subimage.rename(fno,overwrite=True)
-            subimage.close()
-            subimage.done()
-            ia.open(fno)
-            dt.tag("subimage-1")
+        if onepass:
+            # box=, edge= and pb= have been applied already; FITS blanks are masked
+            if acc['nblank'] > 0 and create_mask:
+                logging.warning("no extra mask created because input image already had one")
+                create_mask = False
         else:
-            # the whole cube is passed onto ADMIT
-            if readonly and create_mask:
-                raise Exception,"Cannot use mask=True, data read-only, or use an alias"
-            if file_is_casa and not readonly:
-                # @todo a miriad file - which should be read only - will also create a useless copy here if no alias used
-                ia.subimage(overwrite=True,outfile=fno)
+            if s['hasmask'] and create_mask:
+                logging.warning("no extra mask created because input image already had one")
+                create_mask = False
+
+            # if a box= or edge= was given, only a subset of the cube needs to be ingested
+            # this however complicates PB correction later on
+            if len(box) > 0 or len(edge) > 0:
+                if readonly:
+                    raise Exception,"Cannot use box= or edge=, data is read-only, or use an basename/alias"
+                if len(edge) == 1:  edge.append(edge[0])
+
+                logging.info("box=%s edge=%s processing with SHAPE: %s" % (str(box),str(edge),str(s['shape'])))
+                blc,trc = FitsCube.region(s['shape'], box, edge)
+                r1 = rg.box(blc, trc)
+                logging.debug("BOX/EDGE selection: %s %s" % (str(r1['blc']),str(r1['trc']))) 
+                #if taskinit.ia.isopen(): taskinit.ia.close()
+
+                logging.info("SUBIMAGE")
+                subimage = ia.subimage(region=r1,outfile=fno+'.box',overwrite=True)
                 ia.close()
+                ia.done()
+                subimage.rename(fno,overwrite=True)
+                subimage.close()
+                subimage.done()
                 ia.open(fno)
-                dt.tag("subimage-0")
+                dt.tag("subimage-1")
+            else:
+                # the whole cube is passed onto ADMIT
+                if readonly and create_mask:
+                    raise Exception,"Cannot use mask=True, data read-only, or use an alias"
+                if file_is_casa and not readonly:
+                    # @todo a miriad file - which should be read only - will also create a useless copy here if no alias used
+                    ia.subimage(overwrite=True,outfile=fno)
+                    ia.close()
+                    ia.open(fno)
+                    dt.tag("subimage-0")
 
         if create_mask:
             if readonly:
@@ -565,7 +593,10 @@ class Ingest_AT(AT):
         dt.tag("summary-1")
 
         # do a fast statistics (no median or robust)
-        s0 = ia.statistics()
+        if onepass:
+            s0 = FitsCube.statistics(acc, zeros=not create_mask)
+        else:
+            s0 = ia.statistics()
         dt.tag("statistics")
         if len(s0['npts']) == 0:
             raise Exception,"No statistics possible, are there valid data in this cube?"
@@ -719,6 +750,10 @@ class Ingest_AT(AT):
                 srcname = 'Unknown'
             casa.imhead(fno,mode="put",hdkey="object",hdvalue=srcname)
             h['object'] = srcname
+        # record the header in the BDP's, so downstream AT's don't need to get it from the image again
+        b1.setheader(casautil.imheader(fno))
+        if do_pb and not file_is_casa:
+            b2.setheader(casautil.imheader(fno2))
         logging.info('TELESCOPE: %s' % telescope)
         if telescope == 'UNKNOWN':
             msg = 'Ingest_AT: warning, an UNKNOWN telescope often results in ADMIT failing'
@@ -16,6 +16,7 @@ from admit.util.Line import Line
 from admit.util.Image import Image
 import admit.util.Table
 import admit.util.utils as utils
+import admit.util.casautil as casautil
 from admit.util.AdmitLogging import AdmitLogging as logging
 
 
@@ -145,7 +146,7 @@ class LineCube_AT(AT):
         cols = linelist.table.getHeader()
         # get the casa image
         imagename = spw.getimagefile(bt.CASA)
-        imh = imhead(self.dir(imagename), mode='list')
+        header = casautil.getheader(spw)
         # set the overall parameters for imsubimage
         args = {"imagename" : self.dir(imagename),
                 "overwrite" : True}
@@ -153,7 +154,7 @@ class LineCube_AT(AT):
         dt.tag("start")
 
         if pad != 0 or fpad > 0:
-            nchan = imh['shape'][2]
+            nchan = header.shape()[2]
             dt.tag("pad") 
 
         # if equal size cubes are requested, this will honor the requested pad
@@ -306,7 +307,10 @@ class LineCube_AT(AT):
                    hdvalue="%fGHz" % (row.getkey("frequency")))
             # set up the output BDP
             images = {bt.CASA : outfl}
-            casaimage = Image(images=images)
+            # the header of the output cube follows from the input cube
+            h = header.slice(2, start, end)
+            h['restfreq'] = row.getkey("frequency") * 1e9
+            casaimage = Image(images=images, header=h)
             # note that Summary.getLineFluxes() implicitly relies on the BDP out order
             # being the same order as in the line list table.  If this is ever not
             # true, then Summary.getLineFluxes mismatch BDPs and flux values.
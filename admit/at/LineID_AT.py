@@ -23,6 +23,7 @@ from admit.bdp.CubeSpectrum_BDP import CubeSpectrum_BDP
 from admit.bdp.CubeStats_BDP import CubeStats_BDP
 from admit.bdp.PVCorr_BDP import PVCorr_BDP
 import admit.util.filter.Filter1D as Filter1D
+from admit.util import peakfinder
 from admit.util import APlot
 from admit.util.Image import Image
 from admit.util.Tier1DB import Tier1DB
@@ -30,7 +31,8 @@ from admit.util.AdmitLogging import AdmitLogging as logging
 from admit.util import SpectralLineSearch
 from admit.util import LineData
 from admit.util import Segments
-
+from admit.util import IntervalIndex
+from admit.util.continuumsubtraction.spectral.ContinuumSubtraction import ContinuumSubtraction
 
 # @todo  this code does not check upon exit that the LineID list is uniq, the U lines,
 #        where we only used 3 digits (i.e. 1 MHz accuracy) it would too often find
@@ -209,6 +211,14 @@ class LineID_AT(AT):
             to make them both sensitive to wide and strong narrow lines.
             Default: True.
 
+          **nproc**: int
+            Number of worker processes for the per-spectrum stages (continuum
+            subtraction, segment finding, peak finding and pattern matching).
+            Each input spectrum is processed independently; the merging of the
+            peaks and the line identification stay serial, so the resulting
+            LineList_BDP is the same as for nproc=1.
+            Default: 1.
+
           **force**: list of tuples or LineData objects
             Force a given channel interval to be a specific line identification.
             If force is given, LineID_AT will not try to find any lines in the
@@ -283,7 +293,8 @@ class LineID_AT(AT):
                 "references"   : "",
                 "iterate"      : True,
                 "force"        : [],
-                "reject"       : []
+                "reject"       : [],
+                "nproc"        : 1
                }
         self.boxcar = True
         AT.__init__(self, keys, keyval)
@@ -462,43 +473,28 @@ class LineID_AT(AT):
 
         # make a copy of the input points which will be modified as groups are located
         singles = copy.deepcopy(points)
-        # create a 2D array to catalog the distances between every peak
-        diffs = np.zeros((len(points), len(points)))
-        # calculate the distance between every peak
-        for i in range(len(points)):
-            for j in range(i + 1, len(points)):
-                diffs[i, j] = abs(points[i] - points[j])
-        # look for pairs of peaks that are a common distance apart (within the
-        # given tolerance)
+        # look for pairs of adjacent peaks that are a common distance apart (within
+        # the given tolerance): the distance of each pair is compared to those of
+        # all earlier pairs, which join it in a cluster unless they already joined
+        # an earlier one
         clusters = {}
-        for i in range(len(points)):
-            for j in range(i + 1, min(len(points), i + 2)):
-                # get each distance one at a time and compare it to the rest
-                diff = diffs[i, j]
-                dlist = []
-                # if this is the first time this distance has been found
-                first = True
-                for k in range(i + 1):
-                    for l in range(k + 1, min(len(points), k + 2)):
-                        # compare to all other points, skipping itself
-                        if (k == i and l == j) or diffs[k, l] < self.tol / 3.0 \
-                           or abs(spec.spec()[points[k]]) > 2.0 * abs(spec.spec()[points[l]])\
-                           or abs(spec.spec()[points[l]]) > 2.0 * abs(spec.spec()[points[k]]):
-                            continue
-                        # if the distances from two pairs of points are close enough
-                        # add it to the list of clusters
-                        if maxsep > diffs[k, l] > 0.0 and (diff - self.tol / 3.0 < diffs[k, l] < diff + self.tol / 3.0):
-                            # if this is the first time for this distance then add
-                            # both to the list
-                            if first:
-                                dlist.append([i, j])
-                            dlist.append([k, l])
-                            # mark the current point as processed (i.e. set to 0.0)
-                            diffs[k, l] = 0.0
-                            first = False
-                # if groups of points were detected then add them to the dictionary
-                if len(dlist) > 0:
-                    clusters[diff] = dlist
+        if len(points) > 2:
+            # the distance of every pair of adjacent peaks
+            diffs = np.abs(np.diff(np.asarray(points, dtype=float)))
+            amp = abs(spec.spec()[np.rint(points).astype(int)])
+            # only pairs of similar strength and not too close or too far apart
+            # can join a cluster
+            usable = ~ma.filled((amp[:-1] > 2.0 * amp[1:]) | (amp[1:] > 2.0 * amp[:-1]), False)
+            usable &= (diffs >= self.tol / 3.0) & (diffs > 0.0) & (diffs < maxsep)
+            # match[i, k]: the earlier pair k has the distance of pair i
+            match = (diffs[np.newaxis, :] > diffs[:, np.newaxis] - self.tol / 3.0) & \
+                    (diffs[np.newaxis, :] < diffs[:, np.newaxis] + self.tol / 3.0)
+            match &= usable[np.newaxis, :] & np.tri(len(diffs), k=-1, dtype=bool)
+            # a pair joins the cluster of the first later pair it matches
+            joined = match.any(axis=0)
+            owner = np.argmax(match, axis=0)
+            for i in np.unique(owner[joined]):
+                clusters[diffs[i]] = [[i, i + 1]] + [[k, k + 1] for k in np.nonzero(joined & (owner == i))[0]]
         # get the actual peak points rather then just indexes
         clens = {}
         for k, v in clusters.iteritems():
@@ -512,12 +508,13 @@ class LineID_AT(AT):
         clist.reverse()
 
         spoints = []
+        seen = set()
         for k in clist:
             for i in clusters[k]:
-                if not i[0] in spoints:
-                    spoints.append(i[0])
-                if not i[1] in spoints:
-                    spoints.append(i[1])
+                for p in i:
+                    if p not in seen:
+                        seen.add(p)
+                        spoints.append(p)
         # single spectral lines
         # spectral lines that appear to be in a pattern
         for p in spoints:
@@ -610,7 +607,7 @@ class LineID_AT(AT):
             msg = "Found %s potential pattern%s with%s separation%s of" % (len(clusters), exp, pre, exp)
             summary = ""
             for k in clusters.keys():
-                summary += " %.1f," % (2. * abs(utils.freqtovel(spec.freq()[len(spec)/2], spec.freq()[len(spec)/2] - spec.freq()[len(spec)/2 - k])))
+                summary += " %.1f," % (2. * abs(utils.freqtovel(spec.freq()[len(spec)/2], spec.freq()[len(spec)/2] - spec.freq()[len(spec)/2 - int(k)])))
             summary = summary[:-1] + " km/s"
             logging.info(msg + summary)
 
@@ -722,53 +719,43 @@ class LineID_AT(AT):
 
         """
         if isinstance(lines, list):
-            results = []
-            for res in lines:
-                found = False
-                for rej in self.reject:
-                    if res.name.upper() == rej[0].upper():
-                        if rej[1] is None:
-                            found = True
-                            break
-                        if utils.issameinfreq(res.getkey("frequency"), rej[1]):
-                            found = True
-                            break
-                if not found:
-                    results.append(res)
+            results = [res for res in lines if not self.isrejected(res)]
         elif isinstance(lines, dict):
             results = {}
             for freq, res in lines.iteritems():
                 if isinstance(res, list):
-                    tempr = []
-                    for r in res:
-                        found = False
-                        for rej in self.reject:
-                            if r.name.upper() == rej[0].upper():
-                                if rej[1] is None:
-                                    found = True
-                                    break
-                                if utils.issameinfreq(r.getkey("frequency"), rej[1]):
-                                    found = True
-                                    break
-                        if not found:
-                            tempr.append(r)
-                    results[freq] = tempr
-                else:
-                    found = False
-                    for rej in self.reject:
-                        if res.name.upper() == rej[0].upper():
-                            if rej[1] is None:
-                                found = True
-                                break
-                            if utils.issameinfreq(res.getkey("frequency"), rej[1]):
-                                found = True
-                                break
-                    if not found:
-                        results[freq] = res
+                    results[freq] = [r for r in res if not self.isrejected(r)]
+                elif not self.isrejected(res):
+                    results[freq] = res
         else:
             raise Exception("Impproper format for input lines, it must be a list or dictionary not a %s." % (type(lines)))
         return results
 
+    def isrejected(self, line):
+        """ Method to check a single line against the list of rejected lines,
+            using the lookup of the reject list by name built in run().
+
+            Parameters
+            ----------
+            line : LineData
+                The line identification to check.
+
+            Returns
+            -------
+            Boolean, True if the line matches an entry of the reject list.
+
+        """
+        freqs = self._reject.get(line.name.upper())
+        if freqs is None:
+            return False
+        if None in freqs:
+            return True
+        frq = line.getkey("frequency")
+        for f in freqs:
+            if utils.issameinfreq(frq, f):
+                return True
+        return False
+
 
     def generatepossibles(self, frq):
         """ Method to generate a list of possible molecular identifications
@@ -777,9 +764,11 @@ class LineID_AT(AT):
 
             Parameters
             ----------
-            frq : list, length 2
+            frq : list, length 2, or list of them
                 The frequency range to search, it is just passed to slsearch,
-                and no error checking is done.
+                and no error checking is done. Several ranges can be given
+                at once, their (online) searches are then done concurrently
+                and the results concatenated in order.
 
             Returns
             -------
@@ -788,18 +777,24 @@ class LineID_AT(AT):
             name, rest frequency, transition quantum numbers, line strength,
             lower state energy, and upper state energy, in this order.
         """
-        frq = self.checkforcefreqs(frq)
-        if frq is None:
+        if len(frq) > 0 and not isinstance(frq[0], (list, tuple)):
+            frq = [frq]
+        windows = []
+        for f in frq:
+            f = self.checkforcefreqs(f)
+            if f is not None:
+                windows.append([min(f), max(f)])
+        if not windows:
             return []
-        sls = SpectralLineSearch(self.getkey("online"), self.tier1freq)
+        sls = SpectralLineSearch(self.getkey("online"), self._tier1freqidx)
         kw = {"exclude" : ["atmospheric", "potential", "probable"],
               "include_only_nrao" : True,
               "line_strengths": ["ls1", "ls2"],
               "energy_levels" : ["el2", "el4"],
               "fel" : True
              }
-        results = sls.search(min(frq), max(frq), self.getkey("recomblevel").upper(),
-                             self.getkey("allowexotics"), **kw)
+        results = sls.searchwindows(windows, self.getkey("recomblevel").upper(),
+                                    self.getkey("allowexotics"), **kw)
 
         results = self.checkreject(results)
         for r in results:
@@ -901,6 +896,95 @@ class LineID_AT(AT):
         hfs = self.checkreject(hfs)
         return lines, hfs
 
+    def pmap(self, name, jobs):
+        """ Method to run one of the per-spectrum stages for a list of spectra.
+            With nproc > 1 the jobs are run by a pool of worker processes,
+            otherwise serially. Either way the results come back in order.
+
+            Parameters
+            ----------
+            name : str
+                Name of the method to run, e.g. "getcontinuum".
+
+            jobs : list
+                List of argument tuples, one per call of the method.
+
+            Returns
+            -------
+            List of the results of each call
+        """
+        return utils.pmap(self, name, jobs, self.getkey("nproc"))
+
+    def getcontinuum(self, spec, segargs, order):
+        """ Method to get the continuum of a single spectrum, a polynomial of
+            the given order.
+
+            Parameters
+            ----------
+            spec : Spectrum
+                The spectrum.
+
+            segargs : dict
+                Arguments for the segment finder.
+
+            order : int
+                Order of the polynomial.
+
+            Returns
+            -------
+            Numpy array containing the continuum
+        """
+        csub = ContinuumSubtraction()
+        return csub.run(self.id(True), spec.spec(), spec.freq(), self.getkey("segment"),
+                        segargs, "PolyFit", **{"deg": order})
+
+    def getsegments(self, spec, noise=None):
+        """ Method to find the segments of line emission in a single spectrum.
+
+            Parameters
+            ----------
+            spec : Spectrum
+                The spectrum.
+
+            noise : float
+                The noise level to use. Default: None, the noise is calculated.
+
+            Returns
+            -------
+            Tuple (segments, cutoff, noise, mean) as returned by SegmentFinder.find()
+        """
+        return specutil.findsegments([spec], self.getkey("segment"), self.getkey("minchan"),
+                                     self.getkey("maxgap"), self.getkey("numsigma"),
+                                     self.getkey("iterate"), noise=noise)[0]
+
+    def searchpeaks(self, method, args, spec, segments, iterate=False):
+        """ Method to get the peaks of a single spectrum, only those inside of
+            its segments, see getpeaks() and removepeaks().
+
+            Parameters
+            ----------
+            method : str
+                The peak finding method to use
+
+            args : dict
+                The arguments to send to the peak finder
+
+            spec : array like
+                The input spectrum which is searched for peaks
+
+            segments : list
+                A list of the previously detected segments
+
+            iterate : bool
+                If True then iterate over the minchan ans threshold to detect narrow strong lines.
+                Default : False
+
+            Returns
+            -------
+            List of the peak points in channel space
+        """
+        return self.removepeaks(self.getpeaks(method, args, spec, segments, iterate), segments)
+
     def getpeaks(self, method, args, spec, segments, iterate=False):
         """ Method to get the peaks from the input spectrum. It calls the requested
             peak finder and can iterate over the inputs to find both wider weaker lines as
@@ -940,49 +1024,58 @@ class LineID_AT(AT):
         initthresh = args["thresh"]
         for i in range(1, 6):
             wdth.append(2*i + 1)
+        # the boxcar smoothed spectra, computed once per width for all segments
+        smoothed = {}
+        def boxcar(w):
+            if w not in smoothed:
+                smoothed[w] = Filter1D.Filter1D(spec, "boxcar", **{"width": w}).run()
+            return smoothed[w]
+        # get the (smoothed) spectrum of each segment
+        segspecs = []
+        offsets = []
         for s in segments:
-            temppks = []
-            args["min_width"] = initwidth
-            args["thresh"] = initthresh
             last = 0
             curpk = spec[s[0]:s[1]+1].max()
             # only run the boxcar smoothing if the segment is wide enough, this avoids suppressing
             # narrow lines
             if self.boxcar and abs(s[0] - s[1]) > 6:
                 for i in range(len(wdth)):
-                    fltr = Filter1D.Filter1D(spec, "boxcar", **{"width": wdth[i]})
-                    spec3 = fltr.run()
-                    spec3 *= math.sqrt(float(wdth[i]))
-                    newpk = spec3[s[0]:s[1]+1].max()
+                    newpk = boxcar(wdth[i])[s[0]:s[1]+1].max() * math.sqrt(float(wdth[i]))
                     if newpk > curpk and wdth[i] <= 0.5*(s[1]-s[0]):
                         curpk = newpk
                         last = i
                     else:
                         break
-                fltr = Filter1D.Filter1D(spec, "boxcar", **{"width": wdth[last]})
-                spec3 = fltr.run()
-                args["spec"] = spec3[max(s[0] - 2, 0): min(s[1] + 3, len(spec3) - 1)]
+                spec3 = boxcar(wdth[last])
+                segspecs.append(spec3[max(s[0] - 2, 0): min(s[1] + 3, len(spec3) - 1)])
             else:
-                args["spec"] = spec[max(s[0] - 2, 0): min(s[1] + 3, len(spec) - 1)]
-            while (args["min_width"] > 1 and iterate) or (args["min_width"] > 0 and not iterate):
-                pf = utils.getClass("util.peakfinder", method, args)
-                pk = pf.find() + float(max(s[0] - 2, 0))
-                for p in pk:
+                segspecs.append(spec[max(s[0] - 2, 0): min(s[1] + 3, len(spec) - 1)])
+            offsets.append(float(max(s[0] - 2, 0)))
+        # search all segments at once, for each step of the min_width/thresh ladder
+        temppks = [[] for s in segments]
+        args["min_width"] = initwidth
+        args["thresh"] = initthresh
+        while (args["min_width"] > 1 and iterate) or (args["min_width"] > 0 and not iterate):
+            pfargs = dict([(k, v) for k, v in args.iteritems() if k != "spec"])
+            found = peakfinder.findpeaks(method, segspecs, **pfargs)
+            for j, s in enumerate(segments):
+                for p in found[j] + offsets[j]:
                     if s[0] <= p <= s[1]:
-                        temppks.append(p)
-                if not iterate:
-                    break
-                args["min_width"] -= 1
-                args["thresh"] = area / args["min_width"]
+                        temppks[j].append(p)
+            if not iterate:
+                break
+            args["min_width"] -= 1
+            args["thresh"] = area / args["min_width"]
+        for segpks in temppks:
             drop = set()
-            for i in range(len(temppks)):
-                for j in range(i + 1, len(temppks)):
-                    if j not in drop and abs(temppks[i] - temppks[j]) < initwidth:
+            for i in range(len(segpks)):
+                for j in range(i + 1, len(segpks)):
+                    if j not in drop and abs(segpks[i] - segpks[j]) < initwidth:
                         drop.add(j)
-            for i in range(len(temppks)):
+            for i in range(len(segpks)):
                 if i not in drop:
-                    pks.append(temppks[i])
-            pks.sort()
+                    pks.append(segpks[i])
+        pks.sort()
         return pks
 
     def counthfclines(self, chfc, shfc, peak, wiggle, offset, hflines):
@@ -1203,8 +1296,9 @@ class LineID_AT(AT):
             A listing of any tier1 line which overlaps with the segment.
 
         """
-        for t1 in self.tier1list:
-            if t1.getstart() <= chans[0] <= t1.getend() and t1.getstart() <= chans[1] <= t1.getend():
+        for i in self._tier1lineidx.find(chans[0]):
+            t1 = self.tier1list[i]
+            if t1.getstart() <= chans[1] <= t1.getend():
                 return copy.deepcopy(t1)
 
     def checkforcefreqs(self, frq):
@@ -1222,7 +1316,11 @@ class LineID_AT(AT):
 
         """
         reverse = self.freq[0] > self.freq[-1]
-        for fr in self.forcefreqs:
+        # only the force segments containing an end point change it; visit
+        # those, in order, as the end points move
+        i = self._forcefreqidx.first(frq)
+        while i >= 0:
+            fr = self.forcefreqs[i]
             if fr[0] <= frq[0] <= fr[1] and fr[0] <= frq[1] <= fr[1]:
                 return None
             if fr[0] <= frq[0] <= fr[1]:
@@ -1235,6 +1333,7 @@ class LineID_AT(AT):
                     frq[1] = max(self.freq[-1], fr[0] + 0.0001)
                 else:
                     frq[1] = max(self.freq[0], fr[0] + 0.0001)
+            i = self._forcefreqidx.first(frq, i + 1)
         return frq
 
     def checkforcesegs(self, segs):
@@ -1254,7 +1353,9 @@ class LineID_AT(AT):
         finalsegs = Segments(nchan=len(self.freq))
         for seg in segs:
             found = False
-            for ch in self.forcechans:
+            i = self._forcechanidx.first(seg)
+            while i >= 0:
+                ch = self.forcechans[i]
                 if ch[0] <= seg[0] <= ch[1] and ch[0] < seg[1] < ch[1]:
                     found = True
                     break
@@ -1262,6 +1363,7 @@ class LineID_AT(AT):
                     seg[0] = min(ch[1] + 1, self.chan[-1])
                 if ch[0] <= seg[1] <= ch[1]:
                     seg[1] = max(0, ch[0] - 1)
+                i = self._forcechanidx.first(seg, i + 1)
             if not found:
                 finalsegs.append(seg)
         return finalsegs
@@ -1285,13 +1387,16 @@ class LineID_AT(AT):
 
         """
         chans = copy.deepcopy(chs)
-        for ch in self.forcechans:
+        i = self._forcechanidx.first(chans)
+        while i >= 0:
+            ch = self.forcechans[i]
             if ch[0] <= chans[0] <= ch[1] and ch[0] <= chans[1] <= ch[1]:
                 return None
             if ch[0] <= chans[0] <= ch[1]:
                 chans[0] = min(ch[1] + 1, len(peaks) - 1)
             if ch[0] <= chans[1] <= ch[1]:
                 chans[1] = max(0, ch[0] - 1)
+            i = self._forcechanidx.first(chans, i + 1)
         return chans
 
     def checktier1chans(self, peaks, chs):
@@ -1314,13 +1419,16 @@ class LineID_AT(AT):
 
         """
         chans = copy.deepcopy(chs)
-        for ch in self.tier1chans:
+        i = self._tier1chanidx.first(chans)
+        while i >= 0:
+            ch = self.tier1chans[i]
             if ch[0] <= chans[0] <= ch[1] and ch[0] <= chans[1] <= ch[1]:
                 return None
             if ch[0] <= chans[0] <= ch[1]:
                 chans[0] = min(ch[1] + 1, len(peaks) - 1)
             if ch[0] <= chans[1] <= ch[1]:
                 chans[1] = max(0, ch[0] - 1)
+            i = self._tier1chanidx.first(chans, i + 1)
         return chans
 
     def checkfit(self, peaks, peak, params, freq, segment):
@@ -2220,6 +2328,10 @@ class LineID_AT(AT):
                 for i in delsingle:
                     del peaks.fsingles[i]
 
+        # the Tier 1 lines are complete, index them for the lookups below
+        self._tier1chanidx = IntervalIndex(self.tier1chans)
+        self._tier1freqidx = IntervalIndex(self.tier1freq)
+        self._tier1lineidx = IntervalIndex([[t1.getstart(), t1.getend()] for t1 in self.tier1list])
         slen = len(peaks.fsingles)
         # now process anything that is not Tier 1
         # start with the complex sets
@@ -2279,15 +2391,14 @@ class LineID_AT(AT):
             wpossibles = {}
             # search around the central frequency
             width *= 1.05
-            possibilities += self.generatepossibles([freq - width, freq + width])
+            windows = [[freq - width, freq + width]]
             # if there is a central peak then search around all possible offsets
             # in case this is not a true cluster but just random coincidence
             if centerpeak:
                 for off in peaks.offsets:
-                    possibilities += self.generatepossibles([freq - width - off,
-                                                             freq + width - off])
-                    possibilities += self.generatepossibles([freq - width + off,
-                                                             freq + width + off])
+                    windows.append([freq - width - off, freq + width - off])
+                    windows.append([freq - width + off, freq + width + off])
+            possibilities += self.generatepossibles(windows)
             # take care of the wings
             wpeak = []
             wfwhm = []
@@ -2320,15 +2431,13 @@ class LineID_AT(AT):
                 wwidth.append(width)
                 wfwhm.append(utils.freqtovel(wings[i], abs(popt[2])))
                 # search around the central frequency of the line
-                wpossibles[i] += self.generatepossibles([wings[i] - wwidth[i],
-                                                         wings[i] + wwidth[i]])
+                windows = [[wings[i] - wwidth[i], wings[i] + wwidth[i]]]
                 # search as if this line is offset in case this is a single line and not a cluster
                 if not ispvcorr:
                     for off in peaks.offsets:
-                        wpossibles[i] += self.generatepossibles([wings[i] - wwidth[i] - off,
-                                                                 wings[i] + wwidth[i] - off])
-                        wpossibles[i] += self.generatepossibles([wings[i] - wwidth[i] + off,
-                                                                 wings[i] + wwidth[i] + off])
+                        windows.append([wings[i] - wwidth[i] - off, wings[i] + wwidth[i] - off])
+                        windows.append([wings[i] - wwidth[i] + off, wings[i] + wwidth[i] + off])
+                wpossibles[i] += self.generatepossibles(windows)
 
             # if we have no results from all searches then we have U lines
             if len(possibilities) == len(wpossibles[0]) == len(wpossibles[1]) == 0:
@@ -2347,7 +2456,7 @@ class LineID_AT(AT):
                     pkrms = parameters[0][0]
                     if not isstats:
                         pkrms /= noise
-                    chans = self.checktier1chans(peak, [parameters[0][3][0], parameters[0][3][1]])
+                    chans = self.checktier1chans(peaks, [parameters[0][3][0], parameters[0][3][1]])
                     if chans is None:
                         identifications[freq] = self.gettier1line([parameters[0][3][0],
                                                                    parameters[0][3][1]])
@@ -2739,16 +2848,14 @@ class LineID_AT(AT):
             fwhm = utils.freqtovel(peaks.fsingles[i], abs(popt[2]))
             limits = peaks.limitwidth(peaks.fsingles[i], width)
             # look for an identification around the line
-            possibilities = []
-            possibilities += self.generatepossibles(limits)
+            # limits is None if the line is outside all segments
+            windows = [limits] if limits is not None else []
             # look for other identifications in case this line is red/blue shifted due to rotation/collapse
             if not ispvcorr:
                 for k in peaks.offsets:
-                    possibilities += self.generatepossibles([peaks.fsingles[i] - width - k,
-                                                             peaks.fsingles[i] + width - k])
-
-                    possibilities += self.generatepossibles([peaks.fsingles[i] - width + k,
-                                                             peaks.fsingles[i] + width + k])
+                    windows.append([peaks.fsingles[i] - width - k, peaks.fsingles[i] + width - k])
+                    windows.append([peaks.fsingles[i] - width + k, peaks.fsingles[i] + width + k])
+            possibilities = self.generatepossibles(windows)
             if len(possibilities) == 0:
                 # if none were found the set it as a U line
                 species = "U_%.4f" % (peaks.fsingles[i])
@@ -3020,6 +3127,10 @@ class LineID_AT(AT):
         self.forcechans = []
         self.forcefreqs = []
         self.reject = self.getkey("reject")
+        # rejected rest frequencies (None: all transitions) by molecule name
+        self._reject = {}
+        for rej in self.reject:
+            self._reject.setdefault(rej[0].upper(), []).append(rej[1])
         self.pattern = self.getkey("pattern").upper()
         for rej in self.reject:
             if rej[1] is None:
@@ -3126,7 +3237,9 @@ class LineID_AT(AT):
             if self.getkey("csub")[1] is not None:
                 order = self.getkey("csub")[1]
                 logging.info("Attempting Continuum Subtraction for Input Spectra")
-                specutil.contsub(self.id(True),self.specs, self.getkey("segment"), segargsforcont,algorithm="PolyFit",**{"deg" : order})
+                contin = self.pmap("getcontinuum", [(spec, segargsforcont, order) for spec in self.specs])
+                for spec, c in zip(self.specs, contin):
+                    spec.set_contin(c)
             else:
                 for spec in self.specs:
                     spec.set_contin(np.zeros(len(spec)))
@@ -3141,7 +3254,9 @@ class LineID_AT(AT):
             if self.getkey("csub")[0] is not None:
                 order = self.getkey("csub")[0]
                 logging.info("Attempting Continuum Subtraction for Input CubeStats Spectra")
-                specutil.contsub(self.id(True),self.statspec, self.getkey("segment"), segargsforcont,algorithm="PolyFit",**{"deg" : order})
+                contin = self.pmap("getcontinuum", [(spec, segargsforcont, order) for spec in self.statspec])
+                for spec, c in zip(self.statspec, contin):
+                    spec.set_contin(c)
             else:
                 for i, spec in enumerate(self.statspec):
                     spec.set_contin(np.zeros(len(spec)))
@@ -3183,6 +3298,8 @@ class LineID_AT(AT):
             rng = [self.freq[force.getstart()], self.freq[force.getend()]]
             force.setkey("freqs", [min(rng), max(rng)])
             self.forcefreqs.append([min(rng), max(rng)])
+        self._forcechanidx = IntervalIndex(self.forcechans)
+        self._forcefreqidx = IntervalIndex(self.forcefreqs)
 
         # seach for segments of spectral line emission
 
@@ -3195,7 +3312,7 @@ class LineID_AT(AT):
         self.dt.tag("segment finder")
         if specbdp is not None:
             logging.info("Detecting segments in CubeSpectrum based data")
-            values = specutil.findsegments(self.specs, method, minchan, maxgap, numsigma, iterate)
+            values = self.pmap("getsegments", [(spec,) for spec in self.specs])
             for i, t in enumerate(values):
                 self.specseg.append(self.checkforcesegs(t[0]))
                 self.specs[i].set_noise(t[2])
@@ -3203,7 +3320,7 @@ class LineID_AT(AT):
 
         if statbdp is not None:
             logging.info("Detecting segments in CubeStats based data")
-            values = specutil.findsegments(self.statspec, method, minchan, maxgap, numsigma, iterate)
+            values = self.pmap("getsegments", [(spec,) for spec in self.statspec])
             for i, t in enumerate(values):
                 self.statseg.append(self.checkforcesegs(t[0]))
                 self.statspec[i].set_noise(t[2])
@@ -3320,27 +3437,22 @@ class LineID_AT(AT):
             return
 
         tpeaks = {}
-        # do the peak finding
+        # do the peak finding, collect the searches of all spectra for all methods first
         spnoise = []
+        jobs = []
         # loop over all of the requested methods
         for method, margs in self.getkey("method").iteritems():
             logging.info("Searching for spectral peaks with method: %s" % (method))
-            tpeaks[method] = {"stats" : [],
-                              "specs" : [],
-                              "pvc"   : None}
             # look for peaks in the statspec data
             for i, spec in enumerate(self.statspec):
-                logging.debug("Searching for spectral peaks statspec %d" % i)
                 args = {"spec"      : spec.spec(),
                         "y"         : spec.freq(),
                         "min_width" : self.getkey("minchan")}
                 args.update(margs)
                 args["thresh"] = float(spec.noise() * self.getkey("numsigma"))
-                pks = self.getpeaks(method, args, spec.spec(), self.statseg[i], iterate=self.getkey("iterate"))
-                tpeaks[method]["stats"].append(self.removepeaks(pks, self.statseg[i]))
+                jobs.append((method, args, spec.spec(), self.statseg[i], self.getkey("iterate")))
             # look for peaks in the cubespec data
             for i, spec in enumerate(self.specs):
-                logging.debug("Searching for spectral peaks specs %d" % i)
                 args = {"spec"      : spec.spec(),
                         "y"         : spec.freq(),
                         "min_width" : self.getkey("minchan")}
@@ -3348,18 +3460,22 @@ class LineID_AT(AT):
                 if margs["thresh"] == 0.0:
                     args["thresh"] = float(spec.noise() * self.getkey("numsigma"))
                 spnoise.append(args["thresh"])
-                pks = self.getpeaks(method, args, spec.spec(), self.specseg[i], iterate=self.getkey("iterate"))
-                tpeaks[method]["specs"].append(self.removepeaks(pks, self.specseg[i]))
+                jobs.append((method, args, spec.spec(), self.specseg[i], self.getkey("iterate")))
             # look for peaks in the pvcorr data
             if self.pvspec is not None:
-                logging.debug("Searching for spectral peaks pvspec")
                 args = {"spec"      : self.pvspec.spec(),
                         "y"         : self.pvspec.freq(),
                         "min_width" : self.getkey("minchan")}
                 args.update(margs)
                 args["thresh"] = float(self.pvspec.noise() * self.getkey("numsigma"))
-                pks = self.getpeaks(method, args, self.pvspec.spec(), self.pvseg, iterate=False)
-                tpeaks[method]["pvc"] = self.removepeaks(pks, self.pvseg)
+                jobs.append((method, args, self.pvspec.spec(), self.pvseg, False))
+        found = iter(self.pmap("searchpeaks", jobs))
+        for method in self.getkey("method"):
+            tpeaks[method] = {"stats" : [found.next() for spec in self.statspec],
+                              "specs" : [found.next() for spec in self.specs],
+                              "pvc"   : None}
+            if self.pvspec is not None:
+                tpeaks[method]["pvc"] = found.next()
 
         # now merge it all together into a single dictionary
         allpeaks = {"stats" : [],
@@ -3529,22 +3645,23 @@ class LineID_AT(AT):
                  "specs" : [],
                  "pvc"   : None}
         toomanypeaks = self.checkcount(allpeaks)
-        for i, spec in enumerate(self.statspec):
-            self.current = "CubeStat %i" % (i)
-            if self.pattern == "ON" or (self.pattern == "AUTO" and not toomanypeaks):
-                peaks["stats"].append(self.findpatterns(spec, allpeaks["stats"][i], self.statseg[i]))
-            else:
+        if self.pattern == "ON" or (self.pattern == "AUTO" and not toomanypeaks):
+            jobs = [(spec, allpeaks["stats"][i], self.statseg[i]) for i, spec in enumerate(self.statspec)]
+            jobs += [(spec, allpeaks["specs"][i], self.specseg[i]) for i, spec in enumerate(self.specs)]
+            patterns = self.pmap("findpatterns", jobs)
+            for i, job in enumerate(jobs):
+                # a pool worker returns a copy of the spectrum
+                patterns[i].spec = job[0]
+            peaks["stats"] = patterns[:len(self.statspec)]
+            peaks["specs"] = patterns[len(self.statspec):]
+        else:
+            for i, spec in enumerate(self.statspec):
                 stpeaks = Peaks(spec=spec)
                 stpeaks.singles = allpeaks["stats"][i]
                 stpeaks.pairs = {}
                 stpeaks.segments = self.statseg[i]
                 peaks["stats"].append(stpeaks)
-        for i, spec in enumerate(self.specs):
-            self.current = "CubeSpec %i" % (i)
-            if self.pattern == "ON" or (self.pattern == "AUTO" and not toomanypeaks):
-                peaks["specs"].append(self.findpatterns(spec, allpeaks["specs"][i],
-                                                        self.specseg[i]))
-            else:
+            for i, spec in enumerate(self.specs):
                 sppeaks = Peaks(spec=spec)
                 sppeaks.singles = allpeaks["specs"][i]
                 sppeaks.pairs = {}
@@ -4539,6 +4656,15 @@ class Peaks(object):
         print "FSEGMENTS", self.fsegments
         return ""
 
+    def __getstate__(self):
+        # offsets and offsetdone are shared by all instances, they are not pickled
+        return dict([(k, getattr(self, k)) for k in self.__slots__
+                     if k not in ("offsets", "offsetdone")])
+
+    def __setstate__(self, state):
+        for k, v in state.iteritems():
+            setattr(self, k, v)
+
     @staticmethod
     def reset():
         """ Method to reset the Peaks static member variables so that LineID
@@ -19,6 +19,7 @@ import admit.util.Line as Line
 import admit.util.ImPlot as ImPlot
 import admit.util.utils as utils
 import admit.util.casautil as casautil
+from admit.util.ImagePool import ImagePool
 from admit.util import APlot
 from admit.util.AdmitLogging import AdmitLogging as logging
 
@@ -193,6 +194,8 @@ class Moment_AT(AT):
         # also get the channels the line actually covers (if any)
         bdpin = self._bdp_in[0]
         infile = bdpin.getimagefile(bt.CASA)
+        # the header of the input cube, as recorded in its BDP
+        cubeheader = casautil.getheader(bdpin)
         chans = self.getkey("chans")
         # the basename of the moments, we will append _0, _1, etc.
         basename = self.mkext(infile, "mom")
@@ -203,7 +206,7 @@ class Moment_AT(AT):
         sigma0 = self.getkey("sigma")
         sigma  = sigma0
 
-        ia = taskinit.iatool()
+        pool = ImagePool.shared()
 
         dt.tag("open")
 
@@ -275,9 +278,8 @@ class Moment_AT(AT):
                     }
             casa.immath(**args)
             # get the default mask name
-            ia.open(self.dir("mom0.masked"))
-            defmask = ia.maskhandler('default')
-            ia.close()
+            with pool.open(self.dir("mom0.masked")) as ia:
+                defmask = ia.maskhandler('default')
             dt.tag("mom0clip")
 
         # loop over moments to rename them to _0, _1, _2 etc.
@@ -299,9 +301,11 @@ class Moment_AT(AT):
                          output="%s:%s" % (self.dir(imagename), defmask[0]),
                          overwrite=True, inpmask="%s:%s" % (self.dir("mom0.masked"),
                                                             defmask[0]))
-                ia.open(self.dir(imagename))
-                ia.maskhandler('set', defmask)
-                ia.close()
+                # makemask and maskhandler write the image
+                pool.invalidate(self.dir(imagename))
+                with pool.open(self.dir(imagename)) as ia:
+                    ia.maskhandler('set', defmask)
+                pool.invalidate(self.dir(imagename))
                 dt.tag("makemask")
             if mom == 0:
                 beamarea = nppb(self.dir(imagename))
@@ -320,10 +324,12 @@ class Moment_AT(AT):
 
             # make the histogram plot
 
-            # get the label for the x axis
-            bunit = casa.imhead(imagename=self.dir(imagename), mode="get", hdkey="bunit")
-            # object for the caption
-            objectname = casa.imhead(imagename=self.dir(imagename), mode="get", hdkey="object")
+            # get the label for the x axis, the unit of the map (the image
+            # was just opened by getdata, so the pooled tool is reused)
+            with pool.open(self.dir(imagename)) as ia:
+                bunit = ia.brightnessunit()
+            # object for the caption, the same as of the input cube
+            objectname = cubeheader['object'] if 'object' in cubeheader else ''
 
             # Make the histogram plot
             # Since we give abspath in the constructor, figname should be relative
@@ -339,7 +345,8 @@ class Moment_AT(AT):
                                     auxiliary = auxname,
                                     auxtype   = auxtype,
                                     thumbnail = thumbname,
-                                    thumbnailtype = thumbtype)
+                                    thumbnailtype = thumbtype,
+                                    header    = header)
             auxname = myplot.getFigure(figno=myplot.figno,relative=True)
             auxthumb = myplot.getThumbnail(figno=myplot.figno,relative=True)
 
@@ -410,10 +417,9 @@ class Moment_AT(AT):
 
             # grab the X coordinates for the histogram, we want them in km/s
             # restfreq should also be in summary
-            restfreq = casa.imhead(self.dir(infile),mode="get",hdkey="restfreq")['value']/1e9    # in GHz
+            restfreq = cubeheader.restfreq()                     # in GHz
             # print "PJT  %.10f %.10f" % (restfreq,s_rest)
-            imval0 = casa.imval(self.dir(infile))
-            freqs = imval0['coords'].transpose()[2]/1e9
+            freqs = cubeheader.freqs()
             x = (1-freqs/restfreq)*utils.c
             # 
             h = casa.imstat(self.dir(infile), axes=[0,1])
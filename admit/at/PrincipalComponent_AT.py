@@ -5,10 +5,13 @@
 """
 import sys, os
 import numpy as np
-import matplotlib.mlab as mlab
 
 import admit
 import admit.util.bdp_types as bt
+try:
+  import taskinit
+except:
+  print "WARNING: No CASA; PrincipalComponent task cannot function."
 
 class PrincipalComponent_AT(admit.Task):
     """
@@ -75,7 +78,15 @@ class PrincipalComponent_AT(admit.Task):
     -----
     All input maps must have the same dimensions. Currently only 2-D maps are
     supported.
+
+    The input maps are read in tiles of rows (of about **tilesize** pixels per
+    map), twice: once to accumulate the means and covariances, and once to
+    project the pixels into the eigenimages. Only the tiles, not the maps,
+    need to fit in memory. The sign of each eigenvector (a row of the
+    projection matrix) is chosen such that its largest component is positive.
     """
+    # pixels per input map read at a time
+    tilesize = 1048576
 
     def __init__(self, **keyval):
         keys = {"clipvals" : [], "covarmin" : 0.90}   
@@ -155,21 +166,24 @@ class PrincipalComponent_AT(admit.Task):
 	if not stem: stem = "pca%d" % (self.id())
 
 	inum = 0
-	data = []
+	ifiles = []
 	icols = []
         for ibdp in self._bdp_in:
-	  # Convert input CASA images to numpy arrays.
+	  # Input CASA images are read in tiles of rows, see _tiles().
 	  istem = ibdp.getimagefile(bt.CASA)
 	  ifile = ibdp.baseDir() + istem
+	  ifiles.append(ifile)
 	  icols.append(os.path.splitext(istem)[0])
 	  if os.path.dirname(icols[-1]):
 	    icols[-1] = os.path.dirname(icols[-1])  # Typical line cube case.
-	  img = admit.casautil.getdata(ifile, zeromask=True).data
-	  data.append(img)
-	  admit.logging.info("%s shape=%s min=%g max=%g" % 
-              (icols[-1], str(img.shape), np.amin(img), np.amax(img)))
-	  assert len(data[0].shape) == 2, "Only 2-D input images supported"
-	  assert data[0].shape == data[inum].shape, "Input shapes must match"
+	  ia = taskinit.iatool()
+	  ia.open(ifile)
+	  ishape = list(ia.shape())
+	  ia.close()
+	  if inum == 0: shape = ishape
+	  assert len(ishape) >= 2 and np.prod(ishape[2:]) == 1, \
+	         "Only 2-D input images supported"
+	  assert ishape == shape, "Input shapes must match"
 	  inum += 1
 
 	# At least two inputs required for meaningful PCA!
@@ -177,21 +191,24 @@ class PrincipalComponent_AT(admit.Task):
 
 	# Each 2-D input image is a plane in a single multi-color image.
 	# Each color multiplet (one per pixel) is an observation.
-	# For PCA we collate the input images into a vector of observations.
-	shape = data[0].shape
-	npix = shape[0] * shape[1]
+	# The means and covariances of the (clipped) observations are
+	# accumulated one tile at a time, so the images are never all in memory.
 	clip = self.getkey('clipvals')
 	if not clip: clip = [0 for i in range(inum)]
 	assert len(clip) >= inum, "Too few clipvals provided"
 
-	# Clip input values and stack into a vector of observations.
-	pca_data = []
-        for i in range(inum):
-          nd = data[i]
-	  nd[nd < clip[i]] = 0.0
-	  pca_data.append(np.reshape(nd, (npix,1)))
-	pca_in = np.hstack(pca_data)
-	pca = mlab.PCA(pca_in)
+	pca = admit.IncrementalPCA(inum)
+	vmin = np.inf * np.ones(inum)
+	vmax = -vmin
+        for y0, dshape, tile in self._tiles(ifiles, shape, clip):
+	  pca.add(tile)
+	  if len(tile) > 0:
+	    vmin = np.minimum(vmin, tile.min(axis=0))
+	    vmax = np.maximum(vmax, tile.max(axis=0))
+	for i in range(inum):
+	  admit.logging.info("%s shape=%s min=%g max=%g" %
+              (icols[i], str(tuple(shape[:2])), vmin[i], vmax[i]))
+	pca.solve()
 
 	# Input statistics and output variance fractions.
 	#print "fracs:", pca.fracs
@@ -230,8 +247,8 @@ class PrincipalComponent_AT(admit.Task):
 	    "PCA Projection Matrix (normalized input to output)"
 	self.addoutput(obdp)
 
-	# Covariance matrix.
-	covar = np.cov(pca.a, rowvar=0, bias=1)
+	# Covariance matrix (of the normalized inputs).
+	covar = pca.covar
 	#print "covariance:", covar
 	obdp = admit.Table_BDP(stem + "_covar")
 	obdp.table.setData(covar)
@@ -239,14 +256,30 @@ class PrincipalComponent_AT(admit.Task):
 	obdp.table.description = "PCA Covariance Matrix"
 	self.addoutput(obdp)
 
-	# Collate projected observations into eigenimages and save output.
+	# Project the observations tile by tile into the eigenimages.
+	# As a cross-check, reconstruct input images and compute differences.
 	os.mkdir(self.baseDir()+stem+"_eigen")
-	pca_out = np.hsplit(pca.Y, inum)
-	odata = []
+	ofiles = ["%s_eigen/%d" % (stem, i) for i in range(inum)]
+	oimgs = []
         for i in range(inum):
-	  ofile = "%s_eigen/%d" % (stem, i)
-	  img = np.reshape(pca_out[i], shape)
-          odata.append(img)
+	  ia = taskinit.iatool()
+	  ia.fromimage(infile=ifile, outfile=self.baseDir()+ofiles[i]+".im",
+	               overwrite=True)
+	  oimgs.append(ia)
+	resid = np.zeros(inum)
+        for y0, dshape, tile in self._tiles(ifiles, shape, clip):
+	  y = pca.project(tile)
+	  for i in range(inum):
+	    oimgs[i].putchunk(y[:,i].reshape(dshape), blc=[0,y0]+[0]*(len(shape)-2))
+	  resid += ((pca.reconstruct(y) - tile)**2).sum(axis=0)
+        for k in range(inum):
+	  oimgs[k].close()
+          admit.logging.regression("PCA: %s residual: " % icols[k] +
+                                   str(np.sqrt(resid[k])))
+
+        for i in range(inum):
+	  ofile = ofiles[i]
+	  img = admit.casautil.getdata_raw(self.baseDir()+ofile+".im")
 	  #print ofile, "shape, min, max:", img.shape, np.amin(img), np.amax(img)
 
 	  aplot = admit.util.APlot(figno=inum, abspath=self.baseDir(),
@@ -255,7 +288,6 @@ class PrincipalComponent_AT(admit.Task):
 	  aplot.final()
 
 	  # Currently the output eigenimages are stored as PNG files only.
-	  admit.casautil.putdata_raw(self.baseDir()+ofile+".im", img, ifile)
 	  oimg = admit.Image()
 	  oimg.addimage(admit.imagedescriptor(ofile+".im",  format=bt.CASA))
 	  oimg.addimage(admit.imagedescriptor(ofile+".png", format=bt.PNG))
@@ -263,16 +295,6 @@ class PrincipalComponent_AT(admit.Task):
 	  obdp.addimage(oimg)
 	  self.addoutput(obdp)
 
-	# As a cross-check, reconstruct input images and compute differences.
-        for k in range(inum):
-	  ximg = pca.Wt[0][k]*odata[0]
-	  for l in range(1,inum):
-	    ximg += pca.Wt[l][k]*odata[l]
-
-	  ximg = pca.mu[k] + pca.sigma[k]*ximg
-          admit.logging.regression("PCA: %s residual: " % icols[k] +
-                                   str(np.linalg.norm(ximg - data[k])))
-
 	# Collect large covariance values for summary.
 	cvmin = self.getkey('covarmin')
 	cvsum = []
@@ -296,3 +318,52 @@ class PrincipalComponent_AT(admit.Task):
 						  ],
 						  "PrincipalComponent_AT",
 						  self.id(True), keys)
+
+    def _tiles(self, ifiles, shape, clip):
+        """
+        Iterate over tiles of rows of the input images.
+
+        Each tile holds about **tilesize** pixels per image, as an
+        (npix x nimages) array of observations, with masked values set to
+        zero and values below the clip values clipped to zero.
+
+        Parameters
+        ----------
+        ifiles : list of str
+          Input CASA image filenames.
+
+        shape : list of int
+          Shape of the input images.
+
+        clip : list of float
+          Clip value per input image.
+
+        Returns
+        -------
+        generator of tuple
+          (y0, dshape, tile): first row of the tile, shape of the image
+          chunk (for putchunk) and the observations.
+        """
+        nx, ny = shape[0], shape[1]
+        rows = max(1, min(ny, self.tilesize // nx))
+        ias = []
+        for ifile in ifiles:
+          ia = taskinit.iatool()
+          ia.open(ifile)
+          ias.append(ia)
+        try:
+          for y0 in range(0, ny, rows):
+            y1 = min(y0 + rows, ny) - 1
+            blc = [0, y0] + [0] * (len(shape) - 2)
+            trc = [-1, y1] + [0] * (len(shape) - 2)
+            cols = []
+            for i in range(len(ias)):
+              d = ias[i].getchunk(blc=blc, trc=trc, getmask=False)
+              m = ias[i].getchunk(blc=blc, trc=trc, getmask=True)
+              d[~m] = 0.0
+              d[d < clip[i]] = 0.0
+              cols.append(d.reshape(-1))
+            yield y0, d.shape, np.array(cols).T
+        finally:
+          for ia in ias:
+            ia.close()
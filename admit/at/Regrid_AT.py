@@ -11,6 +11,7 @@ from admit.Summary import SummaryEntry
 import admit.util.bdp_types as bt
 import admit.util.Table
 import admit.util.utils as utils
+import admit.util.casautil as casautil
 from admit.bdp.SpwCube_BDP import SpwCube_BDP
 import numpy as np
 import os as os
@@ -147,30 +148,21 @@ class Regrid_AT(AT):
           istem = ibdp.getimagefile(bt.CASA)
           ifile = ibdp.baseDir() + istem
           
-          h = casa.imhead(ifile, mode='list')
-          pix_size.append(np.abs(h['cdelt1'])) # pix scale in asec @todo QA ?                                    
-          chan_size.append(np.abs(h['cdelt3']))
+          h = casautil.getheader(ibdp)
+          pix_size.append(np.abs(h['cdelt'][0])) # pix scale in rad
+          chan_size.append(np.abs(h['cdelt'][2]))
           # grab the pixels 
-          pix_x = h['shape'][0]
-          pix_y = h['shape'][1]          
           pix_nu= h['shape'][2]
           
-          ia.open(ifile)
-          mycs = ia.coordsys(axes=[0,1,2])
 #           getting all four corners handles the case of images where
 #           x-y axis not aligned with RA-dec
-          for xpix in [0,pix_x]:
-            for ypix in [0,pix_y]:
-              x = mycs.toworld([xpix,ypix])['numeric'][0] 
-              y = mycs.toworld([xpix,ypix])['numeric'][1]
+          for x,y in h['corners']:
               pix_wc_x.append(x)
               pix_wc_y.append(y)
               
-          nu= mycs.toworld([pix_x,pix_y,0])['numeric'][2]
-          pix_wc_nu.append(nu)
-          nu= mycs.toworld([pix_x,pix_y,pix_nu])['numeric'][2]
-          pix_wc_nu.append(nu)
-          ia.close()
+          for nupix in [0,pix_nu]:
+              nu = h['crval'][2] + (nupix - h['crpix'][2]) * h['cdelt'][2]
+              pix_wc_nu.append(nu)
  
         min_ra = np.min(pix_wc_x)
         max_ra = np.max(pix_wc_x)
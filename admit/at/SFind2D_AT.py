@@ -11,18 +11,24 @@ from admit.util import APlot
 import admit.util.bdp_types as bt
 from admit.bdp.SourceList_BDP import SourceList_BDP
 import admit.util.casautil as casautil
+from admit.util.ImagePool import ImagePool
 import admit.util.Image as Image
 import admit.util.Line as Line
 import admit.util.ImPlot as ImPlot
 from admit.bdp.Image_BDP import Image_BDP
 from admit.bdp.CubeStats_BDP import CubeStats_BDP
 import admit.util.utils as utils
+import admit.util.stats as stats
+from admit.util.FitsCube import FitsCube
+from admit.util.SourceFinder import SourceFinder
 from admit.util.AdmitLogging import AdmitLogging as logging
 
 import numpy as np
 import numpy.ma as ma
 from copy import deepcopy
 
+import re
+import math
 import types
 try:
     import casa
@@ -34,7 +40,8 @@ class SFind2D_AT(AT):
     """
     Find sources in a 2-D map -- Sources are found based on peak flux density
     (Jy/beam) and fitted with a Gaussian to determine source parameters. The
-    AT uses the CASA findsources task. The key words allow the cutoff level
+    AT uses the CASA findsources task, or a native (NumPy/SciPy) finder, see
+    the **engine** keyword. The key words allow the cutoff level
     for source discovery to be limited either by N times the RMS noise or by
     a dynamic range. The latter is important when a strong source in the image
     increases noise local to that source. SFind2d_AT can be used on continuum
@@ -114,6 +121,21 @@ class SFind2D_AT(AT):
           Image zoom ratio applied to the source map plot. This does not
           affect the base (CASA) image itself. Default: 1.
 
+        **engine**: string
+          The source finder: "casa" for CASA's ia.findsources(), or "native"
+          for the NumPy/SciPy finder of `SourceFinder <SourceFinder.html>`_,
+          which finds islands above the cutoff, their local maxima, and fits
+          a Gaussian to each from its moments. The native finder reads a
+          FITS version of the map when the input BDP has one, and gets the
+          noise from the map itself (see **robust**; only the hinges-fences
+          and classic algorithms), so it needs neither imstat nor
+          findsources. Its **region** can only be a pixel box, e.g.
+          'box[[10pix,10pix],[200pix,200pix]]'. Default: "casa".
+
+        **nproc**: int
+          Number of processes for the native engine, which searches large
+          maps in tiles. Default: 1.
+
     **Input BDPs**
 
         **SpwCube_BDP**: count: 1
@@ -150,6 +172,8 @@ class SFind2D_AT(AT):
                 "snmax"    : 35.0,         # default to limit dynamic range to 100
                 "nmax"     : 30,           # default to limit max number of sources to 30
                 "zoom"     : 1,            # default map plot zoom ratio
+                "engine"   : "casa",       # source finder: casa or native
+                "nproc"    : 1,            # processes for the native engine
                }
 
         AT.__init__(self,keys,keyval)
@@ -188,6 +212,231 @@ class SFind2D_AT(AT):
         else:
             return {}
 
+    def casafind(self, infile, cutoff, nmax, region):
+        """ Find the sources with CASA's ia.findsources().
+
+            Parameters
+            ----------
+            infile : str
+                The CASA image, relative to the project.
+
+            cutoff : float
+                Cutoff for the peaks, relative to the strongest.
+
+            nmax : int
+                Maximum number of sources.
+
+            region : str
+                CASA region to search, "" for the whole map.
+
+            Returns
+            -------
+            tuple
+                The sources, a list of (i, x, y, ra, dec, flux, peak, major,
+                minor, pa), and the units of flux, size and angle.
+        """
+        args = {"cutoff" : cutoff}
+        args["nmax"] = nmax
+        if region != "" :
+            args["region"] = region
+        #args["mask"] = ""
+        args["point"] = False
+        args["width"] = 5
+        args["negfind"] = False
+        bpatch = True                                  # patch units to Jy/beam for ia.findsources()
+
+        # connect to casa image and call casa ia.findsources tool
+        pool = ImagePool.shared()
+        with pool.open(self.dir(infile)) as ia:
+            # findsources() cannot deal with  'Jy/beam.km/s' ???
+            # so for the duration of findsources() we patch it
+            bunit = ia.brightnessunit()
+            if bpatch and bunit != 'Jy/beam':
+                logging.warning("Temporarely patching your %s units to Jy/beam for ia.findsources()" % bunit) 
+                ia.setbrightnessunit('Jy/beam')
+            else:
+                bpatch = False
+            atab = ia.findsources(**args)
+            if bpatch:
+                ia.setbrightnessunit(bunit)
+            # coordinates and the map, for the peak values of the sources
+            cs = ia.coordsys()
+            plane = ia.getchunk(dropdeg=True)
+        if bpatch:
+            pool.invalidate(self.dir(infile))
+
+        nsources = atab["nelements"]
+        sources = []
+        units = ("", "n/a", "n/a")
+        if nsources > 0:
+            logging.debug("%s" % str(atab['component0']['shape']))
+            funits = atab['component0']['flux']['unit']
+            if atab['component0']['shape'].has_key('majoraxis'):
+                units = (funits, atab['component0']['shape']['majoraxis']['unit'],
+                         atab['component0']['shape']['positionangle']['unit'])
+            else:
+                units = (funits, "n/a", "n/a")
+            # convert all source positions to pixels at once, the other
+            # world axes (if any) at their reference value
+            world = np.array(cs.referencevalue()['numeric'], dtype=float)
+            world = np.repeat(world.reshape(-1,1), nsources, axis=1)
+            for i in range(nsources):
+                c = "component%d" % i
+                world[0][i] = atab[c]['shape']['direction']['m0']['value']
+                world[1][i] = atab[c]['shape']['direction']['m1']['value']
+            pixels = cs.topixelmany(world)['numeric']
+        for i in range(nsources):
+            c = "component%d" % i
+            xpos = pixels[0][i]
+            ypos = pixels[1][i]
+            rd = cs.toworld([xpos,ypos],'s')
+            ra = rd['string'][0][:12]
+            dec = rd['string'][1][:12]
+            flux = atab[c]['flux']['value'][0]
+            if atab[c]['shape'].has_key('majoraxis'):
+                smajor = atab[c]['shape']['majoraxis']['value']
+                sminor = atab[c]['shape']['minoraxis']['value']
+                sangle = atab[c]['shape']['positionangle']['value']
+            else:
+                smajor = 0.0
+                sminor = 0.0
+                sangle = 0.0
+            # as ia.pixelvalue(), which truncates the pixel position
+            ix = int(xpos)
+            iy = int(ypos)
+            if ix < 0 or iy < 0 or ix >= plane.shape[0] or iy >= plane.shape[1]:
+                logging.warning("Problem with source %d @ %d,%d" % (i,xpos,ypos))
+                continue
+            peakf = float(plane[ix][iy])
+            sources.append((i, xpos, ypos, ra, dec, flux, peakf, smajor, sminor, sangle))
+        cs.done()
+        return (sources, units)
+
+    def nativefind(self, xydata, header, threshold, nmax):
+        """ Find the sources with the native finder, SourceFinder.
+
+            Parameters
+            ----------
+            xydata : 2D numpy array
+                The map, indexed [x,y]; NaN for pixels not to search.
+
+            header : ImageHeader
+                The header of the map.
+
+            threshold : float
+                Cutoff for the peaks.
+
+            nmax : int
+                Maximum number of sources.
+
+            Returns
+            -------
+            tuple
+                As casafind().
+        """
+        pixel = header.pixelsize()
+        beam = header.beam()
+        width = beam[0] / pixel if beam is not None else 3.0
+        found = SourceFinder(xydata, width=width, nproc=self.getkey("nproc")).find(threshold, nmax)
+
+        # the integrated flux: Jy/beam over the beam area gives Jy
+        funits = header.unit()
+        fscale = 1.0
+        if beam is not None and '/beam' in funits:
+            fscale = 1.0 / (math.pi / (4.0 * math.log(2.0)) * beam[0] * beam[1] / pixel**2)
+            funits = funits.replace('/beam', '', 1)
+        pa = found['pa']
+        if header['cdelt'][0] > 0:
+            # RA increases to the right
+            pa = (180.0 - pa) % 180.0
+        (ra, dec) = header.direction(found['x'], found['y'])
+        sources = []
+        for i in range(len(found['x'])):
+            (ras, decs) = SourceFinder.radec(ra[i], dec[i])
+            sources.append((i, float(found['x'][i]), float(found['y'][i]), ras[:12], decs[:12],
+                            float(found['flux'][i] * fscale), float(found['peak'][i]),
+                            float(found['major'][i] * pixel), float(found['minor'][i] * pixel),
+                            float(pa[i])))
+        return (sources, (funits, "arcsec", "deg"))
+
+    def getmap(self, bdpin):
+        """ The input map as a numpy array, for the native engine: from the
+            FITS file of the BDP if it has one, otherwise from its CASA image.
+
+            Parameters
+            ----------
+            bdpin : Image_BDP
+                The input BDP.
+
+            Returns
+            -------
+            tuple
+                The image file (relative to the project) and the map,
+                indexed [x,y], with NaN for masked pixels.
+        """
+        fits = bdpin.image.getimage(bt.FITS)
+        if fits is None:
+            infile = bdpin.getimagefile(bt.CASA)
+            xydata = casautil.getdata(self.dir(infile))
+            return (infile, xydata.astype(np.float64).filled(np.nan))
+        cube = FitsCube(self.dir(fits.file))
+        if len(cube.shape) < 2 or np.prod(cube.shape[2:]) != 1:
+            raise Exception,"Input map dimension not 2: %s" % fits.file
+        plane = cube.plane(cube.data(), 0, [0,0], [cube.shape[0]-1, cube.shape[1]-1])
+        return (fits.file, np.asarray(plane, dtype=np.float64).T)
+
+    def inregion(self, xydata, region):
+        """ The map with NaN outside a region; the native engine only
+            supports a box in pixels.
+
+            Parameters
+            ----------
+            xydata : 2D numpy array
+                The map, indexed [x,y].
+
+            region : str
+                The region, e.g. 'box[[10pix,10pix],[200pix,200pix]]'.
+
+            Returns
+            -------
+            2D numpy array
+        """
+        m = re.match(r"^\s*box\s*\[\s*\[\s*(\d+)\s*pix\s*,\s*(\d+)\s*pix\s*\]\s*,"
+                     r"\s*\[\s*(\d+)\s*pix\s*,\s*(\d+)\s*pix\s*\]\s*\]\s*$", region)
+        if m is None:
+            raise Exception,"SFind2D: the native engine only takes a pixel box region, not %s" % region
+        (x0, y0, x1, y1) = [int(v) for v in m.groups()]
+        d = np.zeros(xydata.shape) + np.nan
+        d[x0:x1+1, y0:y1+1] = xydata[x0:x1+1, y0:y1+1]
+        return d
+
+    def robustsigma(self, data, robust):
+        """ The noise of the map, as imstat would give it with the robust
+            keyword; for the native engine.
+
+            Parameters
+            ----------
+            data : numpy array
+                The good pixels.
+
+            robust : list
+                The robust keyword; only the hinges-fences and classic
+                algorithms are supported, others use hinges-fences.
+
+            Returns
+            -------
+            float
+        """
+        if len(robust) > 0 and robust[0][:2] == 'cl':
+            return float(data.std())
+        if len(robust) == 0 or robust[0][:2] != 'hi':
+            logging.warning("SFind2D: robust=%s not supported by the native engine, using ['hin',1.5]" % str(robust))
+            robust = ['hin', 1.5]
+        f = 1.5
+        if len(robust) > 1 and robust[1] > 0:
+            f = robust[1]
+        return float(stats.robust(data, f).std())
+
     def run(self):
         """ The run method creates the BDP
 
@@ -208,16 +457,23 @@ class SFind2D_AT(AT):
         robust = self.getkey("robust")
         snmax  = self.getkey("snmax")
         nmax   = self.getkey("nmax")
+        engine = self.getkey("engine")
         ds9 = True                                     # writes a "ds9.reg" file
         mpl = True                                     # aplot.map1() plot
         dynlog = 20.0                                  # above this value of dyn range finder chart is log I-scaled
-        bpatch = True                                  # patch units to Jy/beam for ia.findsources()
+        if engine not in ["casa", "native"]:
+            raise Exception,"SFind2D: engine must be casa or native, not %s" % engine
         
-        # get the input casa image from bdp[0]
+        # get the input image from bdp[0]
         bdpin = self._bdp_in[0]
-        infile = bdpin.getimagefile(bt.CASA)
-        if mpl:
-            data = np.flipud(np.rot90(casautil.getdata(self.dir(infile)).data))
+        if engine == "native":
+            infile, xydata = self.getmap(bdpin)
+            if mpl:
+                data = np.flipud(np.rot90(xydata))
+        else:
+            infile = bdpin.getimagefile(bt.CASA)
+            if mpl:
+                data = np.flipud(np.rot90(casautil.getdata(self.dir(infile)).data))
 
         # check if there is a 2nd image (which will be a PB)
         for i in range(len(self._bdp_in)):
@@ -237,9 +493,14 @@ class SFind2D_AT(AT):
         slbase = self.mkext(infile,'sl')
 
         # make sure it's a 2D map
-        if not casautil.mapdim(self.dir(infile),2):
+        header = casautil.getheader(bdpin)
+        if header.dim() != 2:
             raise Exception,"Input map dimension not 2: %s" % infile
 
+        # the native engine searches (and gets statistics of) the region only
+        if engine == "native" and region != "":
+            xydata = self.inregion(xydata, region)
+
         # arguments for imstat call if required
         args = {"imagename" : self.dir(infile)}
         if region != "":
@@ -251,7 +512,17 @@ class SFind2D_AT(AT):
         # if no CubeStats BDP was given and no sigma was specified:
         # find a noise level via casa.imstat()
         # if a CubeStat_BDP is given get it from there.
-        if bdpin_cst == None:
+        if bdpin_cst == None and engine == "native":
+            # the same statistics, from the map
+            good = xydata[np.isfinite(xydata)]
+            if len(good) == 0:
+                raise Exception,"No good data in %s" % infile
+            dmin  = float(good.min())
+            dmax  = float(good.max())
+            if sigma <= 0.0 :
+                sigma = self.robustsigma(good, robust)
+            dt.tag("stats")
+        elif bdpin_cst == None:
             # get statistics from input image with imstat because no CubeStat_BDP
             stat  = casa.imstat(**args)
             dmin  = float(stat["min"][0])                 # these would be wrong if robust were used already
@@ -277,37 +548,20 @@ class SFind2D_AT(AT):
         else:
             cutoff = 1.0/drange
         logging.info("sigma, dmin, dmax, snmax, cutoff %g %g %g %g %g" % (sigma, dmin, dmax, snmax, cutoff))
-        # define arguments for call to findsources
-        args2 = {"cutoff" : cutoff}
-        args2["nmax"] = nmax
-        if region != "" :
-            args2["region"] = region
-        #args2["mask"] = ""
-        args2["point"] = False
-        args2["width"] = 5
-        args2["negfind"] = False
         # set-up for SourceList_BDP
         slbdp = SourceList_BDP(slbase)
 
-        # connect to casa image and call casa ia.findsources tool
-        ia = taskinit.iatool()
-        ia.open(self.dir(infile))
-
-        # findsources() cannot deal with  'Jy/beam.km/s' ???
-        # so for the duration of findsources() we patch it
-        bunit = ia.brightnessunit()
-        if bpatch and bunit != 'Jy/beam':
-            logging.warning("Temporarely patching your %s units to Jy/beam for ia.findsources()" % bunit) 
-            ia.setbrightnessunit('Jy/beam')
+        if engine == "native":
+            # the cutoff is relative to the strongest source, as for findsources()
+            (sources, units) = self.nativefind(xydata, header, cutoff * dmax, nmax)
         else:
-            bpatch = False
-        atab = ia.findsources(**args2)
-        if bpatch:
-            ia.setbrightnessunit(bunit)
+            (sources, units) = self.casafind(infile, cutoff, nmax, region)
         
         taskargs = "nsigma=%4.1f sigma=%g region=%s robust=%s snmax=%5.1f nmax=%d" % (nsigma,sigma,str(region),str(robust),snmax,nmax)
+        if engine == "native":
+            taskargs = taskargs + " engine=native"
         dt.tag("findsources")
-        nsources = atab["nelements"] 
+        nsources = len(sources)
         xtab = []
         ytab = []
         logscale = False
@@ -316,16 +570,9 @@ class SFind2D_AT(AT):
             # @TODO: Why are Xpix, YPix not stored in the table?
             #        -> PJT: I left them out since they are connected to an image which may not be available here
             #                but we should store the frequency of the observation here for later bandmerging
-            logging.debug("%s" % str(atab['component0']['shape']))
             logging.info("Right Ascen.  Declination   X(pix)   Y(pix)      Peak       Flux    Major   Minor    PA    SNR")
-            funits = atab['component0']['flux']['unit']
-            if atab['component0']['shape'].has_key('majoraxis'):
-                sunits = atab['component0']['shape']['majoraxis']['unit']
-                aunits = atab['component0']['shape']['positionangle']['unit']
-            else:
-                sunits = "n/a"
-                aunits = "n/a"
-            punits = ia.summary()['unit']
+            (funits, sunits, aunits) = units
+            punits = header.unit()
             logging.info("                                               %s       %s    %s   %s   %s" % (punits,funits,sunits,sunits,aunits))
             #
             # @todo future improvement is to look at image coordinates and control output appropriately
@@ -335,32 +582,9 @@ class SFind2D_AT(AT):
                 regname = self.mkext(infile,'ds9.reg')
                 fp9 = open(self.dir(regname),"w!")
             sn0 = -1.0
-            for i in range(nsources):
-                c = "component%d" % i
+            for (i, xpos, ypos, ra, dec, flux, peakf, smajor, sminor, sangle) in sources:
                 name = "%d" % (i+1)
-                r = atab[c]['shape']['direction']['m0']['value']
-                d = atab[c]['shape']['direction']['m1']['value']
-                pixel = ia.topixel([r,d])
-                xpos = pixel['numeric'][0]
-                ypos = pixel['numeric'][1]
-                rd = ia.toworld([xpos,ypos],'s')
-                ra = rd['string'][0][:12]
-                dec = rd['string'][1][:12]
-                flux = atab[c]['flux']['value'][0]
                 sumflux = sumflux + flux
-                if atab[c]['shape'].has_key('majoraxis'):
-                    smajor = atab[c]['shape']['majoraxis']['value']
-                    sminor = atab[c]['shape']['minoraxis']['value']
-                    sangle = atab[c]['shape']['positionangle']['value']
-                else:
-                    smajor = 0.0
-                    sminor = 0.0
-                    sangle = 0.0
-                peakstr = ia.pixelvalue([xpos,ypos,0,0])
-                if len(peakstr) == 0:
-                    logging.warning("Problem with source %d @ %d,%d" % (i,xpos,ypos))
-                    continue
-                peakf = peakstr['value']['value']
                 snr = peakf/sigma
                 if snr > dynlog:
                     logscale = True
@@ -383,12 +607,9 @@ class SFind2D_AT(AT):
         logging.regression("CONTFLUX: %d %g" % (nsources,sumflux))
         
 
-        summary = ia.summary()
-        beammaj = summary['restoringbeam']['major']['value']
-        beammin = summary['restoringbeam']['minor']['value']
-        beamunit = summary['restoringbeam']['minor']['unit']
-        beamang = summary['restoringbeam']['positionangle']['value']
-        angunit = summary['restoringbeam']['positionangle']['unit']
+        (beammaj, beammin, beamang) = header.beam()
+        beamunit = 'arcsec'
+        angunit = 'deg'
         # @todo add to table comments?
         logging.info(" Fitted Gaussian size; NOT deconvolved source size.")
         logging.info(" Restoring Beam: Major axis: %10.3g %s , Minor axis: %10.3g %s , PA: %5.1f %s" % (beammaj, beamunit, beammin, beamunit, beamang, angunit))
@@ -5,35 +5,40 @@
    from the AT base class.
 """
 # This file is automatically generated, do not edit.
-# Standard, streamlined AT names.
-from BDPIngest_AT               import BDPIngest_AT               as BDPIngest_AT
-from ContinuumMap_AT            import ContinuumMap_AT            as ContinuumMap_AT
-from ContinuumSub_AT            import ContinuumSub_AT            as ContinuumSub_AT
-from CubeSpectrum_AT            import CubeSpectrum_AT            as CubeSpectrum_AT
-from CubeStats_AT               import CubeStats_AT               as CubeStats_AT
-from CubeSum_AT                 import CubeSum_AT                 as CubeSum_AT
-from DescriptionVector_AT       import DescriptionVector_AT       as DescriptionVector_AT
-from Export_AT                  import Export_AT                  as Export_AT
-from FeatureList_AT             import FeatureList_AT             as FeatureList_AT
-from File_AT                    import File_AT                    as File_AT
-from Flow11_AT                  import Flow11_AT                  as Flow11_AT
-from Flow1N_AT                  import Flow1N_AT                  as Flow1N_AT
-from FlowMN_AT                  import FlowMN_AT                  as FlowMN_AT
-from FlowN1_AT                  import FlowN1_AT                  as FlowN1_AT
-from GenerateSpectrum_AT        import GenerateSpectrum_AT        as GenerateSpectrum_AT
-from Ingest_AT                  import Ingest_AT                  as Ingest_AT
-from LineCube_AT                import LineCube_AT                as LineCube_AT
-from LineID_AT                  import LineID_AT                  as LineID_AT
-from LineSegment_AT             import LineSegment_AT             as LineSegment_AT
-from Moment_AT                  import Moment_AT                  as Moment_AT
-from OverlapIntegral_AT         import OverlapIntegral_AT         as OverlapIntegral_AT
-from PVCorr_AT                  import PVCorr_AT                  as PVCorr_AT
-from PVSlice_AT                 import PVSlice_AT                 as PVSlice_AT
-from PrincipalComponent_AT      import PrincipalComponent_AT      as PrincipalComponent_AT
-from Regrid_AT                  import Regrid_AT                  as Regrid_AT
-from SFind2D_AT                 import SFind2D_AT                 as SFind2D_AT
-from Smooth_AT                  import Smooth_AT                  as Smooth_AT
-from SpectralMap_AT             import SpectralMap_AT             as SpectralMap_AT
-from SpwCube_AT                 import SpwCube_AT                 as SpwCube_AT
-from Template_AT                import Template_AT                as Template_AT
-from Test_AT                    import Test_AT                    as Test_AT
+from admit.util.lazyimport import lazymodule
+
+# Standard, streamlined AT names, imported on first access.
+lazymodule(__name__, {
+    'BDPIngest_AT'             : ('admit.at.BDPIngest_AT',               'BDPIngest_AT'),
+    'ContinuumMap_AT'          : ('admit.at.ContinuumMap_AT',            'ContinuumMap_AT'),
+    'ContinuumSub_AT'          : ('admit.at.ContinuumSub_AT',            'ContinuumSub_AT'),
+    'CubeSpectrum_AT'          : ('admit.at.CubeSpectrum_AT',            'CubeSpectrum_AT'),
+    'CubeStats_AT'             : ('admit.at.CubeStats_AT',               'CubeStats_AT'),
+    'CubeSum_AT'               : ('admit.at.CubeSum_AT',                 'CubeSum_AT'),
+    'DescriptionVector_AT'     : ('admit.at.DescriptionVector_AT',       'DescriptionVector_AT'),
+    'Export_AT'                : ('admit.at.Export_AT',                  'Export_AT'),
+    'FeatureList_AT'           : ('admit.at.FeatureList_AT',             'FeatureList_AT'),
+    'File_AT'                  : ('admit.at.File_AT',                    'File_AT'),
+    'Flow11_AT'                : ('admit.at.Flow11_AT',                  'Flow11_AT'),
+    'Flow1N_AT'                : ('admit.at.Flow1N_AT',                  'Flow1N_AT'),
+    'FlowMN_AT'                : ('admit.at.FlowMN_AT',                  'FlowMN_AT'),
+    'FlowN1_AT'                : ('admit.at.FlowN1_AT',                  'FlowN1_AT'),
+    'GenerateCube_AT'          : ('admit.at.GenerateCube_AT',            'GenerateCube_AT'),
+    'GenerateSpectrum_AT'      : ('admit.at.GenerateSpectrum_AT',        'GenerateSpectrum_AT'),
+    'Ingest_AT'                : ('admit.at.Ingest_AT',                  'Ingest_AT'),
+    'LineCube_AT'              : ('admit.at.LineCube_AT',                'LineCube_AT'),
+    'LineID_AT'                : ('admit.at.LineID_AT',                  'LineID_AT'),
+    'LineSegment_AT'           : ('admit.at.LineSegment_AT',             'LineSegment_AT'),
+    'Moment_AT'                : ('admit.at.Moment_AT',                  'Moment_AT'),
+    'OverlapIntegral_AT'       : ('admit.at.OverlapIntegral_AT',         'OverlapIntegral_AT'),
+    'PVCorr_AT'                : ('admit.at.PVCorr_AT',                  'PVCorr_AT'),
+    'PVSlice_AT'               : ('admit.at.PVSlice_AT',                 'PVSlice_AT'),
+    'PrincipalComponent_AT'    : ('admit.at.PrincipalComponent_AT',      'PrincipalComponent_AT'),
+    'Regrid_AT'                : ('admit.at.Regrid_AT',                  'Regrid_AT'),
+    'SFind2D_AT'               : ('admit.at.SFind2D_AT',                 'SFind2D_AT'),
+    'Smooth_AT'                : ('admit.at.Smooth_AT',                  'Smooth_AT'),
+    'SpectralMap_AT'           : ('admit.at.SpectralMap_AT',             'SpectralMap_AT'),
+    'SpwCube_AT'               : ('admit.at.SpwCube_AT',                 'SpwCube_AT'),
+    'Template_AT'              : ('admit.at.Template_AT',                'Template_AT'),
+    'Test_AT'                  : ('admit.at.Test_AT',                    'Test_AT'),
+})
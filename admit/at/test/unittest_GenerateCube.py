@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+#
+# Testing GenerateCube AT
+#
+# Functions covered by test cases:
+#    GenerateCube_AT.header()
+#    GenerateCube_AT.writefits()
+#    GenerateCube_AT.writeblock()
+#    GenerateCube_AT.run()
+#    FitsCube.create()
+
+import admit
+import sys, os
+import shutil
+import logging
+import tempfile
+import unittest
+import numpy as np
+
+from admit.at.GenerateCube_AT import GenerateCube_AT
+from admit.util.FitsCube import FitsCube
+from admit.util.ImageHeader import ImageHeader
+import admit.util.bdp_types as bt
+
+class TestGenerateCube_AT(unittest.TestCase):
+
+    # initialization.
+    def setUp(self):
+        self.verbose = False
+        self.testName = "GenerateCube AT Unit Test"
+        self.tmpdir = tempfile.mkdtemp()
+        self.keys = {"naxis" : [40, 30, 50], "seed" : 7, "noise" : 0.01, "pixel" : 0.5,
+                     "beam" : 2.0, "size" : 0.0, "lines" : [(20.0, 115.2712018, 30.0)]}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_AAAwhoami(self):
+        print "==== %s ====\n" % self.testName
+
+    # the FITS file: header, noise and line
+    def test_write(self):
+        fits = os.path.join(self.tmpdir, "a.fits")
+        h = ImageHeader(GenerateCube_AT(**self.keys).writefits(fits))
+        cube = FitsCube(fits)
+        self.assertTrue(cube.supported())
+        self.assertEqual(cube.shape, (40, 30, 50, 1))
+        self.assertEqual(h.shape(), [40, 30, 50, 1])
+        self.assertEqual(cube.header['CTYPE3'], 'FREQ')
+        self.assertAlmostEqual(cube.header['BMAJ'] * 3600.0, 2.0)
+        self.assertAlmostEqual(cube.header['CRVAL3'], 115.2712018e9)
+        self.assertAlmostEqual(h.pixelsize(), 0.5)
+        self.assertEqual(h.beam(), (2.0, 2.0, 0.0))
+        data = cube.data()[0]
+        # the line peaks at the central pixel and channel, with 20 times the noise
+        z, y, x = np.unravel_index(np.argmax(data), data.shape)
+        self.assertEqual((y, x), (15, 20))
+        self.assertTrue(abs(z - 25) <= 3)
+        self.assertTrue(abs(data[25, 15, 20] - 0.2) < 0.05)
+        # noise, away from the line
+        self.assertTrue(abs(data[:5].std() - 0.01) < 0.001)
+        # repeatable with a seed, also when written in blocks by several processes
+        fits2 = os.path.join(self.tmpdir, "b.fits")
+        GenerateCube_AT(**self.keys).writefits(fits2)
+        self.assertEqual(open(fits).read(), open(fits2).read())
+        self.keys["nlines"] = 3
+        for nproc in [1, 2]:
+            at = GenerateCube_AT(nproc=nproc, **self.keys)
+            at.BLOCK = 40 * 30 * 7
+            at.writefits(os.path.join(self.tmpdir, "c%d.fits" % nproc))
+        self.assertEqual(open(os.path.join(self.tmpdir, "c1.fits")).read(),
+                         open(os.path.join(self.tmpdir, "c2.fits")).read())
+
+    # without noise the cube is the model, also written in several blocks
+    def test_model(self):
+        self.keys.update({"seed" : -1, "contin" : 5.0, "vgrad" : 2.0, "size" : 4.0,
+                          "lines" : [(20.0, 115.2712018, 5.0)]})
+        at = GenerateCube_AT(**self.keys)
+        at.BLOCK = 40 * 30 * 3
+        fits = os.path.join(self.tmpdir, "a.fits")
+        at.writefits(fits)
+        data = FitsCube(fits).data()[0]
+        # continuum in the first channel, a Gaussian of FWHM sqrt(4**2+2**2) arcsec
+        fwhm = np.sqrt(20.0) / 0.5
+        x = np.arange(40) - 20
+        self.assertTrue(np.allclose(data[0, 15], 0.05 * np.exp(-4 * np.log(2) * x**2 / fwhm**2), atol=1e-6))
+        # the line moves 1 km/s (0.38 MHz, 0.77 channels) per column
+        spec = data[:, 15, :] - data[0, 15, :]
+        peak = np.argmax(spec, axis=0)
+        self.assertTrue(peak[10] > peak[20] > peak[30])
+
+    # run in a project: a SpwCube_BDP with the FITS cube and its header
+    def test_run(self):
+        a = admit.Project(os.path.join(self.tmpdir, "p.admit"))
+        a.plotparams(admit.PlotControl.NOPLOT)
+        t = a.addtask(GenerateCube_AT(**self.keys))
+        a.run()
+        bdp = a[t][0]
+        fits = bdp.getimagefile(bt.FITS)
+        self.assertTrue(os.path.exists(a.dir() + fits))
+        self.assertEqual(bdp.getheader().shape(), [40, 30, 50, 1])
+        self.assertAlmostEqual(bdp.getheader().restfreq(), 115.2712018)
+        # the log file goes with the temporary directory; once the project is
+        # deleted, stand-alone tasks would still log to it
+        for h in logging.getLogger(a._loggername).handlers[:]:
+            if isinstance(h, logging.FileHandler):
+                logging.getLogger(a._loggername).removeHandler(h)
+                h.close()
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_GenerateCube.py"
+# or "./unittest_GenerateCube.py"
+if __name__ == '__main__':
+    unittest.main()
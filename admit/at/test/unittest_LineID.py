@@ -0,0 +1,47 @@
+#! /usr/bin/env python
+#
+# Testing LineID AT
+#
+# Functions covered by test cases:
+#    LineID_AT.findpatterns()
+
+import admit
+import sys, os
+import unittest
+import numpy as np
+
+from admit.at.LineID_AT import LineID_AT
+from admit.util.Spectrum import Spectrum
+
+class TestLineID_AT(unittest.TestCase):
+
+    # initialization: a spectrum with two pairs of lines 10 channels apart
+    def setUp(self):
+        self.verbose = False
+        self.testName = "LineID AT Unit Test"
+        self.at = LineID_AT()
+        self.at.tol = self.at.getkey("minchan")
+        spec = np.zeros(200)
+        spec[[50, 60, 100, 110, 170]] = 1.0
+        self.spec = Spectrum(spec=spec, freq=230.0 + 0.001 * np.arange(200),
+                             chans=np.arange(200))
+
+    def test_AAAwhoami(self):
+        print "==== %s ====\n" % self.testName
+
+    # the peak points are (fractional) channels from the peak finders
+    def test_findpatterns(self):
+        for points in [[50, 60, 100, 110, 170], [50.2, 60.1, 100.0, 110.3, 170.0]]:
+            peaks = self.at.findpatterns(self.spec, points, [[40, 180]])
+            if(self.verbose):
+                print "\npairs:", peaks.pairs, "singles:", peaks.singles
+            self.assertEqual(len(peaks.pairs), 1)
+            self.assertEqual(sorted(peaks.pairs.values()[0]),
+                             [[points[0], points[1]], [points[2], points[3]]])
+            self.assertEqual(peaks.singles, [points[4]])
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_LineID.py"
+# or "./unittest_LineID.py"
+if __name__ == '__main__':
+    unittest.main()
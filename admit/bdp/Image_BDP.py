@@ -13,6 +13,7 @@ from BDP import BDP
 # get the multiimage base class
 from admit.util.MultiImage import MultiImage
 from admit.util.Image import Image
+from admit.util.ImageHeader import ImageHeader
 import admit.util.bdp_types as bt
 
 
@@ -106,3 +107,44 @@ class Image_BDP(BDP):
 
         """
         return self.image.getimage(imtype, name).file
+
+    def setheader(self, header, name=""):
+        """ Method to record the header descriptor of an image, see
+            casautil.imheader()
+
+            Parameters
+            ----------
+            header : dict
+                The header descriptor
+
+            name : str
+                The name of the image instance.
+                Default : ""
+
+            Returns
+            -------
+            None
+
+        """
+        self.image.getimageclass(name).header = header
+
+    def getheader(self, name=""):
+        """ Method to get the header descriptor of an image, so its shape,
+            axes, beam and units are known without opening the image
+
+            Parameters
+            ----------
+            name : str
+                The name of the image instance.
+                Default : ""
+
+            Returns
+            -------
+            ImageHeader, or None if no header was recorded (use
+            casautil.getheader() to create it on demand)
+
+        """
+        image = self.image.getimageclass(name)
+        if image is None or len(image.header) == 0:
+            return None
+        return ImageHeader(image.header)
@@ -104,7 +104,7 @@ KEYDESC = {
 def _run(argv):
 
     # Verify arguments are good
-    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return
+    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return False
 
     cubefile = argv[1]
     contfile = None
@@ -122,7 +122,7 @@ def _run(argv):
         KEYS["cutoff"]   = ast.literal_eval(str(KEYS["cutoff"]))
     except Exception, e:
         print("Exception converting keyword value to number:",e)
-        return
+        return False
 
     #========================================================================
     # Master project.  Beginning for ADMIT Commands
@@ -179,6 +179,7 @@ def _run(argv):
     #  Execute ADMIT flow
     #
     p.run()
+    return True
 
 if __name__ == "__main__":
 
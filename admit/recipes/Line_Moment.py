@@ -80,7 +80,7 @@ KEYDESC = {
 # with _ so that the method is not listed in the sphinx-generated documentation
 def _run(argv):
     # Verify arguments are good
-    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return
+    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return False
 
     cubefile = argv[1]
     projdir = os.path.splitext(argv[1])[0] + '.admit'
@@ -99,7 +99,7 @@ def _run(argv):
         KEYS["cutoff"]   = ast.literal_eval(str(KEYS["cutoff"]))
     except Exception, e:
         print("Exception converting keyword value to number:",e)
-        return
+        return False
     #
     # Set-up all ADMIT Flow tasks for execution including their aliases and connections
     # The aliases allow you to refer to a task's input by the alias name of the (previous) 
@@ -120,6 +120,7 @@ def _run(argv):
     #  Execute ADMIT flow
     #
     p.run()
+    return True
 
 if __name__ == "__main__":
 
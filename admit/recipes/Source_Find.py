@@ -72,7 +72,7 @@ KEYDESC = {
 def _run(argv):
 
     # Verify arguments are good
-    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return
+    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return False
 
     imagefile = argv[1]
     projdir = os.path.splitext(argv[1])[0] + '.admit'
@@ -90,7 +90,7 @@ def _run(argv):
         KEYS["snmax"]   = float(KEYS["snmax"])
     except Exception, e:
         print("Exception converting keyword value to number:",e)
-        return
+        return False
     #
     # Set-up all ADMIT Flow tasks for execution including their aliases and connections
     # The aliases allow you to refer to a task's input by the alias name of the (previous) 
@@ -106,6 +106,7 @@ def _run(argv):
     #  Execute ADMIT flow
     #
     p.run()
+    return True
 
 if __name__ == "__main__":
 
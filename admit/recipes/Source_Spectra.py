@@ -69,7 +69,7 @@ KEYDESC = { "xaxis": "X-axis type for CubeSpectrum_AT (chan,freq,velocity). Defa
 def _run(argv):
 
     # Verify arguments are good
-    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return
+    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return False
 
     bdpname = argv[1]
     cubefile = argv[2]
@@ -98,6 +98,7 @@ def _run(argv):
     #  Execute ADMIT flow
     #
     p.run()
+    return True
 
 if __name__ == "__main__":
 
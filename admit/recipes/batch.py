@@ -0,0 +1,333 @@
+"""
+   **batch** --- Runs a recipe on many cubes in parallel.
+   ------------------------------------------------------
+
+   This module implements the multi-project batch runner used by
+   bin/admit_batch: it discovers cubes (e.g. in an ALMA product tree),
+   queues one ADMIT project per cube in a persistent admit.util.WorkQueue,
+   and runs the recipe on the queued cubes in a bounded set of worker
+   processes. The number of workers is limited by the CPU count and by a
+   memory budget, using a memory estimate per cube. An interrupted batch
+   (or one with failures) is resumed by running it again with the same
+   queue file.
+
+   Example:
+
+   .. code-block:: python
+
+      import admit.recipes.batch as batch
+      q = batch.queue("reprocess.queue", ["/data/2016.1.00022.S"], "Archive_Pipeline")
+      stats = batch.run(q, "Archive_Pipeline", nproc=8)
+      print batch.summary(q, stats)
+"""
+import os
+import sys
+import time
+import fnmatch
+import importlib
+import multiprocessing
+
+from admit.util.WorkQueue import WorkQueue
+
+# default cube pattern, the primary beam corrected pipeline cubes
+PATTERN = "*.cube.I.pbcor.fits"
+
+# memory estimate of a project: MEMFACTOR times the input data size
+MEMFACTOR = 4.0
+
+def _recipe(name):
+    """ import a recipe module, by name ("Line_Moment") or module path
+    """
+    if os.path.exists(os.path.join(os.path.dirname(__file__), name + ".py")):
+        name = "admit.recipes." + name
+    return importlib.import_module(name)
+
+def discover(paths, pattern=PATTERN):
+    """ Find the cubes below a list of directories.
+
+        Parameters
+        ----------
+        paths : list of str
+            Directories to search (recursively); files are taken as is.
+
+        pattern : str, optional
+            Shell pattern of the cube file names.
+
+        Returns
+        -------
+        list of str
+            Absolute cube names, sorted per directory.
+    """
+    cubes = []
+    for path in paths:
+        if not os.path.isdir(path):
+            cubes.append(os.path.abspath(path))
+            continue
+        found = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            # skip the ADMIT projects made from earlier cubes
+            dirs[:] = [d for d in dirs if not d.endswith('.admit')]
+            for f in files:
+                if fnmatch.fnmatch(f, pattern):
+                    found.append(os.path.abspath(os.path.join(root, f)))
+        cubes.extend(sorted(found))
+    return cubes
+
+def fitsbytes(filename):
+    """ Size of the data of a FITS file, from its primary header.
+
+        Parameters
+        ----------
+        filename : str
+            FITS file name.
+
+        Returns
+        -------
+        int
+            Data size in bytes, 0 if there is no primary data array.
+    """
+    keys = {}
+    with open(filename, 'rb') as fp:
+        while True:
+            block = fp.read(2880)
+            if len(block) < 2880:
+                break
+            for i in range(0, 2880, 80):
+                card = block[i:i+80]
+                key = card[:8].strip()
+                if key == 'END':
+                    n = abs(int(keys.get('BITPIX', 8))) / 8
+                    naxis = int(keys.get('NAXIS', 0))
+                    if naxis == 0:
+                        return 0
+                    for j in range(1, naxis + 1):
+                        n *= int(keys.get('NAXIS%d' % j, 0))
+                    return n
+                if card[8:10] == '= ':
+                    keys[key] = card[10:].split('/')[0].strip()
+    return 0
+
+def databytes(filename):
+    """ Size of the data of a FITS file or CASA image (directory).
+    """
+    if os.path.isdir(filename):
+        n = 0
+        for root, dirs, files in os.walk(filename):
+            for f in files:
+                n += os.path.getsize(os.path.join(root, f))
+        return n
+    if filename.lower().endswith('.fits'):
+        return fitsbytes(filename)
+    return os.path.getsize(filename)
+
+def entry(cube, recipe):
+    """ Recipe arguments and keywords for a cube.
+
+        If the recipe takes primary beam keywords (as Archive_Pipeline does),
+        the ALMA pipeline naming conventions are used to find the primary
+        beam (``.pbcor.`` -> ``.pb.``) and the continuum image (``.cube.`` ->
+        ``.mfs.``) and its primary beam, cf. bin/admit_pipeline.
+
+        Parameters
+        ----------
+        cube : str
+            Cube file name.
+
+        recipe : str
+            Recipe name.
+
+        Returns
+        -------
+        dict
+            Queue entry information: recipe 'args' and 'keys', the 'log'
+            file, the input data size 'bytes' and the 'memory' estimate.
+    """
+    mod = _recipe(recipe)
+    keys = {}
+    args = [cube]
+    pb = cube.replace('.pbcor.', '.pb.', 1)
+    if 'specpb' in mod.KEYS and pb != cube and os.path.exists(pb):
+        keys['specpb'] = pb
+    mfs = cube.replace('.cube.', '.mfs.', 1)
+    if 'contpb' in mod.KEYS and len(mod.OPTARGS) > 0 and mfs != cube and os.path.exists(mfs):
+        args.append(mfs)
+        pb = mfs.replace('.pbcor.', '.pb.', 1)
+        if pb != mfs and os.path.exists(pb):
+            keys['contpb'] = pb
+    nbytes = sum([databytes(f) for f in args + keys.values()])
+    return {'args'   : args,
+            'keys'   : keys,
+            'log'    : cube + '.log',
+            'bytes'  : nbytes,
+            'memory' : int(MEMFACTOR * nbytes)}
+
+def queue(filename, paths, recipe, pattern=PATTERN):
+    """ Open (or create) a batch queue and add the cubes found below paths
+        that are not queued yet.
+
+        Parameters
+        ----------
+        filename : str
+            Queue file name.
+
+        paths : list of str
+            Directories (or cubes), see discover().
+
+        recipe : str
+            Recipe name, see entry().
+
+        pattern : str, optional
+            Shell pattern of the cube file names.
+
+        Returns
+        -------
+        WorkQueue
+    """
+    q = WorkQueue(filename)
+    for cube in discover(paths, pattern):
+        if cube not in q:
+            q.add(cube, recipe=recipe, **entry(cube, recipe))
+    q.save()
+    return q
+
+def physmem():
+    """ Physical memory size in bytes, 0 if unknown.
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+def _work(recipe, args, keys, log):
+    """ worker process: run the recipe on one cube, output to the log file
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    fd = os.open(log, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    mod = _recipe(recipe)
+    mod.KEYS.update(keys)
+    print "ADMIT batch: %s %s %s" % (recipe, " ".join(args), keys)
+    ok = mod._run([recipe] + list(args))
+    sys.stdout.flush()
+    # the recipes return False on bad arguments or keywords
+    if ok is False:
+        print "ADMIT batch: %s failed" % recipe
+        sys.stdout.flush()
+        sys.exit(1)
+
+def run(q, recipe=None, nproc=None, memory=None, poll=1.0):
+    """ Run the recipe on all PENDING entries of a queue.
+
+        Entries are started in queue order, as long as fewer than nproc are
+        running and their memory estimates fit in the memory budget (an
+        entry always starts if nothing else runs). Each entry runs in its
+        own process, with its output in the entry's log file; it is DONE
+        if the recipe returns and FAILED if it returns False (bad arguments
+        or keywords), raises an exception or the process dies. On an
+        interrupt (^C) the running entries are terminated and queued again.
+
+        Parameters
+        ----------
+        q : WorkQueue
+            The queue, see queue().
+
+        recipe : str, optional
+            Recipe name; default is the recipe stored with each entry.
+
+        nproc : int, optional
+            Maximum number of concurrent projects; default is the CPU count.
+
+        memory : int, optional
+            Memory budget in bytes; default is 80% of the physical memory.
+
+        poll : float, optional
+            Interval in seconds to check for finished projects.
+
+        Returns
+        -------
+        dict
+            Statistics of this run: the number of entries 'done' and
+            'failed', the elapsed 'wall' time, and the input 'bytes' and
+            summed run time 'busy' of the finished entries.
+    """
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    if memory is None:
+        memory = 0.8 * physmem()
+    stats = {'done': 0, 'failed': 0, 'bytes': 0, 'wall': 0.0, 'busy': 0.0}
+    t0 = time.time()
+    running = {}
+    try:
+        while True:
+            used = sum([r[2] for r in running.values()])
+            for e in q.list(WorkQueue.PENDING):
+                if len(running) >= nproc:
+                    break
+                # first come, first served: no small cube overtakes a big one
+                if running and memory > 0 and used + e['memory'] > memory:
+                    break
+                p = multiprocessing.Process(target=_work,
+                                            args=(recipe or e['recipe'], e['args'], e['keys'], e['log']))
+                p.start()
+                running[e['key']] = (p, time.time(), e['memory'])
+                used += e['memory']
+                q.set(e['key'], WorkQueue.RUNNING, pid=p.pid)
+            if not running:
+                break
+            time.sleep(poll)
+            for key in running.keys():
+                p, start, mem = running[key]
+                if p.is_alive():
+                    continue
+                p.join()
+                if p.exitcode == 0:
+                    state = WorkQueue.DONE
+                    stats['done'] += 1
+                else:
+                    state = WorkQueue.FAILED
+                    stats['failed'] += 1
+                wall = time.time() - start
+                stats['bytes'] += q[key]['bytes']
+                stats['busy'] += wall
+                q.set(key, state, wall=wall, exitcode=p.exitcode)
+                del running[key]
+    except KeyboardInterrupt:
+        for key, (p, start, mem) in running.items():
+            p.terminate()
+            p.join()
+            q.set(key, WorkQueue.PENDING)
+        raise
+    finally:
+        stats['wall'] = time.time() - t0
+    return stats
+
+def summary(q, stats=None):
+    """ Summary of a queue, and the throughput of a run().
+
+        Parameters
+        ----------
+        q : WorkQueue
+            The queue.
+
+        stats : dict, optional
+            Statistics returned by run().
+
+        Returns
+        -------
+        str
+    """
+    n = q.count()
+    lines = ["%d cubes: %d done, %d failed, %d pending" %
+             (len(q), n[WorkQueue.DONE], n[WorkQueue.FAILED], n[WorkQueue.PENDING])]
+    for e in q.list(WorkQueue.FAILED):
+        lines.append("  failed: %s (see %s)" % (e['key'], e['log']))
+    if stats is not None and stats['wall'] > 0:
+        nrun = stats['done'] + stats['failed']
+        lines.append("this run: %d cubes in %.1f s, %.1f cubes/hour, %.2f MB/s, %.1f running on average" %
+                     (nrun, stats['wall'], 3600.0 * nrun / stats['wall'],
+                      stats['bytes'] / 1048576.0 / stats['wall'], stats['busy'] / stats['wall']))
+    return "\n".join(lines)
@@ -53,11 +53,12 @@ def _run(argv):
     """The functionality is not in 'main' so that it doesn't get executed when 
     sphinx imports it to make the documentation.  The method name starts 
     with _ so that the method is not listed in the sphinx-generated 
-    documentation.
+    documentation.  It returns False if the arguments or keywords are bad,
+    so the batch runner (admit.recipes.batch) marks the cube as failed.
     """
     print "ARGV=",argv
 
-    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return
+    if ( not admit.recipeutils._processargs(argv,REQARGS,OPTARGS,KEYS,KEYDESC,__doc__)): return False
 
     # Ensure argv is a list.  It could be a tuple if it came in
     # through admit_recipe.  That's probably ok, but we just want 
@@ -66,6 +67,7 @@ def _run(argv):
 
     print KEYS
     print argv
+    return True
 
 if __name__ == "__main__":
 
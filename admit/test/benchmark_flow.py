@@ -0,0 +1,172 @@
+#! /usr/bin/env python
+#
+#    Flow engine benchmark: build synthetic flows of the CASA-free File_AT
+#    and Flow*_AT tasks and time the FlowManager and project operations on
+#    them, for a range of flow sizes:
+#
+#      add          building the flow, Admit.addtask() (FlowManager.add())
+#      run          first Admit.run() (FlowManager.run() plus write)
+#      rerun        Admit.run() of an up to date flow
+#      downstream   FlowManager.downstream() of the root task
+#      stale        FlowManager.stale() of the root task
+#      clone        FlowManager.clone() of the sub-flow below the root
+#      remove       FlowManager.remove() of that clone
+#      write        Admit.write()
+#      reload       reading the project back from XML (uncommitted, as a script
+#                   re-run does)
+#      mergeflow    re-adding the flow to the reloaded project and merging it
+#                   with the XML flow, Admit.mergeFlow()
+#
+#    The flows ("graphs") are
+#
+#      chain        File -> Flow11 -> Flow11 -> ...
+#      fan          File -> N x Flow11
+#      diamond      File -> 4 x Flow11 -> FlowN1 -> 4 x Flow11 -> FlowN1 ...
+#      variadic     File -> Flow1N(n) -> Flow11 -> Flow11, the Flow11 pair is
+#                   cloned for each of the n outputs by run()
+#      vtree        File -> Flow1N(k) -> Flow1N(k) -> Flow11, a nested
+#                   variadic flow of about k*k tasks
+#
+#    Usage:   benchmark_flow.py [-s sizes] [-g graphs] [-o results.json] [-d dir]
+#
+#             sizes   comma separated (approximate) task counts, default 10,100,1000
+#             graphs  comma separated graph names, default all
+#
+#    Example:
+#      benchmark_flow.py -s 100,1000,10000 -g chain,variadic -o flow-1.0.8.json
+#
+#    The results are printed as a table and written (-o) as JSON, one record
+#    per graph, size and operation, together with the ADMIT and python
+#    version, so runs of different versions can be compared.
+import sys, os
+import json
+import math
+import platform
+import shutil
+import time
+import admit
+
+graphs = ['chain', 'fan', 'diamond', 'variadic', 'vtree']
+
+def task(p, at, **keys):
+    """ a Flow*_AT that neither touches nor checks its files, so the tasks
+        themselves cost next to nothing; the files are named after the task
+        count (the default names grow along the flow), except in variadic
+        sub-flows, where the clones need the default names
+    """
+    keys.setdefault('file', 't%d' % len(p))
+    return at(touch=False, exist=False, **keys)
+
+def build(p, graph, n):
+    """ add a flow of about n tasks to project p, return the root task ID
+    """
+    root = p.addtask(admit.File_AT(alias='root', file='root'))
+    if graph == 'chain':
+        t = root
+        for i in range(n - 1):
+            t = p.addtask(task(p, admit.Flow11_AT), [t])
+    elif graph == 'fan':
+        for i in range(n - 1):
+            p.addtask(task(p, admit.Flow11_AT), [root])
+    elif graph == 'diamond':
+        t = root
+        while len(p) + 5 <= n:
+            stuples = [p.addtask(task(p, admit.Flow11_AT), [t]) for i in range(4)]
+            t = p.addtask(task(p, admit.FlowN1_AT), stuples)
+    elif graph == 'variadic':
+        t = p.addtask(task(p, admit.Flow1N_AT, alias='cube', n=max(2, (n - 2) / 2)), [root])
+        t = p.addtask(task(p, admit.Flow11_AT, file=''), [(t, 1)])
+        p.addtask(task(p, admit.Flow11_AT, file=''), [t])
+    elif graph == 'vtree':
+        k = max(2, int(math.sqrt(n)))
+        t = p.addtask(task(p, admit.Flow1N_AT, alias='cube', n=k), [root])
+        t = p.addtask(task(p, admit.Flow1N_AT, alias='cube2', n=k, file=''), [(t, 1)])
+        p.addtask(task(p, admit.Flow11_AT, file=''), [(t, 1)])
+    else:
+        raise Exception("unknown graph %s" % graph)
+    return root
+
+def timeit(func):
+    t0 = time.time()
+    r = func()
+    return time.time() - t0, r
+
+def bench(graph, n, dirname):
+    """ time all operations for one graph of size n, return a list of results
+    """
+    shutil.rmtree(dirname, True)
+    p = admit.Project(dirname)
+    p.setlogginglevel(50)
+    res = []
+    def add(op, t):
+        res.append({'graph': graph, 'size': n, 'op': op, 'sec': t})
+
+    t, root = timeit(lambda: build(p, graph, n))
+    add('add', t)
+    add('run', timeit(lambda: p.run())[0])
+    add('rerun', timeit(lambda: p.run())[0])
+    ntask = len(p)
+
+    # the variadic flows are complete after the first run
+    add('downstream', timeit(lambda: p.fm.downstream(root))[0])
+    add('stale', timeit(lambda: p.fm.stale(root, True))[0])
+    sub = min(p.fm._connmap[root].keys())
+    t, tid = timeit(lambda: p.fm.clone(sub))
+    add('clone', t)
+    add('remove', timeit(lambda: p.fm.remove(tid))[0])
+    add('write', timeit(lambda: p.write())[0])
+
+    p = None
+    t, p = timeit(lambda: admit.Project(dirname, commit=False))
+    p.setlogginglevel(50)
+    add('reload', t)
+    build(p, graph, n)
+    add('mergeflow', timeit(lambda: p.mergeFlow())[0])
+
+    p = None
+    shutil.rmtree(dirname, True)
+    for r in res: r['ntask'] = ntask
+    return res
+
+if __name__ == '__main__':
+    sizes = [10, 100, 1000]
+    out = None
+    dirname = '/tmp/benchmark_flow_%d.admit' % os.getpid()
+    argv = sys.argv[1:]
+    while argv:
+        a = argv.pop(0)
+        if a == '-s':
+            sizes = [int(s) for s in argv.pop(0).split(',')]
+        elif a == '-g':
+            graphs = argv.pop(0).split(',')
+        elif a == '-o':
+            out = argv.pop(0)
+        elif a == '-d':
+            dirname = argv.pop(0)
+        else:
+            print "Usage: %s [-s sizes] [-g graphs] [-o results.json] [-d dir]" % sys.argv[0]
+            sys.exit(1)
+
+    results = []
+    print "%-9s %6s %6s %-11s %9s" % ('graph', 'size', 'ntask', 'op', 'sec')
+    for graph in graphs:
+        for n in sizes:
+            # the tasks print their progress, keep it out of the table
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                res = bench(graph, n, dirname)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            for r in res:
+                print "%-9s %6d %6d %-11s %9.4f" % (r['graph'], r['size'], r['ntask'], r['op'], r['sec'])
+            results.extend(res)
+
+    if out:
+        doc = {'admit': admit.version.__version__,
+               'python': platform.python_version(),
+               'host': platform.node(),
+               'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'results': results}
+        json.dump(doc, open(out, 'w'), indent=1)
@@ -0,0 +1,282 @@
+#! /usr/bin/env python
+#
+#    Scaling benchmark: run the ADMIT recipes on a grid of synthetic cubes
+#    (GenerateCube_AT) of different spatial and spectral size and line
+#    density, collect the per-task records of admit.Metrics (wall and CPU
+#    time, peak memory, bytes read and written) and fit how each task
+#    scales with the cube size (Metrics.scaling()):
+#
+#      value ~ npix**a * nchan**b * nlines**c
+#
+#    The recipes are
+#
+#      Line_Moment        on every spectral cube
+#      Archive_Pipeline   on every spectral cube
+#      Source_Find        on a continuum image (one channel) per spatial size
+#      Source_Spectra     on every spectral cube, with the source list of
+#                         Source_Find at the same spatial size
+#
+#    All cubes have a continuum source at the center, the spectral cubes
+#    add nlines random lines (see GenerateCube_AT). Each recipe runs in a
+#    new python process (the same executable, e.g. the CASA python) on a
+#    fresh project, so the peak memory (maxrss) of a task is that of the
+#    recipe up to and including the task. The recipes need CASA.
+#
+#    Usage:   benchmark_scaling.py [-r recipes] [-s sizes] [-c channels]
+#                                  [-l lines] [-n nproc] [-d dir]
+#                                  [-o results.json] [-b baseline.json] [-k]
+#
+#             recipes   comma separated recipe names, default all of the above
+#             sizes     comma separated map sizes (pixels), default 64,128,256
+#             channels  comma separated channel counts, default 64,256
+#             lines     comma separated line counts, default 1,4
+#             nproc     processes writing the cubes, default 1
+#             dir       work directory for the cubes and projects, removed
+#                       at the end unless -k is given
+#             baseline  results (-o) of an earlier run, e.g. of the previous
+#                       release, to compare with
+#
+#    Example:
+#      benchmark_scaling.py -s 128,256,512 -c 128,512 -o scaling-1.0.8.json
+#      benchmark_scaling.py -s 128,256,512 -c 128,512 -b scaling-1.0.8.json
+#
+#    The report lists, per recipe and task (type and alias), the exponents
+#    of the wall and CPU time, peak memory and I/O (read plus written bytes)
+#    and the value at the largest cube; the "total" rows are whole recipe
+#    runs. Grid points with zero lines are not used in the fits. With a
+#    baseline, the tasks are compared over the grid points both runs have,
+#    largest slow down first. The records, fits and the ADMIT and python
+#    version are written (-o) as JSON.
+import sys, os
+import json
+import platform
+import shutil
+import subprocess
+import time
+import admit
+from admit.at.GenerateCube_AT import GenerateCube_AT
+
+recipes = ['Line_Moment', 'Archive_Pipeline', 'Source_Find', 'Source_Spectra']
+
+# the quantities fitted, and the cube size parameters of the fits
+quantities = ['wall', 'cpu', 'maxrss', 'io']
+factors = ('npix', 'nchan', 'nlines')
+
+# task records are grouped by
+keys = ('recipe', 'type', 'alias')
+
+def makecube(filename, n, nchan, nlines, nproc):
+    """ write a synthetic n x n x nchan cube with nlines lines, the same
+        continuum source for all cubes
+    """
+    at = GenerateCube_AT(naxis=[n, n, nchan], nlines=nlines, seed=n + nchan + nlines,
+                         contin=10.0, size=5.0, nproc=nproc)
+    at.writefits(filename)
+
+def runrecipe(name, args, grid, logfile):
+    """ run a recipe in a new process on fresh projects, return the task
+        records of the project of the last argument, plus a "total" record
+    """
+    cube = args[-1]
+    projdir = os.path.splitext(cube)[0] + '.admit'
+    shutil.rmtree(projdir, True)
+    # as admit_recipe, without the CASA command line of the recipe scripts
+    run = 'import sys, importlib; importlib.import_module("admit.recipes.%s")._run(sys.argv)' % name
+    t0 = time.time()
+    c0 = os.times()
+    log = open(logfile, 'a')
+    try:
+        status = subprocess.call([sys.executable, '-c', run] + args, stdout=log, stderr=subprocess.STDOUT)
+    finally:
+        log.close()
+    c1 = os.times()
+    wall = time.time() - t0
+
+    records = admit.Metrics(projdir + os.sep + admit.Metrics.FILENAME).read()
+    total = {'kind': 'task', 'type': 'total', 'alias': '', 'wall': wall,
+             'cpu': c1[2] + c1[3] - c0[2] - c0[3],
+             'status': 'ok' if status == 0 and records else 'failed'}
+    for k in ['maxrss', 'read', 'written']:
+        v = [r[k] for r in records if r.get(k) is not None]
+        total[k] = (max(v) if k == 'maxrss' else sum(v)) if v else None
+    records.append(total)
+
+    for r in records:
+        r.update(grid)
+        r['recipe'] = name
+        r['npix'] = grid['nx'] * grid['ny']
+        r['nvox'] = r['npix'] * grid['nchan']
+        r['io'] = r['read'] + r['written'] \
+                  if r.get('read') is not None and r.get('written') is not None else None
+    return records
+
+def sourcelist(projdir):
+    """ the SourceList_BDP file written by SFind2D_AT in a project, or None
+    """
+    for root, dirs, files in os.walk(projdir):
+        for f in files:
+            if f.endswith('.sl.bdp'):
+                return os.path.join(root, f)
+    return None
+
+def bench(names, sizes, channels, lines, nproc, dirname):
+    """ run the recipes on the grid of cubes, return all task records
+    """
+    results = []
+    logfile = os.path.join(dirname, 'recipes.log')
+    for n in sizes:
+        slist = None
+        if 'Source_Find' in names or 'Source_Spectra' in names:
+            image = os.path.join(dirname, 'cont%d.fits' % n)
+            makecube(image, n, 1, 0, nproc)
+            res = runrecipe('Source_Find', [image], {'nx': n, 'ny': n, 'nchan': 1, 'nlines': 0}, logfile)
+            if 'Source_Find' in names:
+                results.extend(res)
+            slist = sourcelist(os.path.splitext(image)[0] + '.admit')
+        for nchan in channels:
+            for nlines in lines:
+                grid = {'nx': n, 'ny': n, 'nchan': nchan, 'nlines': nlines}
+                base = os.path.join(dirname, 'cube%d_%d_%d' % (n, nchan, nlines))
+                makecube(base + '.fits', n, nchan, nlines, nproc)
+                for name in names:
+                    if name == 'Source_Find':
+                        continue
+                    # each recipe gets its own project, named after the cube
+                    cube = '%s_%s.fits' % (base, name)
+                    os.symlink(os.path.basename(base + '.fits'), cube)
+                    if name == 'Source_Spectra':
+                        if slist is None:
+                            continue
+                        args = [slist, cube]
+                    else:
+                        args = [cube]
+                    results.extend(runrecipe(name, args, grid, logfile))
+                os.remove(base + '.fits')
+    return results
+
+def fit(records):
+    """ the scaling exponents of all quantities, per recipe and task
+    """
+    fits = {}
+    for q in quantities:
+        ok = [r for r in records if r.get('status') == 'ok']
+        sf = [r for r in ok if r['recipe'] == 'Source_Find']
+        other = [r for r in ok if r['recipe'] != 'Source_Find']
+        s = admit.Metrics.scaling(other, factors, keys, q)
+        # the continuum images only differ in size
+        for k, v in admit.Metrics.scaling(sf, ('npix',), keys, q).items():
+            v.update({'nchan': None, 'nlines': None})
+            s[k] = v
+        for k, v in s.items():
+            fits.setdefault(k, {})[q] = v
+    return fits
+
+def largest(records):
+    """ the task values at the largest cube (with the most lines) of each
+        recipe and task
+    """
+    def size(r):
+        return (r['nvox'], r['nlines'])
+
+    top = {}
+    for r in records:
+        k = admit.Metrics.key(r, keys)
+        if k not in top or size(r) > top[k]:
+            top[k] = size(r)
+    return admit.Metrics.summarize([r for r in records
+                                    if size(r) == top[admit.Metrics.key(r, keys)]], keys)
+
+def report(records, fits):
+    def exp(e):
+        return '%6s' % '-' if e is None else '%6.2f' % (round(e, 2) + 0.0)
+
+    top = largest(records)
+    print "%-45s %-6s %6s %6s %6s %12s" % ('recipe task alias', 'value', 'npix', 'nchan', 'nlines', 'largest')
+    for k in sorted(fits.keys()):
+        for q in quantities:
+            f = fits[k][q]
+            t = top.get(k, {})
+            if q == 'io':
+                v = '%12d' % (t.get('read', 0) + t.get('written', 0))
+            elif q == 'maxrss':
+                v = '%9.1f MB' % t.get('maxrss', 0.0)
+            else:
+                v = '%10.2f s' % t.get(q, 0.0)
+            print "%-45s %-6s %s %s %s %s" % (k if q == 'wall' else '', q,
+                                              exp(f['npix']), exp(f['nchan']), exp(f['nlines']), v)
+
+    failed = sorted(set([admit.Metrics.key(r, keys) for r in records if r.get('status') != 'ok']))
+    if failed:
+        print "failed: %s" % ", ".join(failed)
+
+def compare(base, records):
+    """ compare with the records of a baseline run, over the common grid
+    """
+    def point(r):
+        return tuple([r['recipe']] + [r[k] for k in ['nx', 'ny', 'nchan', 'nlines']])
+
+    common = set([point(r) for r in base]) & set([point(r) for r in records])
+    rows = admit.Metrics.compare([r for r in base if point(r) in common],
+                                 [r for r in records if point(r) in common], keys)
+    print "%-45s %10s %10s %7s" % ('recipe task alias', 'base', 'new', 'ratio')
+    for k, a, b, ratio in rows:
+        print "%-45s %10s %10s %7s" % (k, '-' if a is None else '%.2f' % a,
+                                       '-' if b is None else '%.2f' % b,
+                                       '-' if ratio is None else '%.2f' % ratio)
+
+if __name__ == '__main__':
+    sizes = [64, 128, 256]
+    channels = [64, 256]
+    lines = [1, 4]
+    nproc = 1
+    out = None
+    baseline = None
+    keep = False
+    dirname = '/tmp/benchmark_scaling_%d' % os.getpid()
+    argv = sys.argv[1:]
+    while argv:
+        a = argv.pop(0)
+        if a == '-r':
+            recipes = argv.pop(0).split(',')
+        elif a == '-s':
+            sizes = [int(s) for s in argv.pop(0).split(',')]
+        elif a == '-c':
+            channels = [int(s) for s in argv.pop(0).split(',')]
+        elif a == '-l':
+            lines = [int(s) for s in argv.pop(0).split(',')]
+        elif a == '-n':
+            nproc = int(argv.pop(0))
+        elif a == '-d':
+            dirname = argv.pop(0)
+        elif a == '-o':
+            out = argv.pop(0)
+        elif a == '-b':
+            baseline = json.load(open(argv.pop(0)))
+        elif a == '-k':
+            keep = True
+        else:
+            print "Usage: %s [-r recipes] [-s sizes] [-c channels] [-l lines] [-n nproc] [-d dir] [-o results.json] [-b baseline.json] [-k]" % sys.argv[0]
+            sys.exit(1)
+
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    try:
+        records = bench(recipes, sizes, channels, lines, nproc, dirname)
+    finally:
+        if not keep:
+            shutil.rmtree(dirname, True)
+    fits = fit(records)
+    report(records, fits)
+    if baseline:
+        print "\ncompared with ADMIT %s (%s):" % (baseline['admit'], baseline['date'])
+        compare(baseline['records'], records)
+
+    if out:
+        doc = {'admit': admit.version.__version__,
+               'python': platform.python_version(),
+               'host': platform.node(),
+               'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'grid': {'recipes': recipes, 'sizes': sizes, 'channels': channels, 'lines': lines},
+               'records': records,
+               'scaling': fits}
+        json.dump(doc, open(out, 'w'), indent=1)
@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+#
+#    Startup benchmark: time a cold "import admit" and the loading of an
+#    existing ADMIT project, each in a fresh python interpreter.
+#    It also lists which of the heavy modules a plain "import admit" pulls in
+#    (none, now that admit, admit.util, admit.bdp and admit.at import lazily).
+#
+#    Usage:   benchmark_startup.py [-n ntimes] [project.admit ...]
+#
+#    Example output:
+#      import admit                  min   0.004  median   0.005 sec
+#      heavy modules after import:   none
+#      load test0.admit              min   1.872  median   1.903 sec
+#
+#    Run it with the python (or casarun) you want to measure; loading a
+#    project needs the full ADMIT (CASA) environment.
+import sys, os
+import subprocess
+import time
+
+heavy = ['numpy', 'scipy', 'matplotlib', 'matplotlib.pyplot',
+         'casa', 'taskinit', 'urllib2',
+         'admit.Admit', 'admit.AT', 'admit.util.casautil', 'admit.util.APlot']
+
+def timeit(code, n):
+    """ run python code n times in a fresh interpreter, return the wall clock times
+    """
+    t = []
+    for i in range(n):
+        t0 = time.time()
+        subprocess.check_call([sys.executable, '-c', code])
+        t.append(time.time() - t0)
+    t.sort()
+    return t
+
+def report(label, t):
+    print "%-30s min %7.3f  median %7.3f sec" % (label, t[0], t[len(t)/2])
+
+if __name__ == '__main__':
+    n = 5
+    projects = []
+    argv = sys.argv[1:]
+    while argv:
+        a = argv.pop(0)
+        if a == '-n':
+            n = int(argv.pop(0))
+        else:
+            projects.append(a)
+
+    # baseline, the interpreter itself
+    report('python', timeit('pass', n))
+    report('import admit', timeit('import admit', n))
+
+    code = "import sys, admit; print ' '.join([m for m in %s if m in sys.modules])" % str(heavy)
+    mods = subprocess.check_output([sys.executable, '-c', code]).strip()
+    print "%-30s %s" % ('heavy modules after import:', mods or 'none')
+
+    for p in projects:
+        code = "import admit; admit.Project(%s)" % repr(os.path.abspath(p))
+        report('load ' + os.path.basename(p.rstrip(os.sep)), timeit(code, n))
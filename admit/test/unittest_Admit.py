@@ -446,6 +446,22 @@ class TestAdmit(unittest.TestCase):
         self.assertEqual(task1._stale, False)
         self.assertEqual(task2._stale, True)
 
+    # test _onpost(): a re-run from the browser, under the run lock
+    def test_onpost(self):
+        self.p.setlogginglevel(logging.ERROR)
+        tid = self.p.addtask(admit.File_AT(file='onpost.dat', touch=True))
+        self.p.run()
+        # a key that does not convert fails the command
+        bad = {'command': 'run', 'firefox': False,
+               'task': [{'taskid': unicode(tid), 'touch': u'maybe('}]}
+        self.assertRaises(SyntaxError, self.p._onpost, bad)
+        good = {'command': 'run', 'firefox': False,
+                'task': [{'taskid': unicode(tid), 'file': u'onpost2.dat'}]}
+        self.p._onpost(good)
+        self.assertEqual(self.p[tid].getkey('file'), 'onpost2.dat')
+        self.assertTrue(os.path.exists(self.p.dir() + 'onpost2.dat'))
+        self.assertFalse(self.p[tid].isstale())
+
 #----------------------------------------------------------------------
 # To run on commandline, using either "python unittest_Admit.py" 
 # or "./unittest_Admit.py"
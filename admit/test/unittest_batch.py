@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# Batch runner (admit.recipes.batch) and WorkQueue test script.
+#
+
+import sys, os, unittest
+import shutil
+import tempfile
+import admit
+import admit.recipes.batch as batch
+from admit.util.WorkQueue import WorkQueue
+
+# A stand-in recipe: writes its arguments and keywords next to the cube,
+# fails on cubes named 'bad' or 'quiet' (returning False, as the recipes do
+# on bad arguments).
+RECIPE = '''
+import os
+OPTARGS = ["Continuum-Image"]
+KEYS = {"specpb": None, "contpb": None}
+def _run(argv):
+    if "bad" in argv[1]:
+        raise Exception("bad cube")
+    if "quiet" in argv[1]:
+        return False
+    open(argv[1] + ".done", "w").write(repr((argv[1:], KEYS)))
+'''
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Batch Runner Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='batch_', dir='/tmp')
+        open(os.path.join(self.dir, 'batchtest_recipe.py'), 'w').write(RECIPE)
+        sys.path.insert(0, self.dir)
+        self.tree = os.path.join(self.dir, 'tree')
+        for d in ['a/product', 'b/product', 'b/product/old.admit']:
+            os.makedirs(os.path.join(self.tree, d))
+        self.cubes = []
+        for f in ['a/product/x.spw1.cube.I.pbcor.fits',
+                  'a/product/x.spw1.cube.I.pb.fits',
+                  'a/product/x.spw1.mfs.I.pbcor.fits',
+                  'b/product/y.spw2.cube.I.pbcor.fits',
+                  'b/product/bad.spw3.cube.I.pbcor.fits',
+                  'b/product/old.admit/z.cube.I.pbcor.fits']:
+            self.fits(os.path.join(self.tree, f))
+        self.qfile = os.path.join(self.dir, 'test.queue')
+
+    def tearDown(self):
+        sys.path.remove(self.dir)
+        shutil.rmtree(self.dir)
+
+    def fits(self, name, shape=(10, 20, 30)):
+        # minimal FITS header (the data itself is not needed)
+        cards = ["SIMPLE  = T", "BITPIX  = -32", "NAXIS   = %d" % len(shape)]
+        for i, n in enumerate(shape):
+            cards.append("NAXIS%d  = %d / axis length" % (i + 1, n))
+        cards.append("END")
+        header = "".join([c.ljust(80) for c in cards])
+        open(name, 'w').write(header.ljust(2880))
+
+    def test_AAAwhoami(self):
+        print "==== %s ====\n" % self.testName
+
+    def test_queue(self):
+        q = WorkQueue(self.qfile)
+        self.assertTrue(q.add('one', size=1))
+        self.assertTrue(q.add('two'))
+        self.assertFalse(q.add('one'))
+        q.save()
+        q.set('one', WorkQueue.RUNNING)
+        q.set('two', WorkQueue.FAILED, error='oops')
+        self.assertRaises(ValueError, q.set, 'two', 'lost')
+        # reloading an interrupted queue resumes the running entries
+        q = WorkQueue(self.qfile)
+        self.assertEqual([e['key'] for e in q.list()], ['one', 'two'])
+        self.assertEqual(q['one']['state'], WorkQueue.PENDING)
+        self.assertEqual(q['one']['size'], 1)
+        self.assertEqual(q.count()[WorkQueue.FAILED], 1)
+        self.assertEqual(q.retry(), 1)
+        self.assertEqual(len(WorkQueue(self.qfile).list(WorkQueue.PENDING)), 2)
+
+    def test_batch(self):
+        self.assertEqual(batch.fitsbytes(os.path.join(self.tree, 'a/product/x.spw1.cube.I.pbcor.fits')),
+                         4 * 10 * 20 * 30)
+        q = batch.queue(self.qfile, [self.tree], 'batchtest_recipe')
+        keys = [e['key'] for e in q.list()]
+        self.assertEqual([os.path.basename(k) for k in keys],
+                         ['x.spw1.cube.I.pbcor.fits', 'bad.spw3.cube.I.pbcor.fits',
+                          'y.spw2.cube.I.pbcor.fits'])
+        x = q[keys[0]]
+        self.assertEqual(len(x['args']), 2)
+        self.assertEqual(x['keys'].keys(), ['specpb'])
+        self.assertEqual(x['bytes'], 3 * 4 * 6000)
+        self.assertEqual(x['memory'], batch.MEMFACTOR * x['bytes'])
+
+        # memory budget for one cube at a time
+        stats = batch.run(q, nproc=2, memory=x['memory'], poll=0.05)
+        self.assertEqual((stats['done'], stats['failed']), (2, 1))
+        self.assertTrue(os.path.exists(keys[0] + '.done'))
+        self.assertTrue('specpb' in open(keys[0] + '.done').read())
+        self.assertTrue('bad cube' in open(keys[1] + '.log').read())
+        self.assertTrue('failed' in batch.summary(q, stats))
+
+        # rerun: new cubes are added, only those (and -f the failed) run
+        self.fits(os.path.join(self.tree, 'a/product/w.spw4.cube.I.pbcor.fits'))
+        self.fits(os.path.join(self.tree, 'a/product/quiet.spw5.cube.I.pbcor.fits'))
+        q = batch.queue(self.qfile, [self.tree], 'batchtest_recipe')
+        self.assertEqual(q.count()[WorkQueue.PENDING], 2)
+        q.retry()
+        stats = batch.run(q, nproc=4, poll=0.05)
+        self.assertEqual((stats['done'], stats['failed']), (1, 2))
+        self.assertEqual(q.count()[WorkQueue.DONE], 3)
+        # a recipe returning False fails the cube
+        quiet = [e for e in q.list(WorkQueue.FAILED) if 'quiet' in e['key']]
+        self.assertEqual(len(quiet), 1)
+        self.assertEqual(quiet[0]['exitcode'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
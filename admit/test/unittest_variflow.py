@@ -64,6 +64,42 @@ class TestVariflow(unittest.TestCase):
 
         self.assertLessEqual(len(p), 20, "Incorrect task count")
 
+    def test_expand(self):
+        # Sub-flow of two tasks on the variadic port, as LineCube->Moment.
+        p = admit.Project(self.outputDir)
+        p.setlogginglevel(50)
+        p.addtask(admit.File_AT(alias='root', file='root', touch=True))
+        cube = p.addtask(admit.Flow1N_AT(alias='cube', n=2, touch=True), ['root'])
+        mom = p.addtask(admit.Flow11_AT(alias='mom', touch=True), [('cube', 1)])
+        p.addtask(admit.Flow11_AT(alias='sum', touch=True), ['mom'])
+        fm = p.fm
+
+        # n=6 outputs: 5 variadic ports, 4 cloned sub-flows.
+        p['cube'].setkey('n', 6)
+        p.run()
+        self.assertEqual(len(p), 12, "Incorrect task count")
+        self.assertEqual(sorted(fm._varimap[cube].keys()), [1, 2, 3, 4, 5])
+        for sp in fm._varimap[cube]:
+          flow = fm._varimap[cube][sp][0]
+          self.assertEqual(len(flow), 2)
+          for tid in flow:
+            if fm._bdpmap[tid][0][0] == cube:
+              self.assertEqual(fm._bdpmap[tid], [(cube, sp)])
+              self.assertEqual(fm._tasklevs[tid], fm._tasklevs[mom])
+            else:
+              self.assertEqual(fm._tasklevs[tid], fm._tasklevs[mom] + 1)
+        self.assertEqual(fm.expand(cube, 6), [], "Nothing left to clone")
+
+        # n=3 outputs: sub-flows on ports 3-5 are removed.
+        p['cube'].setkey('n', 3)
+        p.run()
+        self.assertEqual(len(p), 6, "Incorrect task count")
+        self.assertEqual(sorted(fm._varimap[cube].keys()), [1, 2])
+        for tid in fm._tasklevs:
+          self.assertTrue(tid in fm._tasks)
+        for tid in fm._connmap[cube]:
+          self.assertTrue(tid in fm._tasks)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,7 +6,7 @@
   This module defines the APlot class.
 """
 
-from AbstractPlot import AbstractPlot
+from AbstractPlot import AbstractPlot, deferrable
 import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
@@ -76,6 +76,7 @@ class APlot(AbstractPlot):
             plt.ioff()
             plt.show()
 
+    @deferrable
     def scatter(self,x,y,title=None,figname=None,xlab=None,ylab=None,color=None,size=None,cmds=None,thumbnail=True, xrange=None, yrange=None):
         """Scatter plot of multiple columns against one column
 
@@ -130,8 +131,6 @@ class APlot(AbstractPlot):
            None
 
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         plt.ioff()
         APlot.figno = APlot.figno + 1
         if self._abspath != "" and figname:
@@ -169,6 +168,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def plotter(self,x,y,title=None,figname=None,xlab=None,ylab=None,xrange=None,yrange=None,segments=None,labels=[],histo=False,thumbnail=True,x2range=None,y2range=None,x2lab=None,y2lab=None):
         """Simple plotter of multiple columns against one column, optionally in histogram style
 
@@ -237,8 +237,6 @@ class APlot(AbstractPlot):
            None
 
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # if filename: plt.ion()
         #plt.ion()
         plt.ioff()
@@ -294,6 +292,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def multiplotter(self,x,y,title=None,figname=None,xlab=None,ylab=None,xrange=None,yrange=None,labels=[],thumbnail=True,x2range=None,y2range=None,x2lab=None,y2lab=None):
         """Plotter of multiple x against multiple y as traces on same plot. 
 
@@ -354,9 +353,6 @@ class APlot(AbstractPlot):
            None
 
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
-
         if len(x) != len(y):
            raise Exception("Input x and y arrays are not the same length [%d,%d]"%(len(x),len(y)))
 
@@ -407,6 +403,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def segplotter(self,x,y,title="",figname="",xlab="",ylab="",segments=[],cutoff=0.0, continuum=None, thumbnail=True):
         """Plotter for spectral line segments. Based on plotter, but extended to create a legend.
 
@@ -453,8 +450,6 @@ class APlot(AbstractPlot):
            -------
            None
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         plt.ioff()
         APlot.figno = APlot.figno + 1
         if self._abspath != "" and figname:
@@ -518,6 +513,7 @@ class APlot(AbstractPlot):
         plt.close()
 
 
+    @deferrable
     def histogram(self,columns,title=None,figname=None,xlab=None,xrange=None,ylab="#",bins=80,thumbnail=True):
         """Simple histogram of one or more columns
 
@@ -556,8 +552,6 @@ class APlot(AbstractPlot):
            -------
            None
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # if filename: plt.ion()
         plt.ioff()
         APlot.figno = APlot.figno + 1
@@ -592,6 +586,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def hisplot(self,x,title=None,figname=None,xlab=None,range=None,bins=80,gauss=None,thumbnail=True):
         """simple histogram of one column with optional overlayed gaussfit
            This plot could be merged with histogram()
@@ -600,8 +595,6 @@ class APlot(AbstractPlot):
            -------
            None
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # if filename: plt.ion()
         # better example: http://matplotlib.org/examples/statistics/histogram_demo_features.html
         plt.ioff()
@@ -656,6 +649,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def map1(self,data,title=None,figname=None,xlab=None,ylab=None,range=None,
              contours=None,cmap='hot',segments=None,circles=None,
              thumbnail=True,zoom=1,star=None):
@@ -673,8 +667,6 @@ class APlot(AbstractPlot):
         
         See also casa.viewer() calls in e.g. Moment_AT
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         plt.ioff()
         APlot.figno = APlot.figno + 1
         if self._abspath != "" and figname:
@@ -735,6 +727,7 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def summaryspec(self, stat, spec, pvc, figname, lines=[], thumbnail=True, force=[]):
         """ Method to plot a summary of all spectra with overlayed id's. All spectra
             are in S/N units.
@@ -769,8 +762,6 @@ class APlot(AbstractPlot):
             None
 
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # get the peak value
         #pk = max(y)
         #pm = min(y)
@@ -896,6 +887,7 @@ class APlot(AbstractPlot):
             plt.show()
 
 
+    @deferrable
     def makespec(self, x, y, cutoff, figname, title="", xlabel="", lines=[],
                  force=[], blends=[], continuum=None, ylabel=None,
                  thumbnail=True, references={}, refline=None, chan=None):
@@ -976,8 +968,6 @@ class APlot(AbstractPlot):
             -------
             None
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # get the peak value
         pk = ma.max(y)
         pm = ma.min(y)
@@ -1271,14 +1261,13 @@ class APlot(AbstractPlot):
 
         plt.close()
 
+    @deferrable
     def makeUlines(self,x,y,noise=0.0,title=None,figname=None,xlab=None,ylab=None,segments=None,tags=None, thumbnail=True):
         """simple plotter of multiple columns against one column
            stolen from atable, allowing some extra bars in the plot
            for line_id
            This code should be merged with plotter()
         """
-        if self._plot_mode == PlotControl.NOPLOT:
-            return
         # if filename: plt.ion()
         #plt.ion()
         plt.ioff()
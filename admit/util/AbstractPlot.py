@@ -16,6 +16,63 @@ import matplotlib.pyplot as plt
 import PlotControl
 import utils
 import sys
+import inspect
+import functools
+import multiprocessing
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+def deferrable(method):
+    """Decorator for plot methods that honor the NOPLOT and DEFERRED
+       plot modes.
+
+       In either mode the figure number is advanced and the figure and
+       thumbnail file names are registered, exactly as the plot method
+       would have done, so getFigure() and getThumbnail() keep working.
+       In DEFERRED mode the call, with a copy of all its array (and list,
+       tuple, dict) arguments, is also queued for rendering by
+       AbstractPlot.flush(), so the caller is free to modify or reuse its
+       data afterwards. The decorated method must take `figname` and
+       (optionally) `thumbnail` arguments.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._plot_mode not in (PlotControl.NOPLOT, PlotControl.DEFERRED):
+            return method(self, *args, **kwargs)
+        callargs = inspect.getcallargs(method, self, *args, **kwargs)
+        del callargs['self']
+        figname = callargs.get('figname')
+        figno = self._register(figname, callargs.get('thumbnail', False))
+        if self._plot_mode == PlotControl.DEFERRED and figname and \
+           self._plot_type != PlotControl.NONE:
+            AbstractPlot._jobs.append((self.__class__, self._plot_type,
+                                       self._abspath, figno,
+                                       method.__name__, _snapshot(callargs)))
+    return wrapper
+
+def _snapshot(value):
+    """Copy the numpy arrays, lists, tuples and dicts of a (nested) plot
+       argument, as they are at the time a deferred plot is queued.
+       Other objects are kept as they are.
+    """
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return [_snapshot(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple([_snapshot(v) for v in value])
+    if isinstance(value, dict):
+        return dict([(k, _snapshot(v)) for k, v in value.items()])
+    return value
+
+def _render(job):
+    """Render one queued plot job (see AbstractPlot.flush()).
+
+       This is a module function so it can be handed to a process pool.
+    """
+    cls, ptype, abspath, figno, name, callargs = job
+    p = cls(pmode=PlotControl.BATCH, ptype=ptype, figno=figno-1, abspath=abspath)
+    getattr(p, name)(**callargs)
+    return figno
 
 class AbstractPlot(object):
     """
@@ -27,6 +84,11 @@ class AbstractPlot(object):
     figno : int
       Figure number (1 and up). This is a static class variable.
 
+    nproc : int
+      Number of processes used to render deferred plots
+      (PlotControl.DEFERRED); 0 means one per CPU, 1 renders in the
+      calling process. This is a static class variable.
+
     _figurefiles : dict
       Dictionary of figure file names with key equal to figno.
 
@@ -48,6 +110,12 @@ class AbstractPlot(object):
     """
     # Figure number is a static member
     figno = 0
+
+    # Deferred plotting: process count, queued jobs, pool, pending results
+    nproc = 0
+    _jobs = []
+    _pool = None
+    _pending = []
     
     def __init__(self,pmode=None,ptype=None,figno=None,abspath=""):
 
@@ -186,6 +254,79 @@ class AbstractPlot(object):
         except KeyError:
             raise Exception, "Figure %d was not created by this %s." % (figno, self.__class__.__name__ )
 
+    def _register(self,figname,thumbnail):
+        """Advance the figure number and register the figure and thumbnail
+           file names a plot method would write for `figname`, without
+           making the plot.
+
+           Parameters
+           ----------
+           figname : str
+               Root of output file name (see e.g. APlot.plotter()).
+
+           thumbnail : boolean
+               Whether a thumbnail would be made.
+
+           Returns
+           -------
+           int
+               The new figure number.
+        """
+        self.__class__.figno = self.__class__.figno + 1
+        fno = self.__class__.figno
+        if figname and self._plot_type != PlotControl.NONE:
+            root = self._abspath + figname
+            self._figurefiles[fno] = root + PlotControl.mkext(self._plot_type,True)
+            if thumbnail:
+                self._thumbnailfiles[fno] = root + "_thumb.png"
+        return fno
+
+    @staticmethod
+    def flush(wait=True):
+        """Render all queued deferred plots (PlotControl.DEFERRED).
+
+           Queued jobs are submitted to a pool of AbstractPlot.nproc
+           processes. Call with `wait=False` to let them render
+           concurrently with further processing; a final call with
+           `wait=True` blocks until all figure and thumbnail files exist.
+
+           Parameters
+           ----------
+           wait : boolean
+               Whether to wait for all submitted jobs to finish.
+
+           Returns
+           -------
+           None
+        """
+        jobs = AbstractPlot._jobs
+        AbstractPlot._jobs = []
+        if AbstractPlot.nproc == 1:
+            # Render here; keep the caller's figure numbering intact.
+            for job in jobs:
+                figno = job[0].figno
+                _render(job)
+                job[0].figno = figno
+        elif jobs:
+            if AbstractPlot._pool is None:
+                nproc = AbstractPlot.nproc or multiprocessing.cpu_count()
+                AbstractPlot._pool = multiprocessing.Pool(nproc)
+            for job in jobs:
+                AbstractPlot._pending.append(
+                    AbstractPlot._pool.apply_async(_render, (job,)))
+        if wait and AbstractPlot._pool is not None:
+            pending = AbstractPlot._pending
+            AbstractPlot._pending = []
+            AbstractPlot._pool.close()
+            AbstractPlot._pool.join()
+            AbstractPlot._pool = None
+            for r in pending:
+                try:
+                    r.get()
+                except Exception, e:
+                    logging.warning("Deferred plot failed: %s" % str(e))
+            logging.info("Rendered %d deferred plots" % len(pending))
+
     def figure(self,figno=1):
         """set the figure number. 
         This should normally not be needed, unless you want to alternate drawing in different figures.
@@ -6,6 +6,22 @@
    to the data browser on a localhost port.   These classes are
    subclasses of those provided in the Python library BaseHTTPServer
    module.
+
+   Requests are handled in separate threads, so the pages and images
+   are served while a flow runs. Commands POSTed by the browser are
+   queued as background jobs (AdmitJobQueue) and answered at once with
+   the job, as JSON; the browser follows a job with
+
+   ======================= ==================================================
+   GET /jobs               all known jobs
+   GET /jobs/ID?since=N    job ID, with its progress events from number N on
+   GET /jobs/ID/events     the progress events of job ID as a stream of
+                           server-sent events (text/event-stream), until the
+                           job has finished
+   ======================= ==================================================
+
+   The progress events are the task records of admit.util.Metrics: a task
+   "started", "finished" or "failed", with its timings.
 """
 
 import os
@@ -14,16 +30,258 @@ import urllib
 import sys
 import json
 import socket
+import time
+import threading
+import traceback
+import Queue
+import email.utils
 import BaseHTTPServer
+import SocketServer
 from SimpleHTTPServer import SimpleHTTPRequestHandler
 
-__all__ = ["AdmitHTTPServer", "AdmitHTTPRequestHandler"]
+from admit.util.Metrics import Metrics
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+__all__ = ["AdmitHTTPServer", "AdmitHTTPRequestHandler", "AdmitJob", "AdmitJobQueue"]
+
+class AdmitJob(object):
+    """A command POSTed by the browser, run in the background by an
+       AdmitJobQueue.
+
+       Parameters
+       ----------
+       jobid : int
+           Job ID, unique within the queue.
+
+       command : string
+           The command, e.g. "run".
+
+       func : function
+           The function that executes the command.
+
+       args : tuple
+           The arguments of func.
+
+       Attributes
+       ----------
+       state : string
+           "queued", "running", "done" or "failed".
+
+       submitted, started, finished : float
+           Times (time.time()) the job was submitted, started and finished;
+           None while unknown.
+
+       events : list of dict
+           Progress of the job, one event per task started, finished or
+           failed, see AdmitJobQueue.
+
+       error : string
+           The exception that failed the job, or None.
+    """
+    def __init__(self, jobid, command, func, args):
+        self.id = jobid
+        self.command = command
+        self.func = func
+        self.args = args
+        self.state = "queued"
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.events = []
+        self.error = None
+
+    def done(self):
+        """Whether the job has finished (successfully or not)."""
+        return self.state in ["done", "failed"]
+
+    def todict(self, since=0):
+        """The job as a dictionary, for JSON.
+
+           Parameters
+           ----------
+           since : int, optional
+               Only include the progress events from this number on; the
+               number of the first is given as "since".
+
+           Returns
+           -------
+           dict
+        """
+        return {"id"        : self.id,
+                "command"   : self.command,
+                "state"     : self.state,
+                "submitted" : self.submitted,
+                "started"   : self.started,
+                "finished"  : self.finished,
+                "error"     : self.error,
+                "nevents"   : len(self.events),
+                "since"     : since,
+                "events"    : self.events[since:]}
+
+
+class AdmitJobQueue(object):
+    """Queue of background jobs, executed one at a time, in order, by a
+       worker thread, so that POSTed commands never run concurrently
+       with each other and the HTTP requests do not wait for them.
+
+       While a job runs, the tasks it executes report their progress
+       through admit.util.Metrics.listeners; each task adds a "started"
+       event, and a "finished" or "failed" event with its wall and CPU
+       time, to the job. Other threads can wait() for new events.
+
+       Parameters
+       ----------
+       maxjobs : int, optional
+           Number of finished jobs that are remembered.
+
+       Attributes
+       ----------
+       maxjobs : int
+           Number of finished jobs that are remembered.
+    """
+    def __init__(self, maxjobs=100):
+        self.maxjobs = maxjobs
+        self._jobs = []
+        self._count = 0
+        self._current = None
+        self._queue = Queue.Queue()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(name="AdmitJobQueue", target=self._work)
+        self._thread.setDaemon(True)
+        self._thread.start()
+        Metrics.listeners.append(self._progress)
+
+    def submit(self, command, func, *args):
+        """Queue a job.
+
+           Parameters
+           ----------
+           command : string
+               Name of the job, e.g. the POSTed command.
+
+           func : function
+               The function to call.
+
+           args
+               The arguments of func.
+
+           Returns
+           -------
+           AdmitJob
+               The new job.
+        """
+        with self._cond:
+            self._count += 1
+            job = AdmitJob(self._count, command, func, args)
+            self._jobs.append(job)
+            # forget the oldest finished jobs
+            done = [j for j in self._jobs if j.done()]
+            for j in done[:max(0, len(done) - self.maxjobs)]:
+                self._jobs.remove(j)
+        self._queue.put(job)
+        return job
+
+    def get(self, jobid):
+        """The job with a given ID, or None."""
+        with self._cond:
+            for j in self._jobs:
+                if j.id == jobid:
+                    return j
+        return None
+
+    def jobs(self):
+        """All known jobs, oldest first."""
+        with self._cond:
+            return list(self._jobs)
+
+    def wait(self, job, nevents, timeout=None):
+        """Wait until a job has more than a number of events, or has
+           finished.
+
+           Parameters
+           ----------
+           job : AdmitJob
+               The job.
 
-class AdmitHTTPServer(BaseHTTPServer.HTTPServer):
+           nevents : int
+               The number of events already seen.
+
+           timeout : float, optional
+               Maximum time to wait, in seconds.
+
+           Returns
+           -------
+           bool
+               Whether the job has new events or has finished.
+        """
+        with self._cond:
+            if len(job.events) <= nevents and not job.done():
+                self._cond.wait(timeout)
+            return len(job.events) > nevents or job.done()
+
+    def stop(self):
+        """Stop the worker thread after the queued jobs, and stop listening
+           to the task progress.
+        """
+        self._queue.put(None)
+        if self._progress in Metrics.listeners:
+            Metrics.listeners.remove(self._progress)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._cond:
+                self._current = job
+                job.state = "running"
+                job.started = time.time()
+                self._cond.notifyAll()
+            try:
+                job.func(*job.args)
+                state = "done"
+            except Exception, e:
+                logging.error("Job %d (%s) failed: %s" % (job.id, job.command, e))
+                traceback.print_exc()
+                job.error = str(e)
+                state = "failed"
+            with self._cond:
+                self._current = None
+                job.state = state
+                job.finished = time.time()
+                self._cond.notifyAll()
+
+    def _progress(self, record):
+        """Metrics listener: add a task record of the running job as an
+           event. Tasks run outside the worker thread are not jobs.
+        """
+        if threading.currentThread() is not self._thread:
+            return
+        with self._cond:
+            job = self._current
+            if job is None:
+                return
+            event = {"task"  : record.get("id"),
+                     "type"  : record.get("type"),
+                     "alias" : record.get("alias"),
+                     "time"  : time.time() - job.started}
+            if record.get("kind") == "begin":
+                event["event"] = "started"
+            else:
+                event["event"] = "finished" if record.get("status") == "ok" else "failed"
+                event["wall"] = record.get("wall")
+                event["cpu"] = record.get("cpu")
+            job.events.append(event)
+            self._cond.notifyAll()
+
+
+class AdmitHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
     """This class is identical to BaseHTTPServer.HTTPServer except
         1) It defines a fixed document root instead of using the current
            working directory.
         2) The handler class is fixed to be AdmitHTTPRequestHandler.
+        3) Each request is handled in a new (daemon) thread.
+        4) POSTed commands are run as background jobs, see AdmitJobQueue.
 
        This is accomplished by overriding the constructor and
        BaseServer.finish_request().
@@ -48,13 +306,26 @@ class AdmitHTTPServer(BaseHTTPServer.HTTPServer):
        _documentRoot : string
            The document root directory for the web server.  Requests will be
            served out of this directory.
+
+       jobs : AdmitJobQueue
+           The background jobs.
     """
+    # request threads do not keep the process alive
+    daemon_threads = True
 
     def __init__(self, server_address, docroot, postcallback):
         self._documentRoot=docroot
         self._postCallbackFn = postcallback
         BaseHTTPServer.HTTPServer.__init__(self,server_address, AdmitHTTPRequestHandler)
         self.timeout = None
+        self.jobs = AdmitJobQueue()
+
+    def server_close(self):
+        """Close the socket and stop the job queue.
+           *overrides:* `BaseServer.server_close <https://docs.python.org/2/library/socketserver.html#SocketServer.BaseServer.server_close>`_
+        """
+        BaseHTTPServer.HTTPServer.server_close(self)
+        self.jobs.stop()
 
     def finish_request(self, request, client_address):
         """Finish one http request by instantiating RequestHandlerClass.
@@ -64,7 +335,7 @@ class AdmitHTTPServer(BaseHTTPServer.HTTPServer):
         """
         #print "server %s:%d finishing request with handler docroot: %s" % (self.server_address[0], self.server_address[1], self._documentRoot )
         try:
-            self.RequestHandlerClass(request, client_address, docroot=self._documentRoot,postcallback=self._postCallbackFn)
+            self.RequestHandlerClass(request, client_address, docroot=self._documentRoot,postcallback=self._postCallbackFn,jobs=self.jobs)
         except: 
             self.handle_error(request,client_address)
 
@@ -77,8 +348,24 @@ class AdmitHTTPRequestHandler(SimpleHTTPRequestHandler):
        SimpleHTTPRequestHandler cannot be used to spawn off
        http servers in separate threads because they will
        overwrite each other's working directories.
+
+       Images (the plots and their thumbnails) are sent with a
+       Cache-Control header that lets the browser keep them, but check
+       with the server whether they changed; an unchanged image is
+       answered with 304 (Not Modified) instead of the file.
+
+       If a job queue is given, POSTed commands are run as background
+       jobs, and the jobs can be followed at /jobs, see the module
+       documentation.
        """
-    def __init__(self,request,client_address,docroot,postcallback):
+    # Cache-Control of the image files, which are rewritten by a re-run
+    CACHED = ('.png', '.jpg', '.jpeg', '.gif', '.svg')
+    CACHECONTROL = 'no-cache'
+
+    # Seconds between keep-alive comments in an event stream
+    KEEPALIVE = 15.0
+
+    def __init__(self,request,client_address,docroot,postcallback,jobs=None):
        # Note: documentRoot must be set BEFORE instantiation of SimpleHTTPServer
        # because the __init__ in the base class calls the methods that
        # actually handle the request, including AdmitHTTPServer.finish_request()
@@ -87,6 +374,8 @@ class AdmitHTTPRequestHandler(SimpleHTTPRequestHandler):
        # for now don't log anything; it's too verbose
        self._logging = False
        self._postCallbackFn = postcallback
+       self._jobs = jobs
+       self._cachecontrol = None
        try:
            SimpleHTTPRequestHandler.__init__(self, request=request, client_address=client_address, server=None)
        except:
@@ -131,6 +420,103 @@ class AdmitHTTPRequestHandler(SimpleHTTPRequestHandler):
             path = os.path.join(path, word)
         return path
 
+    def end_headers(self):
+        """Add the Cache-Control header, if any, to the headers.
+           *overrides:* BaseHTTPRequestHandler.end_headers()
+        """
+        if self._cachecontrol:
+            self.send_header('Cache-Control', self._cachecontrol)
+        SimpleHTTPRequestHandler.end_headers(self)
+
+    def send_head(self):
+        """Common code for GET and HEAD: as SimpleHTTPRequestHandler.send_head(),
+           but images get a Cache-Control header, and an unchanged image
+           (If-Modified-Since) is answered with 304 (Not Modified).
+        """
+        self._cachecontrol = None
+        path = self.translate_path(self.path)
+        if os.path.splitext(path)[1].lower() in self.CACHED and os.path.isfile(path):
+            self._cachecontrol = self.CACHECONTROL
+            since = self.headers.getheader('If-Modified-Since')
+            if since:
+                try:
+                    since = email.utils.mktime_tz(email.utils.parsedate_tz(since))
+                except (TypeError, ValueError, OverflowError):
+                    since = None
+                if since is not None and int(os.stat(path).st_mtime) <= since:
+                    self.send_response(304)
+                    self.end_headers()
+                    return None
+        return SimpleHTTPRequestHandler.send_head(self)
+
+    def do_GET(self):
+        """Serve a GET request: a job (/jobs) or a file."""
+        if self._jobs is not None and self.path.split('?',1)[0].rstrip('/').split('/')[:2] == ['', 'jobs']:
+            self.send_jobs()
+        else:
+            SimpleHTTPRequestHandler.do_GET(self)
+
+    def send_json(self, code, data):
+        """Send a JSON response."""
+        body = json.dumps(data)
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_jobs(self):
+        """Answer GET /jobs, /jobs/ID[?since=N] and /jobs/ID/events."""
+        path, query = (self.path.split('#',1)[0].split('?',1) + [''])[:2]
+        words = filter(None, path.split('/'))
+        if len(words) == 1:
+            self.send_json(200, [j.todict(len(j.events)) for j in self._jobs.jobs()])
+            return
+        try:
+            job = self._jobs.get(int(words[1]))
+        except ValueError:
+            job = None
+        if job is None or len(words) > 3 or (len(words) == 3 and words[2] != 'events'):
+            self.send_json(404, {'error': 'no such job: %s' % path})
+            return
+        if len(words) == 3:
+            self.send_events(job)
+            return
+        since = 0
+        for q in query.split('&'):
+            if q.startswith('since='):
+                try:
+                    since = max(0, int(q[6:]))
+                except ValueError:
+                    pass
+        self.send_json(200, job.todict(since))
+
+    def send_events(self, job):
+        """Stream the progress events of a job as server-sent events, until
+           the job has finished; the last event is the job itself (event type
+           "job"). Comments keep the connection alive meanwhile.
+        """
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        n = 0
+        while True:
+            if not self._jobs.wait(job, n, self.KEEPALIVE):
+                self.wfile.write(": keep-alive\n\n")
+                self.wfile.flush()
+                continue
+            events = job.events[n:]
+            for e in events:
+                self.wfile.write("data: %s\n\n" % json.dumps(e))
+            n += len(events)
+            self.wfile.flush()
+            if job.done() and n == len(job.events):
+                break
+        self.wfile.write("event: job\ndata: %s\n\n" % json.dumps(job.todict(n)))
+        self.wfile.flush()
+
     def do_OPTIONS(self):
         self.send_response(200, "ok")       
         self.send_header('Access-Control-Allow-Origin', '*')                
@@ -161,6 +547,10 @@ class AdmitHTTPRequestHandler(SimpleHTTPRequestHandler):
             #print "command = %s" % command
             print "User agent: %s " % self.headers['user-agent']
             data["firefox"] = self.isFirefox()
+            if self._jobs is not None:
+                job = self._jobs.submit(data.get("command"), self._postCallbackFn, data)
+                self.send_json(202, job.todict())
+                return
             self._postCallbackFn(data)
             self.send_response(200)
         except Exception, e:
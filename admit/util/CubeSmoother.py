@@ -0,0 +1,319 @@
+""" .. _CubeSmoother-api:
+
+    **CubeSmoother** --- Gaussian smoothing of cubes by FFT, plane by plane.
+    -------------------------------------------------------------------------
+
+    This module defines the CubeSmoother class.
+"""
+# system imports
+import math
+import numpy as np
+from multiprocessing.pool import ThreadPool
+
+
+class CubeSmoother(object):
+    """ Separable Gaussian smoothing of a cube, without CASA: a spatial
+        Gaussian applied to each channel plane by FFT convolution, and a
+        spectral Gaussian along each pencil (the spectrum of a pixel).
+
+        The cube is streamed through in blocks of BLOCK planes: a block is
+        read, its planes are smoothed spatially by a pool of threads, and
+        the spectral kernel is applied, using the planes of the previous
+        and next block within its reach; so only a block plus twice the
+        spectral kernel is in memory. Beyond the first and last channel the
+        cube is taken as zero, as in an FFT convolution. Blank (NaN) pixels
+        are zero in the convolutions and blank in the output, as in CASA's
+        convolve2d.
+
+        The spatial kernel is given as the covariance matrix of the
+        Gaussian in pixels, see beam() and kernel(); it can be different
+        for each plane, e.g. to smooth a cube with per plane beams to a
+        common beam. The spatial convolution conserves the sum, *scale*
+        multiplies the result, e.g. by the ratio of the beam areas for an
+        image in Jy/beam.
+
+        Parameters
+        ----------
+        spatial : 2x2 array or list of them, optional
+            Covariance of the spatial Gaussian, in pixels (X, Y), for all
+            planes or for each plane. Default: no spatial smoothing.
+
+        spectral : float, optional
+            FWHM of the spectral Gaussian, in channels. Default: 0, no
+            spectral smoothing.
+
+        scale : float or list of float, optional
+            Factor for all planes or for each plane. Default: 1.
+
+        nthreads : int, optional
+            Number of threads smoothing planes. Default: 1.
+
+        Attributes
+        ----------
+        halfwidth : int
+            Half width of the spectral kernel, in channels.
+
+        taps : numpy array
+            The spectral kernel (2*halfwidth+1 channels), normalized.
+    """
+    # Number of planes per block.
+    BLOCK = 32
+
+    # The Gaussians are cut at this many sigma.
+    CUTOFF = 4.0
+
+    def __init__(self, spatial=None, spectral=0.0, scale=1.0, nthreads=1):
+        self.spatial = spatial
+        self.scale = scale
+        self.nthreads = nthreads
+        self.halfwidth = 0
+        self.taps = np.ones(1)
+        if spectral > 0.0:
+            sigma = spectral / math.sqrt(8.0 * math.log(2.0))
+            self.halfwidth = int(math.ceil(self.CUTOFF * sigma))
+            j = np.arange(-self.halfwidth, self.halfwidth + 1)
+            self.taps = np.exp(-0.5 * (j / sigma)**2)
+            self.taps /= self.taps.sum()
+        self._transfer = {}
+
+    @staticmethod
+    def beam(bmaj, bmin, bpa, pixel, east=-1):
+        """ Covariance matrix, in pixels, of a Gaussian beam.
+
+            Parameters
+            ----------
+            bmaj, bmin : float
+                FWHM of the major and minor axis, in arcsec.
+
+            bpa : float
+                Position angle of the major axis, in degrees, north (+Y)
+                through east.
+
+            pixel : float
+                Pixel size, in arcsec.
+
+            east : int, optional
+                Direction of east along X: -1 (the default, RA increasing
+                to the left) or +1.
+
+            Returns
+            -------
+            2x2 numpy array
+        """
+        f = 1.0 / (math.sqrt(8.0 * math.log(2.0)) * pixel)
+        smaj = bmaj * f
+        smin = bmin * f
+        t = math.radians(bpa)
+        u = np.array([east * math.sin(t), math.cos(t)])
+        v = np.array([u[1], -u[0]])
+        return smaj**2 * np.outer(u, u) + smin**2 * np.outer(v, v)
+
+    @staticmethod
+    def kernel(source, target):
+        """ Covariance of the Gaussian that convolves a source beam to a
+            target beam: their difference.
+
+            Parameters
+            ----------
+            source, target : 2x2 array
+                Covariances of the beams, see beam().
+
+            Returns
+            -------
+            2x2 numpy array
+
+            Raises
+            ------
+            ValueError
+                If the target beam does not contain the source beam.
+        """
+        k = np.asarray(target, dtype=np.float64) - np.asarray(source, dtype=np.float64)
+        # tolerate rounding in the beam parameters
+        eps = 1e-6 * np.trace(np.asarray(target))
+        w = np.linalg.eigvalsh(k)
+        if w.min() < -eps:
+            raise ValueError("CubeSmoother: the source beam does not fit in the target beam")
+        if w.min() < 0.0:
+            k -= w.min() * np.eye(2)
+        return k
+
+    def _plane(self, z):
+        # the spatial kernel and scale of plane z
+        k = self.spatial
+        if isinstance(k, list):
+            k = k[z]
+        s = self.scale
+        if isinstance(s, list):
+            s = s[z]
+        return (k, s)
+
+    def transfer(self, k, shape):
+        """ Fourier transform of the spatial Gaussian (unit sum), on the
+            grid of numpy.fft.rfft2 of a plane of the given (padded) shape.
+
+            Parameters
+            ----------
+            k : 2x2 array
+                Covariance of the Gaussian.
+
+            shape : tuple
+                Shape of the padded plane.
+
+            Returns
+            -------
+            2D numpy array
+        """
+        key = (tuple(np.asarray(k).ravel()), shape)
+        t = self._transfer.get(key)
+        if t is None:
+            fx = np.fft.fftfreq(shape[0])[:, np.newaxis]
+            fy = np.fft.rfftfreq(shape[1])[np.newaxis, :]
+            t = np.exp(-2.0 * math.pi**2 * (k[0][0] * fx**2 + 2.0 * k[0][1] * fx * fy + k[1][1] * fy**2))
+            # per plane kernels are all different, keep only a common one
+            if not isinstance(self.spatial, list):
+                self._transfer[key] = t
+        return t
+
+    def smoothplane(self, plane, z=0):
+        """ Smooth a plane spatially.
+
+            Parameters
+            ----------
+            plane : 2D numpy array
+                The plane, indexed [x,y]; NaN for blank pixels.
+
+            z : int, optional
+                Channel of the plane, for per plane kernels.
+
+            Returns
+            -------
+            2D numpy array (float64)
+        """
+        (k, s) = self._plane(z)
+        blank = np.isnan(plane)
+        p = np.where(blank, 0.0, plane).astype(np.float64)
+        if k is not None and np.trace(k) > 0.0:
+            # pad so the convolution does not wrap around
+            pad = [int(math.ceil(self.CUTOFF * math.sqrt(k[i][i]))) + 1 for i in range(2)]
+            shape = tuple([_fastlength(p.shape[i] + pad[i]) for i in range(2)])
+            f = np.fft.rfft2(p, shape)
+            p = np.fft.irfft2(f * self.transfer(k, shape), shape)[:plane.shape[0], :plane.shape[1]]
+        if s != 1.0:
+            p *= s
+        if blank.any():
+            p[blank] = np.nan
+        return p
+
+    def smooth(self, read, write, nz):
+        """ Smooth a cube, streaming it block by block.
+
+            Parameters
+            ----------
+            read : function
+                read(z0, z1) returns the planes z0..z1-1 of the input, as an
+                array indexed [x,y,z], NaN for blank pixels.
+
+            write : function
+                write(z0, block) stores the smoothed planes z0.. of the
+                output, an array indexed [x,y,z].
+
+            nz : int
+                Number of planes.
+
+            Returns
+            -------
+            None
+        """
+        h = self.halfwidth
+        pool = ThreadPool(self.nthreads) if self.nthreads > 1 else None
+        # spatially smoothed planes buf[..., i] is plane b0+i
+        buf = None
+        b0 = 0
+        try:
+            for z0 in range(0, nz, self.BLOCK):
+                z1 = min(z0 + self.BLOCK, nz)
+                lo = max(z0 - h, 0)
+                hi = min(z1 + h, nz)
+                # keep what is still needed, smooth the new planes
+                if buf is None:
+                    start = lo
+                    keep = None
+                else:
+                    start = b0 + buf.shape[2]
+                    keep = buf[:, :, lo - b0:]
+                raw = read(start, hi)
+                jobs = [(raw[:, :, i], start + i) for i in range(hi - start)]
+                if pool is None:
+                    new = [self.smoothplane(*job) for job in jobs]
+                else:
+                    new = pool.map(_smoothplane, [(self,) + job for job in jobs])
+                del raw
+                new = np.dstack(new) if len(new) > 0 else None
+                if keep is None:
+                    buf = new
+                elif new is None:
+                    buf = keep
+                else:
+                    buf = np.concatenate([keep, new], axis=2)
+                b0 = lo
+                write(z0, self.smoothspectra(buf, z0 - b0, z1 - z0))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def smoothspectra(self, buf, i0, n):
+        """ Apply the spectral kernel to n planes of a block.
+
+            Parameters
+            ----------
+            buf : 3D numpy array
+                Planes, indexed [x,y,z], including those within reach of the
+                kernel where the cube has them.
+
+            i0 : int
+                Index in buf of the first plane to smooth.
+
+            n : int
+                Number of planes to smooth.
+
+            Returns
+            -------
+            3D numpy array
+        """
+        h = self.halfwidth
+        if h == 0:
+            return buf[:, :, i0:i0+n]
+        blank = np.isnan(buf[:, :, i0:i0+n])
+        out = np.zeros(blank.shape)
+        for j, w in enumerate(self.taps):
+            # plane i0+i uses buf plane i0+i+j-h, if there is one
+            a = max(0, h - j - i0)
+            b = min(n, buf.shape[2] - i0 - j + h)
+            if a < b:
+                out[:, :, a:b] += w * np.nan_to_num(buf[:, :, i0+a+j-h:i0+b+j-h])
+        out[blank] = np.nan
+        return out
+
+
+def _fastlength(n):
+    """ The smallest length of at least n with only 2, 3 and 5 as factors,
+        for a fast FFT.
+    """
+    best = 2 * n
+    p2 = 1
+    while p2 < best:
+        p3 = p2
+        while p3 < best:
+            p5 = p3
+            while p5 < n:
+                p5 *= 5
+            best = min(best, p5)
+            p3 *= 3
+        p2 *= 2
+    return best
+
+def _smoothplane(job):
+    """ CubeSmoother.smoothplane() of a job, for the thread pool.
+    """
+    return job[0].smoothplane(job[1], job[2])
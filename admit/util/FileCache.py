@@ -0,0 +1,239 @@
+""" .. _FileCache-api:
+
+    **FileCache** --- In-memory stat cache of an ADMIT project tree.
+    ----------------------------------------------------------------
+
+    This module defines the FileCache class.
+"""
+# system imports
+import os
+import ast
+
+# ADMIT imports
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+
+class FileCache(object):
+    """ In-memory stat cache of all files and directories below a
+        project directory.
+
+        Loading a project needs to know which BDP files exist (to read
+        them) and whether all the files referenced by the BDPs (images,
+        plots, thumbnails) still exist. Instead of one ``os.walk`` plus one
+        ``os.path.exists`` per referenced file, a single directory scan
+        fills this cache, which then answers all existence queries from
+        memory.
+
+        Optionally, a manifest of all entries (path, size, mtime) can be
+        written when the project is saved. On the next load the manifest is
+        read back and accepted as the cache contents as long as none of
+        the directories it records have changed (a directory's mtime
+        changes whenever an entry is added, removed or renamed in it), so an
+        unchanged project is validated with one read and a stat per
+        directory, instead of a stat per file.
+
+        Parameters
+        ----------
+        basedir : str
+            Root directory of the tree (usually the project directory).
+
+        Attributes
+        ----------
+        basedir : str
+            Root directory of the tree.
+
+        entries : dict
+            Maps normalized path (relative to the current working directory,
+            as given by ``basedir``) to a tuple (size, mtime, isdir).
+
+        scanned : bool
+            True if the cache has been filled, either by scan() or from
+            a valid manifest.
+    """
+    # Name of the manifest file, in basedir.
+    MANIFEST = "admit.manifest"
+
+    def __init__(self, basedir):
+        self.basedir = basedir
+        self.entries = {}
+        self.scanned = False
+
+    def _key(self, path):
+        """ Cache key of a path. """
+        return os.path.normpath(path)
+
+    def scan(self):
+        """ Walk the directory tree once, recording every file and
+            directory with its size and modification time.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        self.entries = {}
+        top = self._key(self.basedir or os.curdir)
+        if os.path.isdir(top):
+            st = os.stat(top)
+            self.entries[top] = (st.st_size, st.st_mtime, True)
+        for root, dirnames, filenames in os.walk(top):
+            for d in dirnames:
+                p = os.path.join(root, d)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                self.entries[p] = (st.st_size, st.st_mtime, True)
+            for f in filenames:
+                p = os.path.join(root, f)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    # e.g. a dangling symbolic link
+                    continue
+                self.entries[p] = (st.st_size, st.st_mtime, False)
+        self.scanned = True
+
+    def load(self):
+        """ Fill the cache, from the manifest if it is still valid,
+            otherwise with a full scan().
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True if the manifest was used, False if the tree was scanned.
+        """
+        if self.readmanifest():
+            return True
+        self.scan()
+        return False
+
+    def readmanifest(self):
+        """ Read the manifest written by writemanifest() and accept it as
+            cache contents if all directories it records are unchanged.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True if the manifest was found and is valid.
+        """
+        mfile = os.path.join(self.basedir, self.MANIFEST)
+        if not os.path.exists(mfile):
+            return False
+        top = self._key(self.basedir or os.curdir)
+        entries = {}
+        try:
+            with open(mfile) as fp:
+                for line in fp:
+                    path, size, mtime, isdir = ast.literal_eval(line)
+                    entries[self._key(os.path.join(top, path))] = \
+                        (size, mtime, isdir)
+        except Exception, e:
+            logging.warning("FileCache: ignoring unreadable manifest %s: %s" %
+                            (mfile, e))
+            return False
+        for p, (size, mtime, isdir) in entries.iteritems():
+            if not isdir:
+                continue
+            try:
+                if os.stat(p).st_mtime != mtime:
+                    logging.debug("FileCache: %s changed, manifest invalid" % p)
+                    return False
+            except OSError:
+                return False
+        self.entries = entries
+        self.scanned = True
+        return True
+
+    def writemanifest(self):
+        """ Scan the tree and write the manifest; the manifest holds one
+            (path, size, mtime, isdir) tuple per line, with paths relative
+            to basedir.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        mfile = os.path.join(self.basedir, self.MANIFEST)
+        # Writing the manifest changes the mtime of basedir, hence
+        # create it first so the scan records the final directory state.
+        open(mfile, 'a').close()
+        self.scan()
+        top = self._key(self.basedir or os.curdir)
+        with open(mfile, 'w') as fp:
+            for p in sorted(self.entries):
+                size, mtime, isdir = self.entries[p]
+                fp.write("%r\n" % ((os.path.relpath(p, top), size, mtime, isdir),))
+
+    def exists(self, path):
+        """ Check if a path exists.
+
+            Paths outside basedir (or any path if the cache was not filled)
+            are checked on disk.
+
+            Parameters
+            ----------
+            path : str
+                File or directory name.
+
+            Returns
+            -------
+            bool
+        """
+        key = self._key(path)
+        if self.scanned and self._inside(key):
+            return key in self.entries
+        return os.path.exists(path)
+
+    def stat(self, path):
+        """ Return the cached (size, mtime, isdir) tuple of a path, or None
+            if it is not in the cache.
+        """
+        return self.entries.get(self._key(path))
+
+    def getfiles(self, ext=None):
+        """ Return all (non-directory) files in the cache, optionally only
+            those ending in `ext`.
+
+            Parameters
+            ----------
+            ext : str, optional
+                Filename extension to select, e.g. ".bdp".
+
+            Returns
+            -------
+            list
+                List of file names.
+        """
+        if not self.scanned:
+            self.scan()
+        files = []
+        for p, (size, mtime, isdir) in self.entries.iteritems():
+            if isdir:
+                continue
+            if ext is None or p.endswith(ext):
+                files.append(p)
+        files.sort()
+        return files
+
+    def _inside(self, key):
+        """ True if a (normalized) path lies within basedir. """
+        top = self._key(self.basedir or os.curdir)
+        if top == os.curdir:
+            return not os.path.isabs(key) and not key.startswith(os.pardir)
+        return key == top or key.startswith(top + os.sep)
@@ -0,0 +1,484 @@
+""" .. _FitsCube-api:
+
+    **FitsCube** --- Memory-mapped FITS cube with a one-pass copy.
+    ---------------------------------------------------------------
+
+    This module defines the FitsCube class.
+"""
+# system imports
+import os
+import math
+import numpy as np
+
+# ADMIT imports
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+
+class FitsCube(object):
+    """ Memory-mapped primary data array of a FITS cube.
+
+        Ingest_AT used to convert a FITS cube to CASA and then take a
+        subimage for box= and edge=, multiply by the primary beam, compute a
+        mask and the statistics, each a full pass over the cube. The
+        copy() method does all of that in a single pass over the (memory
+        mapped) FITS data, one channel at a time, writing a new FITS cube
+        (the selected region, blanked and primary beam corrected) that needs
+        only one import into CASA, and accumulating the statistics Ingest
+        reports on the way.
+
+        Only cubes with the spectral axis as the third axis, and any axes
+        beyond that of length 1 (e.g. a Stokes axis), are supported, see
+        supported().
+
+        Parameters
+        ----------
+        filename : str
+            FITS file name.
+
+        Attributes
+        ----------
+        filename : str
+            FITS file name.
+
+        cards : list of str
+            Header cards (80 characters each), without the END card.
+
+        header : dict
+            Header keyword values: int, float, bool or str.
+
+        shape : tuple of int
+            Axis lengths, in FITS order (NAXIS1, NAXIS2, ...).
+
+        offset : int
+            Byte offset of the data array.
+    """
+    # CTYPE of the spectral axes (the part before any '-')
+    SPECTRAL = ('FREQ', 'VELO', 'VRAD', 'VOPT', 'FELO', 'ZOPT', 'WAVE', 'AWAV', 'BETA')
+
+    # numpy data type of each BITPIX (FITS is big endian)
+    DTYPE = {8: 'u1', 16: '>i2', 32: '>i4', 64: '>i8', -32: '>f4', -64: '>f8'}
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.cards = []
+        self.header = {}
+        nblock = 0
+        with open(filename, 'rb') as fp:
+            while True:
+                block = fp.read(2880)
+                if len(block) < 2880:
+                    raise IOError("FitsCube: no END card in %s" % filename)
+                nblock += 1
+                cards = [block[i:i+80] for i in range(0, 2880, 80)]
+                end = [c[:8].strip() for c in cards].count('END') > 0
+                for c in cards:
+                    if c[:8].strip() == 'END':
+                        break
+                    self.cards.append(c)
+                    if c[8:10] == '= ':
+                        self.header[c[:8].strip()] = self.value(c)
+                if end:
+                    break
+        self.offset = nblock * 2880
+        naxis = self.header.get('NAXIS', 0)
+        self.shape = tuple([self.header.get('NAXIS%d' % i, 0) for i in range(1, naxis + 1)])
+
+    @staticmethod
+    def value(card):
+        """ The value of a header card.
+
+            Parameters
+            ----------
+            card : str
+                80 character header card.
+
+            Returns
+            -------
+            int, float, bool or str
+        """
+        v = card[10:].strip()
+        if v.startswith("'"):
+            # quotes in strings are doubled
+            i = 1
+            while True:
+                i = v.find("'", i)
+                if i < 0 or v[i:i+2] != "''":
+                    break
+                i += 2
+            return v[1:i].replace("''", "'").rstrip()
+        v = v.split('/')[0].strip()
+        if v == 'T':
+            return True
+        if v == 'F':
+            return False
+        try:
+            return int(v)
+        except ValueError:
+            pass
+        try:
+            return float(v.replace('D', 'E'))
+        except ValueError:
+            return v
+
+    @staticmethod
+    def card(key, value):
+        """ A header card.
+
+            Parameters
+            ----------
+            key : str
+                Keyword.
+
+            value : int, float, bool or str
+                Value.
+
+            Returns
+            -------
+            str
+                80 character header card.
+        """
+        if isinstance(value, bool):
+            v = 'T' if value else 'F'
+        elif isinstance(value, (int, long)):
+            v = "%d" % value
+        elif isinstance(value, float):
+            v = repr(value).upper()
+        else:
+            v = "'%-8s'" % value.replace("'", "''")
+            return ("%-8s= %s" % (key, v)).ljust(80)[:80]
+        return ("%-8s= %20s" % (key, v)).ljust(80)[:80]
+
+    def supported(self):
+        """ True if the data can be read by this class: a 3D or 4D cube with
+            a spectral third axis (CTYPE3, see SPECTRAL), any fourth axis of
+            length 1, no random groups and no BLANK convention issues.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+        """
+        if self.header.get('BITPIX') not in self.DTYPE:
+            return False
+        if len(self.shape) not in (3, 4) or 0 in self.shape:
+            return False
+        if len(self.shape) == 4 and self.shape[3] != 1:
+            return False
+        ctype3 = str(self.header.get('CTYPE3', '')).strip().upper()
+        if ctype3.split('-')[0] not in self.SPECTRAL:
+            return False
+        if self.header.get('GROUPS', False):
+            return False
+        nbytes = abs(self.header['BITPIX']) / 8
+        for n in self.shape:
+            nbytes *= n
+        return os.path.getsize(self.filename) >= self.offset + nbytes
+
+    def data(self, mode='r'):
+        """ The data array, memory mapped, in numpy (C) order: the first
+            FITS axis is the last numpy axis.
+
+            Parameters
+            ----------
+            mode : str, optional
+                Memory map mode: 'r' (read only) or 'r+' (to write the data,
+                e.g. of a cube made with create()).
+
+            Returns
+            -------
+            numpy.memmap
+        """
+        return np.memmap(self.filename, dtype=self.DTYPE[self.header['BITPIX']], mode=mode,
+                         offset=self.offset, shape=tuple(reversed(self.shape)))
+
+    @staticmethod
+    def create(filename, shape, cards=[]):
+        """ Create a FITS cube of 32 bit floats, to be filled through data().
+
+            Only the header is written; the (zero) data array is allocated by
+            extending the file, so even very large cubes are created at once
+            and can then be written in any order, e.g. a block of channels at
+            a time.
+
+            Parameters
+            ----------
+            filename : str
+                FITS file name.
+
+            shape : tuple of int
+                Axis lengths, in FITS order (NAXIS1, NAXIS2, ...).
+
+            cards : list of str, optional
+                Additional header cards (see card()), e.g. the coordinates.
+
+            Returns
+            -------
+            FitsCube
+        """
+        header = [FitsCube.card('SIMPLE', True), FitsCube.card('BITPIX', -32),
+                  FitsCube.card('NAXIS', len(shape))]
+        for i, n in enumerate(shape):
+            header.append(FitsCube.card('NAXIS%d' % (i + 1), int(n)))
+        header = ''.join(header + list(cards) + ['END'.ljust(80)])
+        header = header.ljust(2880 * ((len(header) + 2879) / 2880))
+        nbytes = 4
+        for n in shape:
+            nbytes *= int(n)
+        with open(filename, 'wb') as fp:
+            fp.write(header)
+            fp.truncate(len(header) + nbytes + (-nbytes % 2880))
+        return FitsCube(filename)
+
+    def plane(self, data, z, blc, trc):
+        """ A channel of the data, in the XY box, scaled (BSCALE, BZERO)
+            and with blank pixels as NaN.
+
+            Parameters
+            ----------
+            data : numpy.memmap
+                The data array, see data().
+
+            z : int
+                Channel (0 based).
+
+            blc, trc : list of int
+                Bottom left and top right corner (0 based, inclusive) of the
+                box; only the first two (X, Y) are used.
+
+            Returns
+            -------
+            2D numpy array (float32 or float64)
+        """
+        p = data.reshape(data.shape[-3:])[z, blc[1]:trc[1]+1, blc[0]:trc[0]+1]
+        bitpix = self.header['BITPIX']
+        bscale = self.header.get('BSCALE', 1.0)
+        bzero  = self.header.get('BZERO', 0.0)
+        if bitpix < 0:
+            p = p.astype(p.dtype.newbyteorder('='))
+        else:
+            blank = self.header.get('BLANK')
+            f = p.astype('f8' if bitpix > 16 else 'f4')
+            if blank is not None:
+                f[p == blank] = np.nan
+            p = f
+        if bscale != 1.0 or bzero != 0.0:
+            p = p * bscale + bzero
+        return p
+
+    @staticmethod
+    def region(shape, box=[], edge=[]):
+        """ The region selected by Ingest_AT's box= and edge= keywords.
+
+            Parameters
+            ----------
+            shape : tuple of int
+                Axis lengths (FITS order), at least three.
+
+            box : list of int
+                [], [z1,z2], [x1,y1,x2,y2] or [x1,y1,z1,x2,y2,z2].
+
+            edge : list of int
+                [], [ze] or [zl,zr]: number of edge channels to remove, not
+                allowed with a box of 2 or 6 numbers.
+
+            Returns
+            -------
+            tuple
+                (blc, trc): bottom left and top right corner (0 based,
+                inclusive) in X, Y, Z.
+        """
+        nx, ny, nz = shape[:3]
+        edge = list(edge)
+        if len(edge) == 1:
+            edge.append(edge[0])
+        if len(box) == 2:
+            # select zrange
+            if len(edge) > 0:
+                raise Exception,"Cannot use edge= when box=[z1,z2] is used"
+            return [0, 0, box[0]], [nx-1, ny-1, box[1]]
+        elif len(box) == 4:
+            if len(edge) == 0:
+                # select just an XY box
+                return [box[0], box[1], 0], [box[2], box[3], nz-1]
+            elif len(edge) == 2:
+                # select an XY box, but remove some edge channels
+                return [box[0], box[1], edge[0]], [box[2], box[3], nz-edge[1]-1]
+            else:
+                raise Exception,"Bad edge= for len(box)=4"
+        elif len(box) == 6:
+            # select an XYZ box
+            return [box[0], box[1], box[2]], [box[3], box[4], box[5]]
+        elif len(box) == 0 and len(edge) == 2:
+            # remove some edge channels, but keep the whole XY box
+            return [0, 0, edge[0]], [nx-1, ny-1, nz-edge[1]-1]
+        elif len(box) == 0 and len(edge) == 0:
+            return [0, 0, 0], [nx-1, ny-1, nz-1]
+        raise Exception,"box=%s illegal" % box
+
+    def _header(self, blc, trc, crpix3=None):
+        """ header cards of a copy of the region blc..trc, as 32 bit floats
+        """
+        update = {'BITPIX': -32}
+        for i in range(len(self.shape)):
+            j = i + 1
+            if i < 3:
+                update['NAXIS%d' % j] = trc[i] - blc[i] + 1
+                update['CRPIX%d' % j] = float(self.header.get('CRPIX%d' % j, 1.0)) - blc[i]
+        if crpix3 is not None:
+            update['CRPIX3'] = crpix3
+        cards = []
+        for c in self.cards:
+            key = c[:8].strip()
+            if key in ('BSCALE', 'BZERO', 'BLANK', 'DATAMIN', 'DATAMAX', 'CHECKSUM', 'DATASUM'):
+                continue
+            if key in update:
+                c = self.card(key, update.pop(key))
+            cards.append(c)
+        # reference pixels that were missing go after the last NAXISn
+        n = max([i for i, c in enumerate(cards) if c.startswith('NAXIS')]) + 1
+        for key in sorted(update):
+            cards.insert(n, self.card(key, update[key]))
+        cards.append('END'.ljust(80))
+        header = ''.join(cards)
+        return header.ljust(2880 * ((len(header) + 2879) / 2880))
+
+    def copy(self, outfile, blc, trc, pb=None, pbfile=None):
+        """ Copy a region of the cube, primary beam corrected, to a new FITS
+            file in one pass, accumulating its statistics.
+
+            The output is in 32 bit floats, with blank (or non-finite) pixels
+            as NaN. If a primary beam is given, the data are multiplied by
+            it, as Ingest_AT's pb= needs. The statistics of the output are
+            accumulated with and without zeros, so the caller can still
+            decide to mask the zeros afterwards, see statistics().
+
+            Parameters
+            ----------
+            outfile : str
+                Output FITS file name.
+
+            blc, trc : list of int
+                Bottom left and top right corner (0 based, inclusive) in X,
+                Y, Z, see region().
+
+            pb : FitsCube, optional
+                Primary beam, a cube with the same XY size and either the
+                same number of channels or one channel.
+
+            pbfile : str, optional
+                If given (with pb), the primary beam averaged over the
+                selected channels, in the XY box, is written to this FITS
+                file, as a single channel.
+
+            Returns
+            -------
+            dict
+                Accumulated statistics: 'npts', 'sum', 'sumsq', 'min', 'max'
+                over the finite pixels, 'nzero' the number of those that are
+                zero, 'nzmin' and 'nzmax' the extremes of the non-zero
+                pixels, and 'nblank' the number of NaN pixels.
+        """
+        for i in range(3):
+            if not 0 <= blc[i] <= trc[i] < self.shape[i]:
+                raise Exception,"FitsCube: region %s %s outside %s" % (blc, trc, self.shape)
+        data = self.data()
+        if pb is not None:
+            pbdata = pb.data()
+            if pb.shape[:2] != self.shape[:2] or pb.shape[2] not in (1, self.shape[2]):
+                raise Exception,"FitsCube: PB shape %s does not match %s" % (pb.shape, self.shape)
+            pbsum = np.zeros((trc[1]-blc[1]+1, trc[0]-blc[0]+1))
+            pbnum = np.zeros(pbsum.shape, dtype=int)
+        acc = {'npts': 0, 'nzero': 0, 'nblank': 0, 'sum': 0.0, 'sumsq': 0.0,
+               'min': None, 'max': None, 'nzmin': None, 'nzmax': None}
+        with open(outfile, 'wb') as fp:
+            fp.write(self._header(blc, trc))
+            nbytes = 0
+            for z in range(blc[2], trc[2] + 1):
+                p = self.plane(data, z, blc, trc)
+                if pb is not None:
+                    b = pb.plane(pbdata, z if pb.shape[2] > 1 else 0, blc, trc)
+                    p = p * b
+                    good = np.isfinite(b)
+                    pbsum[good] += b[good]
+                    pbnum += good
+                good = np.isfinite(p)
+                v = p[good].astype(np.float64)
+                acc['nblank'] += p.size - v.size
+                if v.size > 0:
+                    acc['npts'] += v.size
+                    acc['sum'] += v.sum()
+                    acc['sumsq'] += np.dot(v, v)
+                    acc['min'] = v.min() if acc['min'] is None else min(acc['min'], v.min())
+                    acc['max'] = v.max() if acc['max'] is None else max(acc['max'], v.max())
+                    nz = v[v != 0.0]
+                    acc['nzero'] += v.size - nz.size
+                    if nz.size > 0:
+                        acc['nzmin'] = nz.min() if acc['nzmin'] is None else min(acc['nzmin'], nz.min())
+                        acc['nzmax'] = nz.max() if acc['nzmax'] is None else max(acc['nzmax'], nz.max())
+                if v.size < p.size:
+                    p = np.where(good, p, np.nan)
+                s = p.astype('>f4').tostring()
+                fp.write(s)
+                nbytes += len(s)
+            fp.write('\0' * (-nbytes % 2880))
+        if pb is not None and pbfile is not None:
+            # the channel average is placed at the center of the selected channels
+            crpix3 = float(pb.header.get('CRPIX3', 1.0)) - 0.5 * (blc[2] + trc[2])
+            if pb.shape[2] == 1:
+                crpix3 = None
+            zplane = [blc[0], blc[1], 0], [trc[0], trc[1], 0]
+            with open(pbfile, 'wb') as fp:
+                fp.write(pb._header(*zplane, crpix3=crpix3))
+                mean = np.where(pbnum > 0, pbsum / np.maximum(pbnum, 1), np.nan)
+                s = mean.astype('>f4').tostring()
+                fp.write(s)
+                fp.write('\0' * (-len(s) % 2880))
+        logging.info("FitsCube: %s[%s:%s] -> %s, %d good %d blank" %
+                     (os.path.basename(self.filename), blc, trc, os.path.basename(outfile),
+                      acc['npts'], acc['nblank']))
+        return acc
+
+    @staticmethod
+    def statistics(acc, zeros=True):
+        """ Statistics, in the form ia.statistics() returns them, from the
+            values accumulated by copy().
+
+            Parameters
+            ----------
+            acc : dict
+                Accumulated values, see copy().
+
+            zeros : bool, optional
+                If False, zero pixels are excluded (as if they were masked).
+
+            Returns
+            -------
+            dict
+                'npts', 'sum', 'sumsq', 'min', 'max', 'mean', 'rms' and
+                'sigma', each an array of one value (none if there are no
+                valid pixels).
+        """
+        n = acc['npts']
+        vmin, vmax = acc['min'], acc['max']
+        if not zeros:
+            n -= acc['nzero']
+            vmin, vmax = acc['nzmin'], acc['nzmax']
+        if n == 0:
+            return dict([(k, np.array([])) for k in
+                         ('npts', 'sum', 'sumsq', 'min', 'max', 'mean', 'rms', 'sigma')])
+        mean = acc['sum'] / n
+        var = (acc['sumsq'] - n * mean * mean) / (n - 1) if n > 1 else 0.0
+        s = {'npts'  : float(n),
+             'sum'   : acc['sum'],
+             'sumsq' : acc['sumsq'],
+             'min'   : vmin,
+             'max'   : vmax,
+             'mean'  : mean,
+             'rms'   : math.sqrt(acc['sumsq'] / n),
+             'sigma' : math.sqrt(max(var, 0.0))}
+        for k in s:
+            s[k] = np.array([s[k]])
+        return s
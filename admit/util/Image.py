@@ -53,6 +53,10 @@ class Image(UtilBase):
 
         description : string
             A description or caption for the image.
+
+        header : dictionary
+            Compact header and coordinate descriptor of the image (see
+            ImageHeader), empty if not recorded.
     """
     def __init__(self, **keyval):
         self.images = {}                # dictionary of images {Format:filename}
@@ -62,6 +66,7 @@ class Image(UtilBase):
         self.auxtype = ""               # format of auxiliary file
         self.description = ""           # image description/caption
         self.name = ""
+        self.header = {}                # header descriptor, see ImageHeader
         UtilBase.__init__(self, **keyval)
 
     def __str__(self):
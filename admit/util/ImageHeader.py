@@ -0,0 +1,273 @@
+""" .. _ImageHeader-api:
+
+    **ImageHeader** --- Header and coordinate descriptor of an image.
+    -----------------------------------------------------------------
+
+    This module defines the ImageHeader class.
+"""
+# system imports
+import math
+import numpy as np
+from copy import deepcopy
+
+
+class ImageHeader(object):
+    """ Read-only access to the compact header descriptor that is recorded
+        with an Image in an Image_BDP (see Image_BDP.getheader()).
+
+        The descriptor itself is a plain dictionary, so it can be stored in
+        the BDP's XML file; it is created once from the image with
+        casautil.imheader(), typically by the AT producing the image, after
+        which downstream ATs get the shape, axes, beam and units without
+        opening the image again (e.g. via imhead, imval or ia.summary()).
+        The keys of the descriptor are:
+
+        - **shape** : list of int, the shape of the image.
+        - **axisnames**, **axisunits** : list of str, as in ia.summary().
+        - **crpix** : list of float, 0-based reference pixels.
+        - **crval**, **cdelt** : list of float, reference values and
+          increments, in the axisunits.
+        - **bunit** : str, the brightness unit.
+        - **object**, **telescope** : str.
+        - **restfreq** : float, rest frequency in Hz (0 if none).
+        - **beam** : list of float, [bmaj, bmin, bpa] in arcsec and degrees,
+          empty if the image has no beam.
+        - **corners** : list of [x,y], the world coordinates (radians) of the
+          four corners of the spatial plane.
+        - **projection** : str, the projection of the spatial axes, e.g.
+          'SIN'; SIN is assumed if not present.
+        - **freqs** : list of float, the frequencies (Hz) of all channels;
+          only present if the spectral axis is not linear.
+
+        Parameters
+        ----------
+        header : dict
+            The header descriptor.
+
+        Attributes
+        ----------
+        header : dict
+            The header descriptor.
+    """
+    def __init__(self, header):
+        self.header = header
+
+    def __getitem__(self, key):
+        return self.header[key]
+
+    def __contains__(self, key):
+        return key in self.header
+
+    def shape(self):
+        """ Shape of the image.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            list of int
+        """
+        return list(self.header['shape'])
+
+    def dim(self):
+        """ Dimensionality of the image: the number of axes before the first
+            degenerate (length 1) axis; as casautil.mapdim().
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            int
+        """
+        shape = self.header['shape']
+        for d in range(len(shape)):
+            if shape[d] <= 1:
+                return d
+        return len(shape)
+
+    def axis(self, name):
+        """ Index of an axis, by (the start of) its name, e.g. 'Frequency',
+            'Right Ascension', or 'Stokes'.
+
+            Parameters
+            ----------
+            name : str
+                Name of the axis, case insensitive.
+
+            Returns
+            -------
+            int
+                The index of the axis, -1 if not present.
+        """
+        name = name.lower()
+        for i, a in enumerate(self.header['axisnames']):
+            if a.lower().startswith(name):
+                return i
+        return -1
+
+    def world(self, axis, pixels=None):
+        """ World coordinates along an axis, in the unit of that axis (e.g.
+            Hz for frequency). For the spatial axes these are linear offsets
+            from the reference value, i.e. without projection.
+
+            Parameters
+            ----------
+            axis : int or str
+                The axis, or its name.
+
+            pixels : array, optional
+                0-based pixel coordinates. Default: all pixels of the axis.
+
+            Returns
+            -------
+            numpy array
+        """
+        if isinstance(axis, basestring):
+            axis = self.axis(axis)
+        if axis < 0 or axis >= len(self.header['shape']):
+            raise ValueError("ImageHeader: no such axis %s" % str(axis))
+        if pixels is None:
+            pixels = np.arange(self.header['shape'][axis])
+        pixels = np.asarray(pixels)
+        if 'freqs' in self.header and axis == self.axis('Frequency'):
+            return np.asarray(self.header['freqs'], dtype=np.float64)[pixels]
+        return self.header['crval'][axis] + \
+               (pixels - self.header['crpix'][axis]) * self.header['cdelt'][axis]
+
+    def direction(self, x, y):
+        """ World coordinates of spatial pixels, with the projection of the
+            image (SIN or TAN); the axes of the image are assumed to be RA
+            and Dec, in that order, without rotation.
+
+            Parameters
+            ----------
+            x, y : float or array
+                0-based pixel coordinates.
+
+            Returns
+            -------
+            tuple
+                (ra, dec) in radians, numpy arrays (or floats).
+        """
+        proj = self.header.get('projection', 'SIN')
+        if proj not in ['SIN', 'TAN']:
+            raise ValueError("ImageHeader: projection %s not supported" % proj)
+        crpix = self.header['crpix']
+        crval = self.header['crval']
+        cdelt = self.header['cdelt']
+        l = (np.asarray(x, dtype=np.float64) - crpix[0]) * cdelt[0]
+        m = (np.asarray(y, dtype=np.float64) - crpix[1]) * cdelt[1]
+        if proj == 'SIN':
+            n = np.sqrt(np.maximum(1.0 - l*l - m*m, 0.0))
+        else:
+            # TAN: the direction (l,m,1), normalized
+            r = np.sqrt(1.0 + l*l + m*m)
+            l, m, n = l / r, m / r, 1.0 / r
+        cd = math.cos(crval[1])
+        sd = math.sin(crval[1])
+        ra = crval[0] + np.arctan2(l, n * cd - m * sd)
+        dec = np.arcsin(np.clip(m * cd + n * sd, -1.0, 1.0))
+        return (ra % (2 * math.pi), dec)
+
+    def slice(self, axis, start, end):
+        """ Header descriptor of a slice of the image along an axis, e.g.
+            of a subcube of channels made with imsubimage.
+
+            Parameters
+            ----------
+            axis : int or str
+                The axis, or its name.
+
+            start, end : int
+                First and last (inclusive) pixel of the slice.
+
+            Returns
+            -------
+            dict
+                The header descriptor of the slice.
+        """
+        if isinstance(axis, basestring):
+            axis = self.axis(axis)
+        h = deepcopy(self.header)
+        h['shape'][axis] = end - start + 1
+        h['crpix'][axis] -= start
+        if 'freqs' in h and axis == self.axis('Frequency'):
+            h['freqs'] = h['freqs'][start:end+1]
+        return h
+
+    def freqs(self):
+        """ Frequencies of all channels in GHz.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            numpy array
+                The frequencies, or None if the image has no frequency axis.
+        """
+        axis = self.axis('Frequency')
+        if axis < 0:
+            return None
+        return self.world(axis) / 1e9
+
+    def restfreq(self):
+        """ Rest frequency in GHz, 0.0 if none.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            float
+        """
+        return self.header.get('restfreq', 0.0) / 1e9
+
+    def beam(self):
+        """ The beam, in arcsec and degrees.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            tuple
+                (bmaj, bmin, bpa), or None if the image has no beam.
+        """
+        b = self.header.get('beam', [])
+        if len(b) != 3:
+            return None
+        return tuple(b)
+
+    def pixelsize(self):
+        """ Size of the pixels along the first (spatial) axis, in arcsec.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            float
+        """
+        return abs(self.header['cdelt'][0]) * 180.0 / math.pi * 3600.0
+
+    def unit(self):
+        """ Brightness unit of the image.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            str
+        """
+        return self.header.get('bunit', '')
@@ -0,0 +1,263 @@
+""" .. _ImagePool-api:
+
+    **ImagePool** --- Shared pool of open CASA image tools.
+    --------------------------------------------------------
+
+    This module defines the ImagePool class.
+"""
+# system imports
+import os
+import threading
+import contextlib
+
+# ADMIT imports
+from admit.util.Metrics import Metrics
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+
+class ImagePool(object):
+    """ Pool of open image tools (``taskinit.iatool()``), keyed by image path.
+
+        Most ATs open the same input images several times per run (header,
+        statistics, a chunk per channel, a pixel per source) and the next
+        AT in the flow opens them again. The pool keeps the tools open, so
+        that an image is opened once and reused, by all ATs of the process:
+
+        .. code-block:: python
+
+           pool = ImagePool.shared()
+           with pool.open(self.dir(infile)) as ia:
+               plane = ia.getchunk(...)
+
+        The tool must not be closed or done() by the caller, and given back
+        with release() when get() was used instead of open(). At most
+        *maxopen* images are kept open; when more are needed the least
+        recently used one that is not in use is closed.
+
+        A tool is only valid as long as the image is unchanged. The
+        pool closes it when the image is written or removed, either when
+        told so with invalidate() (utils.remove() and utils.rename() do
+        this), or when it finds the image has changed on disk (its
+        table.dat, or for a FITS file the file itself, has a new
+        modification time, size or inode). Writing through a pooled
+        tool (putchunk, maskhandler, setbrightnessunit) is allowed, but
+        should be followed by invalidate(), so CASA tasks see the change
+        and the table lock is released.
+
+        The number of requests and of actual opens are counted per task in
+        the task records of admit.util.Metrics, as the counts "imget" and
+        "imopen".
+
+        Parameters
+        ----------
+        maxopen : int, optional
+            Maximum number of open images.
+
+        factory : function, optional
+            Function that returns a new image tool; default
+            ``taskinit.iatool``.
+
+        Attributes
+        ----------
+        maxopen : int
+            Maximum number of open images.
+
+        opens, gets : int
+            Total number of images opened and of tools requested.
+    """
+    # Default maximum number of open images.
+    MAXOPEN = 8
+
+    # The process-wide pool, see shared().
+    _shared = None
+
+    def __init__(self, maxopen=MAXOPEN, factory=None):
+        self.maxopen = maxopen
+        self.opens = 0
+        self.gets = 0
+        self._factory = factory
+        self._lock = threading.RLock()
+        # path -> [path, tool, stamp, users], most recently used last
+        self._tools = {}
+        self._order = []
+        # id(tool) -> entry, for all tools in the pool or in use
+        self._entries = {}
+
+    @staticmethod
+    def shared():
+        """ The process-wide pool, created on first use.
+
+            Returns
+            -------
+            ImagePool
+        """
+        if ImagePool._shared is None:
+            ImagePool._shared = ImagePool()
+        return ImagePool._shared
+
+    @staticmethod
+    def changed(path):
+        """ Tell the process-wide pool, if any, that an image was written or
+            removed; see invalidate().
+
+            Parameters
+            ----------
+            path : str
+                The image, or a directory that contains images.
+
+            Returns
+            -------
+            None
+        """
+        if ImagePool._shared is not None:
+            ImagePool._shared.invalidate(path)
+
+    def __len__(self):
+        return len(self._tools)
+
+    def _stamp(self, path):
+        """ Identification of the image on disk, which changes when the
+            image is rewritten.
+        """
+        f = os.path.join(path, 'table.dat') if os.path.isdir(path) else path
+        try:
+            s = os.stat(f)
+            return (s.st_mtime, s.st_size, s.st_ino)
+        except OSError:
+            return None
+
+    def get(self, path):
+        """ An image tool with the image open; release() it when done.
+
+            Parameters
+            ----------
+            path : str
+                The (absolute) image filename.
+
+            Returns
+            -------
+            image tool
+        """
+        path = os.path.abspath(path)
+        stamp = self._stamp(path)
+        with self._lock:
+            self.gets += 1
+            Metrics.count("imget")
+            e = self._tools.get(path)
+            if e is not None and e[2] != stamp:
+                # changed on disk since it was opened
+                self._retire(e)
+                e = None
+            if e is None:
+                if self._factory is None:
+                    import taskinit
+                    self._factory = taskinit.iatool
+                tool = self._factory()
+                tool.open(path)
+                self.opens += 1
+                Metrics.count("imopen")
+                e = [path, tool, stamp, 0]
+                self._tools[path] = e
+                self._entries[id(tool)] = e
+            else:
+                self._order.remove(path)
+            self._order.append(path)
+            e[3] += 1
+            self._trim()
+            return e[1]
+
+    def release(self, tool):
+        """ Return a tool obtained with get().
+
+            Parameters
+            ----------
+            tool : image tool
+                The tool.
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            e = self._entries.get(id(tool))
+            if e is None:
+                return
+            e[3] -= 1
+            if self._tools.get(e[0]) is not e:
+                # retired while in use
+                if e[3] <= 0:
+                    self._close(e)
+            else:
+                self._trim()
+
+    @contextlib.contextmanager
+    def open(self, path):
+        """ Context manager around get() and release().
+
+            Parameters
+            ----------
+            path : str
+                The (absolute) image filename.
+        """
+        tool = self.get(path)
+        try:
+            yield tool
+        finally:
+            self.release(tool)
+
+    def invalidate(self, path):
+        """ Close the tools of an image, or of all images below a directory,
+            because it was written or removed. Tools in use are closed when
+            they are released, a new get() opens the image again.
+
+            Parameters
+            ----------
+            path : str
+                The image, or a directory.
+
+            Returns
+            -------
+            None
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            for p in list(self._order):
+                if p == path or p.startswith(path.rstrip(os.sep) + os.sep):
+                    self._retire(self._tools[p])
+
+    def clear(self):
+        """ Close all tools that are not in use, e.g. at the end of a flow.
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            for p in list(self._order):
+                if self._tools[p][3] <= 0:
+                    self._retire(self._tools[p])
+
+    def _retire(self, e):
+        # take a tool out of the pool, close it unless it is in use
+        del self._tools[e[0]]
+        self._order.remove(e[0])
+        if e[3] <= 0:
+            self._close(e)
+
+    def _close(self, e):
+        del self._entries[id(e[1])]
+        try:
+            e[1].close()
+            e[1].done()
+        except Exception, ex:
+            logging.warning("ImagePool: cannot close %s: %s" % (e[0], ex))
+
+    def _trim(self):
+        # close the least recently used tools that are not in use
+        excess = len(self._order) - self.maxopen
+        for p in list(self._order):
+            if excess <= 0:
+                break
+            if self._tools[p][3] <= 0:
+                self._retire(self._tools[p])
+                excess -= 1
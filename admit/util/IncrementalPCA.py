@@ -0,0 +1,160 @@
+""" .. _IncrementalPCA-api:
+
+    **IncrementalPCA** --- Principal component analysis of tiled data.
+    -------------------------------------------------------------------
+
+    This module defines the IncrementalPCA class.
+"""
+# system imports
+import numpy as np
+
+
+class IncrementalPCA(object):
+    """ Principal component analysis of observations that are presented
+        in tiles, so they never need to be in memory all at once.
+
+        This gives the same decomposition as matplotlib's mlab.PCA (with
+        standardization), but instead of taking the SVD of the full
+        (observations x variables) matrix, the means and the covariance
+        matrix are accumulated tile by tile, after which only the small
+        (variables x variables) eigenvalue problem is solved. Tiles are
+        then projected onto the principal axes one at a time.
+
+        Used by PrincipalComponent_AT, where the observations are the pixels
+        and the variables are the input images.
+
+        Parameters
+        ----------
+        nvar : int
+            Number of variables (columns of each tile).
+
+        Attributes
+        ----------
+        n : int
+            Number of observations accumulated.
+
+        mean : array
+            Running mean of each variable.
+
+        comoment : array
+            Running (nvar x nvar) sum of products of deviations from the mean.
+
+        mu, sigma : array
+            Mean and standard deviation of each variable, set by solve().
+
+        covar : array
+            Covariance matrix of the standardized variables (the correlation
+            matrix), set by solve().
+
+        s : array
+            Eigenvalues (variances of the components, per observation), in
+            decreasing order, set by solve().
+
+        fracs : array
+            Fraction of the variance in each component, set by solve().
+
+        Wt : array
+            Projection matrix: row i is the eigenvector of component i, set
+            by solve(). The sign of an eigenvector is arbitrary (mlab.PCA
+            leaves it to the SVD); here it is chosen to make its largest
+            component positive, or the first of its largest components if
+            several have the same size, as for the two components of a pair
+            of images. The tables then do not depend on the tiling.
+    """
+    # components within this (relative) size of the largest count as equal
+    SIGNTOL = 1e-8
+
+    def __init__(self, nvar):
+        self.n = 0
+        self.mean = np.zeros(nvar)
+        self.comoment = np.zeros((nvar, nvar))
+        self.mu = self.sigma = self.covar = None
+        self.s = self.fracs = self.Wt = None
+
+    def add(self, tile):
+        """ Accumulate a tile of observations.
+
+            Parameters
+            ----------
+            tile : array
+                (observations x nvar) array.
+
+            Returns
+            -------
+            None
+        """
+        tile = np.asarray(tile, dtype=np.float64)
+        if tile.ndim != 2 or tile.shape[1] != len(self.mean):
+            raise ValueError("IncrementalPCA: expected tiles of %d columns, got %s" %
+                             (len(self.mean), str(tile.shape)))
+        if tile.shape[0] == 0:
+            return
+        n = tile.shape[0]
+        mean = tile.mean(axis=0)
+        d = tile - mean
+        # combine with the running (n, mean, comoment) (Chan et al.)
+        ntot = self.n + n
+        delta = mean - self.mean
+        self.comoment += np.dot(d.T, d) + np.outer(delta, delta) * (float(self.n) * n / ntot)
+        self.mean += delta * (float(n) / ntot)
+        self.n = ntot
+
+    def solve(self):
+        """ Solve the eigenvalue problem of the accumulated observations.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        if self.n < len(self.mean):
+            raise RuntimeError("IncrementalPCA: fewer observations (%d) than variables (%d)" %
+                               (self.n, len(self.mean)))
+        self.mu = self.mean.copy()
+        cov = self.comoment / self.n
+        self.sigma = np.sqrt(np.diag(cov))
+        self.covar = cov / np.outer(self.sigma, self.sigma)
+        s, v = np.linalg.eigh(self.covar)
+        order = np.argsort(s)[::-1]
+        self.s = np.maximum(s[order], 0.0)
+        self.fracs = self.s / self.s.sum()
+        Wt = v[:, order].T
+        for w in Wt:
+            a = abs(w)
+            k = np.where(a >= a.max() * (1.0 - self.SIGNTOL))[0][0]
+            if w[k] < 0:
+                w *= -1
+        self.Wt = Wt
+
+    def project(self, tile):
+        """ Project a tile of observations onto the principal axes.
+
+            Parameters
+            ----------
+            tile : array
+                (observations x nvar) array.
+
+            Returns
+            -------
+            array
+                (observations x nvar) array of component values.
+        """
+        return np.dot((np.asarray(tile) - self.mu) / self.sigma, self.Wt.T)
+
+    def reconstruct(self, y):
+        """ Inverse of project().
+
+            Parameters
+            ----------
+            y : array
+                (observations x nvar) array of component values.
+
+            Returns
+            -------
+            array
+                (observations x nvar) array of observations.
+        """
+        return self.mu + self.sigma * np.dot(y, self.Wt)
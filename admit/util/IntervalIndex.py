@@ -0,0 +1,141 @@
+""" .. _IntervalIndex-api:
+
+    **IntervalIndex** --- Fast lookup of the intervals containing a point.
+    ----------------------------------------------------------------------
+
+    This module defines the IntervalIndex class.
+"""
+# system imports
+import bisect
+
+
+class IntervalIndex(object):
+    """ Index of a list of [low, high] intervals (e.g. channel or frequency
+        ranges), to find the intervals that contain a given point without
+        scanning the whole list.
+
+        The intervals are sorted by their low end once, together with the
+        running maximum of their high ends; the intervals containing a point
+        are then found with a binary search followed by a short backwards
+        walk, which stops as soon as no earlier interval can reach the point.
+        For (nearly) disjoint intervals, as in LineID_AT, a lookup costs
+        O(log n).
+
+        Lookups return the positions of the intervals in the original list,
+        so callers can keep the semantics of a loop over that list (e.g.
+        the first match). The index does not follow changes of the list;
+        it must be rebuilt when intervals are added.
+
+        Parameters
+        ----------
+        intervals : list
+            List of [low, high] pairs. A pair with low > high contains
+            nothing.
+
+        Attributes
+        ----------
+        intervals : list
+            The intervals, in the original order.
+    """
+    def __init__(self, intervals=[]):
+        self.intervals = [[i[0], i[1]] for i in intervals]
+        order = sorted(range(len(self.intervals)), key=lambda k: self.intervals[k][0])
+        self._order = order
+        self._lo = [self.intervals[k][0] for k in order]
+        self._hi = [self.intervals[k][1] for k in order]
+        self._maxhi = []
+        for h in self._hi:
+            if len(self._maxhi) == 0 or h > self._maxhi[-1]:
+                self._maxhi.append(h)
+            else:
+                self._maxhi.append(self._maxhi[-1])
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def find(self, x, closed=True):
+        """ The intervals that contain a point.
+
+            Parameters
+            ----------
+            x : float
+                The point.
+
+            closed : bool
+                If True, the end points belong to the intervals
+                (low <= x <= high), else they do not (low < x < high).
+                Default: True
+
+            Returns
+            -------
+            list
+                Positions of the intervals in the original list, sorted.
+        """
+        found = []
+        if closed:
+            k = bisect.bisect_right(self._lo, x) - 1
+            while k >= 0 and self._maxhi[k] >= x:
+                if self._hi[k] >= x:
+                    found.append(self._order[k])
+                k -= 1
+        else:
+            k = bisect.bisect_left(self._lo, x) - 1
+            while k >= 0 and self._maxhi[k] > x:
+                if self._hi[k] > x:
+                    found.append(self._order[k])
+                k -= 1
+        found.sort()
+        return found
+
+    def contains(self, x, closed=True):
+        """ Whether any interval contains a point.
+
+            Parameters
+            ----------
+            x : float
+                The point.
+
+            closed : bool
+                Whether the end points belong to the intervals, see find().
+                Default: True
+
+            Returns
+            -------
+            bool
+        """
+        if closed:
+            k = bisect.bisect_right(self._lo, x) - 1
+            return k >= 0 and self._maxhi[k] >= x
+        k = bisect.bisect_left(self._lo, x) - 1
+        return k >= 0 and self._maxhi[k] > x
+
+    def first(self, points, start=0):
+        """ The first interval, at or after a position in the original list,
+            that contains (end points included) any of the given points.
+
+            This allows a loop over the intervals that changes the points
+            as it goes, e.g. clipping a segment against all intervals, to
+            only visit the intervals that matter, in the original order.
+
+            Parameters
+            ----------
+            points : list
+                The points.
+
+            start : int
+                The position in the original list to start from.
+                Default: 0
+
+            Returns
+            -------
+            int
+                The position of the interval, or -1 if there is none.
+        """
+        best = -1
+        for x in points:
+            for k in self.find(x):
+                if k >= start:
+                    if best < 0 or k < best:
+                        best = k
+                    break
+        return best
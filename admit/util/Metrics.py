@@ -0,0 +1,520 @@
+""" .. _Metrics-api:
+
+    **Metrics** --- Structured per-task profiling records of an ADMIT project.
+    --------------------------------------------------------------------------
+
+    This module defines the Metrics class.
+"""
+# system imports
+import os
+import sys
+import time
+import json
+import platform
+import numpy as np
+
+# ADMIT imports
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+
+class Metrics(object):
+    """ Structured profiling records of the tasks executed in a project.
+
+        Every AT.execute() appends one *task* record to the metrics file
+        of the project, a text file with one JSON object per line. While
+        the task runs, the utils.Dtime tags of the task are appended as
+        *tag* records. This replaces scraping the TIMING lines of admit.log
+        (scripts/timing_summary.py, bin/admit_summary); the records can be
+        read back with read() and compared between runs and projects with
+        summarize() and compare(), or from the command line with
+        bin/admit_metrics.
+
+        A task record has the keys
+
+        ======== ===========================================================
+        kind     "task" (or "tag")
+        run      project flowcount of the run, see Admit.run()
+        date     ISO date and time the task finished
+        host     host name
+        id       task ID
+        type     task type, e.g. "CubeStats_AT"
+        alias    task alias
+        status   "ok", or "failed" if run() raised an exception
+        shape    shape of the project cube (list), or null if unknown
+        wall     wall clock time (seconds)
+        cpu      user plus system CPU time, including waited for child
+                 processes (seconds)
+        rss      resident memory size after the task (MB)
+        maxrss   peak resident memory size of the process so far (MB)
+        read     bytes read, or null if unknown
+        written  bytes written, or null if unknown
+        counts   counted events of the task, e.g. {"imopen": 3}, see
+                 count(); only present if there were any
+        ======== ===========================================================
+
+        A tag record has the run, id, type, alias and shape keys of the
+        task being executed, and the Dtime label and tag, with the (cpu,
+        wall) time since the previous tag and the (vmsize, rss) memory
+        size.
+
+        The byte counts are the read and written bytes of the process as
+        given by /proc/self/io (Linux only), which includes files read from
+        or written to the page cache; the memory sizes come from
+        /proc/self/status (elsewhere, maxrss from getrusage() only).
+
+        Parameters
+        ----------
+        filename : str
+            Name of the metrics file, usually
+            ``project.baseDir + Metrics.FILENAME``.
+
+        Attributes
+        ----------
+        filename : str
+            Name of the metrics file.
+
+        record : dict
+            Context (run, id, type, alias) of the task being measured, see
+            begin().
+    """
+    # Name of the metrics file, in the project directory.
+    FILENAME = "admit.metrics"
+
+    # Flowcount of the current run, set by Admit.run().
+    run = 0
+
+    # The Metrics of the task being executed, which receives the Dtime tags.
+    current = None
+
+    # Functions called with a copy of the record when a task begins (kind
+    # "begin") and ends (the task record), e.g. to report the progress of a
+    # flow; see util.AdmitHTTP.AdmitJobQueue.
+    listeners = []
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.record = {}
+        self._start = None
+
+    @staticmethod
+    def sample():
+        """ Sample the resource usage of this process.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                Keys wall, cpu (seconds), rss, maxrss (MB), read and
+                written (bytes); unknown values are None.
+        """
+        t = os.times()
+        s = {'wall'    : time.time(),
+             'cpu'     : t[0] + t[1] + t[2] + t[3],
+             'rss'     : None,
+             'maxrss'  : None,
+             'read'    : None,
+             'written' : None}
+        try:
+            with open('/proc/self/status') as fp:
+                for line in fp:
+                    w = line.split()
+                    if w[0] == 'VmRSS:':
+                        s['rss'] = float(w[1]) / 1024.0
+                    elif w[0] == 'VmHWM:':
+                        s['maxrss'] = float(w[1]) / 1024.0
+        except (IOError, OSError):
+            try:
+                import resource
+                m = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                # bytes on Mac OS X, kB elsewhere
+                s['maxrss'] = m / 1048576.0 if sys.platform == 'darwin' \
+                              else m / 1024.0
+            except ImportError:
+                pass
+        try:
+            with open('/proc/self/io') as fp:
+                for line in fp:
+                    w = line.split()
+                    if w[0] == 'rchar:':
+                        s['read'] = int(w[1])
+                    elif w[0] == 'wchar:':
+                        s['written'] = int(w[1])
+        except (IOError, OSError):
+            pass
+        return s
+
+    @staticmethod
+    def shape(at):
+        """ Shape of the project cube, from the NAXISn summary items of
+            the task itself (Ingest_AT) or of the project.
+
+            Parameters
+            ----------
+            at : AT
+                The task.
+
+            Returns
+            -------
+            list of int
+                Axis lengths, or None if the project has no cube (yet).
+        """
+        def value(summary, key):
+            e = summary.get(key)
+            if isinstance(e, list):
+                if not e: return None
+                e = e[0]
+            return e.getValue()[0] if e is not None else None
+
+        import admit
+        for summary in [at.summary(), getattr(admit.Project, 'summaryData', None)]:
+            if summary is None:
+                continue
+            try:
+                naxis = value(summary, 'naxis')
+                if naxis:
+                    return [int(value(summary, 'naxis%d' % (i+1)))
+                            for i in range(naxis)]
+            except Exception:
+                continue
+        return None
+
+    def begin(self, at):
+        """ Start measuring a task; the Dtime tags are recorded until end().
+
+            Parameters
+            ----------
+            at : AT
+                The task about to run.
+
+            Returns
+            -------
+            None
+        """
+        self.record = {'run'   : Metrics.run,
+                       'id'    : at._taskid,
+                       'type'  : at._type,
+                       'alias' : at._alias,
+                       'shape' : Metrics.shape(at)}
+        Metrics.current = self
+        self._start = self.sample()
+        r = dict(self.record)
+        r.update({'kind': 'begin', 'date': time.strftime('%Y-%m-%dT%H:%M:%S')})
+        self.notify(r)
+
+    def end(self, at, status="ok"):
+        """ Stop measuring a task and write its task record.
+
+            Parameters
+            ----------
+            at : AT
+                The task that ran.
+
+            status : str, optional
+                Outcome of the run, "ok" or "failed".
+
+            Returns
+            -------
+            dict
+                The task record.
+        """
+        s = self.sample()
+        r = dict(self.record)
+        r.update({'kind'   : 'task',
+                  'date'   : time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'host'   : platform.node(),
+                  'status' : status,
+                  'shape'  : Metrics.shape(at) or r['shape'],
+                  'rss'    : s['rss'],
+                  'maxrss' : s['maxrss']})
+        for k in ['wall', 'cpu', 'read', 'written']:
+            if s[k] is None or self._start[k] is None:
+                r[k] = None
+            else:
+                r[k] = s[k] - self._start[k]
+        if Metrics.current is self:
+            Metrics.current = None
+        self.write(r)
+        self.notify(r)
+        return r
+
+    def notify(self, record):
+        """ Pass a record to the listeners.
+
+            As for the metrics file, errors of a listener are logged and
+            otherwise ignored.
+
+            Parameters
+            ----------
+            record : dict
+                The record.
+
+            Returns
+            -------
+            None
+        """
+        for f in list(Metrics.listeners):
+            try:
+                f(dict(record))
+            except Exception, e:
+                logging.warning("Metrics: listener failed: %s" % e)
+
+    @staticmethod
+    def count(name, n=1):
+        """ Count an event of the task being executed, e.g. the images it
+            opens (see ImagePool); the counts are added to its task record.
+            Outside a task nothing is counted.
+
+            Parameters
+            ----------
+            name : str
+                Name of the count.
+
+            n : int, optional
+                Number of events.
+
+            Returns
+            -------
+            None
+        """
+        m = Metrics.current
+        if m is not None:
+            counts = m.record.setdefault('counts', {})
+            counts[name] = counts.get(name, 0) + n
+
+    def tag(self, label, tag, dt):
+        """ Write a tag record of the task being measured (see utils.Dtime).
+
+            Parameters
+            ----------
+            label : str
+                Dtime label.
+
+            tag : str
+                Dtime tag.
+
+            dt : array
+                (cpu, wall) time since the previous tag, optionally followed
+                by the (vmsize, rss) memory size.
+
+            Returns
+            -------
+            None
+        """
+        r = dict(self.record)
+        r.pop('counts', None)
+        r.update({'kind': 'tag', 'label': label, 'tag': tag,
+                  'cpu': float(dt[0]), 'wall': float(dt[1])})
+        if len(dt) > 3:
+            r['vmsize'] = float(dt[2])
+            r['rss'] = float(dt[3])
+        self.write(r)
+
+    def write(self, record):
+        """ Append a record to the metrics file.
+
+            Profiling must never stop a flow, hence I/O errors are
+            logged and otherwise ignored.
+
+            Parameters
+            ----------
+            record : dict
+                The record.
+
+            Returns
+            -------
+            None
+        """
+        try:
+            with open(self.filename, 'a') as fp:
+                fp.write(json.dumps(record, sort_keys=True) + '\n')
+        except (IOError, OSError), e:
+            logging.warning("Metrics: cannot write %s: %s" % (self.filename, e))
+
+    def read(self, kind="task", run=None):
+        """ Read the records from the metrics file.
+
+            Parameters
+            ----------
+            kind : str, optional
+                Record kind ("task" or "tag"); None for all records.
+
+            run : int, optional
+                Only records of this run; a negative run counts back from
+                the last run (-1 is the last run). Default is all runs.
+
+            Returns
+            -------
+            list of dict
+                The records, in file order; unreadable lines are skipped.
+        """
+        records = []
+        if not os.path.exists(self.filename):
+            return records
+        with open(self.filename) as fp:
+            for line in fp:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if kind is None or r.get('kind') == kind:
+                    records.append(r)
+        if run is not None:
+            if run < 0:
+                runs = sorted(set([r.get('run') for r in records]))
+                run = runs[run] if len(runs) >= -run else None
+            records = [r for r in records if r.get('run') == run]
+        return records
+
+    @staticmethod
+    def key(record, keys=('type', 'shape')):
+        """ Grouping key of a record, as a string, e.g. "CubeStats_AT
+            [256, 256, 120, 1]".
+        """
+        return " ".join([str(record.get(k)) for k in keys])
+
+    @staticmethod
+    def summarize(records, keys=('type', 'shape')):
+        """ Totals of task records, grouped by key.
+
+            Parameters
+            ----------
+            records : list of dict
+                Task records (see read()).
+
+            keys : tuple of str, optional
+                Record keys to group by; default groups by task type and
+                cube shape.
+
+            Returns
+            -------
+            dict
+                Maps each key (see key()) to a dict with the number of
+                records ('n'), the summed 'wall', 'cpu', 'read', 'written'
+                and 'counts', and the largest 'maxrss'.
+        """
+        groups = {}
+        for r in records:
+            g = groups.setdefault(Metrics.key(r, keys),
+                                  {'n': 0, 'wall': 0.0, 'cpu': 0.0,
+                                   'read': 0, 'written': 0, 'maxrss': 0.0,
+                                   'counts': {}})
+            g['n'] += 1
+            for k in ['wall', 'cpu', 'read', 'written']:
+                g[k] += r.get(k) or 0
+            g['maxrss'] = max(g['maxrss'], r.get('maxrss') or 0.0)
+            for k, v in (r.get('counts') or {}).items():
+                g['counts'][k] = g['counts'].get(k, 0) + v
+        return groups
+
+    @staticmethod
+    def compare(base, other, keys=('type', 'shape'), value='wall'):
+        """ Compare two sets of task records, e.g. two runs of a project or
+            two projects, per group.
+
+            Parameters
+            ----------
+            base : list of dict
+                Reference task records.
+
+            other : list of dict
+                Task records to compare with the reference.
+
+            keys : tuple of str, optional
+                Record keys to group by, see summarize().
+
+            value : str, optional
+                The quantity to compare: 'wall', 'cpu', 'read', 'written'
+                or 'maxrss'.
+
+            Returns
+            -------
+            list of tuple
+                (key, base value, other value, ratio) for every group in
+                either set, ordered by decreasing ratio, so the largest
+                regressions come first. Values are None for groups missing
+                from a set, the ratio is None unless both values are
+                positive.
+        """
+        a = Metrics.summarize(base, keys)
+        b = Metrics.summarize(other, keys)
+        rows = []
+        for k in set(a.keys()) | set(b.keys()):
+            va = a[k][value] if k in a else None
+            vb = b[k][value] if k in b else None
+            ratio = float(vb) / va if va and vb else None
+            rows.append((k, va, vb, ratio))
+        rows.sort(key=lambda r: (r[3] is None, -(r[3] or 0), r[0]))
+        return rows
+
+    @staticmethod
+    def scaling(records, factors=('npix', 'nchan'), keys=('type',), value='wall'):
+        """ Scaling exponents of task records, per group: a least squares
+            fit of log(value) = c + sum_j b_j log(factor_j), e.g. with
+            factors the number of pixels and channels of the cube, gives
+            value ~ npix**b_0 * nchan**b_1.
+
+            The records of a group with the same factor values (e.g. the
+            Moment_AT clones of one run) are first summed ('maxrss': the
+            largest is taken). Points with a value or factor that is not
+            positive are skipped, and only factors with at least two
+            different values are fitted.
+
+            Parameters
+            ----------
+            records : list of dict
+                Task records, with the factors as extra keys.
+
+            factors : tuple of str, optional
+                Record keys of the size parameters.
+
+            keys : tuple of str, optional
+                Record keys to group by, see summarize().
+
+            value : str, optional
+                The quantity to fit: 'wall', 'cpu', 'read', 'written',
+                'maxrss', or any other numeric record key.
+
+            Returns
+            -------
+            dict
+                Maps each key (see key()) to a dict with the number of
+                points ('n') and the exponent of every factor, None for
+                factors that were not fitted (or if there are fewer points
+                than fitted parameters).
+        """
+        points = {}
+        for r in records:
+            x = tuple([r.get(f) for f in factors])
+            g = points.setdefault(Metrics.key(r, keys), {})
+            v = r.get(value)
+            if v is None:
+                continue
+            if x not in g:
+                g[x] = v
+            elif value == 'maxrss':
+                g[x] = max(g[x], v)
+            else:
+                g[x] += v
+
+        fits = {}
+        for k, g in points.items():
+            pts = [(x, v) for x, v in g.items()
+                   if v > 0 and all([xi is not None and xi > 0 for xi in x])]
+            fit = dict([(f, None) for f in factors])
+            fit['n'] = len(pts)
+            fits[k] = fit
+            cols = [j for j in range(len(factors))
+                    if len(set([x[j] for x, v in pts])) > 1]
+            if len(pts) <= len(cols):
+                continue
+            a = np.ones((len(pts), len(cols) + 1))
+            for j, c in enumerate(cols):
+                a[:, j+1] = np.log([float(x[c]) for x, v in pts])
+            b = np.log([float(v) for x, v in pts])
+            coef = np.linalg.lstsq(a, b, rcond=-1)[0]
+            for j, c in enumerate(cols):
+                fit[factors[c]] = float(coef[j+1])
+        return fits
@@ -23,6 +23,12 @@
     - PlotControl.BATCH 
     - PlotControl.INTERACTIVE 
     - PlotControl.SHOW_AT_END 
+    - PlotControl.DEFERRED
+
+    In NOPLOT mode no figures are made, but plot methods still register
+    the figure and thumbnail file names they would have written.
+    In DEFERRED mode the plot commands and their data are queued and
+    rendered later, in parallel, by AbstractPlot.flush().
 
     Plot Orientations are:
 
@@ -39,6 +45,7 @@ class __PlotControl:
      PLOTMODE_BATCH          =  32
      PLOTMODE_INTERACTIVE    =  33
      PLOTMODE_SHOW_AT_END    =  34
+     PLOTMODE_DEFERRED       =  35
      PLOTORIENTATION_LANDSCAPE = 'landscape'
      PLOTORIENTATION_PORTRAIT  = 'portrait'
 
@@ -155,10 +162,34 @@ class __PlotControl:
              return "PLOTMODE_INTERACTIVE"
          elif plotmode == self.PLOTMODE_SHOW_AT_END:
              return "PLOTMODE_SHOW_AT_END"
+         elif plotmode == self.PLOTMODE_DEFERRED:
+             return "PLOTMODE_DEFERRED"
          else:
              return "UNKNOWN PLOT MODE (%d)" % plotmode
 
 
+     #@staticmethod
+     def isplotfile(self,filename):
+         """ Test if a file name has the extension of one of the
+             supported plot types.
+
+             Parameters
+             ----------
+             filename : str
+                 File name.
+
+             Returns
+             -------
+             boolean
+                 True if the extension is a plot type extension.
+         """
+         ext = filename.rsplit(".",1)[-1].lower()
+         for plottype in range(self.PLOTTYPE_GIF, self._NUM_SUPPORTED_TYPES):
+             if ext == self.mkext(plottype,False):
+                 return True
+         return ext == "eps"
+
+
 #-------------------------------
 # This is a singleton    
 #-------------------------------
@@ -183,6 +214,7 @@ NOPLOT         = _inst.PLOTMODE_NOPLOT
 BATCH          = _inst.PLOTMODE_BATCH
 INTERACTIVE    = _inst.PLOTMODE_INTERACTIVE
 SHOW_AT_END    = _inst.PLOTMODE_SHOW_AT_END
+DEFERRED       = _inst.PLOTMODE_DEFERRED
 LANDSCAPE      = _inst.PLOTORIENTATION_LANDSCAPE
 PORTRAIT       = _inst.PLOTORIENTATION_PORTRAIT
 
@@ -193,3 +225,4 @@ mkext    = _inst.mkext
 plottype = _inst.plottype
 plotmode = _inst.plotmode
 isSupportedType = _inst.isSupportedType
+isplotfile = _inst.isplotfile
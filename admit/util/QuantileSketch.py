@@ -0,0 +1,300 @@
+""" .. _QuantileSketch-api:
+
+    **QuantileSketch** --- Streaming, mergeable quantile estimator.
+    ---------------------------------------------------------------
+
+    This module defines the QuantileSketch class.
+"""
+# system imports
+import math
+import numpy as np
+import numpy.ma as ma
+
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+class QuantileSketch(object):
+    """ Streaming estimator of quantiles (median, MAD) of data that are
+        presented in blocks, e.g. the planes of a cube, so the data never
+        need to be in memory all at once.
+
+        Values are counted in logarithmically spaced bins (separately for
+        positive and negative values, plus a bin for zeros), such that any
+        quantile is returned with a relative accuracy of **alpha**; values
+        near zero are thus determined to a correspondingly small absolute
+        accuracy. Sketches of different blocks (e.g. computed in parallel)
+        can be merged, giving the same result as one sketch of all data.
+        The memory used depends only on the dynamic range of the data, not
+        on their number.
+
+        The bins are relative to zero, so for data with an offset (e.g.
+        noise on continuum emission) their width near the median is about
+        alpha * abs(median), which can be larger than the spread of the
+        data. A second pass over the data with adddeviations() adds the
+        values minus the median of the first pass to a second sketch, whose
+        bins are relative to the spread; median(), quantile() and mad() then
+        use it, and are accurate to about alpha times the deviation from
+        the median. Without the second pass mad() and sigma() still return
+        a one-pass estimate, but if the offset is large its error, up to
+        about 2 * alpha * abs(median), is logged as a warning:
+
+        .. code-block:: python
+
+           qs = QuantileSketch()
+           for plane in planes:
+               qs.add(plane)
+           for plane in planes:
+               qs.adddeviations(plane)
+           sigma = qs.sigma()
+
+        Parameters
+        ----------
+        alpha : float, optional
+            Relative accuracy of the quantiles. Default: 0.001
+
+        Attributes
+        ----------
+        alpha : float
+            Relative accuracy of the quantiles.
+
+        n : int
+            Number of values added.
+
+        min, max : float
+            Smallest and largest value added.
+
+        center : float
+            The median of the first pass, from which adddeviations() takes
+            the deviations; None before adddeviations() is called.
+    """
+    # values smaller than this (in absolute value) are counted as zero
+    TINY = 1e-30
+
+    # largest relative error of mad() without adddeviations() before warning
+    MADERROR = 0.01
+
+    def __init__(self, alpha=0.001):
+        self.alpha = alpha
+        self._gamma = (1.0 + alpha) / (1.0 - alpha)
+        self._lg = math.log(self._gamma)
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._zero = 0
+        # (offset, counts) of the bins of the positive and negative values
+        self._pos = (0, np.zeros(0, dtype=np.int64))
+        self._neg = (0, np.zeros(0, dtype=np.int64))
+        self.center = None
+        # sketch of the values minus center, see adddeviations()
+        self._dev = None
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _addbins(store, offset, counts):
+        """ add counts (starting at bin offset) to a (offset, counts) store
+        """
+        o, c = store
+        if len(counts) == 0:
+            return store
+        if len(c) == 0:
+            return (offset, counts.copy())
+        lo = min(o, offset)
+        hi = max(o + len(c), offset + len(counts))
+        new = np.zeros(hi - lo, dtype=np.int64)
+        new[o - lo:o - lo + len(c)] += c
+        new[offset - lo:offset - lo + len(counts)] += counts
+        return (lo, new)
+
+    def _bins(self, a):
+        """ bin index, and counts from the lowest index, of positive values a
+        """
+        idx = np.ceil(np.log(a) / self._lg).astype(np.int64)
+        lo = idx.min()
+        return lo, np.bincount(idx - lo).astype(np.int64)
+
+    def add(self, data):
+        """ Add a block of data; masked and non-finite values are skipped.
+
+            Parameters
+            ----------
+            data : array
+                The data (any shape, can be masked).
+
+            Returns
+            -------
+            None
+        """
+        if isinstance(data, ma.MaskedArray):
+            data = data.compressed()
+        data = np.ravel(np.asarray(data, dtype=np.float64))
+        data = data[np.isfinite(data)]
+        if len(data) == 0:
+            return
+        self.n += len(data)
+        self.min = min(self.min, data.min())
+        self.max = max(self.max, data.max())
+        pos = data[data > self.TINY]
+        neg = -data[data < -self.TINY]
+        self._zero += len(data) - len(pos) - len(neg)
+        if len(pos) > 0:
+            self._pos = self._addbins(self._pos, *self._bins(pos))
+        if len(neg) > 0:
+            self._neg = self._addbins(self._neg, *self._bins(neg))
+
+    def adddeviations(self, data):
+        """ Second pass: add a block of data again, after all data were
+            added with add(), as deviations from their median. The first call
+            fixes the center; once all data were added again, the quantiles
+            and the MAD are taken from the deviations, see the class
+            description.
+
+            Parameters
+            ----------
+            data : array
+                The data (any shape, can be masked), as given to add().
+
+            Returns
+            -------
+            None
+        """
+        if self._dev is None:
+            self.center = self.median()
+            self._dev = QuantileSketch(self.alpha)
+        # keep the mask, so the same values are added as by add()
+        self._dev.add(ma.asarray(data, dtype=np.float64) - self.center)
+
+    def _deviations(self):
+        """ the sketch of the deviations, if all data were added to it
+        """
+        if self._dev is not None and self._dev.n == self.n and self.n > 0:
+            return self._dev
+        return None
+
+    def merge(self, other):
+        """ Add the data of another sketch.
+
+            Parameters
+            ----------
+            other : QuantileSketch
+                Sketch with the same accuracy.
+
+            Returns
+            -------
+            None
+        """
+        if other.alpha != self.alpha:
+            raise ValueError("QuantileSketch: cannot merge alpha=%g into alpha=%g" %
+                             (other.alpha, self.alpha))
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._zero += other._zero
+        self._pos = self._addbins(self._pos, *other._pos)
+        self._neg = self._addbins(self._neg, *other._neg)
+        if self._dev is not None and other._dev is not None and self.center == other.center:
+            self._dev.merge(other._dev)
+        else:
+            self.center = None
+            self._dev = None
+
+    def _values(self):
+        """ sorted bin values and their counts
+        """
+        def store(s, sign):
+            o, c = s
+            keep = c > 0
+            v = 2.0 * self._gamma ** (np.arange(o, o + len(c))[keep]) / (self._gamma + 1.0)
+            return sign * v, c[keep]
+        nv, nc = store(self._neg, -1.0)
+        pv, pc = store(self._pos, 1.0)
+        values = np.concatenate([nv[::-1], [0.0], pv])
+        counts = np.concatenate([nc[::-1], [self._zero], pc])
+        # the representative values are within the exact range
+        return np.clip(values, self.min, self.max), counts
+
+    def quantile(self, q):
+        """ Quantile(s) of the data.
+
+            Parameters
+            ----------
+            q : float or list of float
+                Quantile(s), between 0 and 1.
+
+            Returns
+            -------
+            float or array
+                The value of which a fraction q of the data are smaller
+                (NaN if there are no data).
+        """
+        if self.n == 0:
+            return np.nan * np.asarray(q)
+        dev = self._deviations()
+        if dev is not None:
+            return self.center + dev.quantile(q)
+        values, counts = self._values()
+        cum = np.cumsum(counts)
+        rank = np.asarray(q, dtype=np.float64) * (self.n - 1)
+        return values[np.minimum(np.searchsorted(cum, rank, side='right'), len(values) - 1)]
+
+    def median(self):
+        """ Median of the data.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            float
+        """
+        return float(self.quantile(0.5))
+
+    def mad(self, center=None):
+        """ Median absolute deviation of the data.
+
+            Parameters
+            ----------
+            center : float, optional
+                Center from which the deviations are taken. Default: the
+                median.
+
+            Returns
+            -------
+            float
+                The MAD. Without adddeviations(), if the data have an offset
+                so large that the bins cannot give the MAD to MADERROR, a
+                warning with its error bound is logged.
+        """
+        if self.n == 0:
+            return np.nan
+        d = self._deviations()
+        if d is not None:
+            if center is None:
+                return d.mad()
+            return d.mad(center - self.center)
+        if center is None:
+            center = self.median()
+        values, counts = self._values()
+        dev = np.abs(values - center)
+        order = np.argsort(dev, kind='mergesort')
+        cum = np.cumsum(counts[order])
+        i = np.searchsorted(cum, 0.5 * (self.n - 1), side='right')
+        mad = float(dev[order][min(i, len(dev) - 1)])
+        if self.alpha * abs(center) > self.MADERROR * mad and self.min < self.max:
+            logging.warning("QuantileSketch: MAD %g of data with an offset %g is only accurate to %g, use adddeviations()" %
+                            (mad, center, 2.0 * self.alpha * abs(center)))
+        return mad
+
+    def sigma(self):
+        """ Robust estimate of the standard deviation: 1.4826 * MAD.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            float
+        """
+        return 1.4826 * self.mad()
@@ -0,0 +1,269 @@
+""" .. _SourceFinder-api:
+
+    **SourceFinder** --- Source finder for 2D maps, in NumPy and SciPy.
+    -------------------------------------------------------------------
+
+    This module defines the SourceFinder class.
+"""
+# system imports
+import math
+import numpy as np
+try:
+    import scipy.ndimage
+except:
+    print "WARNING: No scipy; SourceFinder utility cannot function."
+
+# ADMIT imports
+import admit.util.utils as utils
+
+
+class SourceFinder(object):
+    """ Find the sources in a 2D map, without CASA: the map is thresholded,
+        the islands of connected pixels above the threshold are labeled,
+        and each local maximum in an island is a source. The pixels of an
+        island with more than one maximum are given to the nearest one.
+        Every source gets a Gaussian from the moments of its pixels: the
+        centroid, the second moments and the sum, corrected for the part of
+        the Gaussian below the threshold.
+
+        A local maximum is a pixel that is the largest within a box of the
+        size of the beam (*width*), so that the noise on a source does not
+        split it; the maximum of an island is always a source.
+
+        Large maps (mosaics) are searched in tiles of TILE x TILE pixels,
+        each with a border of *margin* pixels from the neighbouring tiles, so
+        that a source near the edge of a tile is found whole. A source
+        belongs to the tile that has its peak pixel. Islands that extend
+        more than *margin* pixels into a neighbouring tile are cut there.
+        With nproc > 1 the tiles are searched by a pool of worker processes.
+
+        Parameters
+        ----------
+        data : 2D numpy array
+            The map, indexed [x,y] as in CASA; masked or NaN pixels are not
+            used.
+
+        width : float, optional
+            The beam (FWHM) in pixels. Default: 3.
+
+        nproc : int, optional
+            Number of processes. Default: 1.
+
+        margin : int, optional
+            The border of a tile; default four times the beam, and at
+            least 16 pixels.
+
+        Attributes
+        ----------
+        data : 2D numpy array
+            The map, with NaN for the masked pixels.
+    """
+    # Size of a tile, in pixels.
+    TILE = 1024
+
+    # The columns of the sources found, see find().
+    COLUMNS = ['x', 'y', 'peak', 'flux', 'major', 'minor', 'pa', 'npix']
+
+    def __init__(self, data, width=3.0, nproc=1, margin=None):
+        if np.ma.isMaskedArray(data):
+            data = data.astype(np.float64).filled(np.nan)
+        self.data = data
+        self.width = max(float(width), 1.0)
+        self.nproc = nproc
+        if margin is None:
+            margin = max(16, int(math.ceil(4 * self.width)))
+        self.margin = margin
+
+    def tiles(self):
+        """ The tiles of the map, as the bottom left and top right corners
+            (0 based, exclusive) of their cores.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            list of tuple
+                (x0, y0, x1, y1) for each tile.
+        """
+        nx, ny = self.data.shape
+        return [(x, y, min(x + self.TILE, nx), min(y + self.TILE, ny))
+                for x in range(0, nx, self.TILE) for y in range(0, ny, self.TILE)]
+
+    def find(self, threshold, nmax=0):
+        """ Find the sources above a threshold.
+
+            Parameters
+            ----------
+            threshold : float
+                Pixels above this value are in an island.
+
+            nmax : int, optional
+                Return only the nmax brightest sources; 0 for all.
+
+            Returns
+            -------
+            dict
+                The columns (see COLUMNS) of the sources, as numpy arrays,
+                ordered by peak value (brightest first):
+                x, y: the centroid (0 based pixels);
+                peak: the value of the peak pixel;
+                flux: the sum of the Gaussian (value times pixels);
+                major, minor: the FWHM of the Gaussian, in pixels;
+                pa: the position angle of the major axis, in degrees, from
+                the Y axis towards -X (north through east for an image with
+                RA increasing to the left), between 0 and 180;
+                npix: the number of pixels of the source.
+        """
+        # the (forked) workers of a pool inherit the map
+        found = utils.pmap(self, "findtile", [(t, threshold) for t in self.tiles()], self.nproc)
+        sources = {}
+        for c in self.COLUMNS:
+            sources[c] = np.concatenate([f[c] for f in found])
+        order = np.argsort(-sources['peak'], kind='mergesort')
+        if nmax > 0:
+            order = order[:nmax]
+        for c in self.COLUMNS:
+            sources[c] = sources[c][order]
+        return sources
+
+    def findtile(self, tile, threshold):
+        """ Find the sources with their peak in a tile, see find().
+
+            Parameters
+            ----------
+            tile : tuple
+                (x0, y0, x1, y1) of the core of the tile, see tiles().
+
+            threshold : float
+                Pixels above this value are in an island.
+
+            Returns
+            -------
+            dict
+                The columns of the sources, unordered.
+        """
+        x0, y0, x1, y1 = tile
+        nx, ny = self.data.shape
+        bx = max(x0 - self.margin, 0)
+        by = max(y0 - self.margin, 0)
+        d = np.asarray(self.data[bx:min(x1 + self.margin, nx), by:min(y1 + self.margin, ny)],
+                       dtype=np.float64)
+        d = np.where(np.isnan(d), -np.inf, d)
+        mask = d > threshold
+        eight = np.ones((3, 3), dtype=bool)
+        labels, nislands = scipy.ndimage.label(mask, structure=eight)
+        if nislands == 0:
+            return dict([(c, np.zeros(0)) for c in self.COLUMNS])
+        islands = np.arange(1, nislands + 1)
+
+        # the peaks: local maxima on the scale of the beam, and the maximum
+        # of each island
+        size = max(3, int(self.width) | 1)
+        peaks = mask & (d == scipy.ndimage.maximum_filter(d, size=size, mode='constant', cval=-np.inf))
+        top = np.array(scipy.ndimage.maximum_position(d, labels, islands), dtype=int).reshape(-1, 2)
+        peaks[top[:, 0], top[:, 1]] = True
+        # a flat top (e.g. a saturated source) has several adjacent, equal
+        # peak pixels: keep the one nearest to the middle of each
+        plateaus, nplateaus = scipy.ndimage.label(peaks, structure=eight)
+        if nplateaus < peaks.sum():
+            index = np.arange(1, nplateaus + 1)
+            middle = np.array(scipy.ndimage.center_of_mass(peaks, plateaus, index)).reshape(-1, 2)
+            x, y = np.indices(d.shape, dtype=np.float64)
+            dist = np.where(peaks, (x - middle[plateaus - 1, 0])**2 + (y - middle[plateaus - 1, 1])**2, np.inf)
+            keep = np.array(scipy.ndimage.minimum_position(dist, plateaus, index), dtype=int).reshape(-1, 2)
+            peaks[:] = False
+            peaks[keep[:, 0], keep[:, 1]] = True
+        del plateaus
+        px, py = np.nonzero(peaks)
+        # the brightest first, so it is the main peak of its island
+        order = np.lexsort((py, px, -d[px, py]))
+        px = px[order]
+        py = py[order]
+        npeaks = len(px)
+        peakid = np.zeros(d.shape, dtype=np.int32)
+        peakid[px, py] = np.arange(1, npeaks + 1)
+        peakisland = labels[px, py]
+        # main (brightest) peak of each island
+        main = np.zeros(nislands + 1, dtype=np.int32) + npeaks + 1
+        np.minimum.at(main, peakisland, np.arange(1, npeaks + 1, dtype=np.int32))
+        main[0] = 0
+
+        # the pixels of each island go to the nearest peak in it
+        if npeaks > nislands:
+            ix, iy = scipy.ndimage.distance_transform_edt(peakid == 0, return_distances=False,
+                                                          return_indices=True)
+            source = peakid[ix, iy]
+            other = mask & (peakisland[np.maximum(source, 1) - 1] != labels)
+            source[other] = main[labels[other]]
+            source[~mask] = 0
+        else:
+            source = main[labels]
+        del labels
+
+        # the moments of each source
+        index = np.arange(1, npeaks + 1)
+        v = np.where(mask, d, 0.0)
+        x, y = np.indices(d.shape, dtype=np.float64)
+        s = scipy.ndimage.sum(v, source, index)
+        npix = scipy.ndimage.sum(mask, source, index)
+        mx = scipy.ndimage.sum(v * x, source, index) / s
+        my = scipy.ndimage.sum(v * y, source, index) / s
+        vxx = scipy.ndimage.sum(v * x * x, source, index) / s - mx * mx
+        vyy = scipy.ndimage.sum(v * y * y, source, index) / s - my * my
+        vxy = scipy.ndimage.sum(v * x * y, source, index) / s - mx * my
+        peak = d[px, py]
+
+        # a Gaussian cut at a fraction f of its peak has a fraction 1-f of
+        # its sum, and second moments smaller by a factor c
+        f = np.clip(threshold / peak, 1e-6, 1.0 - 1e-6) if threshold > 0 else np.zeros(npeaks)
+        u0 = -np.log(np.maximum(f, 1e-300))
+        c = np.where(f > 0, (1.0 - (1.0 + u0) * f) / (1.0 - f), 1.0)
+        flux = s / (1.0 - f)
+        vxx /= c
+        vyy /= c
+        vxy /= c
+        a = 0.5 * (vxx + vyy)
+        b = np.sqrt(0.25 * (vxx - vyy)**2 + vxy**2)
+        fwhm = math.sqrt(8.0 * math.log(2.0))
+        major = fwhm * np.sqrt(np.maximum(a + b, 0.0))
+        minor = fwhm * np.sqrt(np.maximum(a - b, 0.0))
+        theta = 0.5 * np.arctan2(2.0 * vxy, vxx - vyy)
+        pa = np.degrees(np.arctan2(-np.cos(theta), np.sin(theta))) % 180.0
+
+        # keep the sources with their peak in the core of the tile
+        px = px + bx
+        py = py + by
+        keep = (px >= x0) & (px < x1) & (py >= y0) & (py < y1)
+        return {'x'     : (mx + bx)[keep],
+                'y'     : (my + by)[keep],
+                'peak'  : peak[keep],
+                'flux'  : flux[keep],
+                'major' : major[keep],
+                'minor' : minor[keep],
+                'pa'    : pa[keep],
+                'npix'  : npix[keep]}
+
+    @staticmethod
+    def radec(ra, dec):
+        """ Sexagesimal strings of a position, as CASA formats them (e.g.
+            ia.toworld(pixel,'s')), to a milli-second of time and arc.
+
+            Parameters
+            ----------
+            ra, dec : float
+                Right ascension and declination, in radians.
+
+            Returns
+            -------
+            tuple
+                ("HH:MM:SS.SSS", "+DD.MM.SS.SSS")
+        """
+        h = (math.degrees(ra) / 15.0) % 24.0
+        ms = int(round(h * 3600000.0)) % (24 * 3600000)
+        s = "%02d:%02d:%02d.%03d" % (ms / 3600000, ms / 60000 % 60, ms / 1000 % 60, ms % 1000)
+        sign = '-' if dec < 0 else '+'
+        ms = int(round(abs(math.degrees(dec)) * 3600000.0))
+        d = "%s%02d.%02d.%02d.%03d" % (sign, ms / 3600000, ms / 60000 % 60, ms / 1000 % 60, ms % 1000)
+        return (s, d)
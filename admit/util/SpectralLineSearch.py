@@ -14,6 +14,7 @@ from admit.util import Splatalogue
 from admit.util import logging
 from admit.util import utils
 from admit.util import LineData
+from admit.util import IntervalIndex
 
 class SpectralLineSearch(object):
     """ Class to act an as interface to the spectral line searching tools.
@@ -27,9 +28,10 @@ class SpectralLineSearch(object):
             connection is detected, then it will fall back on slsearch.
             Default: True.
 
-        tier1freq : list
+        tier1freq : list or IntervalIndex
             A list of tier1 frequency coverage, to eliminate any matches
-            that fall in the range of a tier1 line.
+            that fall in the range of a tier1 line. An IntervalIndex of
+            these ranges can be given, e.g. to share it between searches.
 
         Attributes
         ----------
@@ -42,6 +44,8 @@ class SpectralLineSearch(object):
     """
     def __init__(self, online=True, tier1freq=[]):
         self.online = online and self.check_online
+        if not isinstance(tier1freq, IntervalIndex):
+            tier1freq = IntervalIndex(tier1freq)
         self.tier1freq = tier1freq
         self.sls_kw = {}
         self.sp_kw = {"exclude" : [],
@@ -604,10 +608,7 @@ class SpectralLineSearch(object):
             Boolean, True if freq is within a tier1 range, False otherwise
 
         """
-        for f in self.tier1freq:
-            if f[0] < freq < f[1]:
-                return True
-        return False
+        return self.tier1freq.contains(freq, closed=False)
 
     def check_online(self):
         """ Method to check whether we are online or not. Just does a simple http
@@ -663,6 +664,45 @@ class SpectralLineSearch(object):
                 raise
         return self.slsearch(rrlevelstr, allowExotics)
 
+    def searchwindows(self, windows, rrlevelstr, allowExotics=False, **kwargs):
+        """ Method to search several frequency windows at once, see search().
+            Online, the splatalogue queries of all windows are submitted
+            concurrently (and served from the response cache when possible).
+
+            Parameters
+            ----------
+            windows : list
+                List of [minfreq, maxfreq] pairs, in GHz.
+
+            rrlevelstr : str
+                A string representation of the depth of recombination lines to return
+
+            allowExotics : bool
+                Whether or not to allow exotic atoms in the results (e.g. Ti).
+                Default: False
+
+            kwargs : dict
+                Dictionary containing any keyword/value pairs for the search, see search().
+
+            Returns
+            -------
+            A list of LineData objects, the results of all windows in window order.
+
+        """
+        possible = []
+        if len(windows) == 0:
+            return possible
+        self.setkeywords(windows[0][0], windows[0][1], rrlevelstr, **kwargs)
+        if self.online:
+            sp = Splatalogue.Splatalogue(**self.sp_kw)
+            for results in sp.query_windows(windows):
+                possible += self.splatparse(results.read(), rrlevelstr, allowExotics)
+            return possible
+        for w in windows:
+            self.sls_kw["freqrange"] = [w[0], w[1]]
+            possible += self.slsearch(rrlevelstr, allowExotics)
+        return possible
+
     def slsearch(self, rrlevelstr, allowExotics):
         """ Method to search through the slsearch database. Search options must already
             have been set. Returns a formatted list of transitions, each item in the list
@@ -801,52 +841,61 @@ class SpectralLineSearch(object):
             A list of LineData objects, with each containing the data for a single transition.
 
         """
-        possible = []
         # initialize the interface class
         sp = Splatalogue.Splatalogue(**self.sp_kw)
         # do the search
         results = sp.query_lines(minfreq, maxfreq)
-        # get the results
-        lines = results.readlines()
-        # the top row is the column headings as one long string
-        # split the string into its individual components
-        header = lines[0].split(":")
+        return self.splatparse(results.read(), rrlevelstr, allowExotics)
+
+    def splatparse(self, text, rrlevelstr, allowExotics):
+        """ Method to convert a splatalogue response into a list of transitions,
+            see splatalogue().
+
+            Parameters
+            ----------
+            text : str
+                The colon separated response of the splatalogue query.
+
+            rrlevelstr : str
+                String representation of how deep to search for recombination lines.
+
+            allowExotics : bool
+                Whether or not to allow exotic atoms in the molecules (e.g Ti)
+
+            Returns
+            -------
+            A list of LineData objects, with each containing the data for a single transition.
+
+        """
+        possible = []
+        header, columns = Splatalogue.parse_columns(text)
         # the indexes of the data are not guaranteed, so search for each needed one
         # by its known name, if splatalogue changes the column headings this will
         # break
-        sidx = header.index("Species")
-        cidx = header.index("Chemical Name")
-        fidx = header.index("Freq-GHz")
-        bfidx = header.index("Meas Freq-GHz")
-        qidx = header.index("Resolved QNs")
-        stidx = header.index("S<sub>ij</sub>&#956;<sup>2</sup> (D<sup>2</sup>)")
-        elidx = header.index("E_L (K)")
-        euidx = header.index("E_U (K)")
-        # remove the header row so the rest can be iterated over
-        del lines[0]
-        # make sure all of the indexes are found
-        if min(sidx, cidx, fidx, qidx, stidx, elidx, euidx, bfidx) < 0:
-            raise Exception("Missing data") # need a better message
+        names = ["Species", "Chemical Name", "Freq-GHz", "Meas Freq-GHz", "Resolved QNs",
+                 "S<sub>ij</sub>&#956;<sup>2</sup> (D<sup>2</sup>)", "E_L (K)", "E_U (K)"]
+        # make sure all of the columns are found
+        for name in names:
+            if name not in columns:
+                raise Exception("Missing data: no '%s' column in splatalogue response" % name)
         # iterate over all the results
-        for line in lines:
-            # sploit into columns
-            row = line.split(":")
+        for species, cname, f, bf, qn, linestr, el, eu in zip(*[columns[n] for n in names]):
             # see which frequency we have, prefering the 'Freq-GHz' column
-            if not row[fidx]:
-                freq = float(row[bfidx])
+            if not f:
+                freq = float(bf)
             else:
-                freq = float(row[fidx])
+                freq = float(f)
             # process the result, dropping if needed
-            if not utils.isexotic(row[sidx] or allowExotics):
-                if (not "RECOMBINATION" in row[cidx].upper() \
-                   or ("RECOMBINATION" in row[cidx].upper()
-                      and (rrlevelstr == "DEEP" or ("H" in row[sidx] \
-                          and ("alpha" in row[sidx] or "beta" in row[sidx]))))) \
-                   and not self.checktier1overlap(row[fidx]):
-                    possible.append(LineData(formula=row[sidx], name=row[cidx], frequency=freq,
-                                    uid=utils.getplain(row[sidx]) + "_%.5f" % freq,
-                                    energies=[float(row[elidx]), float(row[euidx])], linestrength=float(row[stidx]), mass=utils.getmass(row[sidx]),
-                                    transition=row[qidx], plain=utils.getplain(row[sidx]),
-                                    isocount=utils.isotopecount(row[sidx])))
+            if not utils.isexotic(species or allowExotics):
+                if (not "RECOMBINATION" in cname.upper() \
+                   or ("RECOMBINATION" in cname.upper()
+                      and (rrlevelstr == "DEEP" or ("H" in species \
+                          and ("alpha" in species or "beta" in species))))) \
+                   and not self.checktier1overlap(f):
+                    possible.append(LineData(formula=species, name=cname, frequency=freq,
+                                    uid=utils.getplain(species) + "_%.5f" % freq,
+                                    energies=[float(el), float(eu)], linestrength=float(linestr), mass=utils.getmass(species),
+                                    transition=qn, plain=utils.getplain(species),
+                                    isocount=utils.isotopecount(species)))
 
         return possible
@@ -8,7 +8,6 @@
 # system imports
 import numpy as np
 import numpy.ma as ma
-import copy
 import math
 
 # ADMIT imports
@@ -23,6 +22,12 @@ class Spectrum(object):
 
         A spectrum needs to hold at least 2 channels.
 
+        The accessors (spec(), freq(), chans(), contin(), mask()) return
+        read-only views of the data held by the class, they are not copies.
+        Use the set methods to change the data, or copy the returned
+        array before modifying it. The continuum subtracted spectrum is
+        cached until the spectrum, continuum or mask is changed.
+
         Parameters
         ----------
         spec : array like
@@ -55,6 +60,7 @@ class Spectrum(object):
         self._contin = None
         self._noise = None
         self._delta = None
+        self._cache = {}
         if spec is not None:
             self.set_spec(spec, mask)
             domask = False
@@ -79,6 +85,60 @@ class Spectrum(object):
     def __len__(self):
         return len(self._spec)
 
+    def __getstate__(self):
+        # the cached views are not pickled (nor shared by copies)
+        state = self.__dict__.copy()
+        del state["_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = {}
+
+    def _invalidate(self):
+        """ Method to drop the cached views, called whenever the spectrum,
+            axes, continuum or mask change.
+        """
+        self._cache = {}
+
+    def _view(self, name):
+        """ Method to get a read-only view of one of the data arrays.
+            The views are cached, "csub" is the continuum subtracted spectrum.
+
+            Parameters
+            ----------
+            name : str
+                The array to get: "spec", "csub", "freq", "chans", "contin"
+                or "mask".
+
+            Returns
+            -------
+            Read-only numpy array, or None if the array is not set
+
+        """
+        if name in self._cache:
+            return self._cache[name]
+        if name == "csub":
+            if self._contin is not None and len(self._contin) > 0:
+                data = self._spec - self._contin
+            else:
+                data = self._view("spec")
+        else:
+            data = getattr(self, "_" + name)
+        if data is not None:
+            data = data.view()
+            data.flags.writeable = False
+        self._cache[name] = data
+        return data
+
+    def _masked(self, data, masked):
+        """ Method to optionally wrap a read-only view in a masked array
+            with the current mask. The masked array shares the data and mask.
+        """
+        if masked:
+            return ma.masked_array(data, mask=self._view("mask"))
+        return data
+
     def spec(self, csub=True, masked=True):
         """ Method to get the spectrum, the mask is optionally returned
 
@@ -97,15 +157,12 @@ class Spectrum(object):
 
             Returns
             -------
-            Array like object containing the spectrum
+            Array like object containing the spectrum (read-only)
 
         """
-        data = copy.deepcopy(self._spec)
-        if csub and self._contin is not None and len(self._contin) > 0:
-            data -= self._contin
-        if masked:
-            return ma.masked_array(data, mask=self._mask)
-        return data
+        if csub:
+            return self._masked(self._view("csub"), masked)
+        return self._masked(self._view("spec"), masked)
 
     def freq(self, masked=True):
         """ Method to get the frequency axis, the mask is optionally returned
@@ -119,12 +176,10 @@ class Spectrum(object):
 
             Returns
             -------
-            Array like object containing the frequency axis
+            Array like object containing the frequency axis (read-only)
 
         """
-        if masked:
-            return ma.masked_array(self._freq, mask=self._mask)
-        return self._freq
+        return self._masked(self._view("freq"), masked)
 
     def contin(self, masked=True):
         """ Method to get the continuum, the mask is optionally returned
@@ -138,12 +193,10 @@ class Spectrum(object):
 
             Returns
             -------
-            Array like object containing the continuum
+            Array like object containing the continuum (read-only)
 
         """
-        if masked:
-            return ma.masked_array(self._contin, mask=self._mask)
-        return self._contin
+        return self._masked(self._view("contin"), masked)
 
     def noise(self):
         """ Method to return the noise of the spectrum.
@@ -249,12 +302,10 @@ class Spectrum(object):
 
             Returns
             -------
-            Array like object containing the channel axis
+            Array like object containing the channel axis (read-only)
 
         """
-        if masked:
-            return ma.masked_array(self._chans, mask=self._mask)
-        return self._chans
+        return self._masked(self._view("chans"), masked)
 
     def mask(self):
         """ Method to return the mask as a numpy array
@@ -265,10 +316,10 @@ class Spectrum(object):
 
         Returns
         -------
-        Array like object containing the mask
+        Array like object containing the mask (read-only)
 
         """
-        return self._mask
+        return self._view("mask")
 
     def mask_equal(self, value, axis="spec"):
         """ Method to mask data equal to the given value.
@@ -296,6 +347,7 @@ class Spectrum(object):
             return
         mask = getattr(self, "_" + axis, None) == value
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_lt(self, limit, axis="spec"):
         """ Method to mask any data less than the given value.
@@ -322,6 +374,7 @@ class Spectrum(object):
             return
         mask = getattr(self, "_" + axis, None) < limit
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_gt(self, limit, axis="spec"):
         """ Method to mask any data greater than the given value.
@@ -348,6 +401,7 @@ class Spectrum(object):
             return
         mask = getattr(self, "_" + axis, None) > limit
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_le(self, limit, axis="spec"):
         """ Method to mask any data less than or erqual to the given value.
@@ -374,6 +428,7 @@ class Spectrum(object):
             return
         mask = getattr(self, "_" + axis, None) <= limit
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_ge(self, limit, axis="spec"):
         """ Method to mask any data less than or equal to the given value.
@@ -400,6 +455,7 @@ class Spectrum(object):
             return
         mask = getattr(self, "_" + axis, None) >= limit
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_between(self, limit1, limit2, axis="spec"):
         """ Method to mask any data bewteen the the given values.
@@ -432,6 +488,7 @@ class Spectrum(object):
         mask2 = getattr(self, "_" + axis, None) < limit2
         mask = np.logical_and(mask1, mask2)
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def mask_outside(self, limit1, limit2, axis="spec"):
         """ Method to mask any data less than or greater than the given values.
@@ -464,6 +521,7 @@ class Spectrum(object):
         mask2 = limit2 < getattr(self, "_" + axis, None)
         mask = np.logical_and(mask1, mask2)
         self._mask = np.logical_or(self._mask, mask)
+        self._invalidate()
 
     def set_noise(self, noise):
         """ Method to set the noise value for the spectrum.
@@ -510,6 +568,7 @@ class Spectrum(object):
                 self._mask = np.array([mask[0]] * len(self._spec))
             else:
                 self._mask = np.array(mask)
+        self._invalidate()
         if self.integritycheck():
             return
         logging.warning("  Mask not applied")
@@ -531,6 +590,7 @@ class Spectrum(object):
             None
 
         """
+        self._invalidate()
         if isinstance(spec, list):
             self._spec = np.array(spec)
             if mask is not None:
@@ -566,6 +626,7 @@ class Spectrum(object):
             None
 
         """
+        self._invalidate()
         if isinstance(freq, list):
             self._freq = np.array(freq)
         elif isinstance(freq, ma.masked_array):
@@ -589,10 +650,11 @@ class Spectrum(object):
             None
 
         """
+        self._invalidate()
         if isinstance(contin, list):
             self._contin = np.array(contin)
         elif isinstance(contin, float) or isinstance(contin, int):
-            self.contin = np.array([contin] * len(self._spec))
+            self._contin = np.array([contin] * len(self._spec))
         elif isinstance(contin, ma.masked_array):
             self._contin = contin.data
         elif isinstance(contin, np.ndarray):
@@ -613,12 +675,13 @@ class Spectrum(object):
             None
 
         """
+        self._invalidate()
         if isinstance(chans, list):
             self._chans = np.array(chans, dtype=np.int)
         elif isinstance(chans, ma.masked_array):
-            self._chans = chans.data.astype(np.int, copy=True)
+            self._chans = chans.data.astype(np.int, copy=False)
         elif isinstance(chans, np.ndarray):
-            self._chans = chans.astype(np.int, copy=True)
+            self._chans = chans.astype(np.int, copy=False)
         else:
             raise
 
@@ -662,10 +725,12 @@ class Spectrum(object):
             logging.warning("  Masking operation not performed.")
             return
         mask = np.isfinite(self._spec)
-        for i in range(len(mask)):
-            if not mask[i]:
-                self._spec[i] = mask_value
+        if not mask.all():
+            # copy on write, the spectrum may be shared with the caller
+            self._spec = self._spec.copy()
+            self._spec[~mask] = mask_value
         self._mask = np.logical_or(self._mask, np.logical_not(mask))
+        self._invalidate()
 
     def mask_invalid(self):
         """ Method to mask all invalid spectral data.
@@ -685,6 +750,7 @@ class Spectrum(object):
             return
         mask = np.isfinite(self._spec)
         self._mask = np.logical_or(self._mask, np.logical_not(mask))
+        self._invalidate()
 
     def integritycheck(self):
         """ Method to check that all axes are the same length. Axes
@@ -956,7 +1022,8 @@ class Spectrum(object):
            None
         """
         if self._spec is not None:
-            self._spec *= -1.
+            self._spec = self._spec * -1.
         if self._contin is not None:
-            self._contin *= -1.
+            self._contin = self._contin * -1.
+        self._invalidate()
 
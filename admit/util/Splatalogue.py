@@ -10,11 +10,21 @@
     :updated for ADMIT: Douglas Friedel <friedel@illinois.edu>
 
     Dependencies for python requests and astropy modules have been removed.
+
+    Responses are kept in an on-disk cache (see ResponseCache), and the
+    queries of several frequency windows can be submitted concurrently
+    (see Splatalogue.query_windows).
 """
+import os
+import time
 import urllib
 import urllib2
+import hashlib
+import tempfile
+import StringIO
 import json
 import re
+from multiprocessing.pool import ThreadPool
 
 from admit.util.AdmitLogging import AdmitLogging as logging
 
@@ -47,6 +57,227 @@ def clean_column_headings(header, renaming_dict=column_headings_map):
     return header
 
 
+def parse_columns(text):
+    """ Parse a colon separated Splatalogue export into columns.
+
+        Parameters
+        ----------
+        text : str
+            The response text; the first line holds the column headings.
+
+        Returns
+        -------
+        tuple
+            (header, columns): the list of column headings, and a dictionary
+            mapping each heading to the tuple of (string) values of that
+            column. Rows are padded or truncated to the number of headings.
+    """
+    lines = text.splitlines()
+    if not lines:
+        return [], {}
+    header = lines[0].split(':')
+    n = len(header)
+    rows = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        row = line.split(':')
+        if len(row) != n:
+            row = (row + [''] * n)[:n]
+        rows.append(row)
+    if rows:
+        columns = zip(*rows)
+    else:
+        columns = [()] * n
+    return header, dict(zip(header, columns))
+
+
+class ResponseCache(object):
+    """ On-disk cache of Splatalogue responses, keyed on the normalised
+        query (URL and payload).
+
+        Each response is stored in its own file, named after the SHA-1 hash
+        of the key, so concurrent queries (threads or processes) can share
+        the cache. Entries written longer ago than the time to live are
+        ignored (and removed); when the cache grows beyond its size limit
+        the least recently used entries are removed.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Cache directory. Default: $ADMIT_SPLATCACHE, or
+            ~/.admit/splatalogue.
+
+        ttl : float, optional
+            Time to live of an entry in seconds. Default: 30 days.
+
+        maxsize : int, optional
+            Size limit of the cache in bytes. Default: 100 MB.
+
+        Attributes
+        ----------
+        directory : str
+            Cache directory; created on the first put().
+
+        ttl : float
+            Time to live of an entry in seconds.
+
+        maxsize : int
+            Size limit of the cache in bytes.
+    """
+    def __init__(self, directory=None, ttl=30 * 86400.0, maxsize=100 * 1024 * 1024):
+        if directory is None:
+            directory = os.getenv("ADMIT_SPLATCACHE") or \
+                        os.path.join(os.path.expanduser("~"), ".admit", "splatalogue")
+        self.directory = directory
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+    @staticmethod
+    def key(url, payload):
+        """ Normalised cache key of a query; independent of the order of
+            the payload items and of list valued items.
+
+            Parameters
+            ----------
+            url : str
+                Query URL.
+
+            payload : dict
+                Query payload.
+
+            Returns
+            -------
+            str
+                The SHA-1 hex digest of the normalised query.
+        """
+        items = []
+        for k in sorted(payload):
+            v = payload[k]
+            if isinstance(v, (list, tuple, set)):
+                v = sorted([repr(x) for x in v])
+            else:
+                v = repr(v)
+            items.append((k, v))
+        return hashlib.sha1(repr((url, items))).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".txt")
+
+    def get(self, key):
+        """ Get a cached response.
+
+            Parameters
+            ----------
+            key : str
+                Cache key, see key().
+
+            Returns
+            -------
+            str
+                The response text, or None if not cached or expired.
+        """
+        path = self._path(key)
+        try:
+            now = time.time()
+            # the modification time is the time the entry was written
+            mtime = os.path.getmtime(path)
+            if now - mtime > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as fp:
+                text = fp.read()
+            # the access time is not updated reliably (noatime), hence set
+            # it explicitly to keep track of the last use
+            os.utime(path, (now, mtime))
+        except (IOError, OSError):
+            return None
+        return text
+
+    def put(self, key, text):
+        """ Store a response, then enforce the size limit. Errors (e.g. a
+            read-only cache directory) are logged and otherwise ignored.
+
+            Parameters
+            ----------
+            key : str
+                Cache key, see key().
+
+            text : str
+                The response text.
+
+            Returns
+            -------
+            None
+        """
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # write and rename, so readers never see a partial response
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, 'w') as fp:
+                fp.write(text)
+            os.rename(tmp, self._path(key))
+        except (IOError, OSError), e:
+            if not os.path.isdir(self.directory):
+                logging.warning("Splatalogue cache: cannot write %s: %s" % (self.directory, e))
+            return
+        self.prune()
+
+    def prune(self):
+        """ Remove the least recently used entries until the cache is
+            within its size limit.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        entries = []
+        total = 0
+        for f in os.listdir(self.directory):
+            if not f.endswith(".txt"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, f))
+            except OSError:
+                continue
+            # last use: the access time set by get(), or the write time
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, f))
+            total += st.st_size
+        if total <= self.maxsize:
+            return
+        entries.sort()
+        for used, size, f in entries:
+            try:
+                os.remove(os.path.join(self.directory, f))
+            except OSError:
+                pass
+            total -= size
+            if total <= self.maxsize:
+                break
+
+    def clear(self):
+        """ Remove all entries.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for f in os.listdir(self.directory):
+            if f.endswith(".txt"):
+                os.remove(os.path.join(self.directory, f))
+
+
 class SpeciesLookuptable(dict):
     """ Simple class that extends the dictionary class so that keys can be searched
 
@@ -380,6 +611,10 @@ class Splatalogue(object):
     #SLAP_URL = 'http://find.nrao.edu/splata-slap/slap'  #NOT USED
     QUERY_URL = 'http://www.cv.nrao.edu/php/splat/c_export.php'
     TIMEOUT = 60
+    # size of the thread pool of query_windows()
+    THREADS = 4
+    # response cache shared by all queries; None to disable caching
+    cache = ResponseCache()
     versions = ('v1.0', 'v2.0')
     LINES_LIMIT = 10000
     ALL_LINE_LISTS = ('Lovas', # Lovas/NIST list http://physics.nist.gov/PhysRefData/
@@ -640,8 +875,8 @@ class Splatalogue(object):
 
             Returns
             -------
-            response : `requests.Response`
-                The response of the HTTP request.
+            response : file-like
+                The response text of the HTTP request (or the cache).
         """
         # have to chomp this kwd here...
         if "min_frequency" in kwargs:
@@ -668,14 +903,69 @@ class Splatalogue(object):
         if get_query_payload:
             return data_payload
 
-        #Need to pass True so that the sid[] list is handled correctly
-        urlparams = urllib.urlencode(data_payload, True)
+        self.response = StringIO.StringIO(self._fetch(data_payload))
 
-        response = urllib2.urlopen(self.QUERY_URL + '?%s' % urlparams, timeout=self.TIMEOUT)
+        return self.response
+
+    def query_windows(self, windows, threads=None, **kwargs):
+        """ Query Splatalogue for the transitions in several frequency
+            windows, submitting the (uncached) queries concurrently.
 
-        self.response = response
+            Parameters
+            ----------
+            windows : list
+                List of [min_frequency, max_frequency] pairs, in GHz.
+
+            threads : int, optional
+                Maximum number of concurrent queries. Default: THREADS.
+
+            kwargs : dict
+                Any additional arguments for the search, see query_lines().
 
-        return response
+            Returns
+            -------
+            list
+                The response (file-like) of each window, in window order.
+        """
+        keys = []
+        payloads = {}
+        for w in windows:
+            payload = self.query_lines(w[0], w[1], get_query_payload=True, **kwargs)
+            k = ResponseCache.key(self.QUERY_URL, payload)
+            keys.append(k)
+            payloads[k] = payload
+        unique = payloads.keys()
+        nthreads = min(threads or self.THREADS, len(unique))
+        if nthreads > 1:
+            pool = ThreadPool(nthreads)
+            try:
+                texts = pool.map(self._fetch, [payloads[k] for k in unique])
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            texts = [self._fetch(payloads[k]) for k in unique]
+        texts = dict(zip(unique, texts))
+        return [StringIO.StringIO(texts[k]) for k in keys]
+
+    def _fetch(self, payload):
+        """ Response text of a query, from the cache or the server.
+        """
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.key(self.QUERY_URL, payload)
+            text = self.cache.get(key)
+            if text is not None:
+                return text
+
+        #Need to pass True so that the sid[] list is handled correctly
+        urlparams = urllib.urlencode(payload, True)
+
+        response = urllib2.urlopen(self.QUERY_URL + '?%s' % urlparams, timeout=self.TIMEOUT)
+        text = response.read()
+        if key is not None:
+            self.cache.put(key, text)
+        return text
 
     def parse_response(self):
         """ Parse a response (of type urllib2.urlopen) into a list of dictionaries.
@@ -694,19 +984,12 @@ class Splatalogue(object):
         response = self.response
 
         try:
-            csvstring = response.read()
-            tablelist = csvstring.split('\n')
-            header = tablelist[0]
-            headerlist = header.split(':')
-            headerlist = clean_column_headings(headerlist, renaming_dict=column_headings_map)
+            header, columns = parse_columns(response.read())
+            headerlist = clean_column_headings(header, renaming_dict=column_headings_map)
 
             #Populate list of dictionaries
-            for row in tablelist[1:-1]:
-                rowlist = row.split(':')
-                rowdict = {}
-                for i in range(0, len(rowlist)):
-                    rowdict[headerlist[i]] = rowlist[i]
-                result.append(rowdict)
+            for row in zip(*[columns[h] for h in header]):
+                result.append(dict(zip(headerlist, row)))
         except:
             logging.warning("Problem parsing result")
 
@@ -0,0 +1,208 @@
+""" .. _WorkQueue-api:
+
+    **WorkQueue** --- Persistent queue of batch work entries.
+    ---------------------------------------------------------
+
+    This module defines the WorkQueue class.
+"""
+# system imports
+import os
+import json
+import time
+
+# ADMIT imports
+from admit.util.AdmitLogging import AdmitLogging as logging
+
+
+class WorkQueue(object):
+    """ Persistent queue of work entries, e.g. the cubes of an archive
+        reprocessing run (see admit.recipes.batch).
+
+        Each entry is identified by a key (e.g. the cube file name) and
+        carries a state, one of PENDING, RUNNING, DONE or FAILED, plus any
+        information the caller attaches to it. The queue is saved to its
+        file after every state change (write and rename, so an interrupted
+        save leaves the previous version), hence an interrupted batch
+        resumes where it left off: on load, entries that were RUNNING are
+        PENDING again.
+
+        The queue is meant to be updated by one process only (the batch
+        driver), not by its workers.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the queue file; read if it exists.
+
+        Attributes
+        ----------
+        filename : str
+            Name of the queue file.
+
+        entries : dict
+            Maps key to entry (a dict with at least 'key', 'state' and
+            'order', the position in which the entry was added).
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE    = "done"
+    FAILED  = "failed"
+    STATES  = (PENDING, RUNNING, DONE, FAILED)
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}
+        if os.path.exists(filename):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        return self.entries[key]
+
+    def load(self):
+        """ Read the queue file; RUNNING entries (of an interrupted batch)
+            become PENDING.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        with open(self.filename) as fp:
+            entries = json.load(fp)
+        self.entries = {}
+        for e in entries:
+            if e['state'] == self.RUNNING:
+                logging.info("WorkQueue: resuming interrupted %s" % e['key'])
+                e['state'] = self.PENDING
+            self.entries[e['key']] = e
+
+    def save(self):
+        """ Write the queue file.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        tmp = self.filename + ".tmp"
+        with open(tmp, 'w') as fp:
+            json.dump(self.list(), fp, indent=1, sort_keys=True)
+        os.rename(tmp, self.filename)
+
+    def add(self, key, **info):
+        """ Add a PENDING entry, unless the key is already queued. The
+            queue is not saved, so many entries can be added at once; call
+            save() when done.
+
+            Parameters
+            ----------
+            key : str
+                Entry key.
+
+            info : dict
+                Information stored with the entry.
+
+            Returns
+            -------
+            bool
+                True if the entry was added.
+        """
+        if key in self.entries:
+            return False
+        e = dict(info)
+        e.update({'key': key, 'state': self.PENDING, 'order': len(self.entries)})
+        self.entries[key] = e
+        return True
+
+    def set(self, key, state, **info):
+        """ Change the state of an entry, updating its information.
+
+            Parameters
+            ----------
+            key : str
+                Entry key.
+
+            state : str
+                New state, one of WorkQueue.STATES.
+
+            info : dict
+                Information to update.
+
+            Returns
+            -------
+            dict
+                The entry.
+        """
+        if state not in self.STATES:
+            raise ValueError("WorkQueue: invalid state %s" % state)
+        e = self.entries[key]
+        e.update(info)
+        e['state'] = state
+        e['time'] = time.time()
+        self.save()
+        return e
+
+    def list(self, state=None):
+        """ The entries in the order they were added.
+
+            Parameters
+            ----------
+            state : str, optional
+                Only entries in this state; default all.
+
+            Returns
+            -------
+            list of dict
+        """
+        entries = sorted(self.entries.values(), key=lambda e: e['order'])
+        if state is not None:
+            entries = [e for e in entries if e['state'] == state]
+        return entries
+
+    def count(self):
+        """ Number of entries per state.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                Maps each of WorkQueue.STATES to its number of entries.
+        """
+        n = dict([(s, 0) for s in self.STATES])
+        for e in self.entries.values():
+            n[e['state']] += 1
+        return n
+
+    def retry(self):
+        """ Make all FAILED entries PENDING again.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            int
+                Number of entries requeued.
+        """
+        failed = self.list(self.FAILED)
+        for e in failed:
+            e['state'] = self.PENDING
+        if failed:
+            self.save()
+        return len(failed)
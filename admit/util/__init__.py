@@ -2,36 +2,53 @@
    =================
 
    This package contains various common infrastructure utilities.
-"""
 
-import AdmitHTTP
-import PlotControl
-import Splatalogue
-import bdp_types
-import casautil
-import specutil
-import stats
-import utils 
+   The modules and classes below are imported on first access (see
+   admit.util.lazyimport), as several of them pull in CASA, matplotlib
+   or scipy.
+"""
+from admit.util.lazyimport import lazymodule
 
 #__all__ = [ 'AbstractPlot', 'AdmitHTTP', 'Image', 'ImPlot', 'Line', 'MultiImage', 'PlotControl', 'Table', 'Tier1DB', 'VLSR', 'aplot', 'bdp_types', 'stats', 'utils', 'casautil']
 
-from AbstractPlot import AbstractPlot as AbstractPlot
-from AdmitLogging import AdmitLogging as logging
-from APlot  import APlot as APlot
-from Image  import Image as Image
-from Image  import imagedescriptor as imagedescriptor
-from ImPlot  import ImPlot as ImPlot
-from Line  import Line as Line
-from LineData   import LineData as LineData
-from LinePlot  import LinePlot as LinePlot
-from MultiImage  import MultiImage  as MultiImage
-from Segments   import Segments as Segments
-from Source  import Source  as Source
-from SpectralLineSearch import SpectralLineSearch as SpectralLineSearch
-from Spectrum import Spectrum as Spectrum
-# This one causes a circular import reference BDP <-> utils; bad code layout!
-#from SpectrumIngest  import SpectrumIngest  as SpectrumIngest
-from Table  import Table  as Table
-from Tier1DB  import Tier1DB as Tier1DB
-from UtilBase   import UtilBase as UtilBase
-from VLSR  import VLSR as VLSR
+lazymodule(__name__, {
+    # modules
+    'AdmitHTTP'          : ('admit.util.AdmitHTTP',          None),
+    'PlotControl'        : ('admit.util.PlotControl',        None),
+    'Splatalogue'        : ('admit.util.Splatalogue',        None),
+    'bdp_types'          : ('admit.util.bdp_types',          None),
+    'casautil'           : ('admit.util.casautil',           None),
+    'specutil'           : ('admit.util.specutil',           None),
+    'stats'              : ('admit.util.stats',              None),
+    'utils'              : ('admit.util.utils',              None),
+    # classes
+    'AbstractPlot'       : ('admit.util.AbstractPlot',       'AbstractPlot'),
+    'logging'            : ('admit.util.AdmitLogging',       'AdmitLogging'),
+    'APlot'              : ('admit.util.APlot',              'APlot'),
+    'CubeSmoother'       : ('admit.util.CubeSmoother',       'CubeSmoother'),
+    'FileCache'          : ('admit.util.FileCache',          'FileCache'),
+    'FitsCube'           : ('admit.util.FitsCube',           'FitsCube'),
+    'Image'              : ('admit.util.Image',              'Image'),
+    'imagedescriptor'    : ('admit.util.Image',              'imagedescriptor'),
+    'ImageHeader'        : ('admit.util.ImageHeader',        'ImageHeader'),
+    'ImagePool'          : ('admit.util.ImagePool',          'ImagePool'),
+    'ImPlot'             : ('admit.util.ImPlot',             'ImPlot'),
+    'IncrementalPCA'     : ('admit.util.IncrementalPCA',     'IncrementalPCA'),
+    'IntervalIndex'      : ('admit.util.IntervalIndex',      'IntervalIndex'),
+    'Line'               : ('admit.util.Line',               'Line'),
+    'LineData'           : ('admit.util.LineData',           'LineData'),
+    'LinePlot'           : ('admit.util.LinePlot',           'LinePlot'),
+    'Metrics'            : ('admit.util.Metrics',            'Metrics'),
+    'MultiImage'         : ('admit.util.MultiImage',         'MultiImage'),
+    'QuantileSketch'     : ('admit.util.QuantileSketch',     'QuantileSketch'),
+    'Segments'           : ('admit.util.Segments',           'Segments'),
+    'Source'             : ('admit.util.Source',             'Source'),
+    'SourceFinder'       : ('admit.util.SourceFinder',       'SourceFinder'),
+    'SpectralLineSearch' : ('admit.util.SpectralLineSearch', 'SpectralLineSearch'),
+    'Spectrum'           : ('admit.util.Spectrum',           'Spectrum'),
+    'Table'              : ('admit.util.Table',              'Table'),
+    'Tier1DB'            : ('admit.util.Tier1DB',            'Tier1DB'),
+    'UtilBase'           : ('admit.util.UtilBase',           'UtilBase'),
+    'VLSR'               : ('admit.util.VLSR',               'VLSR'),
+    'WorkQueue'          : ('admit.util.WorkQueue',          'WorkQueue'),
+})
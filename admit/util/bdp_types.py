@@ -101,6 +101,7 @@ FLOW11_AT = "Flow11_AT"
 FLOW1N_AT = "Flow1N_AT"
 FLOWMN_AT = "FlowMN_AT"
 FLOWN1_AT = "FlowN1_AT"
+GENERATECUBE_AT = "GenerateCube_AT"
 GENERATESPECTRUM_AT = "GenerateSpectrum_AT"
 INGEST_AT = "Ingest_AT"
 LINECUBE_AT = "LineCube_AT"
@@ -20,6 +20,9 @@ except:
 from imview import imview as casa_imview
 
 import PlotControl
+import bdp_types as bt
+from ImagePool import ImagePool
+from ImageHeader import ImageHeader
 
 def iscasa(file):
     """is a file a casa image
@@ -120,10 +123,8 @@ def implot(rasterfile, figname, contourfile=None, plottype=PlotControl.PNG,
     axes = {'x':'x','y':'y','z':'z'}
 
     # work around this axis labeling problem?
-    ia = taskinit.iatool()
-    ia.open(rasterfile)
-    h = ia.summary()
-    ia.close()
+    with ImagePool.shared().open(rasterfile) as ia:
+        h = ia.summary()
     #print "PJT: implot axisnames:",h['axisnames'][0],h['axisnames'][1]
     if h['axisnames'][1]=='Frequency':
         axes['y'] = 'Frequency'
@@ -140,6 +141,116 @@ def implot(rasterfile, figname, contourfile=None, plottype=PlotControl.PNG,
     if plotmode == PlotControl.INTERACTIVE or plotmode==PlotControl.SHOW_AT_END:
         casa_imview(raster=raster, contour=contour,axes=axes)
 
+def imheader(imgname):
+    """Return the compact header descriptor of a CASA image, as recorded in
+       Image_BDP's (see ImageHeader for its keys).
+
+       This is meant to be called once, by the AT that creates the image,
+       so downstream ATs find the shape, axes, beam and units in the BDP
+       instead of calling imhead, imval or ia.summary() again.
+
+       Parameters
+       ----------
+       imgname : str
+           The (absolute) CASA image filename
+
+       Returns
+       -------
+       dict
+           The header descriptor.
+    """
+    qa = taskinit.qatool()
+    with ImagePool.shared().open(imgname) as ia:
+        s = ia.summary()
+        csys = ia.coordsys()
+        shape = [int(n) for n in s['shape']]
+        h = {}
+        h['shape']     = shape
+        h['axisnames'] = [str(a) for a in s['axisnames']]
+        h['axisunits'] = [str(a) for a in s['axisunits']]
+        h['crpix']     = [float(a) for a in s['refpix']]
+        h['crval']     = [float(a) for a in s['refval']]
+        h['cdelt']     = [float(a) for a in s['incr']]
+        h['bunit']     = str(s['unit'])
+        h['telescope'] = str(csys.telescope())
+        rf = csys.restfrequency()
+        if len(numpy.atleast_1d(rf['value'])) > 0:
+            h['restfreq'] = float(qa.convert(qa.quantity(numpy.atleast_1d(rf['value'])[0], rf['unit']),'Hz')['value'])
+        else:
+            h['restfreq'] = 0.0
+        # a single beam, or else the common beam of the per plane beams
+        b = {}
+        if 'restoringbeam' in s and 'major' in s['restoringbeam']:
+            b = s['restoringbeam']
+            b = {'major' : b['major'], 'minor' : b['minor'], 'pa' : b['positionangle']}
+        elif 'perplanebeams' in s:
+            try:
+                b = ia.commonbeam()
+            except:
+                b = {}
+        if 'major' in b:
+            h['beam'] = [float(qa.convert(b['major'],'arcsec')['value']),
+                         float(qa.convert(b['minor'],'arcsec')['value']),
+                         float(qa.convert(b['pa'],'deg')['value'])]
+        else:
+            h['beam'] = []
+        # the four corners, as in Regrid_AT; handles x-y not aligned with RA-Dec
+        h['corners'] = []
+        if len(shape) > 1:
+            for xpix in [0,shape[0]]:
+                for ypix in [0,shape[1]]:
+                    w = csys.toworld([xpix,ypix],'n')['numeric']
+                    h['corners'].append([float(w[0]),float(w[1])])
+        if csys.findcoordinate('direction')['return']:
+            h['projection'] = str(csys.projection()['type'])
+        # a non-linear (tabular) spectral axis gets all its frequencies recorded
+        k = -1
+        for i in range(len(h['axisnames'])):
+            if h['axisnames'][i] == 'Frequency':
+                k = i
+        if k >= 0 and shape[k] > 1:
+            pix = numpy.array(h['crpix'])
+            pix[k] = shape[k] - 1
+            f1 = csys.toworld(list(pix),'n')['numeric'][k]
+            f2 = h['crval'][k] + (shape[k] - 1 - h['crpix'][k]) * h['cdelt'][k]
+            if abs(f1 - f2) > 1e-3 * abs(h['cdelt'][k]):
+                pix = numpy.outer(h['crpix'], numpy.ones(shape[k]))
+                pix[k] = numpy.arange(shape[k])
+                h['freqs'] = [float(f) for f in csys.toworldmany(pix)['numeric'][k]]
+        csys.done()
+    obj = casa.imhead(imgname,mode='get',hdkey='object')
+    if obj == False:
+        obj = ''
+    h['object'] = str(obj)
+    return h
+
+def getheader(bdp, name=""):
+    """Return the header descriptor of the (CASA) image in an Image_BDP.
+
+       If the BDP has none recorded yet, e.g. it was written by an
+       older version of ADMIT, it is made with imheader() from the image
+       itself.  The input BDP is not changed; a calling AT that needs the
+       header more than once should keep it.
+
+       Parameters
+       ----------
+       bdp : Image_BDP
+           The BDP with the image.
+
+       name : str
+           The name of the image instance in the BDP.
+           Default : ""
+
+       Returns
+       -------
+       ImageHeader
+    """
+    h = bdp.getheader(name)
+    if h is None:
+        imgname = bdp.baseDir() + bdp.getimagefile(bt.CASA, name)
+        h = ImageHeader(imheader(imgname))
+    return h
+
 # Moment_AT, and now CubeSum_AT too
 def getdata(imgname, chans=[], zeromask=False):
     """Return all good data from a CASA image as a masked numpy array.
@@ -162,15 +273,13 @@ def getdata(imgname, chans=[], zeromask=False):
        array 
            data in a masked numpy array
     """
-    ia = taskinit.iatool()    
-    ia.open(imgname)
-    if len(chans) == 0:
-        d = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,-1,0],getmask=False).squeeze()
-        m = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,-1,0],getmask=True).squeeze()
-    else:
-        d = ia.getchunk(blc=[0,0,chans[0],0],trc=[-1,-1,chans[1],0],getmask=False).squeeze()
-        m = ia.getchunk(blc=[0,0,chans[0],0],trc=[-1,-1,chans[1],0],getmask=True).squeeze()
-    ia.close()
+    with ImagePool.shared().open(imgname) as ia:
+        if len(chans) == 0:
+            d = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,-1,0],getmask=False).squeeze()
+            m = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,-1,0],getmask=True).squeeze()
+        else:
+            d = ia.getchunk(blc=[0,0,chans[0],0],trc=[-1,-1,chans[1],0],getmask=False).squeeze()
+            m = ia.getchunk(blc=[0,0,chans[0],0],trc=[-1,-1,chans[1],0],getmask=True).squeeze()
     # note CASA and MA have their mask logic reversed
     # casa: true means a good point
     #   ma: true means a masked/bad point
@@ -210,11 +319,9 @@ def getdata1(imgname):
        array 
           data in a 1D numpy array
     """
-    ia = taskinit.iatool()
-    ia.open(imgname)
-    d = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,0,0],getmask=False)
-    m = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,0,0],getmask=True)
-    ia.close()
+    with ImagePool.shared().open(imgname) as ia:
+        d = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,0,0],getmask=False)
+        m = ia.getchunk(blc=[0,0,0,0],trc=[-1,-1,0,0],getmask=True)
     # note CASA and MA have their mask logic reversed
     # casa: true means a good point
     #   ma: true means a masked/bad point
@@ -271,6 +378,7 @@ def putdata_raw(imgname, data, clone=None):
            for output. It needs to be an absolute filename.
   
     """
+    ImagePool.changed(imgname)
     ia = taskinit.iatool()    
     if clone != None:
         ia.fromimage(infile=clone,outfile=imgname,overwrite=True) 
@@ -289,6 +397,7 @@ def putdata_raw(imgname, data, clone=None):
         tb.putcol('map',pdata)
         tb.flush()
         tb.close()
+    ImagePool.changed(imgname)
     return
   
 def mapdim(imgname, dim=None):
@@ -297,7 +406,7 @@ def mapdim(imgname, dim=None):
      Returns True if the dimensionality matches this value, or
      False if not.
 
-     Warning: opens and closes the map via ia.open()
+     Warning: opens the map via ia.open() (see ImagePool)
 
      Parameters
      ----------
@@ -306,11 +415,9 @@ def mapdim(imgname, dim=None):
      dim : integer (or None)
 
      """
-     ia = taskinit.iatool()     
-     ia.open(imgname)
-     s = ia.summary()
+     with ImagePool.shared().open(imgname) as ia:
+         s = ia.summary()
      shape = s['shape']
-     ia.close()
      #
      rdim = -1
      for d in range(len(shape)):
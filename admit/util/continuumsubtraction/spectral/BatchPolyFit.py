@@ -0,0 +1,186 @@
+""" .. _batchpolycontinuum:
+
+    BatchPolyFit --- Polynomial continuum fits of many spectra at once.
+    -------------------------------------------------------------------
+
+    This module defines the BatchPolyFit class.
+"""
+
+import numpy as np
+
+
+class BatchPolyFit(object):
+    """ Least squares polynomial fits of any number of spectra that share
+        the same channels and the same line (excluded) channels, e.g. all
+        the pixels of a cube, or a single spectrum as in PolyFit.
+
+        The Vandermonde matrix of the continuum channels is QR factored
+        once, up to the maximum degree. Since the columns of the Vandermonde
+        matrix of a lower degree are the first columns of the full matrix,
+        the fits of all degrees up to the maximum, and their residuals, follow
+        from the same factorization; all spectra are fitted with one matrix
+        product. As in np.polyfit the columns are scaled to unit norm first.
+
+        Parameters
+        ----------
+        x : numpy array
+            The x coordinates (e.g. channels) of the spectra.
+
+        mask : numpy array of bool, optional
+            True for the channels to exclude from the fit (e.g. lines), as
+            in a masked array. Default: all channels are fitted.
+
+        maxdeg : int, optional
+            Maximum degree of the fits. Default: 3
+
+        Attributes
+        ----------
+        x : numpy array
+            The x coordinates.
+
+        good : numpy array of bool
+            The channels that are fitted.
+
+        maxdeg : int
+            The maximum degree, limited by the number of channels fitted.
+    """
+    def __init__(self, x, mask=None, maxdeg=3):
+        self.x = np.asarray(x, dtype=np.float64)
+        if mask is None:
+            self.good = np.ones(len(self.x), dtype=bool)
+        else:
+            self.good = ~np.asarray(mask, dtype=bool)
+        ngood = self.good.sum()
+        if ngood == 0:
+            raise ValueError("BatchPolyFit: no channels left to fit")
+        self.maxdeg = min(maxdeg, ngood - 1)
+        self._vander = np.vander(self.x, self.maxdeg + 1, increasing=True)
+        v = self._vander[self.good]
+        self._scale = np.sqrt((v * v).sum(axis=0))
+        self._scale[self._scale == 0.0] = 1.0
+        self._q, self._r = np.linalg.qr(v / self._scale)
+
+    def _project(self, y):
+        """ the continuum channels of y, and their projection on Q
+        """
+        yg = np.asarray(y, dtype=np.float64)[self.good]
+        return yg, np.dot(self._q.T, yg)
+
+    def coefficients(self, y, deg):
+        """ Polynomial coefficients of the fits.
+
+            Parameters
+            ----------
+            y : numpy array
+                A spectrum, or (channels x spectra) array of spectra.
+
+            deg : int
+                Degree of the fits.
+
+            Returns
+            -------
+            numpy array
+                The coefficients, lowest power first: (deg+1) or
+                (deg+1 x spectra).
+        """
+        if deg > self.maxdeg:
+            raise ValueError("BatchPolyFit: degree %d above %d" % (deg, self.maxdeg))
+        n = deg + 1
+        qty = self._project(y)[1][:n]
+        c = np.linalg.solve(self._r[:n, :n], qty)
+        scale = self._scale[:n]
+        if c.ndim > 1:
+            scale = scale[:, np.newaxis]
+        return c / scale
+
+    def fit(self, y, deg):
+        """ The fitted continuum, in all channels.
+
+            Parameters
+            ----------
+            y : numpy array
+                A spectrum, or (channels x spectra) array of spectra.
+
+            deg : int or array of int
+                Degree of the fits, or the degree of each spectrum.
+
+            Returns
+            -------
+            numpy array
+                Continuum, the shape of y.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        if np.isscalar(deg) or np.ndim(deg) == 0:
+            return np.dot(self._vander[:, :int(deg) + 1], self.coefficients(y, int(deg)))
+        deg = np.asarray(deg)
+        cont = np.zeros(y.shape)
+        for d in np.unique(deg):
+            sel = deg == d
+            cont[:, sel] = self.fit(y[:, sel], d)
+        return cont
+
+    def rss(self, y):
+        """ Residual sum of squares, over the fitted channels, of the fits
+            of all degrees.
+
+            Parameters
+            ----------
+            y : numpy array
+                A spectrum, or (channels x spectra) array of spectra.
+
+            Returns
+            -------
+            numpy array
+                (maxdeg+1) or (maxdeg+1 x spectra), for degree 0 to maxdeg.
+        """
+        yg, qty = self._project(y)
+        rss = (yg * yg).sum(axis=0) - np.cumsum(qty * qty, axis=0)
+        return np.maximum(rss, 0.0)
+
+    def search(self, y, noise=None, maxdeg=None):
+        """ Best degree of the fits, chosen as PolyFit(search=True) does:
+            starting from a reduced chi squared of 1000, a higher degree is
+            taken if it lowers the reduced chi squared by more than 20%.
+            The number of free parameters of a fit excludes the
+            coefficients more than 1000 times smaller than the largest one.
+
+            Parameters
+            ----------
+            y : numpy array
+                A spectrum, or (channels x spectra) array of spectra.
+
+            noise : float, optional
+                The noise of the spectra, to scale the chi squared.
+
+            maxdeg : int, optional
+                Highest degree to consider. Default: the maxdeg of the fitter.
+
+            Returns
+            -------
+            tuple
+                (deg, chisq): the degree and reduced chi squared of the best
+                fit of each spectrum (scalars for a single spectrum).
+        """
+        if maxdeg is None:
+            maxdeg = self.maxdeg
+        maxdeg = min(maxdeg, self.maxdeg)
+        rss = self.rss(y)
+        if noise is not None:
+            rss = rss / (noise * noise)
+        ngood = self.good.sum()
+        best = 1000.0 * np.ones(rss.shape[1:])
+        deg = np.zeros(rss.shape[1:], dtype=int)
+        for d in range(maxdeg + 1):
+            if d == 0:
+                numpar = 1
+            else:
+                c = abs(self.coefficients(y, d))
+                numpar = (1000.0 * c > c.max(axis=0)).sum(axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                chisq = rss[d] / (ngood - numpar)
+            better = (chisq < best) & ((best - chisq) / best > 0.2)
+            best = np.where(better, chisq, best)
+            deg = np.where(better, d, deg)
+        if deg.ndim == 0:
+            return int(deg), float(best)
+        return deg, best
@@ -110,15 +110,16 @@ class ContinuumSubtraction(object):
 
             keyval["noise"] = noise
             # now set the identified regions to 0.0
+            mask = np.zeros(len(spectrum), dtype=bool)
             for ch in segs:
-                for i in range(ch[0],ch[1] + 1):
-                    spectrum[i] = 0.0
+                mask[ch[0]:ch[1] + 1] = True
+            spectrum[mask] = 0.0
             # mask all values that are 0.0, effectively masking all line data
             # this should leave only continuum
             if len(segs) == 0:
                 mspec = np.ma.array(spectrum,mask=False,copy=True,shrink=False)
             else:
-                mspec = np.ma.masked_values(spectrum,0.0,atol=1e-10,copy=True,shrink=False)
+                mspec = np.ma.array(spectrum,mask=mask | (abs(spectrum) <= 1e-10),copy=True,shrink=False)
             tempc = np.array([noise] * len(mspec))
             keyval["chisq"] = stats.reducedchisquared(mspec, tempc, 1, noise)
 
@@ -1,3 +1,4 @@
 from ContinuumSubtraction import ContinuumSubtraction as ContinuumSubtraction
+from BatchPolyFit import BatchPolyFit as BatchPolyFit
 #from algorithms import *
 import algorithms
@@ -19,10 +19,17 @@ class Filter1D(object):
         spectrum, however some edge channels may be zeroed by some methods, 
         depending on the input paramters.
 
+        A 2D array is taken as a stack of spectra (one per row), which are all
+        smoothed in one vectorized call. The convolution kernels are cached
+        per (method, width); kernels wider than FFTWIDTH channels are applied
+        with an FFT.
+
         Parameters
         ----------
         spec : numpy array
-            1D numpy array of the input spectrum (just the amplitudes).
+            1D numpy array of the input spectrum (just the amplitudes), or
+            2D array of spectra of equal length (one per row). The Savitzky
+            Golay filter only works on a single spectrum.
 
         method : str
             The smoothing filter to apply: boxcar, gaussian, welch, hanning, 
@@ -37,11 +44,14 @@ class Filter1D(object):
         Attributes
         ----------
         spec : numpy array
-            The spectrum.
+            The spectrum (or stack of spectra).
 
         len : int
             The length of the spectrum.
 
+        FFTWIDTH : int
+            Kernels wider than this are applied with an FFT.
+
         methods : list
             A list of the available filters.
 
@@ -97,13 +107,20 @@ class Filter1D(object):
                "triangle", 
                "savgol"]
 
+    FFTWIDTH = 64
+
+    # normalized kernels, keyed by (method, width)
+    _kernels = {}
+
     def __init__(self, spec, method, **keyval):
-        if len(spec.shape) > 1:
-            raise Exception("Spectrum is not 1D but you are trying to use a 1D filter.")
+        if len(spec.shape) > 2:
+            raise Exception("Spectrum is not 1D (or a 2D stack of spectra) but you are trying to use a 1D filter.")
         self.spec = spec
-        self.len = self.spec.shape[0]
+        self.len = self.spec.shape[-1]
         # keywords for the different algorithms
         self.method = self.checkmethod(method)
+        if self.method == "savgol" and len(spec.shape) > 1:
+            raise Exception("The savgol filter only works on a single spectrum.")
         for k, v in keyval.iteritems():
             try:
                 a = getattr(self, method + "_args")[k]
@@ -162,7 +179,78 @@ class Filter1D(object):
             -------
             Numpy array containing the buffered input array
         """
-        return np.pad(self.spec, (nchan, ), mode='reflect')
+        pad = [(0, 0)] * (self.spec.ndim - 1) + [(nchan, nchan)]
+        return np.pad(self.spec, pad, mode='reflect')
+
+    @staticmethod
+    def kernel(method, width):
+        """ Method to get the normalized kernel of a filter, computed once
+            per (method, width) and cached.
+
+            Parameters
+            ----------
+            method : str
+                The filter: boxcar, gaussian, welch, hanning or triangle.
+
+            width : int
+                The width of the filter in channels (see the filter methods).
+
+            Returns
+            -------
+            Read-only numpy array containing the kernel
+        """
+        key = (method, width)
+        if key in Filter1D._kernels:
+            return Filter1D._kernels[key]
+        if method in ["welch", "hanning"]:
+            width += 2    # must add 2 to get the proper width
+        j = np.arange(width, dtype=np.float64)
+        half = (float(width) - 1.0) / 2.0
+        if method == "boxcar":
+            kernel = np.ones(width)
+        elif method == "gaussian":
+            kernel = np.exp(-0.5 * ((j - half) / (0.2 * half))**2)
+        elif method == "welch":
+            kernel = 1.0 - ((j - half) / half)**2
+        elif method == "hanning":
+            kernel = 0.5 * (1.0 - np.cos((2.0 * math.pi * j) / float(width - 1)))
+        elif method == "triangle":
+            kernel = 1.0 - np.abs((j - half) / (float(width) / 2.0))
+        else:
+            raise Exception("No kernel for smoothing method %s." % method)
+        kernel /= kernel.sum()
+        kernel.flags.writeable = False
+        Filter1D._kernels[key] = kernel
+        return kernel
+
+    def convolve(self, kernel):
+        """ Method to convolve the (buffered) spectrum, or all spectra of a
+            stack, with a kernel. Narrow kernels use a direct convolution,
+            wide ones (more than FFTWIDTH channels) an FFT.
+
+            Parameters
+            ----------
+            kernel : numpy array
+                The kernel, its length must be odd.
+
+            Returns
+            -------
+            numpy array
+                The convolved spectrum (or stack), same shape as the input
+        """
+        width = len(kernel)
+        data = self.buffer((width - 1) / 2)
+        if width > self.FFTWIDTH:
+            nfft = 1 << int(math.ceil(math.log(data.shape[-1] + width - 1, 2)))
+            out = np.fft.irfft(np.fft.rfft(data, nfft) * np.fft.rfft(kernel, nfft), nfft)
+            return out[..., width - 1:width - 1 + self.len]
+        if data.ndim == 1:
+            return np.convolve(data, kernel, mode="valid")
+        # all rows at once: sum of shifted copies, weighted by the kernel
+        out = np.zeros(data.shape[:-1] + (self.len,))
+        for j, k in enumerate(kernel[::-1]):
+            out += k * data[..., j:j + self.len]
+        return out
 
     def boxcar(self, width):
         r""" Method to apply a boxcar filter to a spectrum. The filter for point
@@ -187,10 +275,7 @@ class Filter1D(object):
         """
         if not self.isodd(width):
             raise Exception("Boxcar width must be an odd number.")
-        side = (width - 1) / 2
-        kernel = np.array([1.0] * width)
-        kernel /= kernel.sum()
-        return np.convolve(self.buffer(side), kernel, mode="valid")
+        return self.convolve(self.kernel("boxcar", width))
 
     def gaussian(self, width):
         r""" Method to apply a Gaussian filter to a spectrum. The filter for 
@@ -215,13 +300,7 @@ class Filter1D(object):
         """
         if not self.isodd(width):
             raise Exception("Gaussian width must be an odd number.")
-        side = (width - 1) / 2
-        kernel = np.zeros(width)
-        for j in range(width):
-            kernel[j] = math.exp(-0.5 * pow(((float(j) - ((float(width) - 1.0) /
-                                 2.0)) / (0.2 * (float(width) - 1.0) / 2.0)), 2))
-        kernel /= kernel.sum()
-        return np.convolve(self.buffer(side), kernel, mode="valid")
+        return self.convolve(self.kernel("gaussian", width))
 
     def welch(self, width):
         r""" Method to apply a Welch filter to a spectrum. The filter for point x[i]
@@ -246,14 +325,7 @@ class Filter1D(object):
         """
         if not self.isodd(width):
             raise Exception("Welch width must be an odd number.")
-        width += 2    # must add 2 to get the proper width
-        side = (width - 1) / 2
-        kernel = np.zeros(width)
-        for j in range(width):
-            kernel[j] = (1 - math.pow((j - (float(width - 1) / 2.0)) / 
-                         (float(width - 1) / 2.0), 2))
-        kernel /= kernel.sum()
-        return np.convolve(self.buffer(side), kernel, mode="valid")
+        return self.convolve(self.kernel("welch", width))
 
     def hanning(self, width):
         r""" Method to apply a Hanning filter to a spectrum. The filter for 
@@ -278,14 +350,7 @@ class Filter1D(object):
         """
         if not self.isodd(width):
             raise Exception("Hanning width must be an odd number.")
-
-        width += 2    # must add 2 to get the proper width
-        side = (width - 1) / 2
-        kernel = np.zeros(width)
-        for j in range(width):
-            kernel[j] = 0.5 * (1.0 - math.cos((2.0 * math.pi * j) / float(width - 1)))
-        kernel /= kernel.sum()
-        return np.convolve(self.buffer(side), kernel, mode="valid")
+        return self.convolve(self.kernel("hanning", width))
 
     def triangle(self, width):
         r""" Method to apply a Triangular filter to a spectrum. The filter for 
@@ -310,13 +375,7 @@ class Filter1D(object):
         """
         if not self.isodd(width):
             raise Exception("Triangle width must be an odd number.")
-        side = (width - 1) / 2
-        kernel = np.zeros(width)
-        for j in range(width):
-            kernel[j] = (1 - abs((j - (float(width - 1) / 2.0)) / 
-                         (float(width) / 2.0)))
-        kernel /= kernel.sum()
-        return np.convolve(self.buffer(side), kernel, mode="valid")
+        return self.convolve(self.kernel("triangle", width))
 
     def savgol(self, window_size, order, deriv=0, rate=1):
         """ Smooth (and optionally differentiate) data with a Savitzky-Golay filter.
@@ -362,7 +421,7 @@ class Filter1D(object):
                W.H. Press, S.A. Teukolsky, W.T. Vetterling, B.P. Flannery
                Cambridge University Press ISBN-13: 9780521880688
         """
-        if not self.isodd(width):
+        if not self.isodd(window_size):
             raise Exception("Savgol window_size must be an odd number.")
         y = deepcopy(self.spec)
         try:
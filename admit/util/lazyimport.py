@@ -0,0 +1,124 @@
+""" .. _lazyimport-api:
+
+    **lazyimport** --- Lazy attribute loading for ADMIT packages.
+    --------------------------------------------------------------
+
+    This module lets a package publish names (classes, functions,
+    submodules) that are only imported on first access. It keeps
+    ``import admit`` cheap: the ATs, BDPs, CASA helpers and plotting
+    (matplotlib) are not loaded until a script or worker actually uses them,
+    while all the usual public names keep working unchanged.
+
+    Usage, at the end of a package's ``__init__.py``::
+
+      from admit.util.lazyimport import lazymodule
+      lazymodule(__name__, {
+          'Image' : ('admit.util.Image', 'Image'),   # a class
+          'utils' : ('admit.util.utils', None),      # a module
+      })
+"""
+# system imports
+import sys
+import types
+import importlib
+import imp
+
+
+class LazyModule(types.ModuleType):
+    """ Module object that imports its published names on first access.
+
+        It replaces a package's module object in ``sys.modules`` (Python 2
+        has no module level ``__getattr__``). Resolved names are stored in
+        the module dictionary, so each is imported only once. Names that are
+        not published, but are submodules of the package, are imported as
+        well; this mimics the eager imports done before.
+
+        Parameters
+        ----------
+        module : module
+            The original (package) module; its contents are copied.
+
+        attrs : dict
+            Maps public name to a tuple (module name, attribute name);
+            if the attribute name is None, the module itself is returned.
+    """
+    def __init__(self, module, attrs):
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # Keep the original module alive, Python 2 clears the globals
+        # of collected modules, and its functions still reference them.
+        self.__dict__['_lazy_module'] = module
+        self.__dict__['_lazy_attrs'] = attrs
+        self.__dict__['__all__'] = sorted(attrs.keys())
+
+    def __getattribute__(self, name):
+        value = types.ModuleType.__getattribute__(self, name)
+        if isinstance(value, types.ModuleType) and not name.startswith('_'):
+            # Importing a submodule (e.g. admit.util.Image) stores it in
+            # the package dictionary, shadowing a published name of the
+            # same name (the Image class); restore the published one.
+            attrs = types.ModuleType.__getattribute__(self, '_lazy_attrs')
+            if name in attrs and attrs[name][1] is not None and \
+               value.__name__ == attrs[name][0]:
+                value = getattr(value, attrs[name][1])
+                self.__dict__[name] = value
+        return value
+
+    def __getattr__(self, name):
+        # Only called if normal attribute lookup fails.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        attrs = self.__dict__['_lazy_attrs']
+        if name in attrs:
+            modname, attr = attrs[name]
+            value = importlib.import_module(modname)
+            if attr is not None:
+                value = getattr(value, attr)
+        elif self._issubmodule(name):
+            value = importlib.import_module(self.__name__ + '.' + name)
+        else:
+            raise AttributeError("'module' object %s has no attribute '%s'"
+                                 % (self.__name__, name))
+        self.__dict__[name] = value
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) |
+                      set(self.__dict__['_lazy_attrs'].keys()))
+
+    def _issubmodule(self, name):
+        """ True if `name` is a (not yet imported) submodule of this package.
+        """
+        path = self.__dict__.get('__path__')
+        if not path:
+            return False
+        try:
+            fp, pathname, desc = imp.find_module(name, path)
+        except ImportError:
+            return False
+        if fp is not None:
+            fp.close()
+        return True
+
+
+def lazymodule(name, attrs):
+    """ Replace module `name` in ``sys.modules`` by a LazyModule publishing
+        `attrs`.
+
+        Parameters
+        ----------
+        name : str
+            Full module name, normally ``__name__`` of the calling package.
+
+        attrs : dict
+            Maps public name to a tuple (module name, attribute name);
+            if the attribute name is None, the module itself is returned.
+
+        Returns
+        -------
+        LazyModule
+            The new module object.
+    """
+    lazy = LazyModule(sys.modules[name], attrs)
+    sys.modules[name] = lazy
+    return lazy
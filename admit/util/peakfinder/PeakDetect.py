@@ -32,7 +32,6 @@
 # SOFTWARE.
 
 import numpy as np
-import copy
 
 __version__ = "1.0.4"
 
@@ -148,16 +147,58 @@ class PeakDetect(object):
 
         """
         # get the positive peaks
-        pks = self.detect_peaks(copy.deepcopy(self.spec))
+        pks = self.detect_peaks(self.spec.copy())
         # get the negative valleys
-        pks2 = self.detect_peaks(copy.deepcopy(self.spec), True)
+        pks2 = self.detect_peaks(self.spec.copy(), True)
 
-        peaks = []
         # get the x values of the points
-        for i in np.concatenate((pks, pks2)):
-            peaks.append(self.x[i])
+        return self.x[np.concatenate((pks, pks2)).astype(int)].astype(float)
+
+    @classmethod
+    def findall(cls, specs, x=None, **kwarg):
+        """ Method to locate the peaks in several spectra in one call. The
+            spectra are concatenated, separated by NaN's (which cannot be
+            peaks, nor can their neighbours), and searched together. The
+            results are the same as calling find() on each spectrum.
+
+            Parameters
+            ----------
+            specs : list
+                The spectra (1D arrays, which may differ in length).
+
+            x : list
+                The x co-ordinates for each spectrum (optional).
+                Default: None.
+
+            kwarg : Dict
+                Any additional arguments, see the class Attributes.
 
-        return np.array(peaks).astype(float)
+            Returns
+            -------
+            List of numpy arrays containing the located peaks, one per spectrum
+
+        """
+        if len(specs) == 0:
+            return []
+        if x is None:
+            x = [np.arange(float(len(s))) for s in specs]
+        gap = max(kwarg.get("min_sep", cls.min_sep), 0) + 1
+        sep = np.empty(gap)
+        sep.fill(np.nan)
+        # offset of each spectrum in the concatenation
+        starts = np.cumsum([0] + [len(s) + gap for s in specs])
+        allspec = np.concatenate([np.concatenate((np.asarray(s, dtype=np.float64), sep))
+                                  for s in specs])
+        pd = cls(allspec, **kwarg)
+        pks = np.concatenate((pd.detect_peaks(allspec.copy()),
+                              pd.detect_peaks(allspec.copy(), True))).astype(int)
+        # the spectrum each peak belongs to
+        which = np.searchsorted(starts, pks, side="right") - 1
+        peaks = []
+        for i in range(len(specs)):
+            xi = np.asarray(x[i], dtype=float)
+            peaks.append(xi[pks[which == i] - starts[i]])
+        return peaks
 
     def detect_peaks(self, spec, valley=False):
         """ Detects peaks.
@@ -226,15 +267,23 @@ class PeakDetect(object):
             ind = ind[spec[ind] >= self.thresh]
         # detect small peaks closer than minimum peak distance
         if ind.size and self.min_sep > 1:
-            ind = ind[np.argsort(spec[ind])][::-1]  # sort ind by peak height
+            # visit the peaks by height, each one not yet removed removes the
+            # smaller ones within min_sep; ind is sorted, so those form a slice.
+            # The sort is stable, so peaks of equal height are visited in the
+            # same order by findall() as by find()
+            order = np.argsort(spec[ind], kind="mergesort")[::-1]
+            lo = np.searchsorted(ind, ind - self.min_sep, side="left")
+            hi = np.searchsorted(ind, ind + self.min_sep, side="right")
             idel = np.zeros(ind.size, dtype=bool)
-            for i in range(ind.size):
+            for i in order:
                 if not idel[i]:
                     # keep peaks with the same height if kpsh is True
-                    idel = idel | (ind >= ind[i] - self.min_sep) & (ind <= ind[i] + self.min_sep) \
-                        & (spec[ind[i]] > spec[ind] if self.kpsh else True)
-                    idel[i] = 0  # Keep current peak
-            # remove the small peaks and sort back the indexes by their occurrence
-            ind = np.sort(ind[~idel])
+                    if self.kpsh:
+                        idel[lo[i]:hi[i]] |= spec[ind[i]] > spec[ind[lo[i]:hi[i]]]
+                    else:
+                        idel[lo[i]:hi[i]] = True
+                    idel[i] = False  # Keep current peak
+            # remove the small peaks
+            ind = ind[~idel]
 
         return ind
@@ -74,6 +74,31 @@ class PeakFinder(object):
                     raise Exception("Cannot change the type of a variable in PeakUtils. %s is of type %s, not %s." % (k, type(getattr(self, k)), type(v)))
                 setattr(self, k, v)
 
+    @classmethod
+    def findall(cls, specs, x=None, **kwarg):
+        """ Method to locate the peaks in several spectra in one call.
+
+            Parameters
+            ----------
+            specs : list
+                The spectra (1D arrays, which may differ in length).
+
+            x : list
+                The x co-ordinates for each spectrum (optional).
+                Default: None.
+
+            kwarg : Dict
+                Any additional arguments, see the class Attributes.
+
+            Returns
+            -------
+            List of numpy arrays containing the located peaks, one per spectrum
+
+        """
+        if x is None:
+            x = [None] * len(specs)
+        return [cls(spec, x[i], **kwarg).find() for i, spec in enumerate(specs)]
+
     def wideenough(self, pk, mult=1):
         """ Method to determine whether a line is wide enough, based on the given 
             parameters.
@@ -93,18 +118,122 @@ class PeakFinder(object):
             otherwise
 
         """
-        for i in range(2 * self.min_width):
-            if self.spec[min(max(0, pk - self.min_width + i), len(self.spec) - 2):
-                         max(1, min(pk + i, len(self.spec) - 1))].min() > mult * self.thresh:
-                return True
-        # check if there is a single low channel
-        start = max(0, pk - self.min_width)
-        end = min(len(self.spec) - self.min_width, pk + self.min_width)
-        for i in range(start, end + 1):
-            if np.sort(self.spec[i: i + self.min_width])[1] > mult * self.thresh :
-                return True
-
-        return False
+        return bool(self._wideenough(np.array([pk]), mult)[0])
+
+    def _wideenough(self, pks, mult=1):
+        """ Vectorized version of wideenough, for an array of peaks.
+
+            A line is wide enough if any window of up to min_width channels
+            around it is completely above the cutoff, or if any window of
+            min_width channels has at most one channel below it.
+
+            Parameters
+            ----------
+            pks : numpy array
+                The peaks to examine (in channel units)
+
+            mult : int
+                A mulitpiler to use for the noise level cutoff
+                Default: 1
+
+            Returns
+            -------
+            Numpy array of bool, one per peak
+
+        """
+        n = len(self.spec)
+        mw = self.min_width
+        cut = mult * self.thresh
+        pks = pks[:, np.newaxis]
+        # cumulative counts, so the number of channels in [a, b) is cnt[b] - cnt[a]
+        below = np.concatenate(([0], np.cumsum(~(self.spec > cut))))
+        low = np.concatenate(([0], np.cumsum(self.spec <= cut)))
+        nan = np.concatenate(([0], np.cumsum(np.isnan(self.spec))))
+        # windows [pk - min_width + i, pk + i) completely above the cutoff
+        i = np.arange(2 * mw)
+        a = np.minimum(np.maximum(0, pks - mw + i), n - 2)
+        b = np.maximum(1, np.minimum(pks + i, n - 1))
+        wide = ((below[b] - below[a]) == 0).any(axis=1)
+        if n < mw:
+            # no window of min_width channels fits in the spectrum
+            return wide
+        # check if there is a single low channel, in the windows of min_width
+        # channels starting at max(0, pk - min_width) ... min(n - min_width, pk + min_width)
+        j = pks - mw + np.arange(2 * mw + 1)
+        valid = (j >= 0) & (j <= n - mw)
+        j = np.clip(j, 0, n - mw)
+        single = ((low[j + mw] - low[j]) <= 1) & ((mw - (nan[j + mw] - nan[j])) >= 2)
+        return wide | (single & valid).any(axis=1)
+
+    def _isfirstmax(self, pks, hw):
+        """ Determine for an array of peaks whether the channel hw into the window
+            spec[max(0, pk - hw):min(pk + hw, len(spec) - 1)] is the (first)
+            maximum of that window.
+
+            Parameters
+            ----------
+            pks : numpy array
+                The peaks to examine (in channel units)
+
+            hw : int
+                Half width of the window
+
+            Returns
+            -------
+            Numpy array of bool, one per peak
+
+        """
+        n = len(self.spec)
+        # pad with -inf, windows clipped at either end are then all 2*hw long
+        padded = np.empty(n + 2 * hw)
+        padded.fill(-np.inf)
+        padded[hw:hw + n - 1] = self.spec[:n - 1]
+        windows = np.lib.stride_tricks.as_strided(padded, shape=(n + 1, 2 * hw),
+                                                  strides=(padded.strides[0],) * 2)
+        amax = windows[pks].argmax(axis=1) + pks - hw
+        return amax - np.maximum(0, pks - hw) == hw
+
+    def _merge(self, peaks, spec):
+        """ Remove peaks that are too close together (keeping the highest), and
+            peaks that do not have at least a cutoff's worth of dip between them.
+
+            Parameters
+            ----------
+            peaks : list
+                The peaks (in channel units), in increasing order.
+
+            spec : numpy array
+                The spectrum, negated for minima.
+
+            Returns
+            -------
+            List of the remaining peaks
+
+        """
+        for i in range(len(peaks) - 1):
+            if abs(peaks[i] - peaks[i + 1]) < self.min_sep:
+                if spec[peaks[i]] > spec[peaks[i + 1]]:
+                    peaks[i + 1] = -10
+                else:
+                    peaks[i] = -10
+        peaks[:] = [x for x in peaks if x >= 0]
+        if len(peaks) < 2:
+            return peaks
+        # the minimum between each pair of peaks (i, j), from the minima
+        # between neighbouring ones
+        p = np.array(peaks)
+        seg = np.minimum(np.minimum.reduceat(spec, p)[:-1], spec[p[1:]])
+        mins = np.tile(seg, (len(p), 1))
+        mins[np.tril_indices(len(p), -1, len(seg))] = np.inf
+        mins = np.minimum.accumulate(mins, axis=1)
+        i, j = np.triu_indices(len(p), 1)
+        dip = np.maximum(spec[p[i]], spec[p[j]]) - mins[i, j - 1] < self.thresh
+        i = i[dip]
+        j = j[dip]
+        remove = set(np.where(spec[p[i]] < spec[p[j]], p[i], p[j]).tolist())
+        for r in remove:
+            peaks.remove(r)
+        return peaks
 
     def find(self):
         """ Method to locate peaks in an input spectrum
@@ -120,81 +249,33 @@ class PeakFinder(object):
         """
         self.min_width += int(self.min_width) % 2
         hw = int(self.min_width / 2)
-        minpeaks = []
-        maxpeaks = []
         # determine which points are above the cutoff and set flags appropriately
-        flag = np.ones(len(self.spec), dtype=bool)
-        flag[abs(self.spec) < self.thresh] = False
-        #print self.spec
-        #print flag,"\n"
-
-        dx = np.diff(self.spec).tolist()
-
-        # get the initial peaks
-        for i in range(1,len(dx) - 1):
-            if flag[i]:
-                if self.spec[i] <= -1 * self.thresh:
-                    if dx[i] < 0.0 < dx[i + 1]:
-                        minpeaks.append(i + 1)
-                    elif dx[i] > 0.0 > dx[i - 1]:
-                        minpeaks.append(i)
-                elif self.spec[i] >= self.thresh:
-                    if dx[i] < 0.0 < dx[i - 1]:
-                        maxpeaks.append(i)
-                    elif dx[i] > 0.0 > dx[i + 1]:
-                        maxpeaks.append(i + 1)
+        dx = np.diff(self.spec)
+        i = np.arange(1, len(dx) - 1)
+        spec = self.spec[i]
+        flag = ~(abs(spec) < self.thresh)
+        low = flag & (spec <= -1 * self.thresh)
+        high = flag & ~low & (spec >= self.thresh)
+
+        # get the initial peaks, where the derivative changes sign
+        mina = low & (dx[i] < 0.0) & (dx[i + 1] > 0.0)
+        minb = low & ~mina & (dx[i] > 0.0) & (dx[i - 1] < 0.0)
+        minpeaks = np.where(mina, i + 1, i)[mina | minb]
+        maxa = high & (dx[i] < 0.0) & (dx[i - 1] > 0.0)
+        maxb = high & ~maxa & (dx[i] > 0.0) & (dx[i + 1] < 0.0)
+        maxpeaks = np.where(maxa, i, i + 1)[maxa | maxb]
 
         # refine
         # 1. remove "false" peaks
         # 2. remove peaks that are too close together, favor the one with highest flux
-        # do gaussian fit to get proper peak
-        for i in range(len(maxpeaks) - 1, -1, -1):
-            pk = maxpeaks[i]
-            if self.spec[max(0, pk - hw):min(pk + hw, len(self.spec) - 1)].argmax() != hw \
-               or not self.wideenough(pk):
-                del maxpeaks[i]
-        for i in range(len(minpeaks) - 1, -1, -1):
-            pk = minpeaks[i]
-            if self.spec[max(0, pk - hw):min(pk + hw, len(self.spec) - 1)].argmax() != hw:
-                del minpeaks[i]
-
-        for i in range(len(maxpeaks) - 1):
-            if abs(maxpeaks[i] - maxpeaks[i + 1]) < self.min_sep:
-                if self.spec[maxpeaks[i]] > self.spec[maxpeaks[i + 1]]:
-                    maxpeaks[i + 1] = -10
-                else:
-                    maxpeaks[i] = -10
-        maxpeaks[:] = [x for x in maxpeaks if x >= 0]
-        for i in range(len(minpeaks) - 1):
-            if abs(maxpeaks[i] - maxpeaks[i + 1]) < self.min_sep:
-                minpeaks[minpeaks.index(self.spec.index(min(self.spec[minpeaks[i]],
-                                                            self.spec[minpeaks[i + 1]])))] = 0
-        minpeaks[:] = [x for x in minpeaks if x >= 0]
-        peaks = []
+        if len(maxpeaks) > 0:
+            keep = self._isfirstmax(maxpeaks, hw)
+            keep[keep] = self._wideenough(maxpeaks[keep])
+            maxpeaks = maxpeaks[keep]
+        if len(minpeaks) > 0:
+            minpeaks = minpeaks[self._isfirstmax(minpeaks, hw)]
         # now eliminate any peaks that do not have at least a cutoff's worth of dip between them
-        remove = set()
-        for i in range(len(maxpeaks) - 1):
-            for j in range(i + 1, len(maxpeaks)):
-                mn = min(self.spec[maxpeaks[i]:maxpeaks[j] + 1])
-                if max(self.spec[maxpeaks[i]], self.spec[maxpeaks[j]]) - mn < self.thresh:
-                    if self.spec[maxpeaks[i]] < self.spec[maxpeaks[j]]:
-                        remove.add(maxpeaks[i])
-                    else:
-                        remove.add(maxpeaks[j])
-        for r in remove:
-            maxpeaks.remove(r)
-        remove = set()
-        for i in range(len(minpeaks) - 1):
-            for j in range(i + 1, len(minpeaks)):
-                mx = max(self.spec[minpeaks[i]:minpeaks[j] + 1])
-                if abs(min(self.spec[minpeaks[i]], self.spec[minpeaks[j]]) - mn) < self.thresh:
-                    if self.spec[maxpeaks[i]] > self.spec[maxpeaks[j]]:
-                        remove.add(maxpeaks[i])
-                    else:
-                        remove.add(maxpeaks[j])
-        for r in remove:
-            minpeaks.remove(r)
+        maxpeaks = self._merge(maxpeaks.tolist(), self.spec)
+        minpeaks = self._merge(minpeaks.tolist(), -self.spec)
 
-        for i in maxpeaks + minpeaks:
-            peaks.append(self.x[i])
-        return np.array(peaks).astype(float)
+        return self.x[np.array(maxpeaks + minpeaks, dtype=int)].astype(float)
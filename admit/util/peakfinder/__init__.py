@@ -9,3 +9,34 @@ from PeakDetect import PeakDetect as PeakDetect
 from PeakFinder import PeakFinder as PeakFinder
 from PeakUtils import PeakUtils as PeakUtils
 
+def findpeaks(method, specs, x=None, **kwarg):
+    """ Locate the peaks in several spectra (or segments of a spectrum) in one
+        call, with the given peak finder. Peak finders with a findall method
+        (PeakDetect, PeakFinder) do this in bulk, for the others each spectrum
+        is searched in turn.
+
+        Parameters
+        ----------
+        method : str
+            The peak finder class: FindPeaksCWT, PeakDetect, PeakFinder or PeakUtils.
+
+        specs : list
+            The spectra (1D arrays, which may differ in length).
+
+        x : list
+            The x co-ordinates for each spectrum (optional).
+            Default: None.
+
+        kwarg : Dict
+            The arguments for the peak finder.
+
+        Returns
+        -------
+        List of numpy arrays containing the located peaks, one per spectrum
+    """
+    cls = globals()[method]
+    if hasattr(cls, "findall"):
+        return cls.findall(specs, x, **kwarg)
+    if x is None:
+        x = [None] * len(specs)
+    return [cls(spec, x[i], **kwarg).find() for i, spec in enumerate(specs)]
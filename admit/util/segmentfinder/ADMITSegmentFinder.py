@@ -13,7 +13,7 @@ import numpy.ma as ma
 # ADMIT imports
 from admit.util import stats
 from admit.util import utils
-from admit.util import Segments
+from admit.util.Segments import Segments
 from admit.util.AdmitLogging import AdmitLogging as logging
 
 
@@ -390,4 +390,4 @@ class ADMITSegmentFinder(object):
                 (ch1 - ch0 + 1, ch0, ch1, lmean, lsigma, lmax, lfwhm, lpeak))
             segp.append([self.freq[ch0], self.freq[ch1], rmax, rmax])
             segp.append([lmean, lmean, rmax - 0.1, rmax + 0.05])
-        return Segments.Segments(segments, nchan=len(self.spec)), cutoff, dstd, dmean
+        return Segments(segments, nchan=len(self.spec)), cutoff, dstd, dmean
@@ -12,7 +12,7 @@ import bdp_types as bt
 import utils
 from segmentfinder import SegmentFinder
 import continuumsubtraction.spectral.ContinuumSubtraction
-from admit.util import LineData
+from admit.util.LineData import LineData
 import copy
 
 def mergestats(s1, s2, noise):
@@ -115,8 +115,9 @@ def getspectrum(bdp, vlsr=0.0, smooth=(), recalc=False, segment={"method": "ADMI
             mspectrum.mask = np.array([mspectrum.mask] * len(mspectrum.data))
         if isinstance(nspectrum.mask, bool) or isinstance(nspectrum.mask, np.bool_):
             nspectrum.mask = np.array([nspectrum.mask] * len(nspectrum.data))
-        spec = [Spectrum(mspectrum, copy.deepcopy(freq), copy.deepcopy(chans)),
-                Spectrum(nspectrum, copy.deepcopy(freq), copy.deepcopy(chans))]
+        # the two spectra can share the axes, Spectrum does not modify them
+        spec = [Spectrum(mspectrum, freq, chans),
+                Spectrum(nspectrum, freq, chans)]
         for s in spec:
             s.mask_invalid()
             s.fix_invalid(0.0)
@@ -182,12 +183,19 @@ def getspectrum(bdp, vlsr=0.0, smooth=(), recalc=False, segment={"method": "ADMI
             spec.append(tempspec)
 
         if len(smooth) > 0 and smooth[0] is not None:
-            for s in spec:
-                filter = Filter1D.Filter1D(s.spec(), smooth[0], **Filter1D.Filter1D.convertargs(smooth))
-                s.set_spec(ma.MaskedArray(filter.run(), mask=spectrum[i].mask))
+            # the spectra all have the same length, smooth them in one go
+            if smooth[0] == "savgol":
+                smoothed = [Filter1D.Filter1D(s.spec(), smooth[0], **Filter1D.Filter1D.convertargs(smooth)).run()
+                            for s in spec]
+            else:
+                filter = Filter1D.Filter1D(np.array([s.spec() for s in spec]), smooth[0],
+                                           **Filter1D.Filter1D.convertargs(smooth))
+                smoothed = filter.run()
+            for i, s in enumerate(spec):
+                s.set_spec(ma.MaskedArray(smoothed[i], mask=spectrum[i].mask))
                 if recalc:
                     segment["spectrum"] = s.spec()
-                    segment["freq"] = sfreq()
+                    segment["freq"] = s.freq()
                     sfinder = SegmentFinder.SegmentFinder(**segment)
                     sep, cut, noise, mean = sfinder.find()
                     s.set_noise(noise)
@@ -445,7 +453,7 @@ def linedatafromsegments(freq,chan,segments,specs,statspec=None):
         else:
             peak, ratio, fwhm = getinfo(ch, specs)
         lname = "U_%.3f" % mid
-        linedata = LineData.LineData(frequency=float(mid), uid=lname, formula="NotIdentified", name="Not Identified", plain="N/A", peakintensity=float(peak), fwhm=float(fwhm), chans=[ch[0], ch[1]], peakrms=float(ratio))
+        linedata = LineData(frequency=float(mid), uid=lname, formula="NotIdentified", name="Not Identified", plain="N/A", peakintensity=float(peak), fwhm=float(fwhm), chans=[ch[0], ch[1]], peakrms=float(ratio))
         lines.append(linedata)
 
     return lines
@@ -8,7 +8,7 @@ import numpy as np
 import numpy.ma as ma
 
 
-def rejecto1(data, f=1.5):
+def rejecto1(data, f=1.5, axis=None):
     """ reject outliers from a distribution
     using a hinges-fences style rejection,
     using a mean.
@@ -21,18 +21,26 @@ def rejecto1(data, f=1.5):
         The factor f, such that only data is retained
         between mean - f*std and mean + f*std
 
+    axis : int, optional
+        If given, the mean and std are taken along this axis, e.g. for
+        a set of spectra, and the rejected data are masked instead.
+
     Returns
     -------
-    returns: an array with only data between
-    mean - f*std and mean + f*std
+    returns: a list with only data between
+    mean - f*std and mean + f*std, or with an axis a masked array
+    where the other data are masked.
         
     """
-    u = np.mean(data)
-    s = np.std(data)
-    newdata = [e for e in data if (u - f * s < e < u + f * s)]
-    return newdata
-
-def rejecto2(data, f=1.5):
+    data = np.asarray(data)
+    u = np.mean(data, axis=axis, keepdims=True)
+    s = np.std(data, axis=axis, keepdims=True)
+    keep = (u - f * s < data) & (data < u + f * s)
+    if axis is None:
+        return data[keep].tolist()
+    return ma.masked_array(data, mask=~keep)
+
+def rejecto2(data, f=1.5, axis=None):
     """ reject outliers from a distribution
         using a hinges-fences style rejection,
         using a median.
@@ -45,17 +53,27 @@ def rejecto2(data, f=1.5):
         The factor f, such that only data is retained
         between median - f*std and median + f*std
 
+    axis : int, optional
+        If given, the medians are taken along this axis, e.g. for
+        a set of spectra, and the rejected data are masked instead.
+
     Returns
     -------
     returns: an array with only data between
-    median - f*std and median + f*std
+    median - f*std and median + f*std, or with an axis a masked array
+    where the other data are masked.
     """
-    d = np.abs(data - np.median(data))
-    mdev = np.median(d)
-    s = d/mdev if mdev else 0.
-    return data[s<f]
-
-def mystats(data):
+    # np.median selects (np.partition), it does not sort
+    data = np.asarray(data)
+    d = np.abs(data - np.median(data, axis=axis, keepdims=True))
+    mdev = np.median(d, axis=axis, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(mdev > 0, d / np.where(mdev > 0, mdev, 1.0), 0.)
+    if axis is None:
+        return data[s<f]
+    return ma.masked_array(data, mask=~(s<f))
+
+def mystats(data, axis=None):
     """ return raw and robust statistics for a distribution
 
         Parameters
@@ -63,34 +81,82 @@ def mystats(data):
         data : array 
             The data array for which the statistics is returned.
 
+        axis : int, optional
+            If given, the statistics are computed along this axis, and
+            each returned value is an array.
+
         Returns
         -------
         returns:   N, mean, std for the raw and robust resp.
     """
-    m1 = data.mean()
-    s1 = data.std()
-    n1 = len(data)
-    d = rejecto2(data)
-    m2 = d.mean()
-    s2 = d.std()
-    n2 = len(d)
+    data = np.asarray(data)
+    if axis is None:
+        m1 = data.mean()
+        s1 = data.std()
+        n1 = len(data)
+        d = rejecto2(data)
+        m2 = d.mean()
+        s2 = d.std()
+        n2 = len(d)
+        return (n1,m1,s1,n2,m2,s2)
+    m1 = data.mean(axis=axis)
+    s1 = data.std(axis=axis)
+    n1 = data.shape[axis]
+    d = rejecto2(data, axis=axis)
+    m2 = d.mean(axis=axis).filled(np.nan)
+    s2 = d.std(axis=axis).filled(np.nan)
+    n2 = d.count(axis=axis)
     return (n1,m1,s1,n2,m2,s2)
-    
-def robust(data,f=1.5):
+
+def quartiles(data, axis=None):
+    """ return the three quartiles of a distribution, as the elements
+        n/4, n/2 and 3n/4 of the n sorted (valid) data, found by
+        selection (np.partition) instead of sorting.
+
+        Parameters
+        ----------
+        data : array
+            The data; can be masked.
+
+        axis : int, optional
+            If given, the quartiles are taken along this axis, e.g. for
+            a set of spectra; masked data can have a different number of
+            valid values along the axis.
+
+        Returns
+        -------
+        returns: q1, q2, q3 (scalars, or arrays without the axis)
+    """
+    if axis is None:
+        if isinstance(data, ma.MaskedArray):
+            d = data.compressed()
+        else:
+            d = np.ravel(data)
+        n = len(d)
+        k = [n/4, n/2, (3*n)/4]
+        d = np.partition(d, k)
+        return d[k[0]], d[k[1]], d[k[2]]
+    if isinstance(data, ma.MaskedArray) and ma.getmask(data) is not ma.nomask:
+        # masked data are placed beyond all valid data
+        d = np.moveaxis(data.filled(np.inf), axis, -1)
+        n = data.count(axis=axis)
+    else:
+        d = np.moveaxis(np.asarray(data), axis, -1)
+        n = np.full(d.shape[:-1], d.shape[-1], dtype=int)
+    k = [n/4, n/2, (3*n)/4]
+    kth = np.unique(np.concatenate([np.ravel(i) for i in k]))
+    if len(kth) > 32:
+        d = np.sort(d, axis=-1)
+    else:
+        d = np.partition(d, kth, axis=-1)
+    return tuple([np.take_along_axis(d, i[..., np.newaxis], axis=-1)[..., 0] for i in k])
+
+def robust(data,f=1.5,axis=None):
     """return a subset of the data with outliers robustly removed
     data - can be masked
+    axis - if given, the quartiles are taken along this axis
     """
-    if type(data) == np.ndarray:
-        d = np.sort(data)
-    else:
-        d = np.sort(data).compressed()
-    n= len(d)
-    n1 = n/4
-    n2 = n/2
-    n3 = (3*n)/4
-    q1 = d[n1]
-    q2 = d[n2]
-    q3 = d[n3]
+    q1, q2, q3 = quartiles(data, axis)
     d = q3-q1
     f1 = q1-f*d
     f3 = q3+f*d
@@ -98,7 +164,12 @@ def robust(data,f=1.5):
     # print "robust: Median: ", median
     # print "robust: n,Q1,2,3:",n,q1,q2,q3
     # print "robust: f1,f3:",f1,f3
-    dm = ma.masked_outside(data,f1,f3)
+    if axis is None:
+        dm = ma.masked_outside(data,f1,f3)
+    else:
+        f1 = np.expand_dims(f1, axis)
+        f3 = np.expand_dims(f3, axis)
+        dm = ma.masked_where((data < f1) | (data > f3), data)
     return dm
 
 def reducedchisquared(data, model, numpar, noise=None):
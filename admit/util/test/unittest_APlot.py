@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+#
+# Testing the deferred and no-plot modes of util/APlot.py
+#
+# Functions covered by test cases:
+#    APlot.plotter()
+#    APlot.histogram()
+#    AbstractPlot.flush()
+#    AbstractPlot.getFigure()
+#    AbstractPlot.getThumbnail()
+
+# render without a display; this must come before pyplot is imported
+import matplotlib
+matplotlib.use('Agg')
+
+import admit
+import sys, os
+import unittest
+import shutil
+import tempfile
+import numpy as np
+
+import admit.util.PlotControl as PlotControl
+from admit.util.APlot import APlot
+from admit.util.AbstractPlot import AbstractPlot
+
+class TestAPlot(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility APlot Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='aplot_', dir='/tmp') + os.sep
+        self.nproc = AbstractPlot.nproc
+        self.figno = APlot.figno
+
+    def tearDown(self):
+        AbstractPlot._jobs = []
+        AbstractPlot.nproc = self.nproc
+        APlot.figno = self.figno
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # make two plots, then change their data as a caller reusing its arrays
+    def plots(self, pmode):
+        p = APlot(pmode=pmode, ptype=PlotControl.PNG, abspath=self.dir)
+        x = np.arange(50.0)
+        y = np.sin(x / 5.0)
+        p.plotter(x, [y], title="line", figname="line")
+        f1 = APlot.figno
+        columns = [y]
+        p.histogram(columns, title="histo", figname="histo", thumbnail=False)
+        f2 = APlot.figno
+        x[:] = np.nan
+        y[:] = 0.0
+        columns.append(x)
+        return p, f1, f2
+
+    # deferred plots keep the data of the call, and render after flush()
+    def test_deferred(self):
+        for nproc in [1, 2]:
+            AbstractPlot.nproc = nproc
+            p, f1, f2 = self.plots(PlotControl.DEFERRED)
+            self.assertEqual(len(AbstractPlot._jobs), 2)
+            queued = AbstractPlot._jobs[0][5]
+            self.assertTrue(np.array_equal(queued['x'], np.arange(50.0)))
+            self.assertTrue(np.array_equal(queued['y'][0], np.sin(np.arange(50.0) / 5.0)))
+            self.assertEqual(len(AbstractPlot._jobs[1][5]['columns']), 1)
+            self.assertFalse(os.path.exists(self.dir + "line.png"))
+            AbstractPlot.flush()
+            self.assertEqual(AbstractPlot._jobs, [])
+            if(self.verbose):
+                print "\nFiles:", sorted(os.listdir(self.dir))
+            self.assertEqual(p.getFigure(f1, True), "line.png")
+            self.assertEqual(p.getThumbnail(f1, True), "line_thumb.png")
+            self.assertEqual(p.getFigure(f2, True), "histo.png")
+            for f in ["line.png", "line_thumb.png", "histo.png"]:
+                self.assertTrue(os.path.getsize(self.dir + f) > 0)
+            self.assertFalse(os.path.exists(self.dir + "histo_thumb.png"))
+            # the caller's figure numbering is not changed by rendering
+            self.assertEqual(APlot.figno, f2)
+            for f in os.listdir(self.dir):
+                os.remove(self.dir + f)
+
+    # no-plot mode registers the file names, but writes nothing
+    def test_noplot(self):
+        p, f1, f2 = self.plots(PlotControl.NOPLOT)
+        self.assertEqual(f2, f1 + 1)
+        self.assertEqual(p.getFigure(f1, True), "line.png")
+        self.assertEqual(p.getThumbnail(f1, True), "line_thumb.png")
+        self.assertEqual(p.getFigure(f2, True), "histo.png")
+        self.assertEqual(AbstractPlot._jobs, [])
+        AbstractPlot.flush()
+        self.assertEqual(os.listdir(self.dir), [])
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_APlot.py"
+# or "./unittest_APlot.py"
+if __name__ == '__main__':
+    unittest.main()
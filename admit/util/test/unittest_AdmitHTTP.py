@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+#
+# Testing util/AdmitHTTP.py
+#
+# Functions covered by test cases:
+#    AdmitHTTPServer (threaded requests, background jobs)
+#    AdmitHTTPRequestHandler.do_POST()
+#    AdmitHTTPRequestHandler.send_head() (caching of images)
+#    AdmitHTTPRequestHandler.send_jobs()
+#    AdmitHTTPRequestHandler.send_events()
+#    AdmitJobQueue
+
+import admit
+import sys, os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import urllib2
+
+from admit.util.AdmitHTTP import AdmitHTTPServer
+
+class TestAdmitHTTP(unittest.TestCase):
+
+    # initialization: a server on a free port, serving a temporary directory
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility AdmitHTTP Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='http_', dir='/tmp') + os.sep
+        open(self.dir + 'index.html', 'w').write('<html></html>')
+        open(self.dir + 'plot_thumb.png', 'w').write('PNG')
+        self.posted = []
+        self.release = threading.Event()
+        self.server = AdmitHTTPServer(('localhost', 0), docroot=self.dir, postcallback=self.onpost)
+        self.url = 'http://localhost:%d' % self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # the POST callback: "wait" blocks until released, "fail" raises,
+    # "run" runs the project
+    def onpost(self, payload):
+        self.posted.append(payload['command'])
+        if payload['command'] == 'wait':
+            self.release.wait(10)
+        elif payload['command'] == 'fail':
+            raise Exception('failed on purpose')
+        elif payload['command'] == 'run':
+            self.project.run()
+
+    def get(self, path, headers={}):
+        return urllib2.urlopen(urllib2.Request(self.url + path, headers=headers), timeout=10)
+
+    def post(self, command):
+        r = urllib2.urlopen(self.url + '/', json.dumps({'command': command}), timeout=10)
+        self.assertEqual(r.getcode(), 202)
+        return json.load(r)
+
+    def job(self, jobid, since=0, state=None):
+        # poll until the job has the state
+        for i in range(200):
+            job = json.load(self.get('/jobs/%d?since=%d' % (jobid, since)))
+            if state is None or job['state'] == state:
+                return job
+            time.sleep(0.05)
+        self.fail('job %d did not get state %s' % (jobid, state))
+
+    # a POST returns at once, files are served while the job runs
+    def test_jobs(self):
+        t0 = time.time()
+        job = self.post('wait')
+        self.assertTrue(time.time() - t0 < 5)
+        self.assertTrue(job['state'] in ['queued', 'running'])
+        job2 = self.post('fail')
+        self.assertEqual(job2['id'], job['id'] + 1)
+        self.job(job['id'], state='running')
+        self.assertEqual(self.get('/index.html').read(), '<html></html>')
+        jobs = json.load(self.get('/jobs'))
+        self.assertEqual([j['state'] for j in jobs], ['running', 'queued'])
+        # jobs run one at a time, in order
+        self.release.set()
+        self.job(job['id'], state='done')
+        job2 = self.job(job2['id'], state='failed')
+        self.assertEqual(job2['error'], 'failed on purpose')
+        self.assertEqual(self.posted, ['wait', 'fail'])
+        try:
+            self.get('/jobs/99')
+            self.fail('no 404')
+        except urllib2.HTTPError, e:
+            self.assertEqual(e.code, 404)
+
+    # the tasks of a run report their progress
+    def test_progress(self):
+        # as in Admit, the project lives in the main thread
+        self.project = admit.Project(self.dir + 'test.admit')
+        self.project.setlogginglevel(50)
+        t = self.project.addtask(admit.File_AT(file='x', touch=True))
+        self.project.addtask(admit.Flow11_AT(), [t])
+        job = self.job(self.post('run')['id'], state='done')
+        events = [(e['type'], e['event']) for e in job['events']]
+        self.assertEqual(events, [('File_AT', 'started'), ('File_AT', 'finished'),
+                                  ('Flow11_AT', 'started'), ('Flow11_AT', 'finished')])
+        self.assertTrue(job['events'][1]['wall'] >= 0.0)
+        self.assertEqual(self.job(job['id'], since=3)['events'][0]['type'], 'Flow11_AT')
+
+        # the same as an event stream
+        self.release.clear()
+        jobid = self.post('wait')['id']
+        stream = self.get('/jobs/%d/events' % jobid)
+        self.assertEqual(stream.info().gettype(), 'text/event-stream')
+        self.release.set()
+        data = stream.read()
+        self.assertTrue(data.startswith('event: job\ndata: '))
+        self.assertEqual(json.loads(data.split('data: ', 1)[1])['state'], 'done')
+
+    # images can be cached, and are only sent again when changed
+    def test_cache(self):
+        r = self.get('/plot_thumb.png')
+        self.assertEqual(r.read(), 'PNG')
+        self.assertEqual(r.info().getheader('Cache-Control'), 'no-cache')
+        modified = r.info().getheader('Last-Modified')
+        try:
+            self.get('/plot_thumb.png', {'If-Modified-Since': modified})
+            self.fail('no 304')
+        except urllib2.HTTPError, e:
+            self.assertEqual(e.code, 304)
+        # older copy
+        self.assertEqual(self.get('/plot_thumb.png', {'If-Modified-Since':
+                         'Thu, 01 Jan 2015 00:00:00 GMT'}).read(), 'PNG')
+        self.assertEqual(self.get('/index.html').info().getheader('Cache-Control'), None)
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_AdmitHTTP.py"
+# or "./unittest_AdmitHTTP.py"
+if __name__ == '__main__':
+    unittest.main()
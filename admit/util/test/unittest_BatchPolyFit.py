@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+#
+# Testing util/continuumsubtraction/spectral/BatchPolyFit.py
+#
+# Functions covered by test cases:
+#    BatchPolyFit.coefficients()
+#    BatchPolyFit.fit()
+#    BatchPolyFit.rss()
+#    BatchPolyFit.search()
+#    PolyFit.run()
+
+import admit
+import sys, os
+import unittest
+import numpy as np
+import numpy.ma as ma
+
+from admit.util import stats
+from admit.util.continuumsubtraction.spectral.BatchPolyFit import BatchPolyFit
+from admit.util.continuumsubtraction.spectral.algorithms.PolyFit import PolyFit
+
+class TestBatchPolyFit(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility BatchPolyFit Unit Test"
+        # 50 spectra of 200 channels: polynomials up to 2nd order, noise 0.1, one line
+        np.random.seed(7)
+        self.x = np.arange(200.0)
+        self.noise = 0.1
+        c = np.random.normal(size=(3, 50)) * np.array([[1.0], [1e-2], [1e-4]])
+        c[2, :25] = 0.0
+        self.curved = abs(c[2]) * 200.0**2 > 2.0
+        self.y = np.dot(np.vander(self.x, 3, increasing=True), c)
+        self.y += self.noise * np.random.normal(size=self.y.shape)
+        self.mask = np.zeros(200, dtype=bool)
+        self.mask[80:100] = True
+        self.y[self.mask] += 3.0
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # all spectra at once agree with np.polyfit of each spectrum
+    def test_fit(self):
+        bpf = BatchPolyFit(self.x, self.mask)
+        good = ~self.mask
+        for deg in range(4):
+            cont = bpf.fit(self.y, deg)
+            c = bpf.coefficients(self.y, deg)
+            self.assertEqual(cont.shape, self.y.shape)
+            for j in [0, 17, 49]:
+                p = np.polyfit(self.x[good], self.y[good, j], deg)
+                self.assertTrue(np.allclose(c[::-1, j], p))
+                self.assertTrue(np.allclose(cont[:, j], np.polyval(p, self.x)))
+        # residuals of all degrees
+        rss = bpf.rss(self.y)
+        for deg in range(4):
+            r = (self.y - bpf.fit(self.y, deg))[good]
+            self.assertTrue(np.allclose(rss[deg], (r * r).sum(axis=0)))
+        # a single spectrum, and a degree per spectrum
+        self.assertTrue(np.allclose(bpf.fit(self.y[:, 3], 2), bpf.fit(self.y, 2)[:, 3]))
+        deg = np.array([0, 1] * 25)
+        cont = bpf.fit(self.y, deg)
+        self.assertTrue(np.allclose(cont[:, 1], bpf.fit(self.y[:, 1], 1)))
+        self.assertRaises(ValueError, bpf.fit, self.y, 4)
+        self.assertEqual(BatchPolyFit(self.x[:3], maxdeg=3).maxdeg, 2)
+        self.assertRaises(ValueError, BatchPolyFit, self.x, np.ones(200))
+
+    # the order search matches PolyFit's criterion, spectrum by spectrum
+    def test_search(self):
+        bpf = BatchPolyFit(self.x, self.mask)
+        deg, chisq = bpf.search(self.y, self.noise)
+        for j in range(50):
+            y = ma.array(self.y[:, j], mask=self.mask)
+            best, order = 1000.0, 0
+            for d in range(4):
+                p = np.polyfit(self.x[~self.mask], self.y[~self.mask, j], d)
+                numpar = 1 if d == 0 else (1000.0 * abs(p) > abs(p).max()).sum()
+                c = stats.reducedchisquared(y, np.polyval(p, self.x), numpar, self.noise)
+                if c < best and (best - c) / best > 0.2:
+                    best, order = c, d
+            self.assertEqual(deg[j], order)
+            self.assertAlmostEqual(chisq[j], best)
+        # clearly curved spectra need (at least) 2nd order
+        self.assertTrue((deg[self.curved] >= 2).all())
+        self.assertEqual(bpf.search(self.y[:, 30], self.noise)[0], deg[30])
+
+    # PolyFit, on a masked spectrum
+    def test_polyfit(self):
+        y = ma.array(self.y[:, 30], mask=self.mask)
+        fit = PolyFit(self.x, y).run(deg=2)
+        self.assertTrue(np.allclose(fit, BatchPolyFit(self.x, self.mask).fit(self.y[:, 30], 2)))
+        fit = PolyFit(self.x, y).run(search=True, noise=self.noise, chisq=3.0)
+        self.assertTrue(np.allclose(fit, BatchPolyFit(self.x, self.mask).fit(self.y[:, 30], 2)))
+        self.assertEqual(PolyFit(self.x, y).run(search=True, noise=self.noise / 10.0, chisq=3.0), None)
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_BatchPolyFit.py"
+# or "./unittest_BatchPolyFit.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+#
+# Testing util/CubeSmoother.py
+#
+# Functions covered by test cases:
+#    CubeSmoother.beam()
+#    CubeSmoother.kernel()
+#    CubeSmoother.smoothplane()
+#    CubeSmoother.smooth()
+#    CubeSmoother.smoothspectra()
+
+import admit
+import sys, os
+import math
+import unittest
+import numpy as np
+
+from admit.util.CubeSmoother import CubeSmoother
+
+class TestCubeSmoother(unittest.TestCase):
+
+    # initialization: a noisy cube, with blank pixels
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility CubeSmoother Unit Test"
+        self.cube = np.random.RandomState(2).normal(0.0, 1.0, (40, 30, 50))
+        self.cube[5:8, 3:5, 10:12] = np.nan
+        self.block = CubeSmoother.BLOCK
+
+    def tearDown(self):
+        CubeSmoother.BLOCK = self.block
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    def smooth(self, smoother, cube):
+        out = np.zeros(cube.shape)
+        def write(z0, block):
+            out[:, :, z0:z0+block.shape[2]] = block
+        smoother.smooth(lambda z0, z1: cube[:, :, z0:z1], write, cube.shape[2])
+        return out
+
+    def test_beam(self):
+        s = math.sqrt(8.0 * math.log(2.0))
+        # major axis north (+Y), pixels of 0.5 arcsec
+        b = CubeSmoother.beam(4.0, 2.0, 0.0, 0.5)
+        self.assertTrue(np.allclose(b, [[(4.0 / s)**2, 0.0], [0.0, (8.0 / s)**2]]))
+        # east is -X
+        b = CubeSmoother.beam(4.0, 2.0, 45.0, 1.0)
+        self.assertTrue(b[0][1] < 0.0)
+        self.assertTrue(CubeSmoother.beam(4.0, 2.0, 45.0, 1.0, east=1)[0][1] > 0.0)
+        # beams add as covariances
+        k = CubeSmoother.kernel(CubeSmoother.beam(3.0, 3.0, 0.0, 1.0), CubeSmoother.beam(5.0, 5.0, 0.0, 1.0))
+        self.assertTrue(np.allclose(k, CubeSmoother.beam(4.0, 4.0, 0.0, 1.0)))
+        self.assertTrue(np.allclose(CubeSmoother.kernel(b, b), 0.0))
+        self.assertRaises(ValueError, CubeSmoother.kernel, CubeSmoother.beam(5.0, 1.0, 0.0, 1.0),
+                          CubeSmoother.beam(4.0, 4.0, 0.0, 1.0))
+
+    # a Gaussian source smoothed to a larger beam, in Jy/beam
+    def test_smoothplane(self):
+        x, y = np.indices((101, 81), dtype=np.float64)
+        source = CubeSmoother.beam(4.0, 4.0, 0.0, 1.0)
+        target = CubeSmoother.beam(8.0, 6.0, 30.0, 1.0)
+        r = np.array([x - 50.0, y - 40.0])
+        def gaussian(c):
+            q = np.einsum('i...,ij,j...->...', r, np.linalg.inv(c), r)
+            return np.exp(-0.5 * q)
+        scale = 8.0 * 6.0 / (4.0 * 4.0)
+        smoother = CubeSmoother(spatial=CubeSmoother.kernel(source, target), scale=scale)
+        p = smoother.smoothplane(gaussian(source))
+        # a point source keeps its peak in Jy/beam
+        self.assertTrue(np.allclose(p, gaussian(target), atol=1e-6))
+        # blank pixels stay blank
+        plane = gaussian(source)
+        plane[10, 10] = np.nan
+        self.assertTrue(np.isnan(smoother.smoothplane(plane)[10, 10]))
+        self.assertEqual(np.isnan(smoother.smoothplane(plane)).sum(), 1)
+
+    # the spectral kernel, and blocks and threads do not change the result
+    def test_smooth(self):
+        spatial = CubeSmoother.beam(3.0, 2.0, 20.0, 1.0)
+        cube = np.nan_to_num(self.cube)
+        smoother = CubeSmoother(spectral=4.0)
+        out = self.smooth(smoother, cube)
+        # cut at 4 sigma, zero beyond the ends, as a convolution
+        sigma = 4.0 / math.sqrt(8.0 * math.log(2.0))
+        self.assertEqual(smoother.halfwidth, 7)
+        j = np.arange(-7, 8)
+        w = np.exp(-0.5 * (j / sigma)**2)
+        w /= w.sum()
+        expect = np.zeros(cube.shape)
+        for z in range(cube.shape[2]):
+            for k, t in zip(j, w):
+                if 0 <= z + k < cube.shape[2]:
+                    expect[:, :, z] += t * cube[:, :, z + k]
+        self.assertTrue(np.allclose(out, expect))
+        a = self.smooth(CubeSmoother(spatial=spatial, spectral=5.0), self.cube)
+        CubeSmoother.BLOCK = 7
+        b = self.smooth(CubeSmoother(spatial=spatial, spectral=5.0, nthreads=3), self.cube)
+        self.assertTrue(np.allclose(a, b, equal_nan=True))
+        self.assertTrue(np.array_equal(np.isnan(a), np.isnan(self.cube)))
+        # a kernel per plane
+        c = self.smooth(CubeSmoother(spatial=[spatial] * 50, scale=[2.0] * 50), self.cube)
+        d = self.smooth(CubeSmoother(spatial=spatial, scale=2.0), self.cube)
+        self.assertTrue(np.allclose(c, d, equal_nan=True))
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_CubeSmoother.py"
+# or "./unittest_CubeSmoother.py"
+if __name__ == '__main__':
+    unittest.main()
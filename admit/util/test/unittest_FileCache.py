@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+#
+# Testing util/FileCache.py
+#
+# Functions covered by test cases:
+#    scan()
+#    exists()
+#    getfiles()
+#    writemanifest()
+#    readmanifest()
+#    load()
+
+import admit
+import sys, os
+import unittest
+import shutil
+import tempfile
+
+class TestFileCache(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility FileCache Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='filecache_', dir='/tmp') + os.sep
+        os.mkdir(self.dir + 'sub')
+        os.mkdir(self.dir + 'x.im')
+        for f in ['a.bdp', 'sub/b.bdp', 'x.png', 'x.im/table.f0']:
+            open(self.dir + f, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # test scan(), exists() and getfiles()
+    def test_scan(self):
+        cache = admit.FileCache(self.dir)
+        self.assertEqual(cache.load(), False)
+        bdps = cache.getfiles(".bdp")
+        if(self.verbose):
+            print "\nBDP files:", bdps
+        self.assertEqual(bdps, [self.dir + 'a.bdp', self.dir + 'sub/b.bdp'])
+        self.assertEqual(bdps, sorted(admit.utils.getFiles(self.dir)))
+        self.assertEqual(bdps, admit.utils.getFiles(self.dir, cache))
+        self.assertTrue(cache.exists(self.dir + 'x.png'))
+        self.assertTrue(cache.exists(self.dir + 'x.im'))
+        self.assertFalse(cache.exists(self.dir + 'y.png'))
+
+    # test writemanifest(), readmanifest() and invalidation
+    def test_manifest(self):
+        admit.FileCache(self.dir).writemanifest()
+        cache = admit.FileCache(self.dir)
+        self.assertEqual(cache.load(), True)
+        self.assertTrue(cache.exists(self.dir + 'x.png'))
+        self.assertEqual(len(cache.getfiles(".bdp")), 2)
+
+        # removing a file invalidates the manifest
+        os.remove(self.dir + 'x.png')
+        cache = admit.FileCache(self.dir)
+        self.assertEqual(cache.load(), False)
+        self.assertFalse(cache.exists(self.dir + 'x.png'))
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_FileCache.py"
+# or "./unittest_FileCache.py"
+if __name__ == '__main__':
+    unittest.main()
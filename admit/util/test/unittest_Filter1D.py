@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+#
+# Testing util/filter/Filter1D.py
+#
+# Functions covered by test cases:
+#    kernel()
+#    run() on a single spectrum and on a 2D stack of spectra
+
+import admit
+import unittest
+import numpy as np
+from admit.util.filter.Filter1D import Filter1D
+
+class TestFilter1D(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility Filter1D Unit Test"
+        np.random.seed(42)
+        self.spec = np.random.normal(0.0, 1.0, 200)
+
+    def tearDown(self):
+        pass
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # test kernel(): normalized, cached and read-only
+    def test_kernel(self):
+        for method in ["boxcar", "gaussian", "welch", "hanning", "triangle"]:
+            k = Filter1D.kernel(method, 7)
+            self.assertAlmostEqual(k.sum(), 1.0)
+            self.assertTrue(k is Filter1D.kernel(method, 7))
+            self.assertFalse(k.flags.writeable)
+        # welch and hanning kernels are 2 wider (their end points are 0)
+        self.assertEqual(len(Filter1D.kernel("hanning", 7)), 9)
+        self.assertTrue((Filter1D.kernel("boxcar", 5) == 0.2).all())
+
+    # test run() on a single spectrum against a direct convolution
+    def test_boxcar(self):
+        out = Filter1D(self.spec, "boxcar", width=5).run()
+        self.assertEqual(len(out), len(self.spec))
+        padded = np.pad(self.spec, (2, ), mode='reflect')
+        self.assertTrue(np.allclose(out, np.convolve(padded, np.ones(5) / 5.0, "valid")))
+
+    # test run() on a 2D stack, each row must be smoothed as a single spectrum
+    def test_stack(self):
+        stack = np.array([self.spec, 2.0 * self.spec, self.spec[::-1]])
+        for method in ["boxcar", "gaussian", "hanning"]:
+            # 101 uses the FFT
+            for width in [3, 9, 101]:
+                out = Filter1D(stack, method, width=width).run()
+                self.assertEqual(out.shape, stack.shape)
+                for i in range(len(stack)):
+                    one = Filter1D(stack[i].copy(), method, width=width).run()
+                    self.assertTrue(np.allclose(out[i], one))
+
+    # savgol only takes a single spectrum
+    def test_savgol(self):
+        out = Filter1D(self.spec, "savgol", window_size=7, order=3).run()
+        self.assertEqual(len(out), len(self.spec))
+        self.assertRaises(Exception, Filter1D, np.array([self.spec, self.spec]), "savgol")
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_Filter1D.py"
+# or "./unittest_Filter1D.py"
+if __name__ == '__main__':
+    unittest.main()
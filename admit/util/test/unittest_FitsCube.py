@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+#
+# Testing util/FitsCube.py, the one pass copy used by Ingest_AT
+#
+# Functions covered by test cases:
+#    FitsCube.region()
+#    FitsCube.copy()
+#    FitsCube.statistics()
+#    FitsCube.supported()
+
+import admit
+import sys, os
+import unittest
+import shutil
+import tempfile
+import numpy as np
+
+from admit.util.FitsCube import FitsCube
+
+class TestFitsCube(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility FitsCube Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='fitscube_', dir='/tmp')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def fits(self, name, data, bitpix=-32, extra=[]):
+        # data in numpy order, written as a FITS primary array
+        cards = [FitsCube.card('SIMPLE', True), FitsCube.card('BITPIX', bitpix),
+                 FitsCube.card('NAXIS', data.ndim)]
+        for i, n in enumerate(reversed(data.shape)):
+            cards.append(FitsCube.card('NAXIS%d' % (i + 1), n))
+        for i in range(data.ndim):
+            if 'CRPIX%d' % (i + 1) not in dict(extra):
+                cards.append(FitsCube.card('CRPIX%d' % (i + 1), 1.0))
+        if data.ndim >= 3 and 'CTYPE3' not in dict(extra):
+            cards.append(FitsCube.card('CTYPE3', 'FREQ'))
+        cards.append(FitsCube.card('OBJECT', "it's"))
+        cards += [FitsCube.card(k, v) for k, v in extra]
+        cards.append('END'.ljust(80))
+        header = ''.join(cards)
+        body = data.astype(FitsCube.DTYPE[bitpix]).tostring()
+        name = os.path.join(self.dir, name)
+        with open(name, 'wb') as fp:
+            fp.write(header.ljust(2880 * ((len(header) + 2879) / 2880)))
+            fp.write(body + '\0' * (-len(body) % 2880))
+        return name
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # Ingest_AT's box= and edge= conventions
+    def test_region(self):
+        shape = (10, 20, 30, 1)
+        self.assertEqual(FitsCube.region(shape), ([0, 0, 0], [9, 19, 29]))
+        self.assertEqual(FitsCube.region(shape, [2, 5]), ([0, 0, 2], [9, 19, 5]))
+        self.assertEqual(FitsCube.region(shape, [1, 2, 3, 4]), ([1, 2, 0], [3, 4, 29]))
+        self.assertEqual(FitsCube.region(shape, [1, 2, 3, 4], [3]), ([1, 2, 3], [3, 4, 26]))
+        self.assertEqual(FitsCube.region(shape, [1, 2, 3, 4, 5, 6]), ([1, 2, 3], [4, 5, 6]))
+        self.assertEqual(FitsCube.region(shape, [], [2, 4]), ([0, 0, 2], [9, 19, 25]))
+        self.assertRaises(Exception, FitsCube.region, shape, [2, 5], [1])
+        self.assertRaises(Exception, FitsCube.region, shape, [1, 2, 3])
+
+    # the copy of a box, with statistics, compared to numpy
+    def test_copy(self):
+        np.random.seed(1)
+        data = np.random.normal(size=(1, 6, 8, 10)).astype(np.float32)
+        data[0, 2, 3, 4] = np.nan
+        data[0, 3, :, :2] = 0.0
+        cube = FitsCube(self.fits('cube.fits', data))
+        self.assertTrue(cube.supported())
+        self.assertEqual(cube.shape, (10, 8, 6, 1))
+        self.assertEqual(cube.header['OBJECT'], "it's")
+
+        blc, trc = FitsCube.region(cube.shape, [1, 2, 8, 6], [1])
+        out = os.path.join(self.dir, 'out.fits')
+        acc = cube.copy(out, blc, trc)
+        sub = data[:, 1:5, 2:7, 1:9]
+        copy = FitsCube(out)
+        self.assertEqual(copy.shape, (8, 5, 4, 1))
+        self.assertEqual(copy.header['CRPIX1'], 0.0)
+        self.assertEqual(copy.header['CRPIX3'], 0.0)
+        self.assertEqual(copy.header['OBJECT'], "it's")
+        result = np.array(copy.data())
+        self.assertTrue(np.array_equal(np.isnan(result), np.isnan(sub)))
+        self.assertTrue(np.array_equal(np.nan_to_num(result), np.nan_to_num(sub)))
+
+        good = sub[np.isfinite(sub)].astype(np.float64)
+        s = FitsCube.statistics(acc)
+        self.assertEqual(acc['nblank'], 1)
+        self.assertEqual(s['npts'][0], good.size)
+        self.assertAlmostEqual(s['min'][0], good.min())
+        self.assertAlmostEqual(s['max'][0], good.max())
+        self.assertAlmostEqual(s['mean'][0], good.mean())
+        self.assertAlmostEqual(s['rms'][0], np.sqrt((good**2).mean()))
+        self.assertAlmostEqual(s['sigma'][0], good.std(ddof=1))
+        # zeros masked
+        nz = good[good != 0.0]
+        s = FitsCube.statistics(acc, zeros=False)
+        self.assertEqual(s['npts'][0], nz.size)
+        self.assertAlmostEqual(s['mean'][0], nz.mean())
+        self.assertAlmostEqual(s['min'][0], nz.min())
+
+        self.assertEqual(len(FitsCube.statistics(cube.copy(out, [0, 0, 3], [1, 1, 3]), zeros=False)['npts']), 0)
+        self.assertRaises(Exception, cube.copy, out, [0, 0, 0], [10, 7, 5])
+
+    # scaled integers, and the primary beam correction
+    def test_pb(self):
+        data = np.arange(3 * 4 * 5, dtype=np.int16).reshape(3, 4, 5)
+        data[1, 1, 1] = -1
+        cube = FitsCube(self.fits('int.fits', data, 16, [('BSCALE', 0.5), ('BZERO', 1.0), ('BLANK', -1)]))
+        pbdata = np.linspace(0.5, 1.0, 3 * 4 * 5).reshape(3, 4, 5)
+        pbdata[2, 0, 0] = np.nan
+        pb = FitsCube(self.fits('pb.fits', pbdata, -64, [('CRPIX3', 2.0)]))
+        out = os.path.join(self.dir, 'out.fits')
+        pbout = os.path.join(self.dir, 'pbmean.fits')
+        acc = cube.copy(out, [0, 0, 1], [4, 3, 2], pb, pbout)
+
+        expect = (data * 0.5 + 1.0) * pbdata
+        expect[1, 1, 1] = np.nan
+        result = np.array(FitsCube(out).data())
+        self.assertEqual(np.isnan(result).sum(), 2)
+        self.assertEqual(acc['nblank'], 2)
+        self.assertTrue(np.allclose(np.nan_to_num(result), np.nan_to_num(expect[1:3]), rtol=1e-6))
+
+        pbmean = FitsCube(pbout)
+        self.assertEqual(pbmean.shape, (5, 4, 1))
+        self.assertEqual(pbmean.header['CRPIX3'], 0.5)
+        mean = np.array(pbmean.data())[0]
+        self.assertAlmostEqual(mean[0, 0], pbdata[1, 0, 0], 6)
+        self.assertAlmostEqual(mean[2, 3], pbdata[1:3, 2, 3].mean(), 6)
+
+        # spectral axis not third
+        self.assertFalse(FitsCube(self.fits('stokes.fits', np.zeros((2, 1, 3, 3)))).supported())
+        # the third axis must be spectral
+        self.assertTrue(FitsCube(self.fits('velo.fits', np.zeros((2, 3, 3)),
+                                           extra=[('CTYPE3', 'VRAD')])).supported())
+        self.assertFalse(FitsCube(self.fits('pol.fits', np.zeros((2, 3, 3)),
+                                            extra=[('CTYPE3', 'STOKES')])).supported())
+        self.assertFalse(FitsCube(self.fits('none.fits', np.zeros((2, 3, 3)),
+                                             extra=[('CTYPE3', '')])).supported())
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_FitsCube.py"
+# or "./unittest_FitsCube.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+#
+# Testing util/ImageHeader.py and the header recorded in Image_BDP
+#
+# Functions covered by test cases:
+#    ImageHeader.shape()
+#    ImageHeader.dim()
+#    ImageHeader.axis()
+#    ImageHeader.world()
+#    ImageHeader.slice()
+#    ImageHeader.freqs()
+#    ImageHeader.restfreq()
+#    ImageHeader.beam()
+#    ImageHeader.pixelsize()
+#    ImageHeader.direction()
+#    Image_BDP.setheader()
+#    Image_BDP.getheader()
+
+import admit
+import sys, os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from admit.util.ImageHeader import ImageHeader
+from admit.bdp.SpwCube_BDP import SpwCube_BDP
+import admit.util.bdp_types as bt
+
+class TestImageHeader(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility ImageHeader Unit Test"
+        # what casautil.imheader() returns for a 64x64x100 ALMA-like cube
+        self.header = {
+            'shape'     : [64, 64, 100, 1],
+            'axisnames' : ['Right Ascension', 'Declination', 'Frequency', 'Stokes'],
+            'axisunits' : ['rad', 'rad', 'Hz', ''],
+            'crpix'     : [32.0, 32.0, 0.0, 0.0],
+            'crval'     : [4.0, -0.5, 115.0e9, 1.0],
+            'cdelt'     : [-2.0 / 206264.806, 2.0 / 206264.806, 0.5e6, 1.0],
+            'bunit'     : 'Jy/beam',
+            'object'    : 'TEST',
+            'telescope' : 'ALMA',
+            'restfreq'  : 115.2712018e9,
+            'beam'      : [6.0, 4.0, 30.0],
+            'corners'   : [[4.0003, -0.5003], [4.0003, -0.4997], [3.9997, -0.5003], [3.9997, -0.4997]],
+        }
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    def test_header(self):
+        h = ImageHeader(self.header)
+        self.assertEqual(h.shape(), [64, 64, 100, 1])
+        self.assertEqual(h.dim(), 3)
+        self.assertEqual(h.axis('frequency'), 2)
+        self.assertEqual(h.axis('Right'), 0)
+        self.assertEqual(h.axis('Velocity'), -1)
+        freqs = h.freqs()
+        self.assertEqual(len(freqs), 100)
+        self.assertAlmostEqual(freqs[0], 115.0)
+        self.assertAlmostEqual(freqs[99], 115.0495)
+        self.assertTrue(np.allclose(h.world('Frequency', [1, 2]), [115.0005e9, 115.001e9]))
+        self.assertAlmostEqual(h.restfreq(), 115.2712018)
+        self.assertEqual(h.beam(), (6.0, 4.0, 30.0))
+        self.assertAlmostEqual(h.pixelsize(), 2.0)
+        self.assertEqual(h.unit(), 'Jy/beam')
+        self.assertEqual(h['object'], 'TEST')
+        self.assertTrue('corners' in h)
+        self.assertRaises(ValueError, h.world, 4)
+        # no beam, no frequency axis
+        self.header['beam'] = []
+        self.header['axisnames'][2] = 'Velocity'
+        self.assertEqual(h.beam(), None)
+        self.assertEqual(h.freqs(), None)
+
+    # a channel slice, and a non-linear spectral axis
+    def test_slice(self):
+        h = ImageHeader(self.header)
+        s = ImageHeader(h.slice('Frequency', 10, 19))
+        self.assertEqual(s.shape(), [64, 64, 10, 1])
+        self.assertTrue(np.allclose(s.freqs(), h.freqs()[10:20]))
+        self.assertEqual(h.shape()[2], 100)
+        self.header['freqs'] = list(115.0e9 + 1e4 * np.arange(100)**2)
+        s = ImageHeader(h.slice(2, 10, 19))
+        self.assertTrue(np.allclose(h.freqs(), np.array(self.header['freqs']) / 1e9))
+        self.assertTrue(np.allclose(s.freqs(), h.freqs()[10:20]))
+
+    # RA and Dec of pixels, SIN and TAN projection
+    def test_direction(self):
+        h = ImageHeader(self.header)
+        ra, dec = h.direction([32.0, 42.0, 32.0], [32.0, 32.0, 42.0])
+        d = self.header['cdelt'][1]
+        self.assertAlmostEqual(ra[0], 4.0, 12)
+        self.assertAlmostEqual(dec[0], -0.5, 12)
+        # east is to the left
+        self.assertTrue(abs(ra[1] - (4.0 - 10 * d / np.cos(0.5))) < 1e-9)
+        self.assertTrue(abs(dec[2] - (-0.5 + 10 * d)) < 1e-9)
+        # far from the center
+        self.header.update({'crval' : [1.0, 0.0, 115.0e9, 1.0],
+                            'cdelt' : [-0.01, 0.01, 0.5e6, 1.0]})
+        ra, dec = ImageHeader(self.header).direction(32.0, 82.0)
+        self.assertAlmostEqual(ra, 1.0)
+        self.assertAlmostEqual(dec, np.arcsin(0.5))
+        self.header['projection'] = 'TAN'
+        ra, dec = ImageHeader(self.header).direction(32.0, 82.0)
+        self.assertAlmostEqual(dec, np.arctan(0.5))
+        self.header['projection'] = 'CAR'
+        self.assertRaises(ValueError, ImageHeader(self.header).direction, 0, 0)
+
+    # the header survives writing and reading the BDP
+    def test_bdp(self):
+        bdp = SpwCube_BDP(os.path.join(self.tmpdir, "test.im"))
+        bdp.setkey("image", admit.Image(images={bt.CASA : "test.im"}))
+        self.assertEqual(bdp.getheader(), None)
+        bdp.setheader(self.header)
+        bdp.write(os.path.join(self.tmpdir, "test"))
+        new = admit.util.utils.getBDP(os.path.join(self.tmpdir, "test.bdp"))
+        h = new.getheader()
+        self.assertEqual(h.header, self.header)
+        self.assertTrue(np.allclose(h.freqs(), ImageHeader(self.header).freqs()))
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_ImageHeader.py"
+# or "./unittest_ImageHeader.py"
+if __name__ == '__main__':
+    unittest.main()
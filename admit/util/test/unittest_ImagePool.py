@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+#
+# Testing util/ImagePool.py
+#
+# Functions covered by test cases:
+#    get()/release()/open()
+#    invalidate()/changed()
+#    clear()
+#    Metrics.count() (the "imget" and "imopen" counts)
+
+import admit
+import sys, os
+import shutil
+import tempfile
+import unittest
+
+from admit.util.ImagePool import ImagePool
+
+class FakeTool(object):
+    """ Stands in for taskinit.iatool(), keeps track of open tools.
+    """
+    opened = []
+
+    def open(self, path):
+        self.path = path
+        FakeTool.opened.append(path)
+
+    def close(self):
+        FakeTool.opened.remove(self.path)
+
+    def done(self):
+        pass
+
+class TestImagePool(unittest.TestCase):
+
+    # initialization: a few "images", directories with a table.dat
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility ImagePool Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='imagepool_', dir='/tmp') + os.sep
+        self.images = []
+        for i in range(4):
+            name = self.dir + 'image%d.im' % i
+            os.mkdir(name)
+            open(name + '/table.dat', 'w').write('x')
+            self.images.append(name)
+        FakeTool.opened = []
+        self.pool = ImagePool(maxopen=2, factory=FakeTool)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # an image is opened once, the least recently used one is closed
+    def test_reuse(self):
+        a = self.images[0]
+        with self.pool.open(a) as ia:
+            self.assertEqual(ia.path, a)
+        with self.pool.open(a) as ib:
+            self.assertTrue(ib is ia)
+        self.assertEqual((self.pool.gets, self.pool.opens), (2, 1))
+        self.pool.release(self.pool.get(self.images[1]))
+        self.pool.get(a)
+        self.pool.release(self.pool.get(self.images[2]))
+        # image1 was least recently used
+        self.assertEqual(sorted(FakeTool.opened), [a, self.images[2]])
+        # tools in use are not closed, even when there are too many
+        ic = self.pool.get(self.images[2])
+        i3 = self.pool.get(self.images[3])
+        self.assertEqual(len(self.pool), 3)
+        self.pool.release(ia)
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(sorted(FakeTool.opened), [self.images[2], self.images[3]])
+        self.pool.release(ic)
+        self.pool.clear()
+        self.assertEqual(FakeTool.opened, [self.images[3]])
+        self.pool.release(i3)
+
+    # writing an image closes its tool
+    def test_invalidate(self):
+        a = self.images[0]
+        ia = self.pool.get(a)
+        self.pool.invalidate(a)
+        # still in use, closed when released; the next get() opens again
+        self.assertEqual(FakeTool.opened, [a])
+        ib = self.pool.get(a)
+        self.assertFalse(ib is ia)
+        self.pool.release(ia)
+        self.assertEqual(FakeTool.opened, [a])
+        self.pool.release(ib)
+        # a directory covers the images below it
+        self.pool.release(self.pool.get(self.images[1]))
+        self.pool.invalidate(self.dir)
+        self.assertEqual(FakeTool.opened, [])
+        # an image rewritten on disk is opened again
+        with self.pool.open(a) as ia:
+            pass
+        open(a + '/table.dat', 'w').write('xyz')
+        with self.pool.open(a) as ib:
+            self.assertFalse(ib is ia)
+        self.assertEqual(self.pool.opens, 5)
+        # utils.remove() tells the shared pool
+        ImagePool._shared = self.pool
+        try:
+            admit.util.utils.remove(a)
+            self.assertEqual(len(self.pool), 0)
+        finally:
+            ImagePool._shared = None
+
+    # the opens are counted in the task records
+    def test_counts(self):
+        p = admit.Project(self.dir + 'test.admit')
+        p.setlogginglevel(50)
+        at = p[p.addtask(admit.File_AT(file='x', touch=True))]
+        m = admit.Metrics(p.baseDir + admit.Metrics.FILENAME)
+        m.begin(at)
+        for i in range(3):
+            self.pool.release(self.pool.get(self.images[i % 2]))
+        m.end(at)
+        self.assertEqual(m.read()[-1]['counts'], {'imget': 3, 'imopen': 2})
+        s = admit.Metrics.summarize(m.read())
+        self.assertEqual(s.values()[0]['counts']['imopen'], 2)
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_ImagePool.py"
+# or "./unittest_ImagePool.py"
+if __name__ == '__main__':
+    unittest.main()
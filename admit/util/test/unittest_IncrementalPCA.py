@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+#
+# Testing util/IncrementalPCA.py against matplotlib's mlab.PCA
+#
+# Functions covered by test cases:
+#    IncrementalPCA.add()
+#    IncrementalPCA.solve()
+#    IncrementalPCA.project()
+#    IncrementalPCA.reconstruct()
+
+import admit
+import sys, os
+import unittest
+import numpy as np
+import matplotlib.mlab as mlab
+
+from admit.util.IncrementalPCA import IncrementalPCA
+
+class TestIncrementalPCA(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility IncrementalPCA Unit Test"
+        # four correlated "images" of 1000 pixels, with an offset
+        np.random.seed(42)
+        base = np.random.normal(size=(1000, 2))
+        mix = np.array([[1.0, 0.5, 2.0, 0.1], [0.2, 1.0, -1.0, 0.3]])
+        self.data = 100.0 + np.dot(base, mix) + 0.1 * np.random.normal(size=(1000, 4))
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # same decomposition as mlab.PCA, from tiles of varying size
+    def test_pca(self):
+        ref = mlab.PCA(self.data)
+        pca = IncrementalPCA(4)
+        for i0, i1 in [(0, 1), (1, 300), (300, 300), (300, 1000)]:
+            pca.add(self.data[i0:i1])
+        pca.solve()
+        self.assertEqual(pca.n, 1000)
+        self.assertTrue(np.allclose(pca.mu, ref.mu))
+        self.assertTrue(np.allclose(pca.sigma, ref.sigma))
+        self.assertTrue(np.allclose(pca.fracs, ref.fracs))
+        self.assertTrue(np.allclose(pca.covar, np.cov(ref.a, rowvar=0, bias=1)))
+        # eigenvectors agree up to their sign
+        sign = np.sign((pca.Wt * ref.Wt).sum(axis=1))
+        self.assertTrue(np.allclose(pca.Wt, sign[:, np.newaxis] * ref.Wt))
+        for w in pca.Wt:
+            self.assertTrue(w[np.argmax(abs(w))] > 0)
+
+        y = pca.project(self.data[:10])
+        self.assertTrue(np.allclose(y, sign * ref.Y[:10]))
+        self.assertTrue(np.allclose(pca.reconstruct(y), self.data[:10]))
+
+    # the tables do not depend on the tiling, also for a pair of images,
+    # whose eigenvectors have components of equal size
+    def test_tiles(self):
+        s = np.sqrt(0.5)
+        for data, wt in [(self.data, None), (self.data[:, :2], [[s, s], [s, -s]])]:
+            nvar = data.shape[1]
+            ref = IncrementalPCA(nvar)
+            ref.add(data)
+            ref.solve()
+            if wt is not None:
+                self.assertTrue(np.allclose(ref.Wt, wt))
+            for i in range(1, 1000, 37):
+                a = IncrementalPCA(nvar)
+                a.add(data[:i])
+                a.add(data[i:])
+                a.solve()
+                self.assertTrue(np.allclose(a.comoment, ref.comoment))
+                self.assertTrue(np.allclose(a.Wt, ref.Wt))
+        self.assertRaises(ValueError, ref.add, self.data[:, :3])
+        c = IncrementalPCA(4)
+        c.add(self.data[:3])
+        self.assertRaises(RuntimeError, c.solve)
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_IncrementalPCA.py"
+# or "./unittest_IncrementalPCA.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+#
+# Testing util/IntervalIndex.py
+#
+# Functions covered by test cases:
+#    IntervalIndex.find()
+#    IntervalIndex.contains()
+#    IntervalIndex.first()
+
+import admit
+import sys, os
+import unittest
+import numpy as np
+
+from admit.util.IntervalIndex import IntervalIndex
+
+class TestIntervalIndex(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility IntervalIndex Unit Test"
+        # random, partly overlapping, intervals, and a few shared end points
+        np.random.seed(11)
+        lo = np.random.randint(0, 1000, 200)
+        self.intervals = [[int(l), int(l + w)] for l, w in zip(lo, np.random.randint(-2, 30, 200))]
+        self.intervals += [[100, 100], [100, 120], [90, 100]]
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # lookups agree with a scan of the list
+    def test_find(self):
+        idx = IntervalIndex(self.intervals)
+        self.assertEqual(len(idx), len(self.intervals))
+        for x in range(-5, 1040) + [99.5, 100.0]:
+            closed = [i for i, s in enumerate(self.intervals) if s[0] <= x <= s[1]]
+            opened = [i for i, s in enumerate(self.intervals) if s[0] < x < s[1]]
+            self.assertEqual(idx.find(x), closed)
+            self.assertEqual(idx.find(x, closed=False), opened)
+            self.assertEqual(idx.contains(x), len(closed) > 0)
+            self.assertEqual(idx.contains(x, closed=False), len(opened) > 0)
+        self.assertEqual(IntervalIndex([]).find(1.0), [])
+        self.assertFalse(IntervalIndex().contains(1.0))
+
+    # first() reproduces a loop that clips a segment against the intervals
+    def test_first(self):
+        idx = IntervalIndex(self.intervals)
+        for c0, c1 in [[95, 130], [500, 520], [0, 1000], [-10, -5]]:
+            # the plain loop
+            s0, s1 = c0, c1
+            visited = []
+            for i, s in enumerate(self.intervals):
+                if s[0] <= s0 <= s[1] or s[0] <= s1 <= s[1]:
+                    visited.append(i)
+                    if s[0] <= s0 <= s[1]:
+                        s0 = s[1] + 1
+                    if s[0] <= s1 <= s[1]:
+                        s1 = s[0] - 1
+            # with the index
+            t0, t1 = c0, c1
+            found = []
+            i = idx.first([t0, t1])
+            while i >= 0:
+                found.append(i)
+                s = self.intervals[i]
+                if s[0] <= t0 <= s[1]:
+                    t0 = s[1] + 1
+                if s[0] <= t1 <= s[1]:
+                    t1 = s[0] - 1
+                i = idx.first([t0, t1], i + 1)
+            self.assertEqual(found, visited)
+            self.assertEqual([t0, t1], [s0, s1])
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_IntervalIndex.py"
+# or "./unittest_IntervalIndex.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#! /usr/bin/env python
+#
+# Testing util/Metrics.py
+#
+# Functions covered by test cases:
+#    begin()/end()/tag() (via AT.execute() and utils.Dtime)
+#    read()
+#    summarize()
+#    compare()
+#    scaling()
+
+import admit
+import admit.util.utils as utils
+import sys, os
+import unittest
+import shutil
+import tempfile
+
+class TestMetrics(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility Metrics Unit Test"
+        self.dir = tempfile.mkdtemp(prefix='metrics_', dir='/tmp') + os.sep
+        self.filename = self.dir + admit.Metrics.FILENAME
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # AT.execute() writes a task record, Dtime tags during the run tag records
+    def test_execute(self):
+        p = admit.Project(self.dir + 'test.admit')
+        p.setlogginglevel(50)
+        at = p[p.addtask(admit.File_AT(file='x', touch=True))]
+        p.run()
+        # outside a task, tags are not recorded
+        utils.Dtime("Test", report=False).tag("outside")
+        m = admit.Metrics(p.baseDir + admit.Metrics.FILENAME)
+        r = m.read()
+        self.assertEqual(len(r), 1)
+        r = r[0]
+        self.assertEqual(r['type'], 'File_AT')
+        self.assertEqual(r['run'], p.count)
+        self.assertEqual(r['status'], 'ok')
+        self.assertTrue(r['wall'] >= 0.0 and r['cpu'] >= 0.0)
+        self.assertEqual(admit.Metrics.current, None)
+
+        m.begin(at)
+        dt = utils.Dtime("Test", report=False)
+        dt.tag("one")
+        dt.tag("two")
+        m.end(at, "failed")
+        tags = m.read(kind="tag")
+        self.assertEqual([t['tag'] for t in tags], ['one', 'two'])
+        self.assertEqual(tags[0]['label'], 'Test')
+        self.assertEqual(m.read()[-1]['status'], 'failed')
+        self.assertEqual(len(m.read(kind=None)), 4)
+
+    # read() of runs, summarize() and compare()
+    def test_compare(self):
+        m = admit.Metrics(self.filename)
+        for run, wall in [(1, 1.0), (1, 2.0), (2, 1.5), (3, 4.0)]:
+            m.write({'kind': 'task', 'run': run, 'type': 'A_AT', 'shape': [2, 2, 8],
+                     'wall': wall, 'cpu': wall, 'maxrss': 10.0 * run})
+        m.write({'kind': 'task', 'run': 3, 'type': 'B_AT', 'shape': None,
+                 'wall': 1.0, 'cpu': 1.0, 'maxrss': None})
+        open(self.filename, 'a').write("garbage\n")
+        self.assertEqual(len(m.read()), 5)
+        self.assertEqual(len(m.read(run=1)), 2)
+        self.assertEqual(len(m.read(run=-1)), 2)
+        self.assertEqual(m.read(run=-2)[0]['run'], 2)
+        self.assertEqual(m.read(run=-4), [])
+
+        s = admit.Metrics.summarize(m.read(run=1))
+        self.assertEqual(s.keys(), ['A_AT [2, 2, 8]'])
+        self.assertEqual(s['A_AT [2, 2, 8]']['n'], 2)
+        self.assertEqual(s['A_AT [2, 2, 8]']['wall'], 3.0)
+
+        rows = admit.Metrics.compare(m.read(run=2), m.read(run=3))
+        self.assertEqual(rows[0], ('A_AT [2, 2, 8]', 1.5, 4.0, 4.0 / 1.5))
+        self.assertEqual(rows[1], ('B_AT None', None, 1.0, None))
+        rows = admit.Metrics.compare(m.read(run=1), m.read(run=2),
+                                     keys=('type',), value='maxrss')
+        self.assertEqual(rows, [('A_AT', 10.0, 20.0, 2.0)])
+
+    # scaling() recovers the exponents of a power law, per group
+    def test_scaling(self):
+        records = []
+        for npix in [100, 400, 1600]:
+            for nchan in [10, 100]:
+                # two records at each point, which are summed
+                for i in range(2):
+                    records.append({'type': 'A_AT', 'npix': npix, 'nchan': nchan,
+                                    'wall': 0.5e-3 * npix * nchan**0.5, 'maxrss': 0.1 * npix})
+                records.append({'type': 'B_AT', 'npix': npix, 'nchan': nchan, 'wall': 2.0})
+        records.append({'type': 'B_AT', 'npix': 0, 'nchan': 10, 'wall': 1e6})
+        records.append({'type': 'C_AT', 'npix': 100, 'nchan': 10, 'wall': 1.0})
+        records.append({'type': 'C_AT', 'npix': 100, 'nchan': 20, 'wall': None})
+        s = admit.Metrics.scaling(records)
+        self.assertEqual(sorted(s.keys()), ['A_AT', 'B_AT', 'C_AT'])
+        self.assertEqual(s['A_AT']['n'], 6)
+        self.assertAlmostEqual(s['A_AT']['npix'], 1.0)
+        self.assertAlmostEqual(s['A_AT']['nchan'], 0.5)
+        self.assertAlmostEqual(s['B_AT']['npix'], 0.0)
+        self.assertEqual(s['B_AT']['n'], 6)
+        self.assertEqual(s['C_AT'], {'n': 1, 'npix': None, 'nchan': None})
+        s = admit.Metrics.scaling(records, factors=('npix',), value='maxrss')
+        self.assertAlmostEqual(s['A_AT']['npix'], 1.0)
+        self.assertEqual(s['B_AT']['n'], 0)
+
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_Metrics.py"
+# or "./unittest_Metrics.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+#
+# Testing util/QuantileSketch.py
+#
+# Functions covered by test cases:
+#    QuantileSketch.add()
+#    QuantileSketch.merge()
+#    QuantileSketch.quantile()
+#    QuantileSketch.median()
+#    QuantileSketch.mad()
+#    QuantileSketch.adddeviations()
+#    QuantileSketch.sigma()
+
+import admit
+import sys, os
+import unittest
+import numpy as np
+import numpy.ma as ma
+
+from admit.util.QuantileSketch import QuantileSketch
+
+class TestQuantileSketch(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility QuantileSketch Unit Test"
+        # a "cube" of noise with an offset and some bright emission
+        np.random.seed(11)
+        self.cube = 0.01 + np.random.normal(0.0, 2.0, size=(20, 64, 64))
+        self.cube[5:8, 20:30, 20:30] += 100.0
+        self.cube[0] = 0.0
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # plane by plane, compared to numpy on the whole cube
+    def test_planes(self):
+        qs = QuantileSketch()
+        for plane in self.cube:
+            qs.add(plane)
+        data = self.cube.ravel()
+        self.assertEqual(len(qs), data.size)
+        self.assertEqual(qs.min, data.min())
+        self.assertEqual(qs.max, data.max())
+        for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+            exact = np.percentile(data, 100 * q, interpolation='lower')
+            self.assertTrue(abs(qs.quantile(q) - exact) <= 2 * qs.alpha * abs(exact) + 1e-12)
+        median = np.median(data)
+        mad = np.median(np.abs(data - median))
+        self.assertTrue(abs(qs.median() - median) <= 2 * qs.alpha * abs(median) + 1e-4)
+        self.assertTrue(abs(qs.mad() - mad) <= 2 * qs.alpha * (abs(median) + mad))
+        self.assertAlmostEqual(qs.sigma() / 1.4826, qs.mad())
+        self.assertEqual(len(qs.quantile([0.1, 0.9])), 2)
+
+    # noise on a large offset: the MAD from a second pass
+    def test_offset(self):
+        for offset in [0.0, 100.0, 1000.0, -1e5]:
+            cube = offset + np.random.normal(0.0, 1.0, size=(10, 50, 50))
+            cube[3, 10:20, 10:20] = np.nan
+            data = cube[np.isfinite(cube)]
+            median = np.median(data)
+            mad = np.median(np.abs(data - median))
+            qs = QuantileSketch()
+            for plane in cube:
+                qs.add(plane)
+            # one pass: the bins may be too wide for the MAD
+            self.assertTrue(abs(qs.mad() - mad) <= 2 * qs.alpha * abs(offset) + 0.01)
+            for plane in cube:
+                qs.adddeviations(plane)
+            self.assertTrue(abs(qs.median() - median) < 0.01)
+            self.assertTrue(abs(qs.mad() - mad) < 0.01)
+            self.assertTrue(abs(qs.sigma() - 1.0) < 0.05)
+            exact = np.percentile(data, 90.0, interpolation='lower')
+            self.assertTrue(abs(qs.quantile(0.9) - exact) < 0.01)
+            # merged passes
+            parts = [QuantileSketch(), QuantileSketch()]
+            for i, plane in enumerate(cube):
+                parts[i % 2].add(plane)
+            merged = QuantileSketch()
+            merged.merge(parts[0])
+            merged.merge(parts[1])
+            for plane in cube:
+                merged.adddeviations(plane)
+            self.assertEqual(merged.mad(), qs.mad())
+
+    # masked planes with an offset, compared to stats.robust()
+    def test_masked(self):
+        cube = ma.masked_array(1000.0 + np.random.normal(0.0, 1.0, size=(20, 50, 50)))
+        cube[np.random.uniform(size=cube.shape) < 0.1] = ma.masked
+        qs = QuantileSketch()
+        for plane in cube:
+            qs.add(plane)
+        for plane in cube:
+            qs.adddeviations(plane)
+        self.assertEqual(qs.n, cube.count())
+        self.assertEqual(qs._dev.n, qs.n)
+        std = admit.util.stats.robust(cube.compressed()).std()
+        if(self.verbose):
+            print "\nsigma:", qs.sigma(), "robust:", std
+        # the std of the clipped data is about 3% low for Gaussian noise
+        self.assertTrue(abs(qs.sigma() / std - 1.03) < 0.02)
+
+    # merging the sketches of blocks, masked and non-finite data
+    def test_merge(self):
+        whole = QuantileSketch()
+        whole.add(self.cube)
+        parts = [QuantileSketch() for i in range(3)]
+        for i, plane in enumerate(self.cube):
+            parts[i % 3].add(plane)
+        merged = QuantileSketch()
+        for p in parts:
+            merged.merge(p)
+        self.assertEqual(merged.n, whole.n)
+        for q in [0.1, 0.5, 0.9]:
+            self.assertEqual(merged.quantile(q), whole.quantile(q))
+        self.assertEqual(merged.mad(), whole.mad())
+        self.assertRaises(ValueError, merged.merge, QuantileSketch(alpha=0.01))
+
+        qs = QuantileSketch()
+        qs.add(ma.masked_greater(np.array([1.0, 2.0, 3.0, 1000.0, np.nan]), 100.0))
+        self.assertEqual(qs.n, 3)
+        self.assertTrue(abs(qs.median() - 2.0) < 0.01)
+        self.assertTrue(np.isnan(QuantileSketch().median()))
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_QuantileSketch.py"
+# or "./unittest_QuantileSketch.py"
+if __name__ == '__main__':
+    unittest.main()
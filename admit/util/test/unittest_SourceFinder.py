@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+#
+# Testing util/SourceFinder.py
+#
+# Functions covered by test cases:
+#    SourceFinder.find()
+#    SourceFinder.findtile()
+#    SourceFinder.tiles()
+#    SourceFinder.radec()
+
+import admit
+import sys, os
+import math
+import unittest
+import numpy as np
+
+from admit.util.SourceFinder import SourceFinder
+
+class TestSourceFinder(unittest.TestCase):
+
+    # initialization: a noisy map with three Gaussians, the last two blended
+    # (x, y, peak, major, minor, pa)
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility SourceFinder Unit Test"
+        self.sources = [(100.0, 50.0, 1.0, 8.0, 4.0, 30.0),
+                        (200.0, 150.0, 0.5, 5.0, 5.0, 0.0),
+                        (112.0, 55.0, 0.3, 5.0, 5.0, 0.0)]
+        x, y = np.indices((300, 200), dtype=np.float64)
+        s = 1.0 / math.sqrt(8.0 * math.log(2.0))
+        self.data = np.random.RandomState(1).normal(0.0, 0.01, x.shape)
+        for (x0, y0, peak, major, minor, pa) in self.sources:
+            t = math.radians(pa)
+            u = -(x - x0) * math.sin(t) + (y - y0) * math.cos(t)
+            v = (x - x0) * math.cos(t) + (y - y0) * math.sin(t)
+            self.data += peak * np.exp(-0.5 * ((u / (major * s))**2 + (v / (minor * s))**2))
+        self.tile = SourceFinder.TILE
+
+    def tearDown(self):
+        SourceFinder.TILE = self.tile
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # positions, peaks, sizes and fluxes of the Gaussians
+    def test_find(self):
+        found = SourceFinder(self.data, width=5.0).find(0.06)
+        self.assertEqual(len(found['x']), 3)
+        # ordered by peak
+        self.assertTrue(np.all(np.diff(found['peak']) < 0))
+        for i, (x0, y0, peak, major, minor, pa) in enumerate(self.sources):
+            self.assertTrue(abs(found['x'][i] - x0) < 0.3)
+            self.assertTrue(abs(found['y'][i] - y0) < 0.3)
+            self.assertTrue(abs(found['peak'][i] - peak) < 0.03)
+        self.assertTrue(abs(found['major'][0] - 8.0) < 0.3)
+        self.assertTrue(abs(found['minor'][0] - 4.0) < 0.3)
+        self.assertTrue(abs(found['pa'][0] - 30.0) < 2.0)
+        # the sum of the Gaussian, 2 pi sigma_x sigma_y peak
+        flux = 2 * math.pi * 8.0 * 4.0 / (8.0 * math.log(2.0))
+        self.assertTrue(abs(found['flux'][0] / flux - 1.0) < 0.05)
+        self.assertTrue(abs(found['major'][1] - 5.0) < 0.3)
+        self.assertEqual(list(SourceFinder(self.data, width=5.0).find(0.06, nmax=2)['peak']),
+                         list(found['peak'][:2]))
+        # masked pixels are not searched
+        data = np.ma.masked_where(np.zeros(self.data.shape, dtype=bool), self.data)
+        data[190:210, 140:160] = np.ma.masked
+        self.assertEqual(len(SourceFinder(data, width=5.0).find(0.06)['x']), 2)
+        self.assertEqual(len(SourceFinder(self.data).find(10.0)['x']), 0)
+
+    # a saturated (clipped) source and a flat plateau are one source each
+    def test_plateau(self):
+        data = np.minimum(self.data, 0.5)
+        found = SourceFinder(data, width=5.0).find(0.06)
+        self.assertEqual(len(found['x']), 3)
+        self.assertTrue(abs(found['x'][0] - 100.0) < 0.5)
+        self.assertTrue(abs(found['y'][0] - 50.0) < 0.5)
+        self.assertEqual(found['peak'][0], 0.5)
+        data = np.zeros((30, 30))
+        data[10:13, 10:13] = 1.0
+        found = SourceFinder(data).find(0.5)
+        self.assertEqual(len(found['x']), 1)
+        self.assertEqual((found['x'][0], found['y'][0], found['npix'][0]), (11.0, 11.0, 9))
+
+    # the same sources in tiles, and with several processes
+    def test_tiles(self):
+        found = SourceFinder(self.data, width=5.0).find(0.06)
+        SourceFinder.TILE = 64
+        finder = SourceFinder(self.data, width=5.0, nproc=2)
+        self.assertEqual(len(finder.tiles()), 20)
+        tiled = finder.find(0.06)
+        for c in SourceFinder.COLUMNS:
+            self.assertTrue(np.allclose(tiled[c], found[c]))
+
+    def test_radec(self):
+        self.assertEqual(SourceFinder.radec(math.radians(299.868), math.radians(40.7339)),
+                         ('19:59:28.320', '+40.44.02.040'))
+        self.assertEqual(SourceFinder.radec(-1e-9, math.radians(-0.5)),
+                         ('00:00:00.000', '-00.30.00.000'))
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_SourceFinder.py"
+# or "./unittest_SourceFinder.py"
+if __name__ == '__main__':
+    unittest.main()
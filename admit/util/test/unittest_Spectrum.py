@@ -45,6 +45,39 @@ class TestSpectrum(unittest.TestCase):
                          round(utils.freqtovel(self.spectrum.meanfrequency(),self.fwhm_in),2))
         self.assertEqual(round(self.spectrum.delta(),2),self.delta_in)
 
+    # the accessors return read-only views, not copies
+    def test_views(self):
+        s = self.spectrum
+        for a in [s.spec(), s.spec(csub=False, masked=False), s.freq(), s.chans(False), s.mask()]:
+            self.assertFalse(np.ma.getdata(a).flags.writeable)
+        self.assertRaises(ValueError, s.spec().__setitem__, 0, 1.0)
+        self.assertTrue(np.may_share_memory(s.spec(), s.spec()))
+        # modifying a copy leaves the spectrum alone
+        data = s.spec().copy()
+        data[0] = 10.0
+        self.assertNotEqual(s.spec()[0], 10.0)
+
+    # the continuum subtracted spectrum is cached until the data change
+    def test_cache(self):
+        s = self.spectrum
+        cs = s.spec()
+        self.assertTrue(np.allclose(cs, self.intensity))
+        s.set_contin(np.ones(len(s)))
+        self.assertTrue(np.allclose(s.spec(), self.intensity - 1.0))
+        self.assertTrue(np.allclose(s.spec(csub=False), self.intensity))
+        s.mask_gt(0.5)
+        self.assertEqual(s.spec().mask.sum(), (self.intensity > 0.5).sum())
+        s.invert()
+        self.assertTrue(np.allclose(s.spec(), 1.0 - self.intensity))
+        # the input arrays are not modified
+        self.assertTrue(np.allclose(s.spec(csub=False), -self.intensity))
+        spec = np.array([1.0, np.nan, 3.0, 4.0])
+        s = admit.Spectrum(spec=spec, freq=np.arange(4.0), chans=np.arange(4))
+        s.fix_invalid(0.0)
+        self.assertTrue(np.isnan(spec[1]))
+        self.assertEqual(s.spec().tolist(), [1.0, None, 3.0, 4.0])
+        self.assertEqual(s.spec(masked=False)[1], 0.0)
+
     def see_plot(self):
         import matplotlib.pyplot as plt
         plt.plot(self.freq,self.intensity,c='g')
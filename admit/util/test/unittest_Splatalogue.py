@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+#
+# Testing util/Splatalogue.py against a local stub HTTP server
+#
+# Functions covered by test cases:
+#    Splatalogue.query_lines()
+#    Splatalogue.query_windows()
+#    Splatalogue.parse_response()
+#    parse_columns()
+#    ResponseCache
+#    SpectralLineSearch.searchwindows()
+
+import admit
+import sys, os
+import unittest
+import shutil
+import tempfile
+import threading
+import time
+import urlparse
+import BaseHTTPServer
+import SocketServer
+
+from admit.util import Splatalogue as splat
+
+HEADER = "Species:Chemical Name:Freq-GHz:Meas Freq-GHz:Resolved QNs:" \
+         "S<sub>ij</sub>&#956;<sup>2</sup> (D<sup>2</sup>):E_L (K):E_U (K)"
+LINES = [("CO", "Carbon Monoxide", 115.27120, "1-0", 0.01, 0.0, 5.53),
+         ("CS", "Carbon Monosulfide", 97.98095, "2-1", 7.6, 2.35, 7.05),
+         ("CO", "Carbon Monoxide", 230.53800, "2-1", 0.02, 5.53, 16.6),
+         ("HCN", "Hydrogen Cyanide", 88.63185, "1-0", 26.8, 0.0, 4.25)]
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Splatalogue export stub: the lines between 'from' and 'to' """
+    lock = threading.Lock()
+    requests = 0
+    active = 0
+    maxactive = 0
+    delay = 0.0
+
+    def do_GET(self):
+        cls = StubHandler
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.maxactive = max(cls.maxactive, cls.active)
+        time.sleep(cls.delay)
+        q = urlparse.parse_qs(urlparse.urlparse(self.path).query)
+        f0 = float(q['from'][0])
+        f1 = float(q['to'][0])
+        text = HEADER + "\n"
+        for l in LINES:
+            if f0 <= l[2] <= f1:
+                text += "%s:%s:%.5f::%s:%g:%g:%g\n" % l
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write(text)
+        with cls.lock:
+            cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+class TestSplatalogue(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility Splatalogue Unit Test"
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.dir = tempfile.mkdtemp(prefix='splatcache_', dir='/tmp')
+        self.url = splat.Splatalogue.QUERY_URL
+        self.cache = splat.Splatalogue.cache
+        splat.Splatalogue.QUERY_URL = 'http://127.0.0.1:%d/c_export.php' % self.server.server_address[1]
+        splat.Splatalogue.cache = splat.ResponseCache(self.dir)
+        StubHandler.requests = StubHandler.maxactive = 0
+        StubHandler.delay = 0.0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        splat.Splatalogue.QUERY_URL = self.url
+        splat.Splatalogue.cache = self.cache
+        shutil.rmtree(self.dir)
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # query_lines() and parse_response() go through the cache
+    def test_query(self):
+        sp = splat.Splatalogue()
+        sp.query_lines(100.0, 120.0)
+        result = sp.parse_response()
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['Species'], 'CO')
+        self.assertEqual(result[0]['QNs'], '1-0')
+        self.assertEqual(StubHandler.requests, 1)
+        # repeated (also in a new instance) from the cache
+        sp = splat.Splatalogue()
+        self.assertEqual(sp.query_lines(100.0, 120.0).readlines()[1].split(':')[0], 'CO')
+        self.assertEqual(StubHandler.requests, 1)
+        # a different query is not
+        sp.query_lines(80.0, 120.0)
+        self.assertEqual(len(sp.parse_response()), 3)
+        self.assertEqual(StubHandler.requests, 2)
+
+        header, columns = splat.parse_columns(sp.query_lines(80.0, 120.0).read())
+        self.assertEqual(header[0], 'Species')
+        self.assertEqual(columns['Species'], ('CO', 'CS', 'HCN'))
+        self.assertEqual(splat.parse_columns(''), ([], {}))
+
+    # time to live and size limit of the cache
+    def test_cache(self):
+        cache = splat.ResponseCache(self.dir, ttl=100.0, maxsize=25)
+        k1 = cache.key('url', {'a': 1, 'b': ['x', 'y']})
+        self.assertEqual(k1, cache.key('url', {'b': ['y', 'x'], 'a': 1}))
+        self.assertNotEqual(k1, cache.key('url', {'a': 2, 'b': ['x', 'y']}))
+        k2 = cache.key('url', {'a': 2})
+        self.assertEqual(cache.get(k1), None)
+        cache.put(k1, 'a' * 10)
+        self.assertEqual(cache.get(k1), 'a' * 10)
+        # expired
+        old = time.time() - 200.0
+        os.utime(os.path.join(self.dir, k1 + '.txt'), (old, old))
+        self.assertEqual(cache.get(k1), None)
+        # least recently used entry is removed first
+        cache.put(k1, 'a' * 10)
+        cache.put(k2, 'b' * 10)
+        old = time.time() - 50.0
+        os.utime(os.path.join(self.dir, k1 + '.txt'), (old, old))
+        cache.get(k2)
+        cache.put(cache.key('url', {'a': 3}), 'c' * 10)
+        self.assertEqual(cache.get(k1), None)
+        self.assertEqual(cache.get(k2), 'b' * 10)
+        # a hit is a use, but the time to live counts from the write
+        cache.clear()
+        cache.put(k1, 'a' * 10)
+        path = os.path.join(self.dir, k1 + '.txt')
+        # whole seconds, which survive the float round trip of os.utime()
+        old = int(time.time()) - 80.0
+        os.utime(path, (old, old))
+        self.assertEqual(cache.get(k1), 'a' * 10)
+        self.assertEqual(os.path.getmtime(path), old)
+        self.assertTrue(os.path.getatime(path) > old)
+        # used recently, but older than the time to live
+        os.utime(path, (time.time(), old - 40.0))
+        self.assertEqual(cache.get(k1), None)
+        # an old entry in use is kept over a newer unused one
+        cache.put(k1, 'a' * 10)
+        os.utime(path, (old, old))
+        cache.get(k1)
+        cache.put(k2, 'b' * 10)
+        os.utime(os.path.join(self.dir, k2 + '.txt'), (old + 10.0, old + 10.0))
+        cache.put(cache.key('url', {'a': 3}), 'c' * 10)
+        self.assertEqual(cache.get(k2), None)
+        self.assertEqual(cache.get(k1), 'a' * 10)
+        cache.clear()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    # query_windows() submits the windows concurrently, in order
+    def test_windows(self):
+        StubHandler.delay = 0.2
+        sp = splat.Splatalogue()
+        windows = [[115.0, 116.0], [97.0, 98.0], [230.0, 231.0], [88.0, 89.0], [115.0, 116.0]]
+        results = sp.query_windows(windows, threads=4)
+        species = [r.readlines()[1].split(':')[0] for r in results]
+        self.assertEqual(species, ['CO', 'CS', 'CO', 'HCN', 'CO'])
+        self.assertEqual(StubHandler.requests, 4)
+        self.assertTrue(StubHandler.maxactive > 1)
+        # all cached now
+        sp.query_windows(windows)
+        self.assertEqual(StubHandler.requests, 4)
+
+        sls = admit.SpectralLineSearch(True)
+        lines = sls.searchwindows([[97.0, 98.0], [88.0, 89.0], [80.0, 85.0]], "OFF")
+        self.assertEqual([l.getkey("formula") for l in lines], ['CS', 'HCN'])
+        self.assertEqual(lines[0].getkey("frequency"), 97.98095)
+        self.assertEqual(StubHandler.requests, 5)
+        self.assertEqual(sls.searchwindows([], "OFF"), [])
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_Splatalogue.py"
+# or "./unittest_Splatalogue.py"
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+#
+# Testing util/peakfinder PeakFinder and PeakDetect
+#
+# Functions covered by test cases:
+#    PeakFinder.find()
+#    PeakDetect.find()
+#    findpeaks() (PeakFinder.findall(), PeakDetect.findall())
+
+import admit
+import unittest
+import numpy as np
+from admit.util.peakfinder import PeakFinder, PeakDetect, findpeaks
+
+class TestPeakFinder(unittest.TestCase):
+
+    # initialization
+    def setUp(self):
+        self.verbose = False
+        self.testName = "Utility PeakFinder Unit Test"
+        x = np.arange(100.0)
+        # two lines at channels 30 and 70, plus some ripple
+        self.spec = 5.0 * np.exp(-0.5 * ((x - 30.0) / 3.0)**2) + \
+                    3.0 * np.exp(-0.5 * ((x - 70.0) / 4.0)**2) + 0.5 * np.sin(x)
+
+    def tearDown(self):
+        pass
+
+    def test_AAAwhoami(self):
+        print "\n==== %s ====" % self.testName
+
+    # test PeakFinder.find()
+    def test_PeakFinder(self):
+        pks = PeakFinder(self.spec, thresh=1.0, min_width=4).find()
+        if(self.verbose):
+            print "\nPeakFinder:", pks
+        self.assertEqual(pks.tolist(), [31.0, 70.0])
+        # absorption lines are found as well
+        pks = PeakFinder(-self.spec, thresh=1.0, min_width=4).find()
+        self.assertEqual(pks.tolist(), [31.0, 70.0])
+        # spectra shorter than min_width, e.g. a short segment in LineID
+        spec = np.array([1.0, 3.0, 2.0, 4.0, 1.0])
+        self.assertEqual(PeakFinder(spec, thresh=1.0, min_width=5).find().tolist(), [3.0])
+        self.assertEqual(PeakFinder(spec, thresh=1.0, min_width=7).find().tolist(), [])
+        self.assertEqual(PeakFinder(spec[:4], thresh=1.0, min_width=4).find().tolist(), [])
+
+    # test PeakDetect.find()
+    def test_PeakDetect(self):
+        pks = PeakDetect(self.spec, thresh=1.0, min_sep=5).find()
+        self.assertEqual(pks.tolist(), [31.0, 70.0, 76.0])
+        # peaks, then valleys
+        pks = PeakDetect(np.array([0, 1, 0, 2, 0, 3, 0, 2, 0, 1, 0.0]), min_sep=2).find()
+        self.assertEqual(pks.tolist(), [1.0, 5.0, 9.0, 4.0, 8.0])
+        pks = PeakDetect(np.array([0, 1, 1, 0, 1, 1, 0.0]), edge='both').find()
+        self.assertEqual(pks.tolist(), [5.0, 3.0])
+
+    # test findpeaks(): same results as one search per spectrum
+    def test_findpeaks(self):
+        np.random.seed(10)
+        specs = [self.spec, self.spec[20:45], -self.spec, np.random.normal(0.0, 1.0, 60), self.spec[:2]]
+        specs[3][10:15] = np.nan
+        # many peaks of equal height, closer than min_sep
+        specs.insert(3, np.tile([0.0, 2.0, 0.0, 2.0, 0.0, 0.0, 2.0, 0.0], 12))
+        x = [np.arange(len(s)) * 0.5 for s in specs]
+        for method, args in [("PeakFinder", {"thresh": 1.0, "min_width": 4}),
+                             ("PeakDetect", {"thresh": 1.0, "min_sep": 5}),
+                             ("PeakDetect", {"thresh": 0.5, "min_sep": 1, "edge": "both"})]:
+            allpks = findpeaks(method, specs[:-1] if method == "PeakFinder" else specs, x, **args)
+            for i, pks in enumerate(allpks):
+                one = admit.util.utils.getClass("util.peakfinder", method,
+                                                dict(args, spec=specs[i], x=x[i])).find()
+                self.assertEqual(pks.tolist(), one.tolist())
+
+#----------------------------------------------------------------------
+# To run on commandline, using either "python unittest_peakfinder.py"
+# or "./unittest_peakfinder.py"
+if __name__ == '__main__':
+    unittest.main()
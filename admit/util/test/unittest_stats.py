@@ -6,6 +6,8 @@
 #    rejecto1()
 #    rejecto2()
 #    robust()
+#    quartiles()
+#    mystats()
 #    reducedchisquared()
 
 import admit
@@ -94,6 +96,35 @@ class TestStats(unittest.TestCase):
 
         self.assertEqual(l, 6)
 
+    # test stats.quartiles() and the axis= versions against the 1D ones
+    def test_axis(self):
+        np.random.seed(5)
+        data = np.random.standard_cauchy((6, 41))
+        q = admit.stats.quartiles(data[2])
+        s = np.sort(data[2])
+        self.assertEqual(q, (s[10], s[20], s[30]))
+        # masked data, with a different number of valid values per row
+        mdata = np.ma.masked_greater(data, 2.0)
+        q1, q2, q3 = admit.stats.quartiles(mdata, axis=1)
+        for i in range(6):
+            self.assertEqual((q1[i], q2[i], q3[i]), admit.stats.quartiles(mdata[i]))
+        for d in [data, mdata]:
+            r = admit.stats.robust(d.T, 1.5, axis=0)
+            for i in range(6):
+                self.assertTrue((np.ma.getmaskarray(r[:, i]) ==
+                                 np.ma.getmaskarray(admit.stats.robust(d[i], 1.5))).all())
+        r1 = admit.stats.rejecto1(data, axis=1)
+        r2 = admit.stats.rejecto2(data, axis=1)
+        n1, m1, s1, n2, m2, s2 = admit.stats.mystats(data, axis=1)
+        for i in range(6):
+            self.assertEqual(r1[i].compressed().tolist(), admit.stats.rejecto1(data[i]))
+            self.assertTrue((r2[i].compressed() == admit.stats.rejecto2(data[i])).all())
+            s = admit.stats.mystats(data[i])
+            self.assertEqual((n1, n2[i]), (s[0], s[3]))
+            self.assertAlmostEqual(m1[i], s[1])
+            self.assertAlmostEqual(m2[i], s[4])
+            self.assertAlmostEqual(s2[i], s[5])
+
 #----------------------------------------------------------------------
 # To run on commandline, using either "python unittest_stats.py" 
 # or "./unittest_stats.py"
@@ -22,6 +22,7 @@
 #    getmass()
 #    fitgauss1D()
 #    casa_argv()
+#    pmap()
 
 import admit
 import sys, os
@@ -336,6 +337,25 @@ class TestUtils(unittest.TestCase):
 
         self.assertEquals(str, ret)
 
+    # test pmap, serially and by a pool of processes
+    def test_pmap(self):
+        class Scaler(object):
+            def __init__(self, a):
+                self.a = a
+                self.pid = os.getpid()
+            def scale(self, x, y=0):
+                return (self.a * x + y, os.getpid() == self.pid)
+        obj = Scaler(3)
+        jobs = [(x,) for x in range(10)] + [(1, 2)]
+        expect = [3 * x for x in range(10)] + [5]
+        serial = admit.utils.pmap(obj, "scale", jobs)
+        self.assertEqual([r[0] for r in serial], expect)
+        self.assertTrue(all([r[1] for r in serial]))
+        pool = admit.utils.pmap(obj, "scale", jobs, nproc=3)
+        self.assertEqual([r[0] for r in pool], expect)
+        self.assertFalse(any([r[1] for r in pool]))
+        self.assertEqual(admit.utils.pmap(obj, "scale", [], nproc=3), [])
+
 #----------------------------------------------------------------------
 # To run on commandline, using either "python unittest_utils.py" 
 # or "./unittest_utils.py"
@@ -13,9 +13,12 @@ import numpy as np
 import importlib
 import math
 import subprocess
+import multiprocessing
 from admit.util.Segments import Segments 
 
 from admit.util.AdmitLogging import AdmitLogging as logging
+from admit.util.Metrics import Metrics
+from admit.util.ImagePool import ImagePool
 import admit.version as version
 
 # Sphinx crashes on scipy even when listed in autodoc_mock_imports.
@@ -224,6 +227,8 @@ def remove(item):
         -------
         None
     """
+    # open image tools of the item can no longer be used
+    ImagePool.changed(item)
     # if it is a file
     if(os.path.isfile(item)):
         rm(item)
@@ -249,6 +254,7 @@ def rename(item1, item2):
     # make sure the destination does not exist
     remove(item2)
     # rename the item
+    ImagePool.changed(item1)
     shutil.move(item1, item2)
 
 def getClass(typ, name, init=None):
@@ -411,6 +417,54 @@ def on_error_retry(exception, callback, timeout=2, timedelta=.1):
             elif timedelta > 0:
                 time.sleep(timedelta)
 
+# The object whose method pmap() runs in a process pool. The (forked)
+# workers inherit it, so only the arguments and results of each job are
+# sent between the processes.
+_pmap_obj = None
+
+def _pmaprun(job):
+    """ Run a single job of pmap() in a pool worker.
+    """
+    name, args = job
+    return getattr(_pmap_obj, name)(*args)
+
+def pmap(obj, name, jobs, nproc=1):
+    """ Run a method of an object for a list of jobs. With nproc > 1 the
+        jobs are run by a pool of (forked) worker processes, which inherit
+        the object, e.g. an AT with its spectra or a map; otherwise
+        serially. Either way the results come back in order.
+
+        Parameters
+        ----------
+        obj : object
+            The object.
+
+        name : str
+            Name of the method to run, e.g. "getcontinuum".
+
+        jobs : list
+            List of argument tuples, one per call of the method.
+
+        nproc : int, optional
+            Maximum number of processes. Default: 1.
+
+        Returns
+        -------
+        List of the results of each call
+    """
+    global _pmap_obj
+    nproc = min(nproc, len(jobs))
+    if nproc <= 1:
+        return [getattr(obj, name)(*args) for args in jobs]
+    _pmap_obj = obj
+    pool = multiprocessing.Pool(nproc)
+    try:
+        return pool.map(_pmaprun, [(name, args) for args in jobs])
+    finally:
+        pool.close()
+        pool.join()
+        _pmap_obj = None
+
 
 def freqtovel(freq, delta):
     """ Method to convert between offset frequency and offset velocity
@@ -1115,6 +1169,10 @@ class Dtime(object):
         dt.tag('a')
         ...
         dt.tag('b')
+
+        While a task executes (see AT.execute()), the tags are also
+        written as structured records to the project metrics file, see
+        admit.util.Metrics.
     """
     def __init__(self, label=".", report=True):
         self.start = self.time()
@@ -1147,6 +1205,8 @@ class Dtime(object):
         self.start = t1
         if self.report:
             logging.timing("%s " % self.label + mytag + "  " + str(dt))
+        if Metrics.current is not None:
+            Metrics.current.tag(self.label, mytag, dt)
         return dt
 
     def show(self):
@@ -1497,19 +1557,26 @@ def compareversions(version1, version2):
         return -1
     return 0
 
-def getFiles(basedir):
+def getFiles(basedir, cache=None):
     """ Generates a list of all BDP files that are in the baseDir and any
         subdirectories
 
         Parameters
         ----------
-        None
+        basedir : str
+            Directory to search.
+
+        cache : FileCache, optional
+            Stat cache of basedir; if given, it is used instead of walking
+            the directory tree.
 
         Returns
         -------
         List
             List of BDP files that need to be read in from disk
     """
+    if cache is not None:
+        return cache.getfiles(".bdp")
     files = []
     for root, dirnames, filenames in os.walk(basedir):
         for f in filenames:
@@ -12,7 +12,7 @@ from admit.util.AdmitLogging import AdmitLogging as logging
 from admit.xmlio.DTDParser import DTDParser
 import admit.util.bdp_types as bt
 import admit.util.utils as utils
-import admit.Summary as Summary
+from admit.Summary import Summary, SummaryEntry
 from admit.AT import AT
 import admit.FlowManager as fm
 import admit.util.admit_ast as aast
@@ -362,11 +362,11 @@ class AdmitParser(sax.handler.ContentHandler):
             except Exception, e:
                 raise Exception("Could not create class of type %s because %s" % (temp, str(e)))
         elif temp == bt.SUMMARY:
-            self.summaryData = Summary.Summary()
+            self.summaryData = Summary()
             self.inSummary = True
             self.summaryName = name
         elif temp == bt.SUMMARYENTRY:
-            self.summaryEntry = Summary.SummaryEntry()
+            self.summaryEntry = SummaryEntry()
             self.inSummaryEntry = True
             self.summaryEntryName = name
         elif name == "metadata" and self.inSummary:
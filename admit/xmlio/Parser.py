@@ -19,6 +19,7 @@ from admit.xmlio.ErrorHandler import ErrorHandler
 from admit.xmlio.BDPReader import BDPReader
 from admit.AT import AT
 from admit.util.AdmitLogging import AdmitLogging as logging
+from admit.util.FileCache import FileCache
 from admit.util import utils
 
 
@@ -187,7 +188,11 @@ class Parser(object):
                 self.flowmanager = contentHandler.getflowmanager()
                 self.projmanager = contentHandler.projmanager
                 self.summaryData = contentHandler.summaryData
-                files = utils.getFiles(self.baseDir)
+                # one scan of the project tree (or a valid manifest)
+                # answers all file existence queries below
+                cache = FileCache(self.baseDir)
+                cache.load()
+                files = utils.getFiles(self.baseDir, cache)
                 for fl in files:
                     # search for all BDP's and load them
                     BDPreader = BDPReader(fl)
@@ -196,4 +201,4 @@ class Parser(object):
                 for at in self.tasks:
                     if not at.getProject():
                         at.baseDir(self.baseDir)
-                    at.checkfiles()
+                    at.checkfiles(cache)
@@ -324,8 +324,8 @@ class DtdGenerator(object):
         bdp_f = open(os.sep + "tmp" + os.sep + str(os.getpid()) + ".bdp__init__.py", 'w')
         at_init = os.path.dirname(os.path.realpath(__file__)) + os.sep + ".." + os.sep + "at" + os.sep + "__init__.py"
         at_f = open(os.sep + "tmp" + os.sep + str(os.getpid()) + ".at__init__.py", 'w')
-        at_f.write("""\"\"\"AT Package\n   ----------\n\n   This package contains specific implementations of ADMIT Tasks, derived\n   from the AT base class.\n\"\"\"\n# This file is automatically generated, do not edit.\n# Standard, streamlined AT names.\n""")
-        bdp_f.write("""\"\"\"BDP Package\n   -----------\n\n   This package contains specific implementations of ADMIT Basic Data Products, \n   derived from the BDP base class.\n\"\"\"\n# This file is automatically generated, do not edit.\n\n# Standard, streamlined BDP names.\n""")
+        at_f.write("""\"\"\"AT Package\n   ----------\n\n   This package contains specific implementations of ADMIT Tasks, derived\n   from the AT base class.\n\"\"\"\n# This file is automatically generated, do not edit.\nfrom admit.util.lazyimport import lazymodule\n\n# Standard, streamlined AT names, imported on first access.\nlazymodule(__name__, {\n""")
+        bdp_f.write("""\"\"\"BDP Package\n   -----------\n\n   This package contains specific implementations of ADMIT Basic Data Products, \n   derived from the BDP base class.\n\"\"\"\n# This file is automatically generated, do not edit.\nfrom admit.util.lazyimport import lazymodule\n\n# Standard, streamlined BDP names, imported on first access.\nlazymodule(__name__, {\n""")
         types.write("\"\"\"\n" + AUTOGEN + "\n\nThis file contains string constants useful for programming\n\"\"\"\n")
         sys.stdout.write("Writing types.py ...")
         sys.stdout.flush()
@@ -430,14 +430,12 @@ class DtdGenerator(object):
         shutil.move(os.sep + "tmp" + os.sep + str(os.getpid()) + ".bdp_types.py", typesfl)
         # load in the new bdp_types file
         reload(bt)
-        bdp_f.write("from BDP" + " " * 24 + "import BDP" + " " * 24 + "as BDP\n")
-
         # generate the dtds for the BDPs
-        for key in bdp_files:
-            #line = "from " + key + " " * (27 - len(key)) + "import " + key + " " * (27 - len(key)) + "as " + key[:-4] + "\n"
-            line = "from " + key + " " * (27 - len(key)) + "import " + key + " " * (27 - len(key)) + "as " + key + "\n"
+        for key in ["BDP"] + bdp_files:
+            line = "    " + ("'%s'" % key).ljust(27) + ": " + ("('admit.bdp.%s'," % key).ljust(40) + "'%s'),\n" % key
             bdp_f.write(line)
 
+        bdp_f.write("})\n")
         bdp_f.close()
         shutil.move(os.sep + "tmp" + os.sep + str(os.getpid()) + ".bdp__init__.py", bdp_init)
         for key in bdp_files:
@@ -446,13 +444,13 @@ class DtdGenerator(object):
         # generate the dtds for the ATs
         ATTYPES = ""
         for key in at_files:
-            #line = "from " + key + " " * (27 - len(key)) + "import " + key + " " * (27 - len(key)) + "as " + key[:-3] + "\n"
-            line = "from " + key + " " * (27 - len(key)) + "import " + key + " " * (27 - len(key)) + "as " + key + "\n"
+            line = "    " + ("'%s'" % key).ljust(27) + ": " + ("('admit.at.%s'," % key).ljust(40) + "'%s'),\n" % key
             at_f.write(line)
             ATTYPES += key.upper() + ","
 
         ATTYPES = ATTYPES[:-1]
 
+        at_f.write("})\n")
         at_f.close()
         shutil.move(os.sep + "tmp" + os.sep + str(os.getpid()) + ".at__init__.py", at_init)
         for key in at_files:
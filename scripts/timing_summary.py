@@ -4,6 +4,9 @@
 # Example of use:
 #     $ADMIT/scripts/timing_summary.py *.fits.log | $ADMIT/scripts/tabalign.py > timing_summary.txt
 #     enscript -r1 -fCourier7 timing_summary.txt -o junk.ps
+#
+# Projects now also record structured per-task profiles in admit.metrics,
+# see bin/admit_metrics to report and compare those.
 
 import os, sys
 